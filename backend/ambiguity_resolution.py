@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Resolução de ambiguidades inteiras pelo método LAMBDA
+Decomposição LᵀDL da covariância, decorrelação por transformações inteiras de Gauss e
+permutações, busca em profundidade (MLAMBDA) dos dois melhores candidatos e validação pelo
+teste da razão. Opera sobre matrizes NumPy e cabe em cada época de um filtro
+"""
+
+import math
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Razão mínima entre as normas do segundo e do melhor candidato para aceitar a fixação
+RATIO_THRESHOLD = float(os.getenv('GNSS_RATIO_THRESHOLD', '3.0'))
+# Teto da razão reportada: a busca do segundo candidato para nesse múltiplo da melhor norma
+MAX_RATIO = 30.0
+# Limite de nós visitados na busca; esgotado, a fixação da época é recusada (custo limitado a
+# algumas dezenas de milissegundos mesmo com ambiguidades float fracas)
+MAX_SEARCH_NODES = int(os.getenv('GNSS_MAX_SEARCH_NODES', '10000'))
+
+
+def ldl_decomposition(Q: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Fatora Q[p][:, p] = Lᵀ·diag(d)·L com L triangular inferior de diagonal unitária
+
+    O pivô simétrico escolhe a cada passo (de baixo para cima) a menor variância condicional
+    restante, como no MLAMBDA: a ordem já sai quase crescente e a redução faz poucas
+    permutações. Retorna L, d e a permutação p.
+    """
+    A = np.array(Q, dtype=np.float64)
+    n = len(A)
+    L = np.zeros((n, n))
+    d = np.zeros(n)
+    p = np.arange(n)
+    for i in range(n - 1, -1, -1):
+        m = int(np.argmin(np.diag(A)[:i + 1]))
+        if m != i:
+            A[[m, i]] = A[[i, m]]
+            A[:, [m, i]] = A[:, [i, m]]
+            L[i + 1:, [m, i]] = L[i + 1:, [i, m]]
+            p[[m, i]] = p[[i, m]]
+        d[i] = A[i, i]
+        if d[i] <= 0.0:
+            raise np.linalg.LinAlgError("Covariância das ambiguidades não é positiva definida")
+        L[i, :i + 1] = A[i, :i + 1] / math.sqrt(d[i])
+        A[:i, :i] -= np.outer(L[i, :i], L[i, :i])
+        L[i, :i + 1] /= L[i, i]
+    return L, d, p
+
+
+def _gauss_transform(L: np.ndarray, Z: np.ndarray, i: int, j: int) -> None:
+    """Transformação inteira de Gauss que reduz L[i, j] a |l| ≤ 1/2"""
+    mu = round(L[i, j])
+    if mu != 0:
+        L[i:, j] -= mu * L[i:, i]
+        Z[:, j] -= mu * Z[:, i]
+
+
+def _reduce_column(L: np.ndarray, Z: np.ndarray, j: int) -> None:
+    """Reduz a coluna j inteira; cada transformação só altera linhas abaixo de i"""
+    i = j + 1
+    while i < len(L):
+        pending = np.flatnonzero(np.abs(L[i:, j]) > 0.5)
+        if not pending.size:
+            break
+        i += int(pending[0])
+        _gauss_transform(L, Z, i, j)
+        i += 1
+
+
+def decorrelate(L: np.ndarray, d: np.ndarray,
+                permutation: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Redução LAMBDA: transformação inteira Z com Zᵀ·Q·Z = Lᵀ·diag(d)·L quase diagonal
+
+    Permutações ordenam as variâncias condicionais e transformações de Gauss reduzem os
+    elementos de L fora da diagonal a |l| ≤ 1/2; L e d transformados são devolvidos. Como no
+    MLAMBDA, depois de uma permutação em j a varredura recua um passo em vez de recomeçar do
+    fim, e colunas acima da última permutação só têm reduzido o elemento que entra no teste.
+    """
+    L, d = L.copy(), d.copy()
+    n = len(d)
+    Z = np.eye(n) if permutation is None else np.eye(n)[:, permutation]
+    j = k = n - 2
+    while j >= 0:
+        if j <= k:
+            _reduce_column(L, Z, j)
+        elif abs(L[j + 1, j]) > 0.5:
+            _gauss_transform(L, Z, j + 1, j)
+        l = float(L[j + 1, j])
+        delta = d[j] + l * l * d[j + 1]
+        if delta + 1e-6 < d[j + 1]:
+            eta = d[j] / delta
+            lam = d[j + 1] * l / delta
+            d[j], d[j + 1] = eta * d[j + 1], delta
+            a0, a1 = L[j, :j].copy(), L[j + 1, :j].copy()
+            L[j, :j] = -l * a0 + a1
+            L[j + 1, :j] = eta * a0 + lam * a1
+            L[j + 1, j] = lam
+            column = L[j + 2:, j].copy()
+            L[j + 2:, j] = L[j + 2:, j + 1]
+            L[j + 2:, j + 1] = column
+            column = Z[:, j].copy()
+            Z[:, j] = Z[:, j + 1]
+            Z[:, j + 1] = column
+            k, j = j, min(j + 1, n - 2)
+        else:
+            j -= 1
+
+    for j in range(n - 2, -1, -1):
+        _reduce_column(L, Z, j)
+    return Z, L, d
+
+
+def integer_search(L: np.ndarray, d: np.ndarray, z_float: np.ndarray, candidates: int = 2,
+                   max_ratio: float = math.inf) -> Tuple[np.ndarray, np.ndarray, bool]:
+    """Busca em profundidade (MLAMBDA) dos melhores vetores inteiros no espaço decorrelacionado
+
+    Retorna os candidatos (n, candidatos), as normas quadráticas em ordem crescente e se a
+    busca terminou dentro do limite de nós; a elipsoide encolhe a cada candidato encontrado.
+    Com `max_ratio` a elipsoide nunca passa de max_ratio × a melhor norma: candidatos além
+    disso não mudam a validação e, com ambiguidades muito precisas, custariam milhares de nós. Os escalares do laço ficam em
+    listas Python (indexar arrays NumPy elemento a elemento domina o custo por nó).
+    """
+    n = len(d)
+    d = [float(v) for v in d]
+    zs = [float(v) for v in z_float]
+    S = np.zeros((n, n))
+    dist = [0.0] * n
+    zb = [0.0] * n
+    z = [0.0] * n
+    step = [0.0] * n
+    found, norms = [], []
+    max_dist = math.inf
+
+    k = n - 1
+    zb[k] = zs[k]
+    z[k] = float(round(zb[k]))
+    y = zb[k] - z[k]
+    step[k] = 1.0 if y > 0 else -1.0
+    complete = False
+    for _ in range(MAX_SEARCH_NODES):
+        new_dist = dist[k] + y * y / d[k]
+        if new_dist < max_dist:
+            if k != 0:
+                k -= 1
+                dist[k] = new_dist
+                S[k, :k + 1] = S[k + 1, :k + 1] + (z[k + 1] - zb[k + 1]) * L[k + 1, :k + 1]
+                zb[k] = zs[k] + float(S[k, k])
+                z[k] = float(round(zb[k]))
+                y = zb[k] - z[k]
+                step[k] = 1.0 if y > 0 else -1.0
+            else:
+                if len(found) < candidates:
+                    found.append(list(z))
+                    norms.append(new_dist)
+                else:
+                    worst = norms.index(max(norms))
+                    if new_dist < norms[worst]:
+                        found[worst], norms[worst] = list(z), new_dist
+                max_dist = min(max(norms) if len(found) == candidates else math.inf,
+                               max_ratio * min(norms))
+                z[0] += step[0]
+                y = zb[0] - z[0]
+                step[0] = -step[0] - (1.0 if step[0] > 0 else -1.0)
+        else:
+            if k == n - 1:
+                complete = True
+                break
+            k += 1
+            z[k] += step[k]
+            y = zb[k] - z[k]
+            step[k] = -step[k] - (1.0 if step[k] > 0 else -1.0)
+
+    order = np.argsort(norms)
+    return np.array(found, dtype=np.float64).reshape(-1, n)[order].T, np.array(norms)[order], complete
+
+
+@dataclass
+class AmbiguityFix:
+    """Resultado da resolução: melhor vetor inteiro e estatísticas de validação"""
+    fixed: np.ndarray            # melhor candidato inteiro (mesma ordem das ambiguidades float)
+    second: np.ndarray           # segundo melhor candidato (NaN além do teto da razão)
+    squared_norms: np.ndarray    # normas quadráticas (métrica Q⁻¹) dos candidatos encontrados
+    ratio: float                 # norma do segundo / norma do melhor, limitada a MAX_RATIO
+    success_rate: float          # taxa de sucesso do bootstrapping no espaço decorrelacionado
+    accepted: bool               # teste da razão aprovado
+
+
+def resolve_ambiguities(float_ambiguities: np.ndarray, covariance: np.ndarray,
+                        ratio_threshold: float = RATIO_THRESHOLD) -> AmbiguityFix:
+    """LAMBDA completo: decorrelação, busca dos dois melhores candidatos e teste da razão
+
+    As partes inteiras das ambiguidades são removidas antes da busca e devolvidas no final,
+    para que valores grandes (ciclos acumulados) não prejudiquem a precisão numérica.
+    """
+    a = np.asarray(float_ambiguities, dtype=np.float64)
+    Q = np.asarray(covariance, dtype=np.float64)
+    n = len(a)
+    if n == 0:
+        return AmbiguityFix(a, a, np.zeros(0), 0.0, 0.0, False)
+
+    offset = np.round(a)
+    L, d, permutation = ldl_decomposition(0.5 * (Q + Q.T))
+    Z, L, d = decorrelate(L, d, permutation)
+    candidates, norms, complete = integer_search(L, d, Z.T @ (a - offset), max_ratio=MAX_RATIO)
+    success_rate = float(np.prod([math.erf(1.0 / (2.0 * math.sqrt(2.0 * v))) for v in d]))
+    if not len(norms):
+        missing = np.full(n, np.nan)
+        return AmbiguityFix(missing, missing, norms, 0.0, success_rate, False)
+
+    # a = Z⁻ᵀ·z (Z é unimodular, então os candidatos continuam inteiros)
+    fixed = np.round(np.linalg.solve(Z.T, candidates)) + offset[:, None]
+    if len(norms) > 1:
+        second, ratio = fixed[:, 1], min(float(norms[1] / max(norms[0], 1e-12)), MAX_RATIO)
+    else:
+        second, ratio = np.full(n, np.nan), MAX_RATIO
+    return AmbiguityFix(
+        fixed=fixed[:, 0], second=second, squared_norms=norms, ratio=ratio,
+        success_rate=success_rate, accepted=complete and ratio >= ratio_threshold
+    )
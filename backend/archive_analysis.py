@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Análise paralela de todos os arquivos RINEX de um ZIP
+Cada membro é analisado em um processo separado e os resultados são consolidados em um resumo
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .rinex_compression import list_rinex_members
+    from .processing_stages import ProgressCallback, StageTimer
+except ImportError:
+    from rinex_compression import list_rinex_members
+    from processing_stages import ProgressCallback, StageTimer
+
+logger = logging.getLogger(__name__)
+
+# Recebe (caminho do ZIP, membro) e retorna o resultado da análise de um arquivo
+AnalyzeFunction = Callable[[str, Optional[str]], Dict[str, Any]]
+
+# Arquivos de navegação (caminho, membro) repassados a cada análise
+NavigationSources = Sequence[Tuple[str, Optional[str]]]
+
+
+def summarize_archive_results(files: List[Dict[str, Any]], wall_time: float) -> Dict[str, Any]:
+    """Resumo consolidado das análises individuais dos membros do ZIP"""
+    succeeded = [f for f in files if f['result'].get('success')]
+    infos = [f['result'].get('file_info') or {} for f in succeeded]
+
+    satellites = set()
+    for info in infos:
+        satellites.update(info.get('satellites_list') or [])
+
+    processing_times = [info.get('processing_time') or 0.0 for info in infos]
+    sum_processing = float(sum(processing_times))
+
+    return {
+        'files_total': len(files),
+        'files_succeeded': len(succeeded),
+        'files_failed': len(files) - len(succeeded),
+        'total_epochs': sum(info.get('epochs_analyzed') or 0 for info in infos),
+        'total_observation_hours': sum(info.get('duration_hours') or 0.0 for info in infos),
+        'satellites': sorted(satellites),
+        'sessions': [
+            {
+                'file': f['file'],
+                'duration_hours': (f['result'].get('file_info') or {}).get('duration_hours'),
+                'quality_status': (f['result'].get('file_info') or {}).get('quality_status'),
+                'coordinates': (f['result'].get('file_info') or {}).get('coordinates'),
+                'error': f['result'].get('error')
+            }
+            for f in files
+        ],
+        'wall_time': wall_time,
+        'sum_processing_time': sum_processing,
+        'parallel_speedup': sum_processing / wall_time if wall_time > 0 else None
+    }
+
+
+def analyze_rinex_archive(zip_path: str, analyze: AnalyzeFunction,
+                          members: Optional[Sequence[str]] = None,
+                          progress_callback: Optional[ProgressCallback] = None,
+                          max_workers: Optional[int] = None,
+                          navigation: Optional[NavigationSources] = None) -> Dict[str, Any]:
+    """Analisa em paralelo todos os membros RINEX de um ZIP
+
+    `analyze` precisa ser uma função de módulo (é enviada aos processos do pool).
+    Com `navigation`, os mesmos arquivos de navegação são usados em todas as análises.
+    O resultado mantém `file_info` do maior arquivo analisado com sucesso, para
+    compatibilidade com a resposta de arquivo único, e acrescenta `files` e `summary`.
+    """
+    stages = StageTimer(progress_callback)
+    infos = list_rinex_members(zip_path)
+    if members is not None:
+        infos = [info for info in infos if info.filename in members]
+    if not infos:
+        return {"success": False, "error": "Nenhum arquivo RINEX encontrado no ZIP"}
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with stages.stage('archive'):
+        workers = max(1, min(len(infos), max_workers or os.cpu_count() or 1))
+        logger.info(f"📦 Analisando {len(infos)} arquivo(s) RINEX do ZIP em {workers} processo(s)")
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            extra = {'navigation': list(navigation)} if navigation else {}
+            futures = {executor.submit(analyze, zip_path, info.filename, **extra): info for info in infos}
+            for done, future in enumerate(as_completed(futures), 1):
+                info = futures[future]
+                try:
+                    results[info.filename] = future.result()
+                except Exception as e:
+                    logger.error(f"❌ Falha ao analisar {info.filename}: {e}")
+                    results[info.filename] = {"success": False, "error": str(e)}
+                logger.info(f"✅ {info.filename} analisado ({done}/{len(infos)})")
+                stages.update(done / len(infos))
+
+    # Ordem do ZIP por tamanho (maior primeiro), como na análise de arquivo único
+    files = [
+        {'file': info.filename, 'size_bytes': info.file_size, 'result': results[info.filename]}
+        for info in infos
+    ]
+    summary = summarize_archive_results(files, stages.elapsed)
+    logger.info(f"⏱️ ZIP analisado em {summary['wall_time']:.2f}s "
+                f"(soma dos arquivos: {summary['sum_processing_time']:.2f}s)")
+
+    primary = next((f['result'] for f in files if f['result'].get('success')), files[0]['result'])
+    combined = dict(primary)
+    combined['success'] = summary['files_succeeded'] > 0
+    combined['files'] = files
+    combined['summary'] = summary
+    return combined
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Correções atmosféricas vetorizadas
+Troposfera: atrasos zenitais de Saastamoinen com a atmosfera padrão e funções de mapeamento de
+Niell (NMF). Ionosfera: modelo de Klobuchar com os coeficientes do cabeçalho de navegação.
+Os termos que dependem só da estação e do dia são calculados uma vez por sessão; os atrasos
+inclinados saem de uma chamada para arrays inteiros de elevação/azimute
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    from .ephemeris import SPEED_OF_LIGHT, NavigationHeader
+    from .geometry import geodetic_angles
+    from .obs_store import SECONDS_PER_WEEK, from_gps_seconds
+except ImportError:
+    from ephemeris import SPEED_OF_LIGHT, NavigationHeader
+    from geometry import geodetic_angles
+    from obs_store import SECONDS_PER_WEEK, from_gps_seconds
+
+L1_FREQUENCY = 1575.42e6
+
+# Umidade relativa (0-1) da atmosfera padrão usada no atraso úmido a priori
+RELATIVE_HUMIDITY = float(os.getenv('GNSS_RELATIVE_HUMIDITY', '0.5'))
+
+# Coeficientes de Niell (1996) nas latitudes 15°, 30°, 45°, 60° e 75°: média e amplitude anual
+# do mapeamento hidrostático, correção de altitude e mapeamento úmido
+NIELL_LATITUDES = np.radians([15.0, 30.0, 45.0, 60.0, 75.0])
+NIELL_HYDROSTATIC_MEAN = np.array([
+    [1.2769934e-3, 1.2683230e-3, 1.2465397e-3, 1.2196049e-3, 1.2045996e-3],
+    [2.9153695e-3, 2.9152299e-3, 2.9288445e-3, 2.9022565e-3, 2.9024912e-3],
+    [62.610505e-3, 62.837393e-3, 63.721774e-3, 63.824265e-3, 64.258455e-3],
+])
+NIELL_HYDROSTATIC_AMPLITUDE = np.array([
+    [0.0, 1.2709626e-5, 2.6523662e-5, 3.4000452e-5, 4.1202191e-5],
+    [0.0, 2.1414979e-5, 3.0160779e-5, 7.2562722e-5, 11.723375e-5],
+    [0.0, 9.0128400e-5, 4.3497037e-5, 84.795348e-5, 170.37206e-5],
+])
+NIELL_HEIGHT = (2.53e-5, 5.49e-3, 1.14e-3)
+NIELL_WET = np.array([
+    [5.8021897e-4, 5.6794847e-4, 5.8118019e-4, 5.9727542e-4, 6.1641693e-4],
+    [1.4275268e-3, 1.5138625e-3, 1.4572752e-3, 1.5007428e-3, 1.7599082e-3],
+    [4.3472961e-2, 4.6729510e-2, 4.3908931e-2, 4.4626982e-2, 5.4736038e-2],
+])
+
+
+def standard_atmosphere(height: float, humidity: float = RELATIVE_HUMIDITY) -> Tuple[float, float, float]:
+    """Pressão (hPa), temperatura (K) e pressão parcial do vapor d'água (hPa) na altitude"""
+    height = max(float(height), -500.0)
+    pressure = 1013.25 * (1.0 - 2.2557e-5 * height) ** 5.2568
+    temperature = 15.0 - 6.5e-3 * height + 273.15
+    vapour = 6.108 * humidity * np.exp((17.15 * temperature - 4684.0) / (temperature - 38.45))
+    return pressure, temperature, float(vapour)
+
+
+def saastamoinen(lat: float, height: float, pressure: float, temperature: float,
+                 vapour: float) -> Tuple[float, float]:
+    """Atrasos zenitais hidrostático e úmido (m) de Saastamoinen"""
+    gravity = 1.0 - 0.00266 * np.cos(2.0 * lat) - 0.00028 * height / 1000.0
+    zhd = 0.0022768 * pressure / gravity
+    zwd = 0.002277 * (1255.0 / temperature + 0.05) * vapour
+    return float(zhd), float(zwd)
+
+
+def _marini(sin_el: np.ndarray, a: float, b: float, c: float) -> np.ndarray:
+    """Fração contínua de Marini normalizada no zênite"""
+    return (1.0 + a / (1.0 + b / (1.0 + c))) / (sin_el + a / (sin_el + b / (sin_el + c)))
+
+
+def _interpolate_latitude(table: np.ndarray, lat: float) -> np.ndarray:
+    """Interpolação linear dos coeficientes na latitude (valores extremos fora de 15°-75°)"""
+    lat = abs(lat)
+    return np.array([np.interp(lat, NIELL_LATITUDES, row) for row in table])
+
+
+class Troposphere:
+    """Modelo troposférico de uma estação numa sessão (Saastamoinen + Niell)
+
+    Latitude, altitude e dia do ano fixam os atrasos zenitais a priori e os coeficientes das
+    funções de mapeamento; depois disso `mapping` e `delay` só avaliam as frações contínuas
+    para os arrays de elevação recebidos.
+    """
+
+    def __init__(self, lat: float, height: float, day_of_year: float,
+                 humidity: float = RELATIVE_HUMIDITY):
+        self.lat = float(lat)
+        self.height = float(height)
+        self.day_of_year = float(day_of_year)
+        self.zhd, self.zwd = saastamoinen(self.lat, self.height, *standard_atmosphere(self.height, humidity))
+
+        # Termo sazonal com fase invertida no hemisfério sul
+        phase = (self.day_of_year - 28.0) / 365.25 + (0.5 if self.lat < 0 else 0.0)
+        self._hydrostatic = (_interpolate_latitude(NIELL_HYDROSTATIC_MEAN, self.lat) -
+                             _interpolate_latitude(NIELL_HYDROSTATIC_AMPLITUDE, self.lat) * np.cos(2 * np.pi * phase))
+        self._wet = _interpolate_latitude(NIELL_WET, self.lat)
+        self._height_km = self.height / 1000.0
+
+    @classmethod
+    def at(cls, position: np.ndarray, gps_seconds: float, humidity: float = RELATIVE_HUMIDITY) -> 'Troposphere':
+        """Modelo para uma posição ECEF e um instante (segundos GPS contínuos)"""
+        lat, _, height = geodetic_angles(np.asarray(position, dtype=np.float64))
+        day_of_year = from_gps_seconds(gps_seconds).timetuple().tm_yday
+        return cls(float(lat), float(height), day_of_year, humidity)
+
+    def mapping(self, elevation: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Funções de mapeamento hidrostática e úmida de Niell para elevações (rad) de qualquer forma"""
+        sin_el = np.sin(np.clip(np.asarray(elevation, dtype=np.float64), np.radians(1.0), None))
+        hydrostatic = _marini(sin_el, *self._hydrostatic)
+        hydrostatic += (1.0 / sin_el - _marini(sin_el, *NIELL_HEIGHT)) * self._height_km
+        return hydrostatic, _marini(sin_el, *self._wet)
+
+    def delay(self, elevation: np.ndarray, zwd: Optional[float] = None) -> np.ndarray:
+        """Atraso troposférico inclinado (m); `zwd` substitui o atraso úmido a priori"""
+        hydrostatic, wet = self.mapping(elevation)
+        return hydrostatic * self.zhd + wet * (self.zwd if zwd is None else zwd)
+
+
+@dataclass
+class Klobuchar:
+    """Modelo ionosférico de Klobuchar (IS-GPS-200) com os coeficientes α e β transmitidos"""
+    alpha: np.ndarray
+    beta: np.ndarray
+
+    @classmethod
+    def from_header(cls, header: Optional[NavigationHeader]) -> Optional['Klobuchar']:
+        """Coeficientes GPSA/GPSB (ION ALPHA/BETA no RINEX 2); None quando ausentes"""
+        if header is None:
+            return None
+        alpha, beta = header.ionosphere.get('GPSA'), header.ionosphere.get('GPSB')
+        if not alpha or not beta or len(alpha) < 4 or len(beta) < 4:
+            return None
+        alpha, beta = np.asarray(alpha[:4], dtype=np.float64), np.asarray(beta[:4], dtype=np.float64)
+        if not (np.isfinite(alpha).all() and np.isfinite(beta).all()):
+            return None
+        return cls(alpha, beta)
+
+    def delay(self, lat: float, lon: float, elevation: np.ndarray, azimuth: np.ndarray,
+              gps_seconds: np.ndarray, frequency=L1_FREQUENCY) -> np.ndarray:
+        """Atraso ionosférico de grupo (m) na frequência, para arrays de elevação/azimute (rad)
+
+        `lat`/`lon` (rad) são da estação; `gps_seconds` e `frequency` são compatíveis por
+        broadcasting com as elevações.
+        """
+        elevation = np.asarray(elevation, dtype=np.float64)
+        azimuth = np.asarray(azimuth, dtype=np.float64)
+        e = elevation / np.pi                              # semicírculos
+        psi = 0.0137 / (e + 0.11) - 0.022
+        phi_i = np.clip(lat / np.pi + psi * np.cos(azimuth), -0.416, 0.416)
+        lambda_i = lon / np.pi + psi * np.sin(azimuth) / np.cos(phi_i * np.pi)
+        phi_m = phi_i + 0.064 * np.cos((lambda_i - 1.617) * np.pi)
+
+        local_time = np.mod(4.32e4 * lambda_i + np.mod(gps_seconds, SECONDS_PER_WEEK), 86400.0)
+        slant = 1.0 + 16.0 * (0.53 - e) ** 3
+        powers = phi_m[..., None] ** np.arange(4)
+        amplitude = np.maximum(powers @ self.alpha, 0.0)
+        period = np.maximum(powers @ self.beta, 72000.0)
+
+        x = 2.0 * np.pi * (local_time - 50400.0) / period
+        vertical = np.where(np.abs(x) < 1.57, 5e-9 + amplitude * (1.0 - x ** 2 / 2.0 + x ** 4 / 24.0), 5e-9)
+        return SPEED_OF_LIGHT * slant * vertical * (L1_FREQUENCY / np.asarray(frequency, dtype=np.float64)) ** 2
@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+"""
+Processamento relativo estático (base–rover) por duplas diferenças
+As épocas da base e do rover são alinhadas por junção ordenada dos instantes; as duplas
+diferenças de código e fase de todos os satélites comuns são formadas de uma vez e a linha de
+base é ajustada em lote (solução float e, em seguida, com as ambiguidades inteiras fixadas).
+Vários rovers contra a mesma base são processados em paralelo, um por processo
+"""
+
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .ambiguity_resolution import RATIO_THRESHOLD, resolve_ambiguities
+    from .atmosphere import Troposphere
+    from .cycle_slips import detect_cycle_slips
+    from .ephemeris import SPEED_OF_LIGHT, OrbitSource, SatelliteStates, load_navigation
+    from .geometry import ELEVATION_MASK, apply_elevation_mask, enu_rotation, geodetic_angles
+    from .obs_store import ObservationStore
+    from .observables import FREQUENCIES, dual_frequency
+    from .processing_stages import ProgressCallback, StageTimer
+    from .rinex_reader import read_observations
+    from .spp_solver import solve_spp_batch
+except ImportError:
+    from ambiguity_resolution import RATIO_THRESHOLD, resolve_ambiguities
+    from atmosphere import Troposphere
+    from cycle_slips import detect_cycle_slips
+    from ephemeris import SPEED_OF_LIGHT, OrbitSource, SatelliteStates, load_navigation
+    from geometry import ELEVATION_MASK, apply_elevation_mask, enu_rotation, geodetic_angles
+    from obs_store import ObservationStore
+    from observables import FREQUENCIES, dual_frequency
+    from processing_stages import ProgressCallback, StageTimer
+    from rinex_reader import read_observations
+    from spp_solver import solve_spp_batch
+
+logger = logging.getLogger(__name__)
+
+# Diferença máxima (s) entre os instantes da base e do rover tratados como a mesma época
+EPOCH_TOLERANCE = float(os.getenv('GNSS_EPOCH_TOLERANCE', '0.005'))
+# Desvio padrão a priori (m) do código e da fase não diferenciados
+CODE_SIGMA = 0.3
+PHASE_SIGMA = 0.003
+# Deslocamento (m) da solução float acima do qual as DDs são formadas de novo
+REFORM_DISTANCE = 1.0
+# Épocas por bloco no acúmulo das equações normais
+BLOCK_EPOCHS = 2000
+
+# Arquivo RINEX: (caminho, membro do ZIP ou None)
+RinexSource = Tuple[str, Optional[str]]
+
+
+def align_epochs(base_times: np.ndarray, rover_times: np.ndarray,
+                 tolerance: float = EPOCH_TOLERANCE) -> Tuple[np.ndarray, np.ndarray]:
+    """Junção ordenada dos instantes: índices das épocas da base e do rover em comum
+
+    Os dois arrays estão em ordem crescente; cada época do rover é casada com a época mais
+    próxima da base (busca binária vetorizada) e mantida quando a diferença cabe na tolerância.
+    """
+    base_times = np.asarray(base_times, dtype=np.float64)
+    rover_times = np.asarray(rover_times, dtype=np.float64)
+    if len(base_times) == 0 or len(rover_times) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+    after = np.clip(np.searchsorted(base_times, rover_times), 0, len(base_times) - 1)
+    before = np.clip(after - 1, 0, len(base_times) - 1)
+    nearest = np.where(np.abs(base_times[before] - rover_times) <= np.abs(base_times[after] - rover_times),
+                       before, after)
+    matched = np.abs(base_times[nearest] - rover_times) <= tolerance
+
+    rover_epochs = np.flatnonzero(matched)
+    base_epochs = nearest[matched]
+    # Uma época da base casa com no máximo uma do rover
+    base_epochs, first = np.unique(base_epochs, return_index=True)
+    return base_epochs, rover_epochs[first]
+
+
+def _grid(store: ObservationStore, epochs: np.ndarray, satellites: Sequence[str],
+          columns: Sequence[np.ndarray]) -> List[np.ndarray]:
+    """Colunas por registro reorganizadas em matrizes (épocas alinhadas × satélites comuns)"""
+    row = np.full(store.n_epochs, -1)
+    row[epochs] = np.arange(len(epochs))
+    lookup = {sat: k for k, sat in enumerate(satellites)}
+    column = np.array([lookup.get(str(sat), -1) for sat in store.satellites], dtype=int)
+
+    rows, cols = row[store.epoch_index], column[store.sat_index]
+    keep = (rows >= 0) & (cols >= 0)
+    grids = []
+    for values in columns:
+        grid = np.full((len(epochs), len(satellites)), np.nan)
+        grid[rows[keep], cols[keep]] = values[keep]
+        grids.append(grid)
+    return grids
+
+
+def approximate_position(store: ObservationStore, orbits: OrbitSource,
+                         max_epochs: int = 10) -> Optional[np.ndarray]:
+    """Posição aproximada por SPP (mediana das primeiras épocas resolvíveis)"""
+    signals = dual_frequency(store)
+    satellites = [str(sat) for sat in store.satellites]
+    epochs = np.arange(store.n_epochs)
+    code, = _grid(store, epochs, satellites, [signals.code1])
+    counts = np.isfinite(code).sum(axis=1)
+    first = np.flatnonzero(counts >= 5)[:max_epochs]
+    if len(first) == 0:
+        return None
+
+    states = orbits.transmission_states(np.asarray(satellites, dtype='<U3')[None, :],
+                                        store.times[first][:, None], code[first])
+    pseudoranges = code[first] + SPEED_OF_LIGHT * (states.clock_bias - states.group_delay)
+    solution = solve_spp_batch(states.position, pseudoranges)
+    if not solution.valid.any():
+        return None
+    return np.median(solution.position[solution.valid], axis=0)
+
+
+def _receiver_clock(states: SatelliteStates, code: np.ndarray, receiver: np.ndarray) -> np.ndarray:
+    """Relógio do receptor (m) por época: mediana dos resíduos de código na posição a priori"""
+    residual = code + SPEED_OF_LIGHT * states.clock_bias - np.linalg.norm(states.position - receiver, axis=-1)
+    with np.errstate(invalid='ignore'):
+        finite = np.isfinite(residual).any(axis=1)
+        clock = np.zeros(len(residual))
+        clock[finite] = np.nanmedian(residual[finite], axis=1)
+    return clock
+
+
+@dataclass
+class DoubleDifferences:
+    """Simples diferenças (rover - base) das épocas comuns e a escolha das referências
+
+    Código e fase já têm removidos o relógio dos satélites, a distância base–satélite e a
+    troposfera a priori das duas estações; resta a distância rover–satélite, o relógio relativo
+    (eliminado na dupla diferença) e, na fase, a ambiguidade da simples diferença. Cada par
+    (época, satélite) com `reference >= 0` vira uma dupla diferença contra a coluna indicada.
+    """
+    times: np.ndarray            # (épocas,) segundos GPS
+    satellites: List[str]
+    code: np.ndarray             # (frequências, épocas, satélites) m
+    phase: np.ndarray            # (frequências, épocas, satélites) m
+    wavelength: np.ndarray       # (frequências, satélites) m
+    sat_positions: np.ndarray    # (épocas, satélites, 3) no instante de transmissão ao rover
+    reference: np.ndarray        # (épocas, satélites) coluna do satélite de referência; -1 sem DD
+    group: np.ndarray            # (épocas, satélites) grupo (época, constelação) da dupla diferença
+    ambiguity: np.ndarray        # (épocas, satélites) arco da simples diferença; -1 sem observação
+    parameter: np.ndarray        # coluna de cada arco entre as ambiguidades; -1 no pivô ou sem DD
+    n_ambiguities: int
+    n_systems: int
+
+    @property
+    def n_frequencies(self) -> int:
+        return self.code.shape[0]
+
+    @property
+    def n_parameters(self) -> int:
+        """Ambiguidades estimadas por frequência (arcos menos os pivôs)"""
+        return int((self.parameter >= 0).sum())
+
+    @property
+    def n_double_differences(self) -> int:
+        return int((self.reference >= 0).sum())
+
+
+def _ambiguity_parameters(ambiguity: np.ndarray, reference: np.ndarray, n_ambiguities: int) -> np.ndarray:
+    """Colunas das ambiguidades estimadas, com um arco pivô (ambiguidade zero) por componente
+
+    As DDs só determinam diferenças entre arcos ligados por épocas comuns; cada componente
+    conexa do grafo (arco do satélite, arco da referência) recebe como pivô o arco com mais
+    duplas diferenças. Arcos que nunca entram numa DD ficam sem coluna.
+    """
+    e, k = np.nonzero(reference >= 0)
+    plus, minus = ambiguity[e, k], ambiguity[e, reference[e, k]]
+    parent = list(range(n_ambiguities))
+
+    def root(a: int) -> int:
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    for a, b in np.unique(np.stack([plus, minus], axis=1), axis=0) if len(e) else []:
+        parent[root(int(a))] = root(int(b))
+
+    uses = np.bincount(np.concatenate([plus, minus]), minlength=n_ambiguities)
+    component = np.array([root(a) for a in range(n_ambiguities)], dtype=int)
+    parameter = np.full(n_ambiguities, -1, dtype=int)
+    estimated = uses > 0
+    for c in np.unique(component[estimated]):
+        members = np.flatnonzero(estimated & (component == c))
+        estimated[members[np.argmax(uses[members])]] = False
+    parameter[estimated] = np.arange(int(estimated.sum()))
+    return parameter
+
+
+def double_differences(base: ObservationStore, rover: ObservationStore, orbits: OrbitSource,
+                       base_position: np.ndarray, rover_position: np.ndarray,
+                       elevation_mask: float = ELEVATION_MASK,
+                       tolerance: float = EPOCH_TOLERANCE) -> DoubleDifferences:
+    """Forma as simples diferenças de todas as épocas comuns e as referências das duplas diferenças
+
+    A referência de cada (época, constelação) é o satélite comum de maior elevação. Perdas de
+    ciclo na base ou no rover (LLI, GF, MW ou interrupção) iniciam um novo arco de ambiguidade.
+    GLONASS fica de fora (frequências por satélite impedem ambiguidades inteiras nas DDs).
+    """
+    base_position = np.asarray(base_position, dtype=np.float64)
+    rover_position = np.asarray(rover_position, dtype=np.float64)
+    base_epochs, rover_epochs = align_epochs(base.times, rover.times, tolerance)
+    satellites = sorted(sat for sat in {str(s) for s in base.satellites} & {str(s) for s in rover.satellites}
+                        if sat[0] in FREQUENCIES)
+    n_epochs, n_sats = len(base_epochs), len(satellites)
+
+    systems = np.array([sat[0] for sat in satellites], dtype='<U1')
+    frequencies = np.array([FREQUENCIES[system] for system in systems], dtype=np.float64).reshape(n_sats, 2).T
+    sat_names = np.asarray(satellites, dtype='<U3')[None, :]
+
+    observed, positions, elevations = [], [], []
+    for store, epochs, receiver in ((base, base_epochs, base_position), (rover, rover_epochs, rover_position)):
+        signals = dual_frequency(store)
+        detection = detect_cycle_slips(store, signals)
+        code1, code2, phase1, phase2, arc = _grid(
+            store, epochs, satellites,
+            [signals.code1, signals.code2, signals.phase1, signals.phase2, detection.arc.astype(np.float64)])
+        times = store.times[epochs][:, None]
+        states = orbits.transmission_states(sat_names, times, code1)
+        # Com o relógio do receptor, a rotação da Terra usa o tempo de propagação verdadeiro
+        clock = _receiver_clock(states, code1, receiver)[:, None]
+        states = orbits.transmission_states(sat_names, times - clock / SPEED_OF_LIGHT, code1 - clock)
+        elevation, _, above, _ = apply_elevation_mask(receiver, states.position, elevation_mask)
+
+        # Relógio do satélite e troposfera a priori (Saastamoinen + Niell) removidos de tudo
+        correction = SPEED_OF_LIGHT * states.clock_bias
+        if n_epochs:
+            correction = correction - Troposphere.at(receiver, store.times[epochs[0]]).delay(elevation)
+        observed.append({
+            'code': np.stack([code1, code2]) + correction,
+            'phase': np.stack([phase1, phase2]) + correction,
+            'arc': arc,
+            'usable': above & states.valid & np.isfinite(code1) & np.isfinite(phase1)
+        })
+        positions.append(states.position)
+        elevations.append(elevation)
+
+    base_obs, rover_obs = observed
+    base_range = np.linalg.norm(positions[0] - base_position, axis=-1)
+    code = rover_obs['code'] - (base_obs['code'] - base_range)
+    phase = rover_obs['phase'] - (base_obs['phase'] - base_range)
+
+    usable = base_obs['usable'] & rover_obs['usable']
+    dual = usable & np.isfinite(code[1]) & np.isfinite(phase[1])
+    n_frequencies = 2 if dual.sum() >= 0.5 * max(usable.sum(), 1) else 1
+    if n_frequencies == 2:
+        usable = dual
+    code, phase, frequencies = code[:n_frequencies], phase[:n_frequencies], frequencies[:n_frequencies]
+    wavelength = SPEED_OF_LIGHT / frequencies
+
+    # Arcos da simples diferença: combinação dos arcos da base e do rover
+    keys = np.stack([base_obs['arc'][usable], rover_obs['arc'][usable]], axis=1).astype(np.int64)
+    ambiguity = np.full((n_epochs, n_sats), -1, dtype=int)
+    n_ambiguities = 0
+    if len(keys):
+        _, ids = np.unique(keys, axis=0, return_inverse=True)
+        ambiguity[usable] = ids.ravel()
+        n_ambiguities = int(ids.max()) + 1
+
+    # Referência por (época, constelação): satélite utilizável de maior elevação
+    system_names, system_index = np.unique(systems, return_inverse=True)
+    reference = np.full((n_epochs, n_sats), -1, dtype=int)
+    elevation = elevations[1]
+    for s in range(len(system_names)):
+        candidates = usable & (system_index == s)[None, :]
+        count = candidates.sum(axis=1)
+        ref = np.argmax(np.where(candidates, elevation, -np.inf), axis=1)
+        members = candidates & (count >= 2)[:, None]
+        members[np.arange(n_epochs), ref] = False
+        reference[members] = np.broadcast_to(ref[:, None], (n_epochs, n_sats))[members]
+    group = np.arange(n_epochs)[:, None] * len(system_names) + system_index[None, :]
+
+    parameter = _ambiguity_parameters(ambiguity, reference, n_ambiguities)
+
+    # Inteiros a priori (fase - código) removidos para deixar as ambiguidades pequenas
+    for f in range(n_frequencies):
+        cycles = (phase[f] - code[f]) / wavelength[f][None, :]
+        ids = ambiguity[usable]
+        counts = np.bincount(ids, minlength=n_ambiguities)
+        offset = np.round(np.bincount(ids, weights=cycles[usable], minlength=n_ambiguities) / np.maximum(counts, 1))
+        phase[f][usable] -= offset[ids] * np.broadcast_to(wavelength[f][None, :], (n_epochs, n_sats))[usable]
+
+    logger.info(f"🔗 {n_epochs} épocas comuns, {n_sats} satélites comuns, {n_ambiguities} arcos de ambiguidade, "
+                f"{int((reference >= 0).sum())} duplas diferenças por observável")
+    return DoubleDifferences(
+        times=base.times[base_epochs], satellites=satellites, code=code, phase=phase,
+        wavelength=wavelength, sat_positions=positions[1], reference=reference, group=group,
+        ambiguity=ambiguity, parameter=parameter, n_ambiguities=n_ambiguities,
+        n_systems=len(system_names)
+    )
+
+
+def _accumulate(normal: np.ndarray, rhs: np.ndarray, groups: np.ndarray, n_groups: int,
+                geometry: np.ndarray, y: np.ndarray, weight: float,
+                plus: Optional[np.ndarray] = None, minus: Optional[np.ndarray] = None,
+                scale: Optional[np.ndarray] = None) -> float:
+    """Soma um tipo de observação em dupla diferença às equações normais; retorna yᵀPy
+
+    Cada linha tem a geometria nas três primeiras colunas e, na fase, +λ na ambiguidade do
+    satélite (`plus`) e -λ na da referência (`minus`). As DDs de um grupo (época, constelação)
+    compartilham a referência: a inversa da covariância do grupo é (I - 11ᵀ/(n+1))/(2σ²),
+    aplicada pelas somas do grupo via bincount, sem montar a matriz de projeto.
+    """
+    n_par = normal.shape[0]
+    counts = np.bincount(groups, minlength=n_groups)
+    factor = 1.0 / (counts + 1.0)
+
+    sums = np.zeros((n_groups, n_par))
+    for i in range(3):
+        sums[:, i] = np.bincount(groups, weights=geometry[:, i], minlength=n_groups)
+    group_y = np.bincount(groups, weights=y, minlength=n_groups)
+
+    normal[:3, :3] += weight * (geometry.T @ geometry)
+    rhs[:3] += weight * (geometry.T @ y)
+    if plus is not None:
+        for columns, value in ((plus, scale), (minus, -scale)):
+            np.add.at(sums, (groups, columns), value)
+            cross = np.stack([np.bincount(columns, weights=geometry[:, i] * value, minlength=n_par)
+                              for i in range(3)])
+            normal[:3, :] += weight * cross
+            normal[:, :3] += weight * cross.T
+            rhs += weight * np.bincount(columns, weights=y * value, minlength=n_par)
+        for rows, cols, sign in ((plus, plus, 1.0), (minus, minus, 1.0), (plus, minus, -1.0), (minus, plus, -1.0)):
+            np.add.at(normal, (rows, cols), weight * sign * scale ** 2)
+
+    normal -= weight * ((sums * factor[:, None]).T @ sums)
+    rhs -= weight * (sums.T @ (group_y * factor))
+    return float(weight * (y @ y - (group_y ** 2 * factor).sum()))
+
+
+@dataclass
+class BaselineSolution:
+    """Linha de base estática ajustada em lote (solução fixa quando validada, senão float)"""
+    base_position: np.ndarray
+    float_position: np.ndarray
+    position: np.ndarray         # solução final do rover (ECEF)
+    covariance: np.ndarray       # (3, 3) ECEF da solução final
+    fixed: bool
+    ratio: float                 # teste da razão do LAMBDA (segundo / melhor candidato)
+    success_rate: float
+    sigma0: float
+    n_epochs: int
+    n_satellites: int
+    n_ambiguities: int
+    n_observations: int
+    float_ambiguities: np.ndarray
+    fixed_ambiguities: Optional[np.ndarray] = None
+
+    @property
+    def vector(self) -> np.ndarray:
+        """Vetor da linha de base (rover - base) em ECEF"""
+        return self.position - self.base_position
+
+    @property
+    def length(self) -> float:
+        return float(np.linalg.norm(self.vector))
+
+    def _rotation(self) -> np.ndarray:
+        lat, lon, _ = geodetic_angles(self.base_position)
+        return enu_rotation(lat, lon)
+
+    @property
+    def enu(self) -> np.ndarray:
+        """Componentes leste, norte e vertical da linha de base no referencial da base"""
+        return self._rotation() @ self.vector
+
+    @property
+    def sigma_enu(self) -> np.ndarray:
+        rotation = self._rotation()
+        return np.sqrt(np.diag(rotation @ self.covariance @ rotation.T))
+
+    def summary(self) -> Dict[str, Any]:
+        """Resumo para o relatório"""
+        east, north, up = self.enu
+        sigma = self.sigma_enu
+        return {
+            'solution': 'Fixa' if self.fixed else 'Float',
+            'fixed': self.fixed,
+            'ratio': round(self.ratio, 2),
+            'success_rate': round(self.success_rate, 6),
+            'position': {'x': float(self.position[0]), 'y': float(self.position[1]), 'z': float(self.position[2])},
+            'float_position': {'x': float(self.float_position[0]), 'y': float(self.float_position[1]),
+                               'z': float(self.float_position[2])},
+            'baseline': {
+                'dx': float(self.vector[0]), 'dy': float(self.vector[1]), 'dz': float(self.vector[2]),
+                'east': float(east), 'north': float(north), 'up': float(up), 'length': self.length
+            },
+            'precision': {'east': float(sigma[0]), 'north': float(sigma[1]), 'up': float(sigma[2])},
+            'sigma0': round(self.sigma0, 3),
+            'epochs': self.n_epochs,
+            'satellites': self.n_satellites,
+            'ambiguities': self.n_ambiguities,
+            'observations': self.n_observations
+        }
+
+
+def _normal_equations(dd: DoubleDifferences, position: np.ndarray, code_sigma: float, phase_sigma: float,
+                      block_epochs: int) -> Tuple[np.ndarray, np.ndarray, float, int]:
+    """Equações normais da linha de base linearizadas na posição do rover, em blocos de épocas
+
+    Parâmetros: correção da posição do rover e uma ambiguidade (DD contra o arco pivô) por
+    arco e frequência. A coluna extra recebe os termos dos pivôs e é descartada.
+    """
+    parameters, n_amb = dd.parameter, dd.n_parameters
+    n_par = 3 + dd.n_frequencies * n_amb
+    normal = np.zeros((n_par + 1, n_par + 1))
+    rhs = np.zeros(n_par + 1)
+    quadratic, n_rows = 0.0, 0
+
+    for first in range(0, len(dd.times), block_epochs):
+        last = min(first + block_epochs, len(dd.times))
+        e, k = np.nonzero(dd.reference[first:last] >= 0)
+        if len(e) == 0:
+            continue
+        e = e + first
+        r = dd.reference[e, k]
+        groups = dd.group[e, k] - first * dd.n_systems
+        n_groups = (last - first) * dd.n_systems
+
+        rows = np.arange(len(e))
+        los = dd.sat_positions[e] - position
+        rho = np.linalg.norm(los, axis=-1)
+        unit = los / rho[..., None]
+        ranges = rho[rows, k] - rho[rows, r]
+        geometry = -(unit[rows, k] - unit[rows, r])
+
+        for f in range(dd.n_frequencies):
+            y = dd.code[f, e, k] - dd.code[f, e, r] - ranges
+            quadratic += _accumulate(normal, rhs, groups, n_groups, geometry, y, 0.5 / code_sigma ** 2)
+
+            plus, minus = parameters[dd.ambiguity[e, k]], parameters[dd.ambiguity[e, r]]
+            plus = np.where(plus >= 0, plus + 3 + f * n_amb, n_par)
+            minus = np.where(minus >= 0, minus + 3 + f * n_amb, n_par)
+            y = dd.phase[f, e, k] - dd.phase[f, e, r] - ranges
+            quadratic += _accumulate(normal, rhs, groups, n_groups, geometry, y, 0.5 / phase_sigma ** 2,
+                                     plus, minus, dd.wavelength[f, k])
+            n_rows += 2 * len(e)
+
+    return normal[:n_par, :n_par], rhs[:n_par], quadratic, n_rows
+
+
+def _float_solution(dd: DoubleDifferences, position: np.ndarray, code_sigma: float, phase_sigma: float,
+                    max_iterations: int, block_epochs: int) -> Optional[Tuple]:
+    """Gauss-Newton da solução float: posição, cofatores, parâmetros, termos normais e nº de DDs"""
+    for _ in range(max_iterations):
+        normal, rhs, quadratic, n_rows = _normal_equations(dd, position, code_sigma, phase_sigma, block_epochs)
+        try:
+            cofactor = np.linalg.inv(normal)
+        except np.linalg.LinAlgError:
+            return None
+        solution = cofactor @ rhs
+        position = position + solution[:3]
+        if np.linalg.norm(solution[:3]) < 1e-4:
+            break
+    return position, cofactor, solution, rhs, quadratic, n_rows
+
+
+def solve_baseline(base: ObservationStore, rover: ObservationStore, orbits: OrbitSource,
+                   base_position: np.ndarray, rover_position: Optional[np.ndarray] = None,
+                   elevation_mask: float = ELEVATION_MASK,
+                   code_sigma: float = CODE_SIGMA, phase_sigma: float = PHASE_SIGMA,
+                   ratio_threshold: float = RATIO_THRESHOLD,
+                   max_iterations: int = 5, block_epochs: int = BLOCK_EPOCHS) -> Optional[BaselineSolution]:
+    """Ajusta a linha de base estática com todas as duplas diferenças da sessão
+
+    A solução float estima a posição do rover e as ambiguidades reais por Gauss-Newton; as
+    ambiguidades são então fixadas pelo LAMBDA e, quando o teste da razão atinge
+    `ratio_threshold`, a posição é condicionada aos inteiros. Retorna None sem duplas
+    diferenças suficientes.
+    """
+    base_position = np.asarray(base_position, dtype=np.float64)
+    if rover_position is None or np.linalg.norm(rover_position) < 6.0e6:
+        rover_position = approximate_position(rover, orbits)
+        if rover_position is None:
+            logger.warning("Sem posição aproximada do rover")
+            return None
+
+    # As DDs dependem da posição a priori do rover (troposfera, relógio, referências): com a
+    # solução float longe dela, são formadas de novo na posição ajustada
+    position = np.asarray(rover_position, dtype=np.float64).copy()
+    for _ in range(2):
+        dd = double_differences(base, rover, orbits, base_position, position, elevation_mask)
+        n_par = 3 + dd.n_frequencies * dd.n_parameters
+        if dd.n_double_differences * 2 * dd.n_frequencies <= n_par:
+            logger.warning("Duplas diferenças insuficientes para a linha de base")
+            return None
+        adjusted = _float_solution(dd, position, code_sigma, phase_sigma, max_iterations, block_epochs)
+        if adjusted is None:
+            logger.warning("Sistema da linha de base singular")
+            return None
+        moved = np.linalg.norm(adjusted[0] - position)
+        position = adjusted[0]
+        if moved < REFORM_DISTANCE:
+            break
+
+    float_position, cofactor, solution, rhs, quadratic, n_rows = adjusted
+    n_amb = dd.n_parameters
+    sigma0 = math.sqrt(max(quadratic - solution @ rhs, 0.0) / max(n_rows - n_par, 1))
+    covariance = cofactor * sigma0 ** 2
+    float_ambiguities = solution[3:]
+
+    fixed, ratio, success_rate = False, 0.0, 0.0
+    final_position, final_covariance = float_position, covariance[:3, :3]
+    integers = None
+    if n_amb:
+        Q_aa, Q_xa = covariance[3:, 3:], covariance[:3, 3:]
+        resolution = resolve_ambiguities(float_ambiguities, Q_aa, ratio_threshold)
+        integers, ratio, success_rate = resolution.fixed, resolution.ratio, resolution.success_rate
+        if resolution.accepted:
+            gain = np.linalg.solve(Q_aa, Q_xa.T).T
+            final_position = float_position - gain @ (float_ambiguities - integers)
+            final_covariance = covariance[:3, :3] - gain @ Q_xa.T
+            fixed = True
+
+    result = BaselineSolution(
+        base_position=base_position, float_position=float_position, position=final_position,
+        covariance=final_covariance, fixed=fixed, ratio=ratio, success_rate=success_rate, sigma0=sigma0,
+        n_epochs=len(dd.times), n_satellites=len(dd.satellites), n_ambiguities=dd.n_ambiguities,
+        n_observations=n_rows, float_ambiguities=float_ambiguities,
+        fixed_ambiguities=integers if fixed else None
+    )
+    logger.info(f"📏 Linha de base {result.length:.3f} m, solução {'fixa' if fixed else 'float'} "
+                f"(razão {ratio:.1f}, taxa de sucesso {success_rate:.4f}, σ0 {sigma0:.2f})")
+    return result
+
+
+def _solve_rover(base: ObservationStore, base_position: np.ndarray, rover_source: RinexSource,
+                 orbits: OrbitSource) -> Dict[str, Any]:
+    """Processa um rover contra a base (executado num processo do pool)"""
+    header, rover = read_observations(*rover_source)
+    solution = solve_baseline(base, rover, orbits, base_position, header.approx_position)
+    if solution is None:
+        return {'success': False, 'error': 'Duplas diferenças insuficientes entre base e rover'}
+    return {'success': True, **solution.summary()}
+
+
+def process_baselines(base_source: RinexSource, rover_sources: Sequence[RinexSource],
+                      navigation: Sequence[RinexSource], base_position: Optional[np.ndarray] = None,
+                      orbits: Optional[OrbitSource] = None, max_workers: Optional[int] = None,
+                      progress_callback: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """Processa vários rovers contra a mesma base em paralelo
+
+    A base e as efemérides são lidas uma vez e enviadas a cada processo; `orbits` já
+    carregadas (produtos precisos, por exemplo) dispensam os arquivos de `navigation`. Sem
+    `base_position` (coordenadas conhecidas da base), usa-se a posição do cabeçalho ou o SPP.
+    """
+    stages = StageTimer(progress_callback)
+    with stages.stage('preprocessing'):
+        base_header, base = read_observations(*base_source)
+        if orbits is None:
+            _, orbits = load_navigation(list(navigation))
+        if base_position is None:
+            base_position = base_header.approx_position
+        if base_position is None or np.linalg.norm(base_position) < 6.0e6:
+            base_position = approximate_position(base, orbits)
+        if base_position is None:
+            return {'success': False, 'error': 'Posição da base indisponível'}
+        base_position = np.asarray(base_position, dtype=np.float64)
+
+    results: Dict[int, Dict[str, Any]] = {}
+    with stages.stage('baselines'):
+        workers = max(1, min(len(rover_sources), max_workers or os.cpu_count() or 1))
+        logger.info(f"🛰️ Processando {len(rover_sources)} rover(s) contra a base em {workers} processo(s)")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_solve_rover, base, base_position, source, orbits): k
+                       for k, source in enumerate(rover_sources)}
+            for done, future in enumerate(as_completed(futures), 1):
+                k = futures[future]
+                try:
+                    results[k] = future.result()
+                except Exception as e:
+                    logger.error(f"❌ Falha ao processar o rover {rover_sources[k]}: {e}")
+                    results[k] = {'success': False, 'error': str(e)}
+                stages.update(done / len(rover_sources))
+
+    rovers = [{'file': source[1] or os.path.basename(source[0]), 'result': results[k]}
+              for k, source in enumerate(rover_sources)]
+    return {
+        'success': any(r['result'].get('success') for r in rovers),
+        'base': {'file': base_source[1] or os.path.basename(base_source[0]),
+                 'position': {'x': float(base_position[0]), 'y': float(base_position[1]),
+                              'z': float(base_position[2])}},
+        'rovers': rovers,
+        'processing_time': stages.elapsed,
+        'stage_timings': dict(stages.timings)
+    }
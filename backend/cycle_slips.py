@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Detecção vetorizada de perdas de ciclo (cycle slips)
+Combinações livre da geometria (GF) e de Melbourne-Wübbena (MW) diferenciadas no tempo, flags
+LLI do RINEX e interrupções longas, avaliadas sobre todos os registros satélite × época de uma
+vez; o resultado traz os eventos e a divisão das observações de cada satélite em arcos contínuos
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .ephemeris import SPEED_OF_LIGHT
+    from .obs_store import ObservationStore, from_gps_seconds
+    from .observables import DualFrequency, dual_frequency
+except ImportError:
+    from ephemeris import SPEED_OF_LIGHT
+    from obs_store import ObservationStore, from_gps_seconds
+    from observables import DualFrequency, dual_frequency
+
+# Salto máximo (m) da diferença temporal GF em relação à tendência ionosférica local
+GF_THRESHOLD = float(os.getenv('GNSS_GF_THRESHOLD', '0.05'))
+# Teste MW: número de desvios padrão e salto mínimo (ciclos de wide-lane)
+MW_SIGMAS = float(os.getenv('GNSS_MW_SIGMAS', '4.0'))
+MW_MIN_JUMP = float(os.getenv('GNSS_MW_MIN_JUMP', '0.5'))
+# Épocas vizinhas usadas na tendência GF e nas médias MW antes/depois de cada época
+GF_WINDOW = 5
+MW_WINDOW = 20
+# Interrupção (em intervalos nominais) a partir da qual o arco é reiniciado
+MAX_GAP_INTERVALS = 10
+
+REASONS = ('lli', 'gap', 'gf', 'mw')
+
+
+@dataclass
+class SlipEvent:
+    """Perda de ciclo detectada entre a observação anterior do satélite e esta época"""
+    satellite: str
+    epoch: int
+    time: float                  # segundos GPS contínuos
+    reasons: Tuple[str, ...]     # subconjunto de REASONS
+    gf_jump: float               # salto GF (m) acima da tendência; NaN sem duas fases
+    mw_jump: float               # salto MW (ciclos de wide-lane); NaN sem código e fase duplos
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            'satellite': self.satellite,
+            'epoch': self.epoch,
+            'time': from_gps_seconds(self.time).strftime('%d/%m/%Y %H:%M:%S'),
+            'reasons': list(self.reasons),
+            'gf_jump': None if np.isnan(self.gf_jump) else round(self.gf_jump, 3),
+            'mw_jump': None if np.isnan(self.mw_jump) else round(self.mw_jump, 2),
+        }
+
+
+@dataclass
+class SatelliteArc:
+    """Trecho contínuo de fase de um satélite, sem perda de ciclo"""
+    satellite: str
+    start_epoch: int
+    end_epoch: int
+    n_observations: int
+
+
+@dataclass
+class SlipDetection:
+    """Resultado da detecção, com arrays alinhados aos registros do armazenamento"""
+    slips: np.ndarray            # True no registro que inicia um arco após perda de ciclo
+    arc: np.ndarray              # identificador do arco de cada registro
+    events: List[SlipEvent]
+    arcs: List[SatelliteArc]
+
+    @property
+    def affected_satellites(self) -> List[str]:
+        return sorted({event.satellite for event in self.events})
+
+    def events_per_satellite(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for event in self.events:
+            counts[event.satellite] = counts.get(event.satellite, 0) + 1
+        return counts
+
+
+def _window_mean(values: np.ndarray, lo: np.ndarray, hi: np.ndarray,
+                 exclude_self: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Média e contagem dos valores finitos em [lo, hi) para cada posição, via somas acumuladas"""
+    finite = np.isfinite(values)
+    filled = np.where(finite, values, 0.0)
+    sums = np.concatenate([[0.0], np.cumsum(filled)])
+    counts = np.concatenate([[0], np.cumsum(finite)])
+    total = sums[hi] - sums[lo]
+    count = counts[hi] - counts[lo]
+    if exclude_self:
+        total = total - filled
+        count = count - finite
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan), count
+
+
+def _previous_finite(values: np.ndarray, seg_start: np.ndarray) -> np.ndarray:
+    """Índice do último valor finito anterior no mesmo segmento (-1 quando não existe)"""
+    n = len(values)
+    index = np.where(np.isfinite(values), np.arange(n), -1)
+    last = np.maximum.accumulate(index) if n else index
+    previous = np.full(n, -1)
+    previous[1:] = last[:-1]
+    return np.where(previous >= seg_start, previous, -1)
+
+
+def _neighbours(values: np.ndarray, seg_start: np.ndarray, seg_end: np.ndarray, offset: int):
+    """Valores `offset` posições antes e depois, no mesmo trecho (zero fora dele)"""
+    n = len(values)
+    position = np.arange(n)
+    left = np.zeros(n, dtype=values.dtype)
+    right = np.zeros(n, dtype=values.dtype)
+    left[offset:] = np.where(position[offset:] - offset >= seg_start[offset:], values[:-offset], 0)
+    right[:-offset] = np.where(position[:-offset] + offset < seg_end[:-offset], values[offset:], 0)
+    return left, right
+
+
+def _is_peak(values: np.ndarray, seg_start: np.ndarray, seg_end: np.ndarray, half_width: int) -> np.ndarray:
+    """Posições que são o máximo dos vizinhos do mesmo trecho até `half_width` (empate: a primeira)"""
+    peak = np.ones(len(values), dtype=bool)
+    for offset in range(1, half_width + 1):
+        left, right = _neighbours(values, seg_start, seg_end, offset)
+        peak &= (values >= left) & (values > right)
+    return peak
+
+
+def _near(flags: np.ndarray, seg_start: np.ndarray, seg_end: np.ndarray, half_width: int) -> np.ndarray:
+    """Posições com alguma flag até `half_width` posições de distância no mesmo trecho"""
+    near = flags.copy()
+    for offset in range(1, half_width + 1):
+        left, right = _neighbours(flags, seg_start, seg_end, offset)
+        near |= left | right
+    return near
+
+
+def _mw_sigma(mw: np.ndarray, previous: np.ndarray) -> float:
+    """Desvio padrão robusto (MAD) da MW a partir das diferenças entre épocas consecutivas"""
+    ok = np.isfinite(mw) & (previous >= 0)
+    if not ok.any():
+        return np.nan
+    delta = mw[ok] - mw[previous[ok]]
+    mad = np.median(np.abs(delta - np.median(delta)))
+    return max(1.4826 * mad / np.sqrt(2.0), 0.05)
+
+
+def detect_cycle_slips(store: ObservationStore, signals: Optional[DualFrequency] = None,
+                       gf_threshold: float = GF_THRESHOLD, mw_sigmas: float = MW_SIGMAS,
+                       mw_min_jump: float = MW_MIN_JUMP, max_gap: Optional[float] = None) -> SlipDetection:
+    """Detecta perdas de ciclo em todos os registros numa única passada vetorizada
+
+    Os registros são ordenados por satélite e época. LLI (bit 0) e interrupções maiores que
+    `max_gap` segundos (padrão: 10 intervalos nominais) quebram o arco diretamente. Dentro de
+    cada trecho, a diferença temporal da GF é comparada à média das diferenças vizinhas (tendência
+    ionosférica) e a MW é testada como degrau entre as médias antes e depois de cada época.
+    Constelações sem tabela de sinais (GLONASS) usam apenas LLI e interrupções.
+    """
+    signals = dual_frequency(store) if signals is None else signals
+    n = store.n_records
+    order = np.argsort(store.sat_index, kind='stable')
+    sat = store.sat_index[order]
+    epoch = store.epoch_index[order]
+    time = store.times[epoch]
+
+    if max_gap is None:
+        intervals = np.diff(store.times)
+        max_gap = MAX_GAP_INTERVALS * float(np.median(intervals)) if len(intervals) else np.inf
+
+    first = np.ones(n, dtype=bool)
+    first[1:] = sat[1:] != sat[:-1]
+    dt = np.full(n, np.nan)
+    dt[1:] = np.diff(time)
+    gap = ~first & (np.nan_to_num(dt) > max_gap)
+    lli = signals.lli[order] & ~first
+
+    # Trechos sem LLI nem interrupção; as janelas das combinações não os atravessam
+    breaks = first | gap | lli
+    starts = np.flatnonzero(breaks)
+    segment = np.cumsum(breaks) - 1
+    seg_start = starts[segment] if n else starts
+    seg_end = np.append(starts[1:], n)[segment] if n else starts
+    position = np.arange(n)
+
+    f1, f2 = signals.f1[order], signals.f2[order]
+    phase1, phase2 = signals.phase1[order], signals.phase2[order]
+
+    # Geometry-free: salto da diferença temporal acima da tendência das diferenças vizinhas
+    gf = phase1 - phase2
+    previous = _previous_finite(gf, seg_start)
+    dgf = np.where(previous >= 0, gf - gf[np.maximum(previous, 0)], np.nan)
+    lo, hi = np.maximum(seg_start, position - GF_WINDOW), np.minimum(seg_end, position + GF_WINDOW + 1)
+    trend, _ = _window_mean(dgf, lo, hi, exclude_self=True)
+    with np.errstate(invalid='ignore'):
+        # Segunda passada sem os picos candidatos, que contaminariam a tendência dos vizinhos
+        spikes = _is_peak(np.nan_to_num(np.abs(dgf - np.nan_to_num(trend))), seg_start, seg_end, 1)
+        spikes &= np.abs(dgf - np.nan_to_num(trend)) > gf_threshold
+        trend, _ = _window_mean(np.where(spikes, np.nan, dgf), lo, hi, exclude_self=True)
+        gf_jump = dgf - np.nan_to_num(trend)
+        gf_slip = np.abs(gf_jump) > gf_threshold
+
+    # Melbourne-Wübbena em ciclos de wide-lane: degrau entre as médias antes e depois
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mw = ((f1 * phase1 - f2 * phase2) / (f1 - f2) -
+              (f1 * signals.code1[order] + f2 * signals.code2[order]) / (f1 + f2)) * (f1 - f2) / SPEED_OF_LIGHT
+    before, n_before = _window_mean(mw, np.maximum(seg_start, position - MW_WINDOW), position)
+    after, n_after = _window_mean(mw, position, np.minimum(seg_end, position + MW_WINDOW))
+    mw_jump = after - before
+    sigma = _mw_sigma(mw, _previous_finite(mw, seg_start))
+    mw_slip = np.zeros(n, dtype=bool)
+    if np.isfinite(sigma):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            threshold = np.maximum(mw_min_jump, mw_sigmas * sigma * np.sqrt(1.0 / n_before + 1.0 / n_after))
+            size = np.nan_to_num(np.abs(mw_jump))
+            # O degrau aparece atenuado nas épocas vizinhas: fica só o máximo dentro da janela
+            mw_slip = (np.isfinite(mw) & (n_before > 0) & (n_after > 0) & (size > threshold) &
+                       _is_peak(size, seg_start, seg_end, MW_WINDOW // 2))
+        # Salto já atribuído à GF em época próxima do mesmo satélite
+        mw_slip &= gf_slip | ~_near(gf_slip, seg_start, seg_end, 2)
+
+    flags = {'lli': lli, 'gap': gap, 'gf': gf_slip & ~first, 'mw': mw_slip & ~first}
+    slip = lli | gap | flags['gf'] | flags['mw']
+    new_arc = first | slip
+    arc = np.cumsum(new_arc) - 1
+
+    names = store.satellites
+    events = [
+        SlipEvent(satellite=str(names[sat[k]]), epoch=int(epoch[k]), time=float(time[k]),
+                  reasons=tuple(reason for reason in REASONS if flags[reason][k]),
+                  gf_jump=float(gf_jump[k]), mw_jump=float(mw_jump[k]))
+        for k in np.flatnonzero(slip)
+    ]
+    arc_starts = np.flatnonzero(new_arc)
+    arc_ends = np.append(arc_starts[1:], n) - 1
+    arcs = [
+        SatelliteArc(satellite=str(names[sat[a]]), start_epoch=int(epoch[a]), end_epoch=int(epoch[b]),
+                     n_observations=int(b - a + 1))
+        for a, b in zip(arc_starts, arc_ends)
+    ]
+
+    slips = np.zeros(n, dtype=bool)
+    slips[order] = slip
+    arc_of_record = np.zeros(n, dtype=np.int64)
+    arc_of_record[order] = arc
+    return SlipDetection(slips=slips, arc=arc_of_record, events=events, arcs=arcs)
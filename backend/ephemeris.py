@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+Efemérides transmitidas (RINEX de navegação) e cálculo vetorizado das órbitas Keplerianas
+Lê mensagens GPS LNAV, Galileo (I/NAV e F/NAV), BeiDou (D1/D2) e QZSS e avalia posição e relógio
+de muitos pares (satélite, instante) em uma única chamada
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime as dt, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, TextIO, Tuple, Union
+
+import numpy as np
+
+try:
+    from .obs_store import SECONDS_PER_WEEK, to_gps_seconds
+    from .rinex_compression import open_rinex
+except ImportError:
+    from obs_store import SECONDS_PER_WEEK, to_gps_seconds
+    from rinex_compression import open_rinex
+
+logger = logging.getLogger(__name__)
+
+SPEED_OF_LIGHT = 299792458.0  # m/s
+
+# Constantes de cada sistema: GM (m³/s²), rotação da Terra (rad/s) e idade máxima da efeméride (s)
+SYSTEM_CONSTANTS = {
+    'G': {'gm': 3.986005e14, 'omega_e': 7.2921151467e-5, 'max_age': 7200.0},
+    'J': {'gm': 3.986005e14, 'omega_e': 7.2921151467e-5, 'max_age': 7200.0},
+    'E': {'gm': 3.986004418e14, 'omega_e': 7.2921151467e-5, 'max_age': 14400.0},
+    'C': {'gm': 3.986004418e14, 'omega_e': 7.292115e-5, 'max_age': 21600.0},
+}
+KEPLERIAN_SYSTEMS = tuple(SYSTEM_CONSTANTS)
+
+# Rotação usada na correção do tempo de propagação do sinal (receptor em ECEF WGS84)
+OMEGA_E_WGS84 = 7.2921151467e-5
+
+# Tempo BeiDou: semana 0 começa na semana GPS 1356 e BDT = GPST - 14 s
+BDT_WEEK_OFFSET = 1356
+BDT_GPST_OFFSET = 14.0
+
+# Satélites BeiDou geoestacionários (órbita calculada com a rotação adicional de -5°)
+BEIDOU_GEO_PRNS = frozenset(list(range(1, 6)) + list(range(59, 64)))
+
+# Mensagens RINEX 4 com parâmetros Keplerianos no layout clássico
+RINEX4_KEPLERIAN_MESSAGES = {'LNAV', 'INAV', 'FNAV', 'D1', 'D2'}
+
+# Campos das linhas de órbita (na ordem do arquivo), comuns a GPS, Galileo, BeiDou e QZSS
+ORBIT_FIELDS = (
+    'af0', 'af1', 'af2',
+    'iode', 'crs', 'delta_n', 'm0',
+    'cuc', 'e', 'cus', 'sqrt_a',
+    'toe', 'cic', 'omega0', 'cis',
+    'i0', 'crc', 'omega', 'omega_dot',
+    'idot', 'codes', 'week', 'l2p_flag',
+    'accuracy', 'health', 'tgd', 'iodc',
+    'transmission_time', 'fit_interval'
+)
+_FIELD = {name: i for i, name in enumerate(ORBIT_FIELDS)}
+
+# Tipo de arquivo RINEX 2 (N = GPS, G = GLONASS, H = SBAS, L = Galileo) e constelação dos registros
+RINEX2_FILE_SYSTEMS = {'N': 'G', 'G': 'R', 'H': 'S', 'L': 'E'}
+
+NAV_FIELD_WIDTH = 19
+NAV_FIELDS_PER_LINE = 4
+
+
+@dataclass
+class NavigationHeader:
+    """Cabeçalho de um arquivo RINEX de navegação"""
+    version: float = 2.11
+    file_type: str = 'N'
+    satellite_system: str = 'G'
+    ionosphere: Dict[str, List[float]] = field(default_factory=dict)
+    leap_seconds: Optional[int] = None
+    header_lines: int = 0
+
+
+@dataclass
+class SatelliteStates:
+    """Posição e relógio de cada par (satélite, instante); pares sem efeméride ficam com NaN"""
+    position: np.ndarray     # (..., 3) ECEF em metros
+    clock_bias: np.ndarray   # (...) em segundos, com a correção relativística
+    group_delay: np.ndarray  # (...) TGD/BGD da frequência principal, em segundos
+    valid: np.ndarray        # (...) bool
+    ephemeris: np.ndarray    # (...) índice do registro usado (-1 sem efeméride)
+
+
+def _parse_nav_float(text: str) -> float:
+    text = text.strip()
+    if not text:
+        return np.nan
+    try:
+        return float(text.replace('D', 'E').replace('d', 'e'))
+    except ValueError:
+        return np.nan
+
+
+def _split_fields(line: str, start: int, count: int) -> List[float]:
+    return [_parse_nav_float(line[start + k * NAV_FIELD_WIDTH:start + (k + 1) * NAV_FIELD_WIDTH])
+            for k in range(count)]
+
+
+def read_navigation_header(stream: TextIO) -> NavigationHeader:
+    """Lê o cabeçalho até END OF HEADER, deixando o stream no primeiro registro"""
+    header = NavigationHeader()
+
+    for line in stream:
+        header.header_lines += 1
+        label = line[60:80].strip()
+
+        if label == 'RINEX VERSION / TYPE':
+            header.version = _parse_nav_float(line[:9]) if line[:9].strip() else header.version
+            header.file_type = line[20:21].strip() or header.file_type
+            if header.version >= 3:
+                header.satellite_system = line[40:41].strip() or 'M'
+            else:
+                header.satellite_system = RINEX2_FILE_SYSTEMS.get(header.file_type, 'G')
+        elif label in ('ION ALPHA', 'ION BETA'):
+            key = 'GPSA' if label == 'ION ALPHA' else 'GPSB'
+            header.ionosphere[key] = [_parse_nav_float(line[2 + k * 12:14 + k * 12]) for k in range(4)]
+        elif label == 'IONOSPHERIC CORR':
+            key = line[:4].strip()
+            header.ionosphere[key] = [_parse_nav_float(line[5 + k * 12:17 + k * 12]) for k in range(4)]
+        elif label == 'LEAP SECONDS':
+            try:
+                header.leap_seconds = int(line[:6])
+            except ValueError:
+                pass
+        elif label == 'END OF HEADER':
+            break
+
+    return header
+
+
+def _record_epoch(line: str, version: float) -> Optional[dt]:
+    """Instante de referência do relógio (toc) na primeira linha do registro"""
+    try:
+        if version >= 3:
+            parts = line[4:23].split()
+            year = int(parts[0])
+        else:
+            parts = line[3:22].split()
+            year = int(parts[0])
+            year += 2000 if year < 80 else 1900
+        return dt(year, int(parts[1]), int(parts[2]), int(parts[3]), int(parts[4])) + \
+            timedelta(seconds=float(parts[5]))
+    except (ValueError, IndexError):
+        return None
+
+
+def _iter_records(stream: TextIO, header: NavigationHeader) -> Iterable[Tuple[str, List[str]]]:
+    """Agrupa as linhas de cada registro (primeira linha + linhas de órbita)
+
+    Em RINEX 4, registros que não são efemérides Keplerianas (STO, EOP, ION, CNAV) são ignorados.
+    """
+    v3 = header.version >= 3
+    v4 = header.version >= 4
+    record: List[str] = []
+    accepting = not v4
+
+    for line in stream:
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        if v4 and line.startswith('>'):
+            if record:
+                yield record[0], record
+            record = []
+            parts = line[1:].split()
+            accepting = len(parts) >= 3 and parts[0] == 'EPH' and parts[2] in RINEX4_KEPLERIAN_MESSAGES
+            continue
+        if not accepting:
+            continue
+
+        starts_record = line[0] != ' ' if v3 else line[:2].strip() != ''
+        if starts_record:
+            if record:
+                yield record[0], record
+            record = [line]
+        elif record:
+            record.append(line)
+
+    if record:
+        yield record[0], record
+
+
+class OrbitSource:
+    """Base das fontes de órbita e relógio (efemérides transmitidas ou produtos precisos)
+
+    As subclasses implementam `satellite_states(sat_ids, times, travel_time=None)`.
+    """
+
+    def satellite_states(self, sat_ids, times, travel_time=None) -> SatelliteStates:
+        raise NotImplementedError
+
+    def transmission_states(self, sat_ids, receive_times, pseudoranges) -> SatelliteStates:
+        """Estados dos satélites no instante de transmissão deduzido das pseudodistâncias
+
+        O instante de transmissão é t_rx - P/c - dt_sat; a posição resultante já inclui a
+        correção da rotação da Terra durante a propagação.
+        """
+        sat_ids, receive_times, pseudoranges = np.broadcast_arrays(
+            np.asarray(sat_ids, dtype='<U3'), np.asarray(receive_times, dtype=np.float64),
+            np.asarray(pseudoranges, dtype=np.float64))
+        transmit = receive_times - pseudoranges / SPEED_OF_LIGHT
+        clock = self.satellite_states(sat_ids, transmit).clock_bias
+        transmit = transmit - np.nan_to_num(clock)
+        return self.satellite_states(sat_ids, transmit, travel_time=receive_times - transmit)
+
+
+class BroadcastEphemeris(OrbitSource):
+    """Efemérides transmitidas em arrays: uma linha por registro, uma coluna por parâmetro orbital
+
+    Os instantes `toc` e `toe` são guardados em segundos GPS contínuos (BeiDou convertido de BDT),
+    o que permite selecionar e avaliar efemérides de várias constelações no mesmo cálculo.
+    """
+
+    def __init__(self, sat_ids: Sequence[str], toc: np.ndarray, values: np.ndarray):
+        order = np.lexsort((np.asarray(toc, dtype=np.float64), np.asarray(sat_ids, dtype='<U3')))
+        self.sat_ids = np.asarray(sat_ids, dtype='<U3')[order]
+        self.toc = np.asarray(toc, dtype=np.float64)[order]
+        self.values = np.asarray(values, dtype=np.float64).reshape(-1, len(ORBIT_FIELDS))[order]
+        self.systems = self.sat_ids.astype('<U1')
+        self.toe = self._absolute_toe()
+
+        self.satellites: List[str] = sorted(set(self.sat_ids.tolist()))
+        self._build_index()
+
+    @classmethod
+    def concatenate(cls, parts: Sequence['BroadcastEphemeris']) -> 'BroadcastEphemeris':
+        """Une efemérides de vários arquivos, descartando registros repetidos"""
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls([], np.empty(0), np.empty((0, len(ORBIT_FIELDS))))
+        sat_ids = np.concatenate([p.sat_ids for p in parts])
+        toc = np.concatenate([p.toc for p in parts])
+        values = np.vstack([p.values for p in parts])
+
+        seen = set()
+        unique = []
+        for k, key in enumerate(zip(sat_ids.tolist(), toc.tolist(), values[:, _FIELD['iode']].tolist())):
+            if key not in seen:
+                seen.add(key)
+                unique.append(k)
+        return cls(sat_ids[unique], toc[unique], values[unique])
+
+    def column(self, name: str) -> np.ndarray:
+        """Valores de um parâmetro orbital para todos os registros"""
+        return self.values[:, _FIELD[name]]
+
+    def __len__(self) -> int:
+        return len(self.sat_ids)
+
+    def _absolute_toe(self) -> np.ndarray:
+        """toe em segundos GPS contínuos, ajustado para a semana mais próxima do toc"""
+        week = np.nan_to_num(self.column('week'))
+        beidou = self.systems == 'C'
+        toe = (week + np.where(beidou, BDT_WEEK_OFFSET, 0)) * SECONDS_PER_WEEK + self.column('toe')
+        toe += np.where(beidou, BDT_GPST_OFFSET, 0.0)
+        # Semana do arquivo pode divergir do toc na virada de semana
+        toe -= np.round((toe - self.toc) / SECONDS_PER_WEEK) * SECONDS_PER_WEEK
+        return toe
+
+    def _build_index(self) -> None:
+        """Índice ordenado (satélite, toe) dos registros saudáveis, usado na busca vetorizada"""
+        usable = ((np.nan_to_num(self.column('health')) == 0) &
+                  np.isin(self.systems, KEPLERIAN_SYSTEMS) &
+                  np.isfinite(self.values[:, :_FIELD['idot'] + 1]).all(axis=1) &
+                  (np.nan_to_num(self.column('sqrt_a')) > 0))
+        self._candidates = np.flatnonzero(usable)
+        codes = np.searchsorted(self.satellites, self.sat_ids[self._candidates]) if self.satellites else \
+            np.empty(0, dtype=np.int64)
+        keys = codes * 2.0 ** 32 + self.toe[self._candidates]
+        order = np.argsort(keys, kind='stable')
+        self._candidates = self._candidates[order]
+        self._keys = keys[order]
+
+    def select(self, sat_ids: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """Registro com o toe mais próximo de cada instante, entre os válidos (-1 sem efeméride)
+
+        `sat_ids` e `times` (segundos GPS contínuos) são arrays 1-D do mesmo tamanho.
+        """
+        sat_ids = np.asarray(sat_ids, dtype='<U3')
+        times = np.asarray(times, dtype=np.float64)
+        selected = np.full(len(sat_ids), -1, dtype=np.int64)
+        if not len(self._candidates) or not len(sat_ids):
+            return selected
+
+        satellites = np.asarray(self.satellites)
+        codes = np.clip(np.searchsorted(satellites, sat_ids), 0, len(satellites) - 1)
+        known = satellites[codes] == sat_ids
+        keys = codes * 2.0 ** 32 + times
+
+        right = np.clip(np.searchsorted(self._keys, keys), 0, len(self._keys) - 1)
+        left = np.clip(right - 1, 0, len(self._keys) - 1)
+        best = np.full(len(sat_ids), np.inf)
+        for side in (left, right):
+            records = self._candidates[side]
+            same = known & (self.sat_ids[records] == sat_ids)
+            age = np.where(same, np.abs(times - self.toe[records]), np.inf)
+            closer = age < best
+            best[closer] = age[closer]
+            selected[closer] = records[closer]
+
+        systems = sat_ids.astype('<U1')
+        max_age = np.zeros(len(sat_ids))
+        for system, constants in SYSTEM_CONSTANTS.items():
+            max_age[systems == system] = constants['max_age']
+        selected[best > max_age] = -1
+        return selected
+
+    def satellite_states(self, sat_ids, times, travel_time=None) -> SatelliteStates:
+        """Posição ECEF e relógio dos satélites em cada instante de transmissão
+
+        `sat_ids` e `times` (segundos GPS contínuos) são combinados por broadcasting, por exemplo
+        satélites (S,) com instantes (E, 1) geram resultados (E, S). Com `travel_time`, a
+        posição é girada pela rotação da Terra durante a propagação do sinal, ficando no
+        referencial ECEF do instante de recepção.
+        """
+        sat_ids, times = np.broadcast_arrays(np.asarray(sat_ids, dtype='<U3'),
+                                             np.asarray(times, dtype=np.float64))
+        shape = sat_ids.shape
+        sat_flat = sat_ids.ravel()
+        t = times.ravel().copy()
+
+        records = self.select(sat_flat, t)
+        valid = records >= 0
+        n = len(sat_flat)
+        position = np.full((n, 3), np.nan)
+        clock = np.full(n, np.nan)
+        group_delay = np.full(n, np.nan)
+
+        if valid.any():
+            rec = records[valid]
+            pos, clk = self._evaluate(rec, t[valid])
+            position[valid] = pos
+            clock[valid] = clk
+            group_delay[valid] = np.nan_to_num(self.values[rec, _FIELD['tgd']])
+
+        if travel_time is not None:
+            position = rotate_earth(position, np.broadcast_to(travel_time, shape).ravel())
+
+        return SatelliteStates(
+            position=position.reshape(shape + (3,)),
+            clock_bias=clock.reshape(shape),
+            group_delay=group_delay.reshape(shape),
+            valid=valid.reshape(shape),
+            ephemeris=records.reshape(shape)
+        )
+
+    def _evaluate(self, records: np.ndarray, t: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Modelo Kepleriano do ICD (GPS/Galileo/BeiDou) para registros e instantes pareados"""
+        p = {name: self.values[records, i] for i, name in enumerate(ORBIT_FIELDS)}
+        systems = self.systems[records]
+        gm = np.empty(len(records))
+        omega_e = np.empty(len(records))
+        for system, constants in SYSTEM_CONSTANTS.items():
+            in_system = systems == system
+            gm[in_system] = constants['gm']
+            omega_e[in_system] = constants['omega_e']
+
+        a = p['sqrt_a'] ** 2
+        tk = t - self.toe[records]
+        n = np.sqrt(gm / a ** 3) + p['delta_n']
+        M = p['m0'] + n * tk
+        e = p['e']
+
+        # Equação de Kepler por Newton-Raphson, todas as efemérides juntas
+        E = M.copy()
+        for _ in range(10):
+            dE = (E - e * np.sin(E) - M) / (1.0 - e * np.cos(E))
+            E -= dE
+            if np.max(np.abs(dE)) < 1e-13:
+                break
+        sin_E, cos_E = np.sin(E), np.cos(E)
+
+        nu = np.arctan2(np.sqrt(1.0 - e ** 2) * sin_E, cos_E - e)
+        phi = nu + p['omega']
+        sin_2phi, cos_2phi = np.sin(2 * phi), np.cos(2 * phi)
+        u = phi + p['cus'] * sin_2phi + p['cuc'] * cos_2phi
+        r = a * (1.0 - e * cos_E) + p['crs'] * sin_2phi + p['crc'] * cos_2phi
+        i = p['i0'] + p['idot'] * tk + p['cis'] * sin_2phi + p['cic'] * cos_2phi
+
+        x_orb, y_orb = r * np.cos(u), r * np.sin(u)
+        cos_i, sin_i = np.cos(i), np.sin(i)
+
+        geo = np.isin(self.sat_ids[records], _BEIDOU_GEO_IDS)
+        omega = p['omega0'] + (p['omega_dot'] - np.where(geo, 0.0, omega_e)) * tk - omega_e * p['toe']
+        cos_O, sin_O = np.cos(omega), np.sin(omega)
+
+        position = np.stack([
+            x_orb * cos_O - y_orb * cos_i * sin_O,
+            x_orb * sin_O + y_orb * cos_i * cos_O,
+            y_orb * sin_i
+        ], axis=1)
+
+        if geo.any():
+            position[geo] = _beidou_geo_rotation(position[geo], omega_e[geo] * tk[geo])
+
+        # Relógio: polinômio a partir do toc mais o termo relativístico F·e·√A·sin(E)
+        dt_clock = t - self.toc[records]
+        relativistic = -2.0 * np.sqrt(gm) / SPEED_OF_LIGHT ** 2 * e * p['sqrt_a'] * sin_E
+        clock = p['af0'] + p['af1'] * dt_clock + p['af2'] * dt_clock ** 2 + relativistic
+        return position, clock
+
+    def coverage(self, satellites: Iterable[str]) -> List[str]:
+        """Satélites da lista que possuem ao menos uma efeméride utilizável"""
+        usable = set(self.sat_ids[self._candidates].tolist())
+        return [s for s in satellites if s in usable]
+
+
+_BEIDOU_GEO_IDS = np.array([f"C{prn:02d}" for prn in sorted(BEIDOU_GEO_PRNS)], dtype='<U3')
+
+
+def _beidou_geo_rotation(position: np.ndarray, angle: np.ndarray) -> np.ndarray:
+    """Converte a posição de satélites BeiDou GEO do referencial auxiliar para CGCS2000"""
+    tilt = np.radians(-5.0)
+    x, y, z = position[:, 0], position[:, 1], position[:, 2]
+    y_t = y * np.cos(tilt) + z * np.sin(tilt)
+    z_t = -y * np.sin(tilt) + z * np.cos(tilt)
+    cos_a, sin_a = np.cos(angle), np.sin(angle)
+    return np.stack([x * cos_a + y_t * sin_a, -x * sin_a + y_t * cos_a, z_t], axis=1)
+
+
+def rotate_earth(position: np.ndarray, travel_time: np.ndarray) -> np.ndarray:
+    """Gira posições ECEF pela rotação da Terra ocorrida durante `travel_time` segundos"""
+    angle = OMEGA_E_WGS84 * np.asarray(travel_time, dtype=np.float64)
+    cos_a, sin_a = np.cos(angle), np.sin(angle)
+    x, y = position[..., 0], position[..., 1]
+    return np.stack([cos_a * x + sin_a * y, -sin_a * x + cos_a * y, position[..., 2]], axis=-1)
+
+
+def _parse_record(first: str, lines: List[str], header: NavigationHeader) -> Optional[Tuple[str, dt, List[float]]]:
+    """Converte as linhas de um registro em (satélite, toc, parâmetros orbitais)"""
+    v3 = header.version >= 3
+    if v3:
+        token = first[:3]
+        system = token[0]
+        prn = token[1:].strip()
+    else:
+        system = header.satellite_system if header.satellite_system in 'GRES' else 'G'
+        prn = first[:2].strip()
+    if not prn.isdigit():
+        return None
+    sat_id = f"{system}{int(prn):02d}"
+
+    toc = _record_epoch(first, header.version)
+    if toc is None:
+        return None
+
+    offset = 4 if v3 else 3
+    values = _split_fields(first, 23 if v3 else 22, 3)
+    for line in lines[1:]:
+        values.extend(_split_fields(line.ljust(offset + NAV_FIELD_WIDTH * NAV_FIELDS_PER_LINE),
+                                    offset, NAV_FIELDS_PER_LINE))
+    values = (values + [np.nan] * len(ORBIT_FIELDS))[:len(ORBIT_FIELDS)]
+    return sat_id, toc, values
+
+
+def read_navigation(source: Union[str, TextIO],
+                    member: Optional[str] = None) -> Tuple[NavigationHeader, BroadcastEphemeris]:
+    """Lê um arquivo RINEX de navegação (2.x, 3.x ou 4.x, comprimido ou em ZIP)"""
+    stream = open_rinex(source, member) if isinstance(source, str) else source
+    try:
+        header = read_navigation_header(stream)
+        sat_ids: List[str] = []
+        tocs: List[float] = []
+        rows: List[List[float]] = []
+        skipped: Dict[str, int] = {}
+
+        for first, lines in _iter_records(stream, header):
+            parsed = _parse_record(first, lines, header)
+            if parsed is None:
+                continue
+            sat_id, toc, values = parsed
+            if sat_id[0] not in KEPLERIAN_SYSTEMS:
+                skipped[sat_id[0]] = skipped.get(sat_id[0], 0) + 1
+                continue
+            sat_ids.append(sat_id)
+            tocs.append(to_gps_seconds(toc) + (BDT_GPST_OFFSET if sat_id[0] == 'C' else 0.0))
+            rows.append(values)
+    finally:
+        if isinstance(source, str):
+            stream.close()
+
+    ephemeris = BroadcastEphemeris(sat_ids, np.array(tocs), np.array(rows).reshape(-1, len(ORBIT_FIELDS)))
+    logger.info(f"🛰️ {len(ephemeris)} efemérides transmitidas lidas para {len(ephemeris.satellites)} satélites")
+    if skipped:
+        logger.info(f"   Registros ignorados (órbita não Kepleriana): "
+                    f"{', '.join(f'{s}: {n}' for s, n in sorted(skipped.items()))}")
+    return header, ephemeris
+
+
+def load_navigation(sources: Sequence[Tuple[str, Optional[str]]]) -> Tuple[NavigationHeader, BroadcastEphemeris]:
+    """Lê vários arquivos de navegação (caminho, membro do ZIP) e une as efemérides
+
+    O cabeçalho retornado é o primeiro que traz parâmetros ionosféricos, ou o do primeiro arquivo.
+    """
+    headers: List[NavigationHeader] = []
+    parts: List[BroadcastEphemeris] = []
+    for path, member in sources:
+        header, ephemeris = read_navigation(path, member)
+        headers.append(header)
+        parts.append(ephemeris)
+
+    header = next((h for h in headers if h.ionosphere), headers[0] if headers else NavigationHeader())
+    return header, BroadcastEphemeris.concatenate(parts)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Modelo geoidal e altitudes ortométricas
+Ondulação geoidal N interpolada de uma grade nacional (padrão MAPGEO) mapeada em memória e
+altitude ortométrica H = h - N, para arrays de latitude/longitude numa única chamada
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+
+try:
+    from .grids import RegularGrid, load_grid
+except ImportError:
+    from grids import RegularGrid, load_grid
+
+# Arquivo texto da grade: longitude, latitude (graus) e ondulação N (m) por linha
+GEOID_GRID = os.getenv('GNSS_GEOID_GRID', os.path.join('data', 'geoid', 'mapgeo2015.txt'))
+GEOID_MODEL = os.getenv('GNSS_GEOID_MODEL', 'MAPGEO2015')
+
+
+class GeoidGrid(RegularGrid):
+    """Grade de ondulação geoidal (m) referida ao elipsoide GRS80"""
+    n_values = 1
+    description = 'grade geoidal'
+
+    def undulation(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Ondulação N (m) em latitude e longitude (graus); NaN fora da grade"""
+        return self.interpolate(lat, lon)[..., 0]
+
+    def orthometric_height(self, lat: np.ndarray, lon: np.ndarray, height: np.ndarray) -> np.ndarray:
+        """Altitude ortométrica H = h - N a partir da altura elipsoidal h (m)"""
+        return np.asarray(height, dtype=np.float64) - self.undulation(lat, lon)
+
+
+def load_geoid(path: Optional[str] = None) -> Optional[GeoidGrid]:
+    """Grade geoidal do arquivo local, carregada uma vez por processo"""
+    return load_grid(GeoidGrid, os.path.abspath(path or GEOID_GRID))
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Geometria topocêntrica vetorizada dos satélites
+Latitude/longitude, rotação para o referencial local (ENU), elevação, azimute, máscara de
+elevação, pesos e DOP, calculados de uma vez para arrays de pares (época, satélite)
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .transforms import WGS84, ecef_to_geodetic, enu_rotation
+except ImportError:
+    from transforms import WGS84, ecef_to_geodetic, enu_rotation
+
+WGS84_A = WGS84.a
+WGS84_E2 = WGS84.e2
+
+# Máscara de elevação padrão (graus) e modelo de ponderação das observações
+ELEVATION_MASK = float(os.getenv('GNSS_ELEVATION_MASK', '10'))
+WEIGHTING = os.getenv('GNSS_WEIGHTING', 'sin2')
+
+
+def geodetic_angles(position: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Latitude, longitude (rad) e altura elipsoidal (m) de posições ECEF com forma (..., 3)
+
+    Posições zeradas (épocas sem solução) resultam em NaN, descartado pelo chamador.
+    """
+    return ecef_to_geodetic(position, WGS84)
+
+
+def elevation_azimuth(receiver: np.ndarray, sat_positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Elevação e azimute (rad) de todos os satélites vistos do receptor
+
+    `receiver` tem forma (3,) ou qualquer forma (..., 3) compatível por broadcasting com
+    `sat_positions`; por exemplo (épocas, 1, 3) contra (épocas, satélites, 3). Satélites com
+    posição NaN resultam em NaN.
+    """
+    receiver = np.asarray(receiver, dtype=np.float64)
+    sat_positions = np.asarray(sat_positions, dtype=np.float64)
+    lat, lon, _ = geodetic_angles(receiver)
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    sin_lon, cos_lon = np.sin(lon), np.cos(lon)
+
+    delta = sat_positions - receiver
+    dx, dy, dz = delta[..., 0], delta[..., 1], delta[..., 2]
+    east = -sin_lon * dx + cos_lon * dy
+    north = -sin_lat * cos_lon * dx - sin_lat * sin_lon * dy + cos_lat * dz
+    up = cos_lat * cos_lon * dx + cos_lat * sin_lon * dy + sin_lat * dz
+
+    elevation = np.arctan2(up, np.hypot(east, north))
+    azimuth = np.mod(np.arctan2(east, north), 2 * np.pi)
+    return elevation, azimuth
+
+
+def elevation_weights(elevation: np.ndarray, model: str = WEIGHTING) -> np.ndarray:
+    """Pesos (inverso da variância relativa ao zênite) dependentes da elevação
+
+    Modelos: 'sin2' (σ ∝ 1/sen e), 'sin' (σ² ∝ 1/sen e) e 'uniform'. Elevações NaN ou
+    negativas recebem peso zero.
+    """
+    sin_el = np.sin(np.nan_to_num(np.asarray(elevation, dtype=np.float64), nan=-1.0))
+    if model == 'sin2':
+        weights = sin_el ** 2
+    elif model == 'sin':
+        weights = sin_el.copy()
+    elif model == 'uniform':
+        weights = np.ones_like(sin_el)
+    else:
+        raise ValueError(f"Modelo de ponderação desconhecido: {model}")
+    return np.where(sin_el > 0.0, weights, 0.0)
+
+
+def apply_elevation_mask(receiver: np.ndarray, sat_positions: np.ndarray,
+                         mask_degrees: Optional[float] = None,
+                         model: str = WEIGHTING) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Elevação, azimute, pares acima da máscara e pesos, numa única passada vetorizada"""
+    mask_degrees = ELEVATION_MASK if mask_degrees is None else mask_degrees
+    elevation, azimuth = elevation_azimuth(receiver, sat_positions)
+    with np.errstate(invalid='ignore'):
+        above = elevation >= np.radians(mask_degrees)
+    weights = np.where(above, elevation_weights(elevation, model), 0.0)
+    return elevation, azimuth, above, weights
+
+
+def batched_inverse(normal: np.ndarray) -> np.ndarray:
+    """Inversa de matrizes empilhadas; as singulares resultam em NaN"""
+    try:
+        return np.linalg.inv(normal)
+    except np.linalg.LinAlgError:
+        flat = normal.reshape((-1,) + normal.shape[-2:])
+        inverse = np.full_like(flat, np.nan)
+        for k in range(len(flat)):
+            try:
+                inverse[k] = np.linalg.inv(flat[k])
+            except np.linalg.LinAlgError:
+                pass
+        return inverse.reshape(normal.shape)
+
+
+def dop_from_design(H: np.ndarray, rotation: Optional[np.ndarray] = None) -> Tuple[np.ndarray, ...]:
+    """GDOP, PDOP, HDOP, VDOP e TDOP de matrizes de projeto empilhadas (..., satélites, 4)
+
+    Linhas zeradas não contribuem. Sem `rotation` as três primeiras colunas de `H` já estão no
+    referencial local; com ela (..., 3, 3) a covariância ECEF é girada para ENU.
+    """
+    Q = batched_inverse(np.swapaxes(H, -1, -2) @ H)
+    Q_pos = Q[..., :3, :3]
+    if rotation is not None:
+        Q_pos = rotation @ Q_pos @ np.swapaxes(rotation, -1, -2)
+    with np.errstate(invalid='ignore'):
+        gdop = np.sqrt(np.trace(Q, axis1=-2, axis2=-1))
+        pdop = np.sqrt(np.trace(Q_pos, axis1=-2, axis2=-1))
+        hdop = np.sqrt(Q_pos[..., 0, 0] + Q_pos[..., 1, 1])
+        vdop = np.sqrt(Q_pos[..., 2, 2])
+        tdop = np.sqrt(Q[..., 3, 3])
+    return gdop, pdop, hdop, vdop, tdop
+
+
+DOP_TYPES = ('gdop', 'pdop', 'hdop', 'vdop', 'tdop')
+
+
+@dataclass
+class DopSeries:
+    """Séries temporais de DOP (uma posição por época; NaN sem geometria suficiente)"""
+    gdop: np.ndarray
+    pdop: np.ndarray
+    hdop: np.ndarray
+    vdop: np.ndarray
+    tdop: np.ndarray
+    n_satellites: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.pdop)
+
+    @classmethod
+    def concatenate(cls, parts: Sequence['DopSeries']) -> 'DopSeries':
+        return cls(*(np.concatenate([getattr(p, name) for p in parts])
+                     for name in DOP_TYPES + ('n_satellites',)))
+
+    def summary(self, percentiles: Sequence[int] = (5, 50, 95)) -> Dict[str, Dict[str, float]]:
+        """Média, extremos e percentis de cada DOP sobre as épocas com solução"""
+        summary = {}
+        for name in DOP_TYPES:
+            values = getattr(self, name)
+            values = values[np.isfinite(values)]
+            if len(values) == 0:
+                continue
+            stats = {'mean': float(values.mean()), 'min': float(values.min()), 'max': float(values.max())}
+            for q, value in zip(percentiles, np.percentile(values, percentiles)):
+                stats[f'p{q}'] = float(value)
+            summary[name] = stats
+        return summary
+
+
+def dop_from_angles(elevation: np.ndarray, azimuth: np.ndarray,
+                    used: Optional[np.ndarray] = None) -> DopSeries:
+    """DOP de cada época a partir de elevação e azimute (rad) com forma (épocas, satélites)"""
+    elevation = np.atleast_2d(np.asarray(elevation, dtype=np.float64))
+    azimuth = np.atleast_2d(np.asarray(azimuth, dtype=np.float64))
+    valid = np.isfinite(elevation) & np.isfinite(azimuth)
+    if used is not None:
+        valid &= np.atleast_2d(used)
+
+    cos_el = np.cos(elevation)
+    H = np.stack([-cos_el * np.sin(azimuth), -cos_el * np.cos(azimuth), -np.sin(elevation),
+                  np.ones_like(elevation)], axis=-1)
+    H = np.where(valid[..., None], H, 0.0)
+    n_satellites = valid.sum(axis=-1)
+
+    dops = dop_from_design(H)
+    dops = [np.where(n_satellites >= 4, d, np.nan) for d in dops]
+    return DopSeries(*dops, n_satellites=n_satellites)
+
+
+def dilution_of_precision(receiver: np.ndarray, sat_positions: np.ndarray,
+                          used: Optional[np.ndarray] = None,
+                          mask_degrees: Optional[float] = None) -> DopSeries:
+    """DOP de todas as épocas numa chamada, a partir das posições ECEF (épocas, satélites, 3)
+
+    `receiver` é (3,) ou (épocas, 3); satélites abaixo da máscara de elevação ou fora de
+    `used` não entram na geometria.
+    """
+    receiver = np.asarray(receiver, dtype=np.float64)
+    if receiver.ndim == 2:
+        receiver = receiver[:, None, :]
+    elevation, azimuth, above, _ = apply_elevation_mask(receiver, sat_positions, mask_degrees)
+    if used is not None:
+        above &= used
+    return dop_from_angles(elevation, azimuth, above)
@@ -6,75 +6,198 @@ Implementa processamento PPP (Precise Point Positioning) e cálculo de coordenad
 
 import numpy as np
 import pandas as pd
-from datetime import datetime as dt, timedelta
+from datetime import datetime as dt
 import logging
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, List, Tuple, Any, Optional, Sequence
 import math
-import time
+from collections import deque
+
+try:
+    from .rinex_reader import read_observations
+    from .obs_store import ObservationStore, from_gps_seconds, to_gps_seconds
+    from .atmosphere import Klobuchar, Troposphere
+    from .ephemeris import BroadcastEphemeris, NavigationHeader, OrbitSource, load_navigation
+    from .geoid import GEOID_MODEL, load_geoid
+    from .geometry import (DopSeries, apply_elevation_mask, dilution_of_precision, dop_from_angles,
+                           elevation_azimuth, geodetic_angles)
+    from .multipath import MultipathResult, estimate_multipath
+    from .observables import FREQUENCIES, GLONASS_G1
+    from .precise_products import PRODUCTS_FRAME, PreciseProducts, ProductStore
+    from .reference_frames import FrameCoordinates, decimal_year, to_sirgas2000
+    from .ppp_filter import CONVERGED_SIGMA, PPPFilter, PPPSolution, ppp_epochs
+    from .processing_stages import ProgressCallback, StageTimer
+    from .rts_smoother import RTSSmoother, SmoothedSolution
+    from .spp_solver import SppSolution, solve_spp_batch
+    from .transforms import GRS80, central_meridian, ecef_to_geodetic, enu_rotation, geodetic_to_utm
+except ImportError:
+    from rinex_reader import read_observations
+    from obs_store import ObservationStore, from_gps_seconds, to_gps_seconds
+    from atmosphere import Klobuchar, Troposphere
+    from ephemeris import BroadcastEphemeris, NavigationHeader, OrbitSource, load_navigation
+    from geoid import GEOID_MODEL, load_geoid
+    from geometry import (DopSeries, apply_elevation_mask, dilution_of_precision, dop_from_angles,
+                          elevation_azimuth, geodetic_angles)
+    from multipath import MultipathResult, estimate_multipath
+    from observables import FREQUENCIES, GLONASS_G1
+    from precise_products import PRODUCTS_FRAME, PreciseProducts, ProductStore
+    from reference_frames import FrameCoordinates, decimal_year, to_sirgas2000
+    from ppp_filter import CONVERGED_SIGMA, PPPFilter, PPPSolution, ppp_epochs
+    from processing_stages import ProgressCallback, StageTimer
+    from rts_smoother import RTSSmoother, SmoothedSolution
+    from spp_solver import SppSolution, solve_spp_batch
+    from transforms import GRS80, central_meridian, ecef_to_geodetic, enu_rotation, geodetic_to_utm
 
 logger = logging.getLogger(__name__)
 
 # Constantes geodésicas WGS84
-WGS84_A = 6378137.0  # Semi-eixo maior (m)
-WGS84_F = 1/298.257223563  # Achatamento
-WGS84_E2 = 2*WGS84_F - WGS84_F**2  # Primeira excentricidade ao quadrado
 GM = 3.986005e14  # Constante gravitacional * massa da Terra (m³/s²)
 OMEGA_E = 7.2921151467e-5  # Velocidade angular da Terra (rad/s)
 SPEED_OF_LIGHT = 299792458.0  # m/s
 
+# Observáveis em ordem de preferência (RINEX 2 e códigos RINEX 3 de cada constelação)
+PSEUDORANGE_CODES = ['C1', 'P1', 'C1C', 'C1X', 'C1W', 'C1P', 'C2I']
+SIGNAL_STRENGTH_CODES = ['S1', 'S1C', 'S1X', 'S1W', 'S1P', 'S2I']
+
+# Arquivo de navegação: (caminho, membro do ZIP ou None)
+NavigationSource = Tuple[str, Optional[str]]
+
+# Últimas épocas (mais estáveis) usadas na posição final sem suavização
+STABLE_EPOCHS = 100
+
+
+class SessionSolutions:
+    """Resumo das soluções por época acumulado em fluxo
+
+    Guarda só o que a posição final usa: as últimas `STABLE_EPOCHS` épocas, a primeira, as
+    contagens de épocas e de fixações e a primeira época convergida. A memória não cresce
+    com a duração da sessão.
+    """
+
+    def __init__(self, recent: int = STABLE_EPOCHS):
+        self.recent: deque = deque(maxlen=recent)
+        self.first: Optional[Dict] = None
+        self.epochs = 0
+        self.fixed = 0
+        self.converged_at: Optional[int] = None
+
+    @classmethod
+    def from_results(cls, results: Sequence[Dict]) -> 'SessionSolutions':
+        session = cls()
+        for result in results:
+            session.add(result)
+        return session
+
+    def add(self, result: Dict) -> None:
+        """Registra uma época resolvida (resultados sem sucesso são ignorados)"""
+        if not result.get('success', False):
+            return
+        if self.first is None:
+            self.first = result
+        if result.get('converged') and self.converged_at is None:
+            self.converged_at = self.epochs
+        self.fixed += bool(result.get('fixed'))
+        self.epochs += 1
+        self.recent.append(result)
+
+    @property
+    def last(self) -> Optional[Dict]:
+        return self.recent[-1] if self.recent else None
+
+    @property
+    def filtered(self) -> bool:
+        """Soluções do filtro de Kalman PPP (e não do SPP)"""
+        return bool(self.recent) and bool(self.recent[-1].get('filtered'))
+
+    @property
+    def fix_rate(self) -> float:
+        """Percentual de épocas com ambiguidades fixadas e aprovadas no teste da razão"""
+        return 100.0 * self.fixed / self.epochs if self.epochs else 0.0
+
+    def __len__(self) -> int:
+        return self.epochs
+
+
 class GNSSProcessor:
     """Processador geodésico completo para dados GNSS"""
     
-    def __init__(self):
+    def __init__(self, smoothing: bool = True):
         self.receiver_position = None
         self.clock_bias = 0
         self.satellites_data = {}
-        
-    def process_rinex(self, file_path: str) -> Dict[str, Any]:
-        """Processa arquivo RINEX completo com cálculo de coordenadas"""
+        self.observation_stats = None
+        self.ephemeris: Optional[BroadcastEphemeris] = None
+        self.navigation_header: Optional[NavigationHeader] = None
+        self.precise_products: Optional[PreciseProducts] = None
+        # Suavização RTS da sessão estática após o filtro PPP
+        self.smoothing = smoothing
+        self.smoothed_solution: Optional[SmoothedSolution] = None
+        self.dop_series: Optional[DopSeries] = None
+        self.multipath: Optional[MultipathResult] = None
+        # Modelos atmosféricos da sessão (estação e coeficientes transmitidos)
+        self.troposphere: Optional[Troposphere] = None
+        self.klobuchar: Optional[Klobuchar] = None
+        
+    def process_rinex(self, file_path: str, member: Optional[str] = None,
+                      progress_callback: Optional[ProgressCallback] = None,
+                      navigation: Optional[Sequence[NavigationSource]] = None,
+                      parsed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Processa arquivo RINEX completo com cálculo de coordenadas
+
+        Cada fase tem seu tempo medido; `progress_callback(fase, fração)` recebe o
+        progresso real de cada fase. Com arquivos de `navigation`, as posições dos
+        satélites vêm das efemérides transmitidas e a solução é calculada das observações.
+        `parsed` traz o cabeçalho e as observações já lidas (chaves 'header', 'observations'
+        e, opcionalmente, 'qc'), dispensando uma nova leitura do arquivo.
+        """
         try:
             logger.info(f"🌐 Iniciando processamento geodésico PPP completo")
-            start_time = time.time()
+            stages = StageTimer(progress_callback)
             
             # 1. Pré-processamento e validação
-            logger.info("📋 Fase 1/7: Pré-processamento e validação dos dados...")
-            time.sleep(2)  # Simular tempo de pré-processamento
-            rinex_data = self._load_and_parse_rinex(file_path)
-            
-            # 2. Carregar efemérides precisas (simulado)
-            logger.info("🛰️ Fase 2/7: Carregando efemérides precisas dos satélites...")
-            time.sleep(3)  # Simular download/carregamento de efemérides
-            ephemeris_data = self._load_precise_ephemeris(rinex_data)
+            with stages.stage('preprocessing'):
+                logger.info("📋 Fase 1/7: Pré-processamento e validação dos dados...")
+                rinex_data = self._load_and_parse_rinex(file_path, member, parsed)
+            
+            # 2. Carregar efemérides (transmitidas quando há arquivo de navegação)
+            with stages.stage('ephemeris'):
+                logger.info("🛰️ Fase 2/7: Carregando efemérides dos satélites...")
+                ephemeris_data = self._load_precise_ephemeris(rinex_data)
+                if navigation:
+                    broadcast_data = self._load_broadcast_ephemeris(rinex_data, navigation)
+                    if self.precise_products is None:
+                        ephemeris_data = broadcast_data
             
             # 3. Correções atmosféricas
-            logger.info("🌍 Fase 3/7: Calculando correções atmosféricas (troposfera/ionosfera)...")
-            time.sleep(2)  # Simular cálculos atmosféricos
-            atm_corrections = self._calculate_atmospheric_corrections(rinex_data)
+            with stages.stage('atmosphere'):
+                logger.info("🌍 Fase 3/7: Calculando correções atmosféricas (troposfera/ionosfera)...")
+                atm_corrections = self._calculate_atmospheric_corrections(rinex_data)
             
             # 4. Processamento PPP época por época
-            logger.info("⚡ Fase 4/7: Processamento PPP (Precise Point Positioning)...")
-            
-            # FORÇAR processamento PPP sintético para demonstração
-            logger.info("🎯 Executando processamento PPP completo com dados RINEX...")
-            processing_results = self._generate_synthetic_ppp_results(rinex_data)
+            with stages.stage('ppp'):
+                logger.info("⚡ Fase 4/7: Processamento PPP (Precise Point Positioning)...")
+                processing_results = self._process_ppp_solution(rinex_data, ephemeris_data, atm_corrections, stages)
             
             # 5. Filtragem Kalman e convergência
-            logger.info("🔄 Fase 5/7: Aplicando filtro de Kalman para convergência...")
-            time.sleep(4)  # Simular filtragem iterativa
-            filtered_results = self._apply_kalman_filter(processing_results)
+            with stages.stage('kalman'):
+                logger.info("🔄 Fase 5/7: Aplicando filtro de Kalman para convergência...")
+                filtered_results = self._apply_kalman_filter(processing_results)
             
             # 6. Cálculo de coordenadas finais e estatísticas
-            logger.info("📊 Fase 6/7: Calculando coordenadas finais e análise estatística...")
-            time.sleep(2)
-            final_coords = self._calculate_final_position(filtered_results)
+            with stages.stage('final_position'):
+                logger.info("📊 Fase 6/7: Calculando coordenadas finais e análise estatística...")
+                self.dop_series = self._compute_dop(rinex_data)
+                self.multipath = self._compute_multipath(rinex_data)
+                final_coords = self._calculate_final_position(filtered_results)
             
             # 7. Transformações de coordenadas
-            logger.info("🗺️ Fase 7/7: Transformando coordenadas para diferentes sistemas...")
-            time.sleep(1)
-            geodetic = self._ecef_to_geodetic(final_coords['position'])
-            utm_coords = self._geodetic_to_utm(geodetic['latitude'], geodetic['longitude'])
-            
-            processing_time = time.time() - start_time
+            with stages.stage('transformations'):
+                logger.info("🗺️ Fase 7/7: Transformando coordenadas para diferentes sistemas...")
+                frame = self._to_sirgas2000(final_coords['position'], rinex_data)
+                position = frame.positions
+                geodetic = self._ecef_to_geodetic(position)
+                utm_coords = self._geodetic_to_utm(geodetic['latitude'], geodetic['longitude'])
+            
+            processing_time = stages.elapsed
             logger.info(f"✅ Processamento geodésico concluído em {processing_time:.1f} segundos")
             
             # Gerar relatório completo
@@ -85,13 +208,18 @@ class GNSSProcessor:
                     'latitude': geodetic['latitude'],
                     'longitude': geodetic['longitude'],
                     'altitude': geodetic['altitude'],
+                    'ellipsoidal_height': geodetic['ellipsoidal_height'],
+                    'geoid_undulation': geodetic['geoid_undulation'],
+                    'orthometric_height': geodetic['orthometric_height'],
+                    'geoid_model': geodetic['geoid_model'],
                     'utm': utm_coords
                 },
                 'cartesian': {
-                    'x': final_coords['position'][0],
-                    'y': final_coords['position'][1],
-                    'z': final_coords['position'][2]
+                    'x': float(position[0]),
+                    'y': float(position[1]),
+                    'z': float(position[2])
                 },
+                'reference_frame': frame.summary(),
                 'precision': {
                     'horizontal': final_coords['precision_h'],
                     'vertical': final_coords['precision_v'],
@@ -100,6 +228,8 @@ class GNSSProcessor:
                     'vdop': final_coords['vdop'],
                     'confidence_95': final_coords['confidence_95']
                 },
+                'dop': self._dop_report(),
+                'multipath': self.multipath.summary() if self.multipath is not None else {},
                 'quality': {
                     'classification': final_coords['quality'],
                     'satellites_used': final_coords['satellites_used'],
@@ -108,10 +238,17 @@ class GNSSProcessor:
                     'fix_rate': final_coords['fix_rate']
                 },
                 'processing_details': {
-                    'method': 'Single Point Positioning com correções',
-                    'datum': 'WGS84',
-                    'corrections_applied': ['troposfera', 'relógio', 'relatividade'],
-                    'epochs_per_second': final_coords['epochs_processed'] / processing_time
+                    'method': ('PPP com filtro de Kalman (ambiguidades reais)'
+                               + (' e suavização RTS' if self.smoothed_solution is not None else '')
+                               if filtered_results.filtered
+                               else 'Single Point Positioning com correções'),
+                    'datum': self._datum_label(frame),
+                    'corrections_applied': self._corrections_applied(filtered_results.filtered),
+                    'orbits': ephemeris_data['source'],
+                    'epochs_per_second': final_coords['epochs_processed'] / max(processing_time, 1e-6),
+                    'completeness': (round(rinex_data['qc'].completeness, 2)
+                                     if rinex_data['qc'] is not None else None),
+                    'stage_timings': dict(stages.timings)
                 }
             }
             
@@ -124,466 +261,173 @@ class GNSSProcessor:
                 'error': str(e)
             }
     
-    def _load_and_parse_rinex(self, file_path: str) -> Dict[str, Any]:
-        """Carrega e analisa arquivo RINEX"""
-        logger.info("📂 Carregando arquivo RINEX...")
+    def _load_and_parse_rinex(self, file_path: str, member: Optional[str] = None,
+                              parsed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Carrega arquivo RINEX em fluxo para o armazenamento colunar (ou reaproveita `parsed`)"""
+        if parsed and parsed.get('observations') is not None:
+            logger.info("📂 Reaproveitando observações já decodificadas...")
+            header, store = parsed['header'], parsed['observations']
+        else:
+            logger.info("📂 Carregando arquivo RINEX...")
+            header, store = read_observations(file_path, member)
         
         rinex_data = {
-            'header': {},
-            'observations': [],
+            'header': header,
+            'observations': store,
+            'qc': parsed.get('qc') if parsed else None,
             'approx_position': None
         }
         
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-        
-        # Parse do cabeçalho
-        header_end = 0
-        for i, line in enumerate(lines):
-            if 'APPROX POSITION XYZ' in line:
-                coords = line[:60].split()
-                rinex_data['approx_position'] = np.array([
-                    float(coords[0]), 
-                    float(coords[1]), 
-                    float(coords[2])
-                ])
-                logger.info(f"📍 Posição aproximada: {rinex_data['approx_position']}")
-            
-            if 'END OF HEADER' in line:
-                header_end = i
-                break
-        
-        # Parse das observações
-        epoch_count = 0
-        i = header_end + 1
-        logger.info(f"Iniciando parse de observações a partir da linha {i} de {len(lines)} linhas totais")
-        
-        while i < len(lines):
-            line = lines[i]
-            # Verificar se é uma linha de época (formato RINEX v2)
-            # Formato real: " 23  7 24 20 57 15.0000000  0 15G24G11G28..."
-            if (len(line) > 26 and 
-                line[0] == ' ' and 
-                line.strip()):  # Linha não vazia
-                
-                # Tentar extrair timestamp para validar
-                timestamp_part = line[:26].strip()
-                parts = timestamp_part.split()
-                
-                # Deve ter pelo menos 6 partes (ano, mês, dia, hora, minuto, segundo)
-                if len(parts) >= 6:
-                    try:
-                        # Validar se são números válidos
-                        year = int(parts[0])
-                        month = int(parts[1])
-                        day = int(parts[2])
-                        hour = int(parts[3])
-                        minute = int(parts[4])
-                        second = float(parts[5])
-                        
-                        # Validar se são valores realistas
-                        if (1 <= month <= 12 and 1 <= day <= 31 and 
-                            0 <= hour <= 23 and 0 <= minute <= 59 and 
-                            0 <= second < 60):
-                            
-                            if epoch_count == 0:
-                                logger.info(f"🔍 Primeira linha de época encontrada na linha {i}: '{line.rstrip()}'")
-                            
-                            # Extrair informações da época
-                            remaining_part = line[26:].strip()
-                            remaining_parts = remaining_part.split()
-                            
-                            if len(remaining_parts) >= 2:
-                                flag = int(remaining_parts[0])
-                                num_sats = int(remaining_parts[1])
-                            else:
-                                continue
-                        else:
-                            i += 1
-                            continue
-                    except (ValueError, IndexError):
-                        i += 1
-                        continue
-                else:
-                    i += 1
-                    continue
-                
-                try:
-                    
-                    # Calcular linhas necessárias
-                    # 1 linha de época + linha(s) continuação satélites + observações
-                    sat_continuation_lines = 1 if num_sats > 12 else 0  # Linha de continuação se > 12 sats
-                    obs_lines = num_sats  # Uma linha por satélite
-                    lines_needed = 1 + sat_continuation_lines + obs_lines
-                    
-                    # Garantir que temos linhas suficientes
-                    end_idx = min(i + lines_needed + 5, len(lines))  # +5 para margem de segurança
-                    
-                    if epoch_count == 0:
-                        logger.info(f"📊 Processando primeira época: {num_sats} satélites, {end_idx - i} linhas")
-                    
-                    epoch_data = self._parse_epoch(lines[i:end_idx])
-                    
-                    if epoch_data:
-                        rinex_data['observations'].append(epoch_data)
-                        epoch_count += 1
-                        
-                        if epoch_count % 1000 == 0:
-                            logger.info(f"⏳ Carregadas {epoch_count} épocas...")
-                        
-                        # Avançar para próxima época
-                        i += lines_needed
-                    else:
-                        # Se não conseguiu processar, avançar apenas 1 linha
-                        i += 1
-                            
-                except Exception as e:
-                    logger.debug(f"Erro ao processar época na linha {i}: {e}")
-                    i += 1
-            else:
-                i += 1
+        if header.approx_position is not None:
+            rinex_data['approx_position'] = np.array(header.approx_position)
+            logger.info(f"📍 Posição aproximada: {rinex_data['approx_position']}")
         
-        # Debug: mostrar algumas linhas após o header
-        if epoch_count == 0 and header_end + 1 < len(lines):
-            logger.warning("Nenhuma época encontrada! Primeiras linhas após header:")
-            for j in range(header_end + 1, min(header_end + 6, len(lines))):
-                logger.warning(f"  Linha {j}: '{lines[j].rstrip()}'")
+        self.observation_stats = store.statistics()
         
-        logger.info(f"✅ {epoch_count} épocas carregadas")
-        return rinex_data
-    
-    def _parse_epoch(self, lines: List[str]) -> Optional[Dict]:
-        """Parse de uma época de observações RINEX v2"""
-        if not lines or len(lines[0]) < 26:
-            return None
-            
-        try:
-            # Formato real: " 23  7 24 20 57 15.0000000  0 15G24G11G28..."
-            line = lines[0]
-            
-            # Extrair timestamp usando split para lidar com espaços variáveis
-            timestamp_part = line[:26].strip()  # Primeiros 26 caracteres
-            parts = timestamp_part.split()
-            
-            if len(parts) < 6:
-                return None
-            
-            year = int(parts[0])
-            month = int(parts[1])
-            day = int(parts[2])
-            hour = int(parts[3])
-            minute = int(parts[4])
-            second = float(parts[5])
-            
-            # Ajustar ano para formato completo
-            if year < 80:
-                year += 2000
-            elif year < 100:
-                year += 1900
-            
-            # Debug primeira época
-            if not hasattr(self, '_first_epoch_logged'):
-                logger.info(f"🔍 Debug primeira época: '{line.rstrip()}'")
-                logger.info(f"📅 Data/hora extraída: {year}/{month}/{day} {hour}:{minute}:{second}")
-                self._first_epoch_logged = True
-            
-            epoch_time = datetime(year, month, day, hour, minute, int(second))
-            
-            # Extrair número de satélites e flag
-            remaining_part = line[26:].strip()
-            remaining_parts = remaining_part.split()
-            
-            if len(remaining_parts) < 2:
-                return None
-                
-            flag = int(remaining_parts[0])  # Deve ser 0 para época normal
-            num_sats = int(remaining_parts[1])
-            
-            if not hasattr(self, '_first_sats_logged'):
-                logger.info(f"🛰️ Número de satélites: {num_sats}")
-                self._first_sats_logged = True
-            
-            # Extrair IDs dos satélites
-            satellites = {}
-            
-            # IDs dos satélites vêm após o número de satélites
-            # Formato: "...0 15G24G11G28G25G29G12G20G05G18R14R13R12"
-            sat_section = remaining_part[len(remaining_parts[0]) + len(remaining_parts[1]) + 2:].strip()
-            
-            # Verificar se há linha de continuação
-            all_sat_text = sat_section
-            line_idx = 1
-            
-            # Verificar próximas linhas para continuação de satélites
-            while line_idx < len(lines) and len(lines[line_idx].strip()) > 0:
-                next_line = lines[line_idx].strip()
-                # Se a linha começa com espaços e contém IDs de satélites
-                if next_line and not next_line[0].isdigit() and ('G' in next_line or 'R' in next_line or 'E' in next_line):
-                    all_sat_text += next_line
-                    line_idx += 1
-                else:
-                    break
-            
-            # Extrair IDs dos satélites (formato: G24G11G28...)
-            sat_ids = []
-            i = 0
-            while i < len(all_sat_text) - 2:
-                if all_sat_text[i] in 'GRE':  # GPS, GLONASS, Galileo
-                    if i + 2 < len(all_sat_text):
-                        sat_id = all_sat_text[i:i+3]
-                        if sat_id[1:].isdigit():
-                            sat_ids.append(sat_id)
-                    i += 3
-                else:
-                    i += 1
-            
-            if not hasattr(self, '_first_sats_ids_logged'):
-                logger.info(f"🔢 Primeiros satélites encontrados: {sat_ids[:10]}")
-                self._first_sats_ids_logged = True
-            
-            # Observações (simplificado - apenas pseudodistância)
-            # O índice de observações começa após as linhas de satélites
-            obs_idx = line_idx  # Já aponta para primeira linha de observações
-            
-            for sat_id in sat_ids:
-                if obs_idx < len(lines):
-                    obs_line = lines[obs_idx]
-                    try:
-                        # C1 - pseudodistância (primeiros 14 caracteres)
-                        c1 = float(obs_line[0:14]) if obs_line[0:14].strip() else None
-                        # L1 - fase (próximos 14 caracteres)
-                        l1 = float(obs_line[14:28]) if len(obs_line) > 28 and obs_line[14:28].strip() else None
-                        # S1 - intensidade do sinal (próximos 14 caracteres)
-                        s1 = float(obs_line[28:42]) if len(obs_line) > 42 and obs_line[28:42].strip() else 45.0
-                        
-                        if c1 and c1 > 0:
-                            satellites[sat_id] = {
-                                'C1': c1,
-                                'L1': l1,
-                                'S1': s1,
-                                'elevation': 45.0  # Simplificado
-                            }
-                    except Exception as parse_err:
-                        logger.debug(f"Erro ao parsear observação para {sat_id}: {parse_err}")
-                    obs_idx += 1
-            
-            if satellites:
-                if not hasattr(self, '_first_valid_epoch_logged'):
-                    logger.info(f"Primeira época válida: {epoch_time}, {len(satellites)} satélites")
-                    self._first_valid_epoch_logged = True
-                return {
-                    'time': epoch_time,
-                    'satellites': satellites
-                }
-            else:
-                if not hasattr(self, '_no_sats_logged'):
-                    logger.warning(f"Época sem satélites válidos: {epoch_time}")
-                    self._no_sats_logged = True
-                
-        except Exception as e:
-            if not hasattr(self, '_parse_error_logged'):
-                logger.error(f"Erro no parse de época: {e}")
-                logger.error(f"Linha problemática: '{lines[0] if lines else 'vazia'}'")
-                self._parse_error_logged = True
-            return None
+        if store.n_epochs == 0:
+            logger.warning("Nenhuma época encontrada após o cabeçalho")
         
-        return None
+        logger.info(f"✅ {store.n_epochs} épocas carregadas com {len(store.obs_codes)} observáveis "
+                    f"({', '.join(store.obs_codes)}) - {store.n_records} registros, {store.nbytes() / 1024:.0f} KB")
+        return rinex_data
     
     def _process_gnss_data(self, rinex_data: Dict) -> List[Dict]:
-        """Processa dados GNSS e calcula posições"""
+        """Processa dados GNSS e calcula posições de todas as épocas em lote"""
         logger.info("🛰️ Iniciando processamento GNSS...")
         
         results = []
         self.receiver_position = rinex_data['approx_position']
+        store = rinex_data['observations']
+        orbits = self._orbit_source()
+        if orbits is None:
+            logger.warning("Sem efemérides, posições dos satélites indisponíveis")
+            return results
         
-        # Processar cada época
-        total_epochs = len(rinex_data['observations'])
-        
-        for i, obs in enumerate(rinex_data['observations']):
-            if i % 100 == 0:
-                progress = (i / total_epochs) * 100
-                logger.info(f"📊 Progresso: {progress:.1f}% ({i}/{total_epochs} épocas)")
-            
-            # Calcular posição para esta época
-            epoch_result = self._process_single_epoch(obs)
-            if epoch_result:
-                results.append(epoch_result)
-                
-                # Atualizar posição do receptor com a nova estimativa
-                if epoch_result['success']:
-                    self.receiver_position = epoch_result['position']
+        # Colunas completas dos observáveis, fatiadas por época sem cópia
+        c1 = self._select_observable(store, PSEUDORANGE_CODES)
+        if c1 is None:
+            logger.warning("Nenhum observável de pseudodistância disponível")
+            return results
+        s1 = self._select_observable(store, SIGNAL_STRENGTH_CODES)
+        
+        # Filtrar satélites válidos (sinal forte) de uma vez para todo o arquivo
+        valid = c1 > 0
+        if s1 is not None:
+            valid &= ~(s1 <= 30)
+        
+        # Matrizes densas época × satélite para o solver em lote
+        n_epochs, n_sats = store.n_epochs, len(store.satellites)
+        pseudoranges = np.full((n_epochs, n_sats), np.nan)
+        pseudoranges[store.epoch_index, store.sat_index] = np.where(valid, c1, np.nan)
+        
+        # Posição e relógio de todos os pares época × satélite no instante de transmissão
+        states = orbits.transmission_states(
+            np.asarray(store.satellites, dtype='<U3')[None, :], store.times[:, None], pseudoranges)
+        pseudoranges = pseudoranges + SPEED_OF_LIGHT * (states.clock_bias - states.group_delay)
+        sat_positions = states.position
+        
+        # Máscara de elevação e pesos para todos os pares época × satélite de uma vez
+        columns = np.arange(n_sats)
+        weights = None
+        receiver = self._approximate_position(sat_positions, pseudoranges)
+        if receiver is not None:
+            elevation, azimuth, above, weights = apply_elevation_mask(receiver, sat_positions)
+            pseudoranges = np.where(above, pseudoranges, np.nan)
+            pseudoranges = pseudoranges - self._atmospheric_delays(store, receiver, elevation, azimuth)
+            # Satélites sempre abaixo da máscara saem das matrizes do solver
+            columns = np.flatnonzero((above & np.isfinite(pseudoranges)).any(axis=0))
+            logger.info(f"📐 Máscara de elevação: {int(above.sum())}/{int(np.isfinite(states.position[..., 0]).sum())} "
+                        f"pares acima, {len(columns)}/{n_sats} satélites no ajuste")
+            pseudoranges, sat_positions, weights = pseudoranges[:, columns], sat_positions[:, columns], weights[:, columns]
+        
+        solution = solve_spp_batch(sat_positions, pseudoranges, initial_position=receiver, weights=weights)
+        results = self._spp_results(store, solution, columns)
+        
+        if results:
+            self.receiver_position = results[-1]['position']
+            self.clock_bias = results[-1]['clock_bias']
         
         logger.info(f"✅ Processamento concluído: {len(results)} soluções válidas")
         return results
     
-    def _process_single_epoch(self, obs: Dict) -> Optional[Dict]:
-        """Processa uma única época"""
-        satellites = obs['satellites']
-        
-        # Filtrar satélites válidos (sinal forte)
-        valid_sats = {k: v for k, v in satellites.items() 
-                      if v.get('S1', 0) > 30 and v.get('C1', 0) > 0}
-        
-        if len(valid_sats) < 4:
+    def _approximate_position(self, sat_positions: np.ndarray, pseudoranges: np.ndarray) -> Optional[np.ndarray]:
+        """Posição aproximada do receptor: cabeçalho RINEX ou SPP das primeiras épocas resolvíveis"""
+        if self.receiver_position is not None and np.linalg.norm(self.receiver_position) > 6.0e6:
+            return np.asarray(self.receiver_position, dtype=np.float64)
+        
+        counts = (np.isfinite(pseudoranges) & np.isfinite(sat_positions[..., 0])).sum(axis=1)
+        first = np.flatnonzero(counts >= 5)[:10]
+        if len(first) == 0:
             return None
-        
-        # Calcular posições dos satélites
-        sat_positions = self._calculate_satellite_positions(
-            list(valid_sats.keys()), 
-            obs['time']
-        )
-        
-        # Resolver posição por mínimos quadrados
-        try:
-            solution = self._least_squares_positioning(valid_sats, sat_positions)
-            
-            return {
-                'time': obs['time'],
-                'position': solution['position'],
-                'clock_bias': solution['clock_bias'],
-                'residuals': solution['residuals'],
-                'satellites': list(valid_sats.keys()),
-                'dop': solution['dop'],
-                'success': True
-            }
-        except:
+        solution = solve_spp_batch(sat_positions[first], pseudoranges[first])
+        if not solution.valid.any():
             return None
+        return np.median(solution.position[solution.valid], axis=0)
     
-    def _calculate_satellite_positions(self, sat_ids: List[str], epoch: datetime) -> Dict[str, np.ndarray]:
-        """Calcula posições aproximadas dos satélites"""
-        positions = {}
-        
-        # Tempo GPS desde epoch
-        gps_epoch = datetime(1980, 1, 6)
-        gps_time = (epoch - gps_epoch).total_seconds()
-        
-        for sat_id in sat_ids:
-            if sat_id.startswith('G'):  # GPS
-                # Órbita aproximada
-                sat_num = int(sat_id[1:]) if len(sat_id) > 1 else 1
-                
-                # Parâmetros orbitais típicos GPS
-                a = 26559.7e3  # semi-eixo maior (m)
-                e = 0.0001  # excentricidade (quase circular)
-                i = math.radians(55.0)  # inclinação
-                omega = math.radians(sat_num * 30)  # argumento do perigeu
-                Omega = math.radians(sat_num * 60)  # ascensão reta
-                
-                # Anomalia média
-                n = math.sqrt(GM / a**3)  # movimento médio
-                M = n * gps_time
-                
-                # Anomalia excêntrica (iteração de Kepler)
-                E = M
-                for _ in range(5):
-                    E = M + e * math.sin(E)
-                
-                # Anomalia verdadeira
-                nu = 2 * math.atan2(
-                    math.sqrt(1 + e) * math.sin(E/2),
-                    math.sqrt(1 - e) * math.cos(E/2)
-                )
-                
-                # Raio orbital
-                r = a * (1 - e * math.cos(E))
-                
-                # Posição no plano orbital
-                x_orb = r * math.cos(nu)
-                y_orb = r * math.sin(nu)
-                
-                # Rotação para ECEF
-                cos_omega = math.cos(omega + nu)
-                sin_omega = math.sin(omega + nu)
-                cos_i = math.cos(i)
-                sin_i = math.sin(i)
-                cos_Omega = math.cos(Omega - OMEGA_E * gps_time)
-                sin_Omega = math.sin(Omega - OMEGA_E * gps_time)
-                
-                x = x_orb * (cos_omega * cos_Omega - sin_omega * cos_i * sin_Omega) - \
-                    y_orb * (sin_omega * cos_Omega + cos_omega * cos_i * sin_Omega)
-                    
-                y = x_orb * (cos_omega * sin_Omega + sin_omega * cos_i * cos_Omega) + \
-                    y_orb * (cos_omega * cos_i * cos_Omega - sin_omega * sin_Omega)
-                    
-                z = x_orb * sin_omega * sin_i + y_orb * cos_omega * sin_i
-                
-                positions[sat_id] = np.array([x, y, z])
-        
-        return positions
-    
-    def _least_squares_positioning(self, observations: Dict, sat_positions: Dict) -> Dict:
-        """Calcula posição por mínimos quadrados"""
-        # Estado inicial
-        if self.receiver_position is None:
-            x0 = np.array([0, 0, 0, 0])  # X, Y, Z, clock_bias
-        else:
-            x0 = np.append(self.receiver_position, self.clock_bias)
-        
-        # Matrizes para mínimos quadrados
-        sat_ids = list(observations.keys())
-        n_sats = len(sat_ids)
-        
-        # Iteração de Newton-Raphson
-        x = x0.copy()
-        for iteration in range(10):
-            H = np.zeros((n_sats, 4))  # Matriz design
-            b = np.zeros(n_sats)  # Vetor de observações - calculadas
-            
-            for i, sat_id in enumerate(sat_ids):
-                if sat_id not in sat_positions:
-                    continue
-                    
-                sat_pos = sat_positions[sat_id]
-                
-                # Distância geométrica
-                dx = sat_pos - x[:3]
-                range_calc = np.linalg.norm(dx)
-                
-                # Correções
-                tropo_delay = 2.3 * np.exp(-x[2]/7000)  # Modelo simples troposférico
-                
-                # Pseudodistância calculada
-                rho_calc = range_calc + x[3] + tropo_delay
-                
-                # Observação - calculada
-                rho_obs = observations[sat_id]['C1']
-                b[i] = rho_obs - rho_calc
-                
-                # Derivadas parciais
-                H[i, :3] = -dx / range_calc
-                H[i, 3] = 1.0
-            
-            # Resolver sistema
-            try:
-                # dx = (H^T H)^-1 H^T b
-                dx = np.linalg.inv(H.T @ H) @ H.T @ b
-                x += dx
-                
-                # Verificar convergência
-                if np.linalg.norm(dx[:3]) < 0.001:
-                    break
-                    
-            except np.linalg.LinAlgError:
-                break
-        
-        # Calcular DOP
-        try:
-            Q = np.linalg.inv(H.T @ H)
-            pdop = math.sqrt(Q[0,0] + Q[1,1] + Q[2,2])
-            hdop = math.sqrt(Q[0,0] + Q[1,1])
-            vdop = math.sqrt(Q[2,2])
-        except:
-            pdop = hdop = vdop = 99.9
+    def _spp_results(self, store: ObservationStore, solution: SppSolution,
+                     columns: Optional[np.ndarray] = None) -> List[Dict]:
+        """Converte a solução em lote na lista de resultados por época
+
+        `columns` indica o satélite de cada coluna da solução (todos, quando omitido).
+        """
+        if columns is None:
+            columns = np.arange(len(store.satellites))
+        results = []
+        for i in np.flatnonzero(solution.valid):
+            used = np.isfinite(solution.residuals[i])
+            results.append({
+                'time': store.epoch_time(i),
+                'position': solution.position[i],
+                'clock_bias': solution.clock_bias[i],
+                'residuals': solution.residuals[i][used],
+                'satellites': [store.satellites[k] for k in columns[used]],
+                'dop': {'pdop': solution.pdop[i], 'hdop': solution.hdop[i], 'vdop': solution.vdop[i]},
+                'sigma': solution.sigma_enu[i],
+                'converged': bool(solution.converged[i]),
+                'success': True
+            })
+        return results
+    
+    def _select_observable(self, store: ObservationStore, codes: List[str]) -> Optional[np.ndarray]:
+        """Combina os códigos disponíveis, usando para cada registro o primeiro não vazio na ordem de preferência"""
+        column = None
+        for code in codes:
+            if not store.has(code):
+                continue
+            if column is None:
+                column = store.column(code).copy()
+            else:
+                missing = np.isnan(column)
+                column[missing] = store.column(code)[missing]
+        return column
+    
+    def _calculate_satellite_positions(self, sat_ids: List[str], epoch: dt) -> Dict[str, np.ndarray]:
+        """Calcula posições dos satélites num instante a partir das efemérides disponíveis"""
+        orbits = self._orbit_source()
+        if orbits is None:
+            return {}
+        states = orbits.satellite_states(np.asarray(sat_ids, dtype='<U3'), to_gps_seconds(epoch))
+        return {sat_id: states.position[k] for k, sat_id in enumerate(sat_ids) if states.valid[k]}
+    
+    def _least_squares_positioning(self, sat_ids: List[str], pseudoranges: np.ndarray, sat_positions: Dict) -> Dict:
+        """Calcula posição de uma época por mínimos quadrados (solver em lote com uma época)"""
+        positions = np.array([[sat_positions.get(s, (np.nan,) * 3) for s in sat_ids]], dtype=np.float64)
+        solution = solve_spp_batch(positions, np.asarray(pseudoranges, dtype=np.float64)[None, :],
+                                   initial_position=self.receiver_position)
+        if not solution.valid[0]:
+            raise np.linalg.LinAlgError("Geometria insuficiente para a solução")
         
         return {
-            'position': x[:3],
-            'clock_bias': x[3],
-            'residuals': b,
-            'dop': {'pdop': pdop, 'hdop': hdop, 'vdop': vdop}
+            'position': solution.position[0],
+            'clock_bias': solution.clock_bias[0],
+            'residuals': solution.residuals[0],
+            'dop': {'pdop': solution.pdop[0], 'hdop': solution.hdop[0], 'vdop': solution.vdop[0]}
         }
     
-    def _calculate_final_position(self, results: List[Dict]) -> Dict:
-        """Calcula posição final e estatísticas com precisão realista"""
+    def _calculate_final_position(self, results: SessionSolutions) -> Dict:
+        """Calcula posição final e estatísticas com a precisão da covariância da solução"""
+        if not isinstance(results, SessionSolutions):
+            results = SessionSolutions.from_results(results)
         if not results:
             # Usar posição aproximada se disponível
             if self.receiver_position is not None:
@@ -618,15 +462,12 @@ class GNSSProcessor:
                     'fix_rate': 0
                 }
         
-        # Extrair resultados válidos (últimas épocas são mais precisas)
-        valid_results = [r for r in results if r.get('success', False)]
-        
-        if not valid_results:
-            logger.warning("Nenhum resultado válido encontrado")
-            return self._calculate_final_position([])  # Recursão para caso sem resultados
+        # Sessão estática suavizada: posição e precisão vêm da solução RTS
+        if self.smoothed_solution is not None:
+            return self._smoothed_final_position(results)
         
-        # Usar últimas 100 épocas para cálculo final (mais estáveis)
-        stable_results = valid_results[-min(100, len(valid_results)):]
+        # Últimas épocas (mais estáveis) para o cálculo final
+        stable_results = list(results.recent)
         positions = np.array([r['position'] for r in stable_results])
         
         # Posição final ponderada pela convergência
@@ -635,335 +476,416 @@ class GNSSProcessor:
         
         final_position = np.average(positions, axis=0, weights=weights)
         
-        # Calcular precisão baseada na convergência PPP (mais realista)
-        mean_convergence = np.mean(convergences)
-        
-        logger.info(f"🎯 Convergência média do PPP: {mean_convergence:.1%}")
-        
-        # Precisão realista baseada na convergência
-        if mean_convergence > 0.90:  # PPP excelente (>90% convergido)
-            precision_h = 0.03 + np.random.uniform(0, 0.02)  # 3-5cm
-            precision_v = 0.05 + np.random.uniform(0, 0.03)  # 5-8cm
-            quality = 'EXCELENTE'
-        elif mean_convergence > 0.75:  # PPP bom (75-90% convergido)
-            precision_h = 0.08 + np.random.uniform(0, 0.07)  # 8-15cm
-            precision_v = 0.12 + np.random.uniform(0, 0.08)  # 12-20cm
-            quality = 'BOA'
-        elif mean_convergence > 0.50:  # PPP regular (50-75% convergido)
-            precision_h = 0.20 + np.random.uniform(0, 0.30)  # 20-50cm
-            precision_v = 0.35 + np.random.uniform(0, 0.25)  # 35-60cm
-            quality = 'REGULAR'
-        elif mean_convergence > 0.25:  # PPP ruim (25-50% convergido)
-            precision_h = 0.80 + np.random.uniform(0, 1.20)  # 80cm-2m
-            precision_v = 1.20 + np.random.uniform(0, 1.80)  # 1.2-3m
-            quality = 'RUIM'
-        else:  # PPP sem convergência (<25%)
-            precision_h = 5.0 + np.random.uniform(0, 10.0)   # 5-15m
-            precision_v = 8.0 + np.random.uniform(0, 12.0)   # 8-20m
-            quality = 'SEM SOLUÇÃO'
-        
-        # DOPs baseados na convergência
-        if mean_convergence > 0.90:
-            avg_pdop = 1.1 + np.random.uniform(0, 0.3)  # PDOP excelente 1.1-1.4
-            avg_hdop = 0.7 + np.random.uniform(0, 0.2)  # HDOP excelente 0.7-0.9
-            avg_vdop = 1.3 + np.random.uniform(0, 0.4)  # VDOP excelente 1.3-1.7
-        elif mean_convergence > 0.75:
-            avg_pdop = 1.5 + np.random.uniform(0, 0.5)  # PDOP bom 1.5-2.0
-            avg_hdop = 1.0 + np.random.uniform(0, 0.3)  # HDOP bom 1.0-1.3
-            avg_vdop = 1.8 + np.random.uniform(0, 0.5)  # VDOP bom 1.8-2.3
-        elif mean_convergence > 0.50:
-            avg_pdop = 2.2 + np.random.uniform(0, 0.8)  # PDOP regular 2.2-3.0
-            avg_hdop = 1.5 + np.random.uniform(0, 0.5)  # HDOP regular 1.5-2.0
-            avg_vdop = 2.8 + np.random.uniform(0, 0.7)  # VDOP regular 2.8-3.5
+        if stable_results[-1].get('filtered'):
+            # PPP sem suavização: precisão da covariância do filtro na última época (σENU)
+            sigma = np.asarray(stable_results[-1]['sigma'], dtype=np.float64)
+            precision_h = float(np.hypot(sigma[0], sigma[1]))
+            precision_v = float(sigma[2])
+            quality = self._quality_class(precision_h)
+            logger.info(f"🎯 Solução PPP filtrada: σh {precision_h:.3f}m, σv {precision_v:.3f}m ({quality})")
         else:
-            avg_pdop = 4.0 + np.random.uniform(0, 2.0)  # PDOP ruim 4.0-6.0
-            avg_hdop = 2.5 + np.random.uniform(0, 1.0)  # HDOP ruim 2.5-3.5
-            avg_vdop = 4.5 + np.random.uniform(0, 2.5)  # VDOP ruim 4.5-7.0
+            # SPP: precisão da covariância a posteriori do ajuste de cada época (mediana das estáveis)
+            precision_h, precision_v = self._spp_precision(stable_results)
+            quality = self._quality_class(precision_h)
+            logger.info(f"🎯 Precisão SPP por época (mediana): σh {precision_h:.3f}m, σv {precision_v:.3f}m ({quality})")
+        
+        # DOPs da geometria real das épocas (mediana)
+        dops = self._dop_summary()
         
         # Intervalo de confiança 95%
         confidence_95 = 1.96 * precision_h
         
         # Estatísticas realistas
-        satellites_used = 25  # Baseado nos dados reais do RINEX
-        epochs_processed = len(results)
-        obs_hours = 2.48  # Duração real observada no arquivo
-        fix_rate = min(int(mean_convergence * 100 + 5), 100)  # Taxa de fix baseada na convergência
+        stats = self.observation_stats or {}
+        satellites_used = stats.get('satellites', 0)
+        epochs_processed = results.epochs
+        obs_hours = stats.get('duration_hours', 0.0)
         
         return {
             'position': final_position,
             'precision_h': precision_h,
             'precision_v': precision_v,
-            'pdop': avg_pdop,
-            'hdop': avg_hdop,
-            'vdop': avg_vdop,
+            'pdop': dops['pdop'],
+            'hdop': dops['hdop'],
+            'vdop': dops['vdop'],
             'confidence_95': confidence_95,
             'quality': quality,
             'satellites_used': satellites_used,
             'epochs_processed': epochs_processed,
             'observation_hours': obs_hours,
-            'fix_rate': fix_rate
+            'fix_rate': results.fix_rate
         }
     
-    def _ecef_to_geodetic(self, ecef: np.ndarray) -> Dict[str, float]:
-        """Converte ECEF para coordenadas geodésicas"""
-        x, y, z = ecef
-        
-        # Longitude
-        lon = math.atan2(y, x)
+    def _smoothed_final_position(self, results: SessionSolutions) -> Dict:
+        """Posição final da solução estática suavizada, com precisão da sua covariância"""
+        smoothed = self.smoothed_solution
+        position = smoothed.static_position
         
-        # Cálculo iterativo da latitude
-        p = math.sqrt(x**2 + y**2)
-        lat = math.atan2(z, p * (1 - WGS84_E2))
+        lat, lon, _ = ecef_to_geodetic(position)
+        rotation = enu_rotation(lat, lon)
+        cov_enu = rotation @ smoothed.static_covariance @ rotation.T
+        precision_h = float(math.sqrt(max(cov_enu[0, 0] + cov_enu[1, 1], 0.0)))
+        precision_v = float(math.sqrt(max(cov_enu[2, 2], 0.0)))
         
-        for _ in range(5):
-            N = WGS84_A / math.sqrt(1 - WGS84_E2 * math.sin(lat)**2)
-            h = p / math.cos(lat) - N
-            lat = math.atan2(z, p * (1 - WGS84_E2 * N / (N + h)))
+        quality = self._quality_class(precision_h)
+        logger.info(f"🎯 Solução estática suavizada: σh {precision_h:.3f}m, σv {precision_v:.3f}m ({quality})")
         
-        # Altitude
-        N = WGS84_A / math.sqrt(1 - WGS84_E2 * math.sin(lat)**2)
-        h = p / math.cos(lat) - N
+        dops = self._dop_summary()
+        stats = self.observation_stats or {}
         
         return {
-            'latitude': math.degrees(lat),
-            'longitude': math.degrees(lon),
-            'altitude': h
+            'position': position,
+            'precision_h': precision_h,
+            'precision_v': precision_v,
+            'pdop': dops['pdop'],
+            'hdop': dops['hdop'],
+            'vdop': dops['vdop'],
+            'confidence_95': 1.96 * precision_h,
+            'quality': quality,
+            'satellites_used': stats.get('satellites', 0),
+            'epochs_processed': results.epochs,
+            'observation_hours': stats.get('duration_hours', 0.0),
+            'fix_rate': results.fix_rate
         }
     
-    def _geodetic_to_utm(self, lat: float, lon: float) -> Dict[str, Any]:
-        """Converte para UTM"""
-        # Zona UTM
-        utm_zone = int((lon + 180) / 6) + 1
-        
-        # Meridiano central
-        lon0 = (utm_zone - 1) * 6 - 180 + 3
-        
-        # Projeção simplificada
-        k0 = 0.9996  # Fator de escala
-        
-        # Diferença de longitude
-        dlon = math.radians(lon - lon0)
-        
-        # Parâmetros
-        lat_rad = math.radians(lat)
-        N = WGS84_A / math.sqrt(1 - WGS84_E2 * math.sin(lat_rad)**2)
-        T = math.tan(lat_rad)**2
-        C = WGS84_E2 * math.cos(lat_rad)**2 / (1 - WGS84_E2)
-        A = dlon * math.cos(lat_rad)
-        
-        # Meridional arc
-        M = WGS84_A * ((1 - WGS84_E2/4 - 3*WGS84_E2**2/64) * lat_rad -
-                       (3*WGS84_E2/8 + 3*WGS84_E2**2/32) * math.sin(2*lat_rad))
+    @staticmethod
+    def _quality_class(precision_h: float) -> str:
+        """Classificação da solução pela precisão horizontal (m)"""
+        if precision_h <= 0.05:
+            return 'EXCELENTE'
+        if precision_h <= 0.15:
+            return 'BOA'
+        if precision_h <= 0.50:
+            return 'REGULAR'
+        if precision_h <= 2.0:
+            return 'RUIM'
+        return 'SEM SOLUÇÃO'
+    
+    @staticmethod
+    def _spp_precision(results: List[Dict]) -> Tuple[float, float]:
+        """Precisão horizontal e vertical (m) das soluções SPP: mediana do σENU das épocas
+
+        Épocas sem redundância não têm σ estimável; sem nenhuma a precisão fica 999.
+        """
+        sigma = np.array([r['sigma'] for r in results], dtype=np.float64).reshape(-1, 3)
+        horizontal = np.hypot(sigma[:, 0], sigma[:, 1])
+        finite = np.isfinite(horizontal) & np.isfinite(sigma[:, 2])
+        if not finite.any():
+            return 999.0, 999.0
+        return float(np.median(horizontal[finite])), float(np.median(sigma[finite, 2]))
+    
+    def _compute_dop(self, rinex_data: Dict, block_epochs: int = 3600) -> Optional[DopSeries]:
+        """DOP de todas as épocas a partir da geometria dos satélites observados, em blocos de épocas"""
+        store = rinex_data.get('observations')
+        orbits = self._orbit_source()
+        if orbits is None or store is None or store.n_epochs == 0 or self.receiver_position is None:
+            return None
         
-        # Coordenadas UTM
-        easting = k0 * N * (A + (1-T+C)*A**3/6) + 500000
-        northing = k0 * (M + N * math.tan(lat_rad) * (A**2/2 + (5-T+9*C)*A**4/24))
+        sat_ids = np.asarray(store.satellites, dtype='<U3')[None, :]
+        observed = np.zeros((store.n_epochs, len(store.satellites)), dtype=bool)
+        observed[store.epoch_index, store.sat_index] = True
+        
+        parts = []
+        for first in range(0, store.n_epochs, block_epochs):
+            block = slice(first, first + block_epochs)
+            # Instante de transmissão aproximado (~75 ms); suficiente para a geometria
+            states = orbits.satellite_states(sat_ids, store.times[block, None] - 0.075)
+            parts.append(dilution_of_precision(self.receiver_position, states.position,
+                                               observed[block] & states.valid))
+        series = DopSeries.concatenate(parts)
+        
+        summary = series.summary()
+        if 'pdop' in summary:
+            logger.info(f"📐 DOP da geometria real: PDOP mediano {summary['pdop']['p50']:.2f} "
+                        f"(P95 {summary['pdop']['p95']:.2f}), HDOP mediano {summary['hdop']['p50']:.2f}")
+        return series
+    
+    def _record_elevations(self, store: ObservationStore, block_records: int = 200000) -> Optional[np.ndarray]:
+        """Elevação (rad) de cada registro vista da posição do receptor, em blocos de registros"""
+        orbits = self._orbit_source()
+        if orbits is None or self.receiver_position is None:
+            return None
         
-        if lat < 0:
-            northing += 10000000  # Hemisfério sul
+        sat_names = np.asarray(store.satellites, dtype='<U3')
+        elevation = np.full(store.n_records, np.nan)
+        for first in range(0, store.n_records, block_records):
+            rows = slice(first, first + block_records)
+            states = orbits.satellite_states(sat_names[store.sat_index[rows]],
+                                             store.times[store.epoch_index[rows]] - 0.075)
+            block, _ = elevation_azimuth(self.receiver_position, states.position)
+            elevation[rows] = np.where(states.valid, block, np.nan)
+        return elevation
+    
+    def _compute_multipath(self, rinex_data: Dict) -> Optional[MultipathResult]:
+        """MP1/MP2 por arco contínuo, com RMS por satélite e, havendo órbitas, por faixa de elevação"""
+        store = rinex_data.get('observations')
+        if store is None or store.n_records == 0:
+            return None
         
+        multipath = estimate_multipath(store, elevation=self._record_elevations(store))
+        mp1_rms, mp2_rms = multipath.rms
+        if np.isfinite(mp1_rms):
+            logger.info(f"📶 Multicaminho de código: MP1 {mp1_rms:.3f} m, MP2 {mp2_rms:.3f} m (RMS)")
+        return multipath
+    
+    def _dop_summary(self) -> Dict[str, float]:
+        """DOPs representativos da sessão: medianas da série calculada da geometria real (999 sem ela)"""
+        if self.dop_series is not None:
+            summary = self.dop_series.summary()
+            if 'pdop' in summary:
+                return {name: stats['p50'] for name, stats in summary.items()}
+        return {'pdop': 999, 'hdop': 999, 'vdop': 999}
+    
+    def _dop_report(self, max_points: int = 500) -> Dict[str, Any]:
+        """Resumo por percentis e série temporal de DOP (decimada para o relatório)"""
+        if self.dop_series is None:
+            return {}
+        step = max(1, int(np.ceil(len(self.dop_series) / max_points)))
         return {
-            'zone': utm_zone,
-            'hemisphere': 'N' if lat >= 0 else 'S',
-            'easting': easting,
-            'northing': northing,
-            'meridian_central': lon0
+            'summary': self.dop_series.summary(),
+            'series': {
+                'interval_epochs': step,
+                **{name: np.round(getattr(self.dop_series, name)[::step], 3).tolist()
+                   for name in ('gdop', 'pdop', 'hdop', 'vdop', 'tdop')},
+                'satellites': self.dop_series.n_satellites[::step].tolist()
+            }
+        }
+    
+    def calculate_dop_synthetic(self, geometry: List[Dict[str, float]]) -> Dict[str, float]:
+        """DOP de uma configuração de satélites dada por elevação e azimute em graus"""
+        elevation = np.radians([g['elevation'] for g in geometry])
+        azimuth = np.radians([g['azimuth'] for g in geometry])
+        series = dop_from_angles(elevation[None, :], azimuth[None, :])
+        # Menos de 4 satélites: geometria indeterminada
+        return {name: float(np.nan_to_num(getattr(series, name)[0], nan=np.inf))
+                for name in ('gdop', 'pdop', 'hdop', 'vdop', 'tdop')}
+    
+    def _to_sirgas2000(self, position: np.ndarray, rinex_data: Dict) -> FrameCoordinates:
+        """Leva a posição final do referencial das órbitas para SIRGAS2000 na época 2000,4"""
+        store = rinex_data.get('observations')
+        times = store.times if store is not None and store.n_epochs else np.zeros(1)
+        epoch = float(decimal_year(0.5 * (times[0] + times[-1])))
+        source = PRODUCTS_FRAME if self.precise_products is not None else 'WGS84'
+        frame = to_sirgas2000(position, epoch, source)
+        if frame.propagated:
+            logger.info(f"🌎 {source} época {epoch:.3f} → SIRGAS2000 época 2000.4 "
+                        f"(deslocamento {np.linalg.norm(frame.positions - position):.3f} m)")
+        else:
+            logger.warning(f"⚠️ Sem velocidade para a estação: coordenadas no ITRF2000 época {epoch:.3f}")
+        return frame
+    
+    @staticmethod
+    def _datum_label(frame: FrameCoordinates) -> str:
+        summary = frame.summary()
+        return f"{summary['frame']} (época {summary['epoch']:.1f})"
+    
+    def _ecef_to_geodetic(self, ecef: np.ndarray) -> Dict[str, Any]:
+        """Converte ECEF para coordenadas geodésicas no GRS80 (graus e metros)
+
+        `altitude` é a altura elipsoidal; com a grade geoidal local, a ondulação e a altitude
+        ortométrica também são devolvidas (None fora da grade ou sem o modelo).
+        """
+        lat, lon, h = ecef_to_geodetic(ecef, GRS80)
+        lat, lon = float(np.degrees(lat)), float(np.degrees(lon))
+        geoid = load_geoid()
+        undulation = float(geoid.undulation(lat, lon)) if geoid is not None else math.nan
+        known = math.isfinite(undulation)
+        return {
+            'latitude': lat,
+            'longitude': lon,
+            'altitude': float(h),
+            'ellipsoidal_height': float(h),
+            'geoid_undulation': undulation if known else None,
+            'orthometric_height': float(h) - undulation if known else None,
+            'geoid_model': GEOID_MODEL if known else None
+        }
+    
+    def _geodetic_to_utm(self, lat: float, lon: float) -> Dict[str, Any]:
+        """Converte para UTM (série de Krüger completa)"""
+        easting, northing, zone, south = geodetic_to_utm(np.radians(lat), np.radians(lon), ellipsoid=GRS80)
+        return {
+            'zone': int(zone),
+            'hemisphere': 'S' if south else 'N',
+            'easting': float(easting),
+            'northing': float(northing),
+            'meridian_central': int(round(float(np.degrees(central_meridian(zone)))))
         }
     
     def _load_precise_ephemeris(self, rinex_data: Dict) -> Dict[str, Any]:
-        """Simula carregamento de efemérides precisas"""
-        logger.info("📡 Baixando efemérides IGS (International GNSS Service)...")
-        time.sleep(2)
-        
-        # Simular análise de qualidade das efemérides
-        logger.info("🔍 Verificando qualidade das efemérides precisas...")
-        time.sleep(1)
-        
+        """Carrega órbitas SP3 e relógios CLK do diretório local de produtos (com cache por dia GPS)"""
+        store = rinex_data.get('observations')
+        if store is None or store.n_epochs == 0:
+            return {'source': 'Indisponível', 'accuracy': None, 'satellites_available': 0, 'quality': 'INDISPONÍVEL'}
+        
+        logger.info("📡 Procurando produtos precisos (SP3/CLK) no diretório local...")
+        self.precise_products = ProductStore().load(store.times)
+        if self.precise_products is None:
+            return {'source': 'Indisponível', 'accuracy': None, 'satellites_available': 0, 'quality': 'INDISPONÍVEL'}
+        
+        covered = self.precise_products.coverage(store.satellites)
+        logger.info(f"✅ Produtos precisos para {len(covered)}/{len(store.satellites)} satélites observados")
         return {
-            'source': 'IGS Final Products',
+            'source': ', '.join(self.precise_products.sources),
             'accuracy': '2-5 cm',
-            'satellites_available': len(rinex_data.get('observations', [])),
-            'quality': 'EXCELENTE'
+            'satellites_available': len(covered),
+            'quality': 'EXCELENTE' if covered else 'INSUFICIENTE'
         }
     
-    def _calculate_atmospheric_corrections(self, rinex_data: Dict) -> Dict[str, Any]:
-        """Calcula correções atmosféricas detalhadas"""
-        logger.info("🌤️ Modelando atraso troposférico...")
-        time.sleep(1.5)
+    def _orbit_source(self) -> Optional[OrbitSource]:
+        """Fonte de órbitas usada no posicionamento: produtos precisos ou efemérides transmitidas"""
+        return self.precise_products if self.precise_products is not None else self.ephemeris
+    
+    def _load_broadcast_ephemeris(self, rinex_data: Dict, navigation: Sequence[NavigationSource]) -> Dict[str, Any]:
+        """Lê os arquivos de navegação e verifica a cobertura dos satélites observados"""
+        logger.info(f"📡 Lendo {len(navigation)} arquivo(s) de navegação RINEX...")
+        self.navigation_header, self.ephemeris = load_navigation(navigation)
         
-        logger.info("⚡ Calculando correções ionosféricas...")
-        time.sleep(0.5)
+        store = rinex_data.get('observations')
+        observed = store.satellites if store is not None else []
+        covered = self.ephemeris.coverage(observed)
+        logger.info(f"✅ Efemérides para {len(covered)}/{len(observed)} satélites observados")
         
         return {
-            'tropospheric_model': 'VMF1 (Vienna Mapping Function)',
-            'ionospheric_model': 'Klobuchar + Dupla Frequência',
-            'quality': 'ALTA'
+            'source': 'Efemérides transmitidas (RINEX NAV)',
+            'accuracy': '1-2 m',
+            'records': len(self.ephemeris),
+            'satellites_available': len(covered),
+            'quality': 'BOA' if covered else 'INSUFICIENTE'
         }
     
-    def _process_ppp_solution(self, rinex_data: Dict, ephemeris: Dict, corrections: Dict) -> List[Dict]:
-        """Processamento PPP época por época com convergência"""
-        observations = rinex_data.get('observations', [])
-        
-        # SEMPRE usar processamento sintético para garantir consistência
-        logger.info("🎯 Processamento PPP com base nos dados RINEX detectados...")
-        logger.info(f"📊 Dados disponíveis: {len(observations)} épocas observadas")
-        
-        time.sleep(12)  # Simular tempo de processamento intensivo PPP real
-        
-        # Gerar resultados sintéticos mas realistas baseados nos dados reais
-        return self._generate_synthetic_ppp_results(rinex_data)
-        
-        results = []
-        total_epochs = len(observations)
-        
-        logger.info(f"🔄 Processando {total_epochs} épocas com PPP...")
-        
-        # Simular convergência gradual
-        for i, obs in enumerate(observations[:min(100, total_epochs)]):  # Limitar para demo
-            if i % 10 == 0:
-                progress = (i / min(100, total_epochs)) * 100
-                logger.info(f"   Convergência PPP: {progress:.0f}% - Época {i}")
-                time.sleep(0.1)  # Pequena pausa para mostrar progresso
-            
-            # Simular solução PPP para cada época
-            epoch_result = self._solve_ppp_epoch(obs, ephemeris, corrections, i)
-            if epoch_result:
-                results.append(epoch_result)
-        
-        logger.info(f"✅ PPP convergiu com {len(results)} soluções válidas")
-        return results
+    def _calculate_atmospheric_corrections(self, rinex_data: Dict) -> Dict[str, Any]:
+        """Prepara os modelos atmosféricos da sessão a partir da estação e do cabeçalho de navegação"""
+        store = rinex_data.get('observations')
+        position = rinex_data.get('approx_position')
+        self.troposphere = None
+        if position is not None and np.linalg.norm(position) > 6.0e6 and store is not None and store.n_epochs:
+            self.troposphere = Troposphere.at(position, store.times[0])
+        self.klobuchar = Klobuchar.from_header(self.navigation_header)
+        
+        corrections: Dict[str, Any] = {
+            'tropospheric_model': 'Saastamoinen + Niell (NMF)',
+            'ionospheric_model': ('Klobuchar (SPP) + Livre da ionosfera (PPP)' if self.klobuchar is not None
+                                  else 'Livre da ionosfera (dupla frequência)')
+        }
+        if self.troposphere is not None:
+            corrections['zenith_hydrostatic_delay'] = round(self.troposphere.zhd, 4)
+            corrections['zenith_wet_delay'] = round(self.troposphere.zwd, 4)
+            logger.info(f"🌤️ Troposfera a priori: ZHD {self.troposphere.zhd:.3f} m, ZWD {self.troposphere.zwd:.3f} m")
+        if self.klobuchar is not None:
+            corrections['klobuchar'] = {'alpha': self.klobuchar.alpha.tolist(), 'beta': self.klobuchar.beta.tolist()}
+            logger.info("⚡ Coeficientes de Klobuchar carregados do cabeçalho de navegação")
+        return corrections
     
-    def _generate_synthetic_ppp_results(self, rinex_data: Dict) -> List[Dict]:
-        """Gera resultados sintéticos de PPP baseados em dados reais"""
-        if self.receiver_position is not None:
-            # Usar posição aproximada + ruído realista para simular convergência PPP
-            base_position = self.receiver_position.copy()
-        else:
-            # Posição default no Brasil (região rural típica)
-            base_position = np.array([3753050.3895, -4538224.3918, -2442715.5314])
-        
-        results = []
-        num_epochs = 8943  # Usar número real de épocas do arquivo RINEX
-        
-        logger.info(f"🔄 Iniciando processamento de {num_epochs} épocas PPP...")
-        
-        # Simular convergência PPP: começa com maior erro e converge gradualmente
-        for i in range(num_epochs):
-            # Convergência realista: erro inicial alto que diminui exponencialmente
-            # Parâmetros ajustados para convergência mais lenta e realista
-            convergence_factor = np.exp(-i / 180.0)  # Converge após ~500 épocas (mais lento)
-            base_precision = 0.04  # Precisão final de 4cm (excelente)
-            noise_scale = 8.0 * convergence_factor + base_precision  # De 8m para 4cm
-            
-            # Adicionar ruído Gaussiano realista com correlação temporal
-            if i == 0:
-                noise = np.random.normal(0, noise_scale, 3)
-            else:
-                # Correlação temporal: posição anterior + ruído reduzido
-                previous_noise = results[-1]['position'] - base_position
-                alpha = 0.95  # Fator de correlação temporal
-                noise = alpha * previous_noise + (1-alpha) * np.random.normal(0, noise_scale, 3)
-            
-            position = base_position + noise
-            
-            # DOP melhorando com convergência
-            pdop = 1.1 + 0.9 * convergence_factor
-            hdop = 0.7 + 0.6 * convergence_factor
-            vdop = 1.3 + 1.2 * convergence_factor
-            
-            # Residuals melhorando com convergência
-            num_sats = 18  # Número típico de satélites por época
-            residuals = np.random.normal(0, noise_scale * 0.15, num_sats)
-            
-            convergence_percentage = 1.0 - convergence_factor
-            
-            results.append({
-                'epoch': i,
-                'position': position,
-                'convergence': convergence_percentage,
-                'dop': {
-                    'pdop': pdop,
-                    'hdop': hdop, 
-                    'vdop': vdop
-                },
-                'residuals': residuals,
-                'satellites': ['G23', 'G31', 'G05', 'G29', 'G25', 'G28', 'G26', 'G12', 'G18', 'G15', 'R14', 'R02', 'R13', 'R12', 'R24', 'R23', 'R17', 'G11'],
-                'success': True,
-                'time': dt.now() + timedelta(seconds=i)  # Timestamps simulados
-            })
-            
-            # Log de progresso realista a cada 500 épocas
-            if i % 500 == 0 and i > 0:
-                logger.info(f"   📊 Época {i}/{num_epochs} - Convergência: {convergence_percentage*100:.1f}% - Precisão: {noise_scale:.3f}m")
-            
-            # Simular tempo de processamento (micro pausas)
-            if i % 1000 == 0:
-                time.sleep(0.1)
-        
-        return results
+    def _atmospheric_delays(self, store: ObservationStore, receiver: np.ndarray,
+                            elevation: np.ndarray, azimuth: np.ndarray) -> np.ndarray:
+        """Atrasos troposférico e ionosférico (m) de todos os pares época × satélite de uma vez"""
+        if self.troposphere is None:
+            self.troposphere = Troposphere.at(receiver, store.times[0])
+        delays = self.troposphere.delay(elevation)
+        if self.klobuchar is not None:
+            frequency = np.array([FREQUENCIES.get(str(sat)[0], (GLONASS_G1,))[0] for sat in store.satellites])
+            lat, lon, _ = geodetic_angles(receiver)
+            delays = delays + self.klobuchar.delay(float(lat), float(lon), elevation, azimuth,
+                                                   store.times[:, None], frequency[None, :])
+        return delays
     
-    def _solve_ppp_epoch(self, obs: Dict, ephemeris: Dict, corrections: Dict, epoch_num: int) -> Dict:
-        """Resolve PPP para uma época individual"""
-        # Simular solução iterativa
-        satellites = obs.get('satellites', {})
-        
-        # Calcular convergência baseada no número da época
-        convergence = min(epoch_num / 200.0, 0.95)  # Converge até 95%
-        
-        # Simular posição com erro decrescente
-        if self.receiver_position is not None:
-            base_pos = self.receiver_position
-        else:
-            base_pos = np.array([3753050.3895, -4538224.3918, -2442715.5314])
-        
-        # Erro diminui com convergência
-        position_error = (1 - convergence) * 5.0  # De 5m para 0.25m
-        position = base_pos + np.random.normal(0, position_error, 3)
-        
+    def _corrections_applied(self, filtered: bool) -> List[str]:
+        """Correções efetivamente aplicadas na solução final (`filtered`: solução do filtro PPP)"""
+        corrections = ['troposfera (Saastamoinen + Niell)', 'relógio', 'relatividade']
+        if filtered:
+            corrections.insert(1, 'ionosfera (livre da ionosfera)')
+        elif self.klobuchar is not None:
+            corrections.insert(1, 'ionosfera (Klobuchar)')
+        return corrections
+    
+    def _process_ppp_solution(self, rinex_data: Dict, ephemeris: Dict, corrections: Dict,
+                              stages: Optional[StageTimer] = None) -> SessionSolutions:
+        """Processamento PPP época por época com convergência
+
+        Sem efemérides ou sem nenhuma época resolvida não há solução: o resumo vazio leva a
+        posição final a ficar na posição aproximada do cabeçalho, classificada como SEM SOLUÇÃO.
+        """
+        self.receiver_position = rinex_data.get('approx_position')
+        if self._orbit_source() is None:
+            logger.warning("⚠️ Sem efemérides: posições dos satélites indisponíveis, sem solução PPP")
+            return SessionSolutions()
+        
+        # Com efemérides (precisas ou transmitidas): EKF com fase em duas frequências, senão SPP
+        session = self._run_ppp_filter(rinex_data, stages)
+        if session:
+            return session
+        session = SessionSolutions.from_results(self._process_gnss_data(rinex_data))
+        if not session:
+            logger.warning("⚠️ Nenhuma época resolvida com as efemérides, sem solução PPP")
+        return session
+    
+    def _run_ppp_filter(self, rinex_data: Dict, stages: Optional[StageTimer] = None) -> SessionSolutions:
+        """PPP com o filtro de Kalman, consumindo as épocas em sequência e relatando a convergência"""
+        store = rinex_data['observations']
+        smoother = RTSSmoother() if self.smoothing else None
+        ppp = PPPFilter(initial_position=rinex_data.get('approx_position'), smoother=smoother)
+        self.smoothed_solution = None
+        
+        session = SessionSolutions()
+        try:
+            for solution in ppp.run(ppp_epochs(store, self._orbit_source())):
+                session.add(self._ppp_result(solution, session.epochs))
+                if session.epochs % 500 == 0:
+                    logger.info(f"   📊 Época {session.epochs}/{store.n_epochs} - σ horizontal: "
+                                f"{solution.sigma_horizontal:.3f}m - {len(solution.satellites)} satélites")
+                    if stages is not None:
+                        stages.update(session.epochs / store.n_epochs)
+            
+            if not session:
+                logger.info("Sem código e fase em duas frequências, usando solução SPP")
+                return session
+            
+            if smoother is not None:
+                logger.info(f"🔁 Suavização RTS de {len(smoother)} épocas...")
+                self.smoothed_solution = smoother.smooth()
+        finally:
+            if smoother is not None:
+                smoother.close()
+        
+        last = session.last
+        self.receiver_position = last['position']
+        self.clock_bias = last['clock_bias']
+        logger.info(f"✅ EKF PPP: {session.epochs} épocas, σ horizontal final {last['sigma'][:2].max():.3f}m, "
+                    f"ambiguidades fixadas em {session.fix_rate:.1f}% das épocas")
+        return session
+    
+    def _ppp_result(self, solution: PPPSolution, epoch: int) -> Dict:
+        """Converte a solução do filtro no formato de resultado por época"""
         return {
-            'position': position,
-            'convergence': convergence,
-            'satellites': list(satellites.keys())[:8],
-            'residuals': np.random.normal(0, position_error * 0.2, len(satellites)),
-            'dop': {
-                'pdop': 1.5 - 0.3 * convergence,
-                'hdop': 1.0 - 0.2 * convergence,
-                'vdop': 2.0 - 0.5 * convergence
-            },
+            'epoch': epoch,
+            'time': from_gps_seconds(solution.time),
+            'position': solution.position,
+            'clock_bias': solution.clock_bias,
+            'zwd': solution.zwd,
+            'sigma': solution.sigma_enu,
+            'residuals': solution.residuals,
+            'satellites': solution.satellites,
+            'dop': solution.dop,
+            'converged': solution.converged,
+            'convergence': min(CONVERGED_SIGMA / max(solution.sigma_horizontal, 1e-9), 1.0),
+            'fixed': solution.fixed,
+            'ratio': solution.ratio,
+            'filtered': True,
             'success': True
         }
     
-    def _apply_kalman_filter(self, results: List[Dict]) -> List[Dict]:
-        """Aplica filtro de Kalman para suavizar soluções"""
+    def _apply_kalman_filter(self, results: SessionSolutions) -> SessionSolutions:
+        """Verifica a convergência do filtro de Kalman aplicado durante o processamento PPP"""
         if not results:
             return results
         
-        logger.info("🎯 Aplicando filtro de Kalman Extended (EKF)...")
-        time.sleep(2)
-        
-        logger.info("📈 Analisando convergência e estabilidade...")
-        time.sleep(1)
-        
-        logger.info("🔧 Otimizando parâmetros do filtro...")
-        time.sleep(1)
-        
-        # Simular melhoria da precisão com filtragem
-        filtered_results = []
-        for i, result in enumerate(results):
-            # Aplicar suavização
-            smoothing_factor = min(i / 100.0, 0.8)  # Aumenta suavização com tempo
-            
-            # Melhorar DOP com filtragem
-            improved_dop = {
-                'pdop': result['dop']['pdop'] * (1 - smoothing_factor * 0.3),
-                'hdop': result['dop']['hdop'] * (1 - smoothing_factor * 0.3),
-                'vdop': result['dop']['vdop'] * (1 - smoothing_factor * 0.3)
-            }
-            
-            filtered_result = result.copy()
-            filtered_result['dop'] = improved_dop
-            filtered_result['filtered'] = True
-            filtered_results.append(filtered_result)
+        if not results.filtered:
+            logger.info("Soluções sem filtro de Kalman (sem fase em duas frequências ou sem efemérides)")
+            return results
         
-        logger.info("✅ Filtragem Kalman aplicada com sucesso")
-        return filtered_results
+        if results.converged_at is None:
+            logger.warning("⚠️ Filtro de Kalman não convergiu (σ horizontal acima de "
+                           f"{CONVERGED_SIGMA * 100:.0f} cm)")
+        else:
+            logger.info(f"✅ Filtro de Kalman convergido a partir da época {results.converged_at}")
+        return results
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Grades regulares em latitude/longitude mapeadas em memória
+Base comum das grades de modelos (velocidades, ondulação geoidal): o arquivo texto é
+interpretado uma única vez e gravado em cache binário `.npy`, reaberto com mmap pelos
+processos seguintes (início imediato e páginas compartilhadas entre workers), com
+interpolação bilinear vetorizada
+"""
+
+import json
+import logging
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple, Type, TypeVar, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GridType = TypeVar('GridType', bound='RegularGrid')
+
+
+class RegularGrid:
+    """Valores (latitudes, longitudes, n_values) em nós regulares; nós sem modelo em NaN
+
+    Arquivo texto: longitude, latitude (graus) e os valores de cada nó por linha ('#' inicia
+    comentário). Colunas finais ausentes valem zero. Os valores vão para `cache/<nome>.npy`
+    (float32) e a geometria da grade para `cache/<nome>.json`, ao lado do arquivo.
+    """
+    n_values = 1
+    description = 'grade'
+
+    def __init__(self, values: np.ndarray, lat0: float, lon0: float, step_lat: float, step_lon: float):
+        self.values = values
+        self.lat0, self.lon0 = lat0, lon0
+        self.step_lat, self.step_lon = step_lat, step_lon
+
+    @staticmethod
+    def _cache_paths(path: Path) -> Tuple[Path, Path]:
+        cache_dir = path.parent / 'cache'
+        return cache_dir / f"{path.stem}.npy", cache_dir / f"{path.stem}.json"
+
+    @classmethod
+    def from_text(cls: Type[GridType], path: Union[str, Path]) -> GridType:
+        """Interpreta a grade texto"""
+        table = np.atleast_2d(np.loadtxt(path, comments='#', dtype=np.float64))
+        if table.shape[1] < 3 or len(table) < 4:
+            raise ValueError(f"{cls.description.capitalize()} inválida: {path}")
+        lons, lats = np.unique(table[:, 0]), np.unique(table[:, 1])
+        step_lon, step_lat = float(np.diff(lons).min()), float(np.diff(lats).min())
+        n_lon = int(round((lons[-1] - lons[0]) / step_lon)) + 1
+        n_lat = int(round((lats[-1] - lats[0]) / step_lat)) + 1
+        values = np.full((n_lat, n_lon, cls.n_values), np.nan, dtype=np.float32)
+        rows = np.rint((table[:, 1] - lats[0]) / step_lat).astype(int)
+        cols = np.rint((table[:, 0] - lons[0]) / step_lon).astype(int)
+        columns = min(table.shape[1] - 2, cls.n_values)
+        values[rows, cols, :columns] = table[:, 2:2 + columns]
+        values[rows, cols, columns:] = 0.0
+        return cls(values, float(lats[0]), float(lons[0]), step_lat, step_lon)
+
+    @classmethod
+    def load(cls: Type[GridType], path: Union[str, Path]) -> GridType:
+        """Abre a grade pelo cache binário mapeado em memória, criando-o se necessário"""
+        path = Path(path)
+        values_path, meta_path = cls._cache_paths(path)
+        signature = f"{path.name}:{path.stat().st_size}:{int(path.stat().st_mtime)}"
+        if values_path.exists() and meta_path.exists():
+            try:
+                meta = json.loads(meta_path.read_text())
+                if meta['source'] == signature:
+                    values = np.load(values_path, mmap_mode='r')
+                    return cls(values, meta['lat0'], meta['lon0'], meta['step_lat'], meta['step_lon'])
+            except Exception as e:
+                logger.warning(f"⚠️ Cache da {cls.description} inválido ({values_path.name}): {e}")
+
+        logger.info(f"🌎 Lendo {cls.description}: {path.name}")
+        grid = cls.from_text(path)
+        try:
+            values_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=values_path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as tmp:
+                np.save(tmp, grid.values)
+            os.replace(tmp_name, values_path)
+            meta_path.write_text(json.dumps({
+                'source': signature, 'lat0': grid.lat0, 'lon0': grid.lon0,
+                'step_lat': grid.step_lat, 'step_lon': grid.step_lon
+            }))
+            return cls(np.load(values_path, mmap_mode='r'), grid.lat0, grid.lon0, grid.step_lat, grid.step_lon)
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível gravar o cache da {cls.description}: {e}")
+            return grid
+
+    def interpolate(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Valores (..., n_values) por interpolação bilinear em latitude e longitude (graus)
+
+        Nós sem modelo não entram na média; pontos fora da grade ou cercados de nós vazios
+        resultam em NaN. Só as quatro células vizinhas de cada ponto são lidas do arquivo.
+        """
+        lat, lon = np.broadcast_arrays(np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64))
+        n_lat, n_lon = self.values.shape[:2]
+        row = (lat - self.lat0) / self.step_lat
+        col = (lon - self.lon0) / self.step_lon
+        inside = (row >= 0) & (row <= n_lat - 1) & (col >= 0) & (col <= n_lon - 1)
+        r0 = np.clip(np.floor(np.where(inside, row, 0.0)).astype(int), 0, max(n_lat - 2, 0))
+        c0 = np.clip(np.floor(np.where(inside, col, 0.0)).astype(int), 0, max(n_lon - 2, 0))
+        fr, fc = np.clip(row - r0, 0.0, 1.0), np.clip(col - c0, 0.0, 1.0)
+        r1, c1 = np.minimum(r0 + 1, n_lat - 1), np.minimum(c0 + 1, n_lon - 1)
+
+        total = np.zeros(lat.shape + (self.values.shape[-1],))
+        weight = np.zeros(lat.shape + (1,))
+        for rows, cols, w in ((r0, c0, (1 - fr) * (1 - fc)), (r0, c1, (1 - fr) * fc),
+                              (r1, c0, fr * (1 - fc)), (r1, c1, fr * fc)):
+            corner = np.asarray(self.values[rows, cols], dtype=np.float64)
+            valid = np.all(np.isfinite(corner), axis=-1, keepdims=True)
+            total += np.where(valid, corner, 0.0) * w[..., None]
+            weight += np.where(valid, w[..., None], 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = total / weight
+        return np.where(inside[..., None] & (weight > 1e-9), values, np.nan)
+
+
+@lru_cache(maxsize=8)
+def load_grid(cls: Type[GridType], path: str) -> Optional[GridType]:
+    """Grade do arquivo local, carregada uma vez por processo; None se ausente ou inválida"""
+    if not os.path.isfile(path):
+        logger.warning(f"{cls.description.capitalize()} não encontrada em {path}")
+        return None
+    try:
+        return cls.load(path)
+    except Exception as e:
+        logger.warning(f"⚠️ {cls.description.capitalize()} inválida ({path}): {e}")
+        return None
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Atividade ionosférica medida nas próprias observações (ROT/ROTI)
+A combinação geometry-free das fases dá o TEC inclinado de cada arco a menos de uma constante;
+a taxa de variação (ROT, TECU/min) e seu desvio-padrão em janelas de 5 minutos (ROTI) indicam
+irregularidades ionosféricas sem depender de órbitas nem de modelos
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    from .cycle_slips import SlipDetection, detect_cycle_slips
+    from .obs_store import ObservationStore
+    from .observables import DualFrequency, dual_frequency
+except ImportError:
+    from cycle_slips import SlipDetection, detect_cycle_slips
+    from obs_store import ObservationStore
+    from observables import DualFrequency, dual_frequency
+
+# Atraso ionosférico de primeira ordem: 40,3·TEC/f² (m, TEC em elétrons/m²); 1 TECU = 1e16 el/m²
+TECU_FACTOR = 40.3e16
+# Amostragem do ROT (s): a 1 Hz o ruído da fase domina a diferença entre épocas
+ROT_SAMPLING = 30.0
+# Janela (s) e mínimo de amostras de ROT por janela para o ROTI
+ROTI_WINDOW = 300.0
+ROTI_MIN_SAMPLES = 5
+# ROTI (TECU/min) que separam atividade baixa, moderada e alta
+ROTI_MODERATE = 0.25
+ROTI_HIGH = 0.5
+
+
+def assess_ionosphere(roti: Optional[float]) -> str:
+    """Classificação da atividade ionosférica a partir do ROTI (TECU/min)"""
+    if roti is None or not np.isfinite(roti):
+        return 'Não calculado'
+    if roti < ROTI_MODERATE:
+        return 'Baixa'
+    if roti < ROTI_HIGH:
+        return 'Moderada'
+    return 'Alta'
+
+
+@dataclass
+class IonosphericActivity:
+    """ROTI de cada janela de 5 minutos por satélite"""
+    satellites: List[str]
+    window_satellite: np.ndarray   # satélite de cada janela
+    roti: np.ndarray               # TECU/min
+    rot_rms: float                 # RMS de todas as amostras de ROT (TECU/min)
+
+    def summary(self) -> Dict[str, Any]:
+        """Resumo para o relatório: mediana e percentil 95 do ROTI, e ROTI mediano por satélite"""
+        def _value(x):
+            return None if x is None or not np.isfinite(x) else round(float(x), 3)
+
+        p95 = float(np.percentile(self.roti, 95)) if len(self.roti) else None
+        per_satellite = {}
+        for k, sat in enumerate(self.satellites):
+            values = self.roti[self.window_satellite == k]
+            if len(values):
+                per_satellite[sat] = _value(np.median(values))
+        return {
+            'ionospheric_activity': assess_ionosphere(p95),
+            'roti_median': _value(float(np.median(self.roti)) if len(self.roti) else None),
+            'roti_p95': _value(p95),
+            'rot_rms': _value(self.rot_rms),
+            'windows': int(len(self.roti)),
+            'per_satellite': per_satellite
+        }
+
+
+def estimate_ionospheric_activity(store: ObservationStore, detection: Optional[SlipDetection] = None,
+                                  signals: Optional[DualFrequency] = None,
+                                  sampling: float = ROT_SAMPLING, window: float = ROTI_WINDOW,
+                                  min_samples: int = ROTI_MIN_SAMPLES) -> IonosphericActivity:
+    """ROT e ROTI de todos os satélites com duas frequências numa passada vetorizada
+
+    TEC = (Φ1 - Φ2) / (40,3e16·(1/f2² - 1/f1²)), com as fases em metros. O ROT só é formado entre
+    amostras consecutivas (a cada `sampling` segundos) do mesmo arco da detecção de perdas de
+    ciclo, onde a ambiguidade é constante. GLONASS fica de fora (sem tabela de frequências).
+    """
+    signals = dual_frequency(store) if signals is None else signals
+    detection = detect_cycle_slips(store, signals) if detection is None else detection
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tec = (signals.phase1 - signals.phase2) / (TECU_FACTOR * (1.0 / signals.f2 ** 2 - 1.0 / signals.f1 ** 2))
+    time = store.times[store.epoch_index]
+    offset = np.mod(time, sampling)
+    sampled = np.isfinite(tec) & ((offset < 0.5) | (offset > sampling - 0.5))
+
+    rows = np.flatnonzero(sampled)
+    rows = rows[np.argsort(store.sat_index[rows], kind='stable')]
+    sat, arc, t, value = store.sat_index[rows], detection.arc[rows], time[rows], tec[rows]
+
+    pair = (sat[1:] == sat[:-1]) & (arc[1:] == arc[:-1])
+    dt = np.diff(t)
+    pair &= dt > 0
+    rot = np.diff(value)[pair] / (dt[pair] / 60.0)
+    rot_sat = sat[1:][pair]
+    rot_time = t[1:][pair]
+
+    # Desvio-padrão do ROT em cada janela (satélite, bloco de `window` segundos) via bincount
+    block = np.floor(rot_time / window).astype(np.int64)
+    if len(block):
+        block -= block.min()
+    n_blocks = int(block.max()) + 1 if len(block) else 0
+    group = rot_sat.astype(np.int64) * n_blocks + block
+    n_groups = len(store.satellites) * n_blocks
+    counts = np.bincount(group, minlength=n_groups)
+    sums = np.bincount(group, weights=rot, minlength=n_groups)
+    squares = np.bincount(group, weights=rot ** 2, minlength=n_groups)
+    valid = np.flatnonzero(counts >= min_samples)
+    mean = sums[valid] / counts[valid]
+    roti = np.sqrt(np.maximum(squares[valid] / counts[valid] - mean ** 2, 0.0))
+
+    return IonosphericActivity(
+        satellites=[str(s) for s in store.satellites],
+        window_satellite=valid // max(n_blocks, 1),
+        roti=roti,
+        rot_rms=float(np.sqrt(np.mean(rot ** 2))) if len(rot) else np.nan
+    )
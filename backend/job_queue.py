@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Fila de processamento em segundo plano para análises GNSS
+Os jobs rodam em um pool de processos e o estado (fases, progresso, resultado) fica em SQLite
+"""
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime as dt, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+
+def _now() -> str:
+    return dt.now(timezone.utc).isoformat()
+
+
+def _process_alive(pid: int) -> bool:
+    """Indica se existe um processo com este PID nesta máquina"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _json_default(obj: Any) -> Any:
+    """Converte tipos NumPy, datas e conjuntos presentes nos resultados da análise"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, dt):
+        return obj.isoformat()
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+class JobStore:
+    """Estado dos jobs em SQLite, compartilhado entre a API e os processos do pool"""
+
+    def __init__(self, storage_dir: str = None):
+        if storage_dir is None:
+            storage_dir = os.getenv('JOB_STORAGE_DIR', 'data')
+
+        self.storage_dir = Path(storage_dir)
+        try:
+            self.storage_dir.mkdir(exist_ok=True)
+        except Exception as e:
+            logger.warning(f"Could not create job storage directory {self.storage_dir}: {e}")
+            self.storage_dir = Path(tempfile.gettempdir()) / "ongeo_jobs"
+            self.storage_dir.mkdir(exist_ok=True)
+
+        self.db_file = self.storage_dir / "gnss_jobs.db"
+        self._ensure_database()
+
+    def _ensure_database(self):
+        """Garante que as tabelas de jobs e de fases existem"""
+        conn = self._get_connection()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS gnss_jobs (
+                    id TEXT PRIMARY KEY,
+                    filename TEXT,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    result TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    owner_pid INTEGER
+                )
+            ''')
+            # Bancos criados antes da coluna de dono do job
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(gnss_jobs)')}
+            if 'owner_pid' not in columns:
+                conn.execute('ALTER TABLE gnss_jobs ADD COLUMN owner_pid INTEGER')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS gnss_job_stages (
+                    job_id TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    progress REAL NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (job_id, stage)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON gnss_jobs(status)')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _get_connection(self):
+        """Retorna uma conexão com o banco de dados"""
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, query: str, params: Sequence = ()) -> int:
+        conn = self._get_connection()
+        try:
+            cursor = conn.execute(query, params)
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def create(self, filename: Optional[str] = None) -> str:
+        """Registra um novo job na fila e retorna seu ID
+
+        O dono do job é o processo que o enfileira (o pool de processos vive dentro dele).
+        """
+        job_id = str(uuid.uuid4())
+        self._execute('INSERT INTO gnss_jobs (id, filename, status, created_at, owner_pid) VALUES (?, ?, ?, ?, ?)',
+                      (job_id, filename, JOB_QUEUED, _now(), os.getpid()))
+        return job_id
+
+    def mark_running(self, job_id: str) -> None:
+        self._execute('UPDATE gnss_jobs SET status = ?, started_at = ? WHERE id = ?',
+                      (JOB_RUNNING, _now(), job_id))
+
+    def update_stage(self, job_id: str, stage: str, progress: float) -> None:
+        """Registra o progresso (0.0 a 1.0) de uma fase do job"""
+        self._execute('''
+            INSERT INTO gnss_job_stages (job_id, stage, progress, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(job_id, stage) DO UPDATE SET progress = excluded.progress, updated_at = excluded.updated_at
+        ''', (job_id, stage, progress, _now()))
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._execute('UPDATE gnss_jobs SET status = ?, result = ?, finished_at = ? WHERE id = ?',
+                      (JOB_COMPLETED, json.dumps(result, default=_json_default), _now(), job_id))
+
+    def fail(self, job_id: str, error: str, result: Optional[Dict[str, Any]] = None) -> None:
+        """Marca o job como falho, a menos que ele já tenha terminado"""
+        self._execute('''
+            UPDATE gnss_jobs SET status = ?, error = ?, result = ?, finished_at = ?
+            WHERE id = ? AND status IN (?, ?)
+        ''', (JOB_FAILED, error, json.dumps(result, default=_json_default) if result is not None else None,
+              _now(), job_id, JOB_QUEUED, JOB_RUNNING))
+
+    def recover_interrupted(self) -> int:
+        """Marca como falhos os jobs pendentes cujo processo dono não existe mais
+
+        Com vários workers da API no mesmo banco, os jobs de workers vivos são preservados.
+        Um job com o PID deste processo só pode vir de uma instância anterior que usou o
+        mesmo PID (ex.: PID 1 em contêiner) e também é recuperado. O banco deve ser local:
+        a verificação de PID não enxerga processos de outras máquinas.
+        """
+        conn = self._get_connection()
+        try:
+            pending = conn.execute('SELECT id, owner_pid FROM gnss_jobs WHERE status IN (?, ?)',
+                                   (JOB_QUEUED, JOB_RUNNING)).fetchall()
+        finally:
+            conn.close()
+
+        current = os.getpid()
+        count = 0
+        for row in pending:
+            owner = row['owner_pid']
+            if owner is not None and owner != current and _process_alive(owner):
+                continue
+            count += self._execute('''
+                UPDATE gnss_jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)
+            ''', (JOB_FAILED, 'Processamento interrompido pela reinicialização do servidor', _now(),
+                  row['id'], JOB_QUEUED, JOB_RUNNING))
+        if count:
+            logger.warning(f"⚠️ {count} job(s) interrompido(s) marcados como falhos")
+        return count
+
+    def get(self, job_id: str, include_result: bool = False) -> Optional[Dict[str, Any]]:
+        """Estado do job com o progresso de cada fase, na ordem em que começaram"""
+        conn = self._get_connection()
+        try:
+            row = conn.execute('SELECT * FROM gnss_jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return None
+            stages = conn.execute(
+                'SELECT stage, progress, updated_at FROM gnss_job_stages WHERE job_id = ? ORDER BY rowid',
+                (job_id,)).fetchall()
+        finally:
+            conn.close()
+
+        job = {
+            'id': row['id'],
+            'filename': row['filename'],
+            'status': row['status'],
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+            'stages': [{'stage': s['stage'], 'progress': s['progress'], 'updated_at': s['updated_at']}
+                       for s in stages]
+        }
+        if include_result:
+            job['result'] = json.loads(row['result']) if row['result'] else None
+        return job
+
+
+def _execute_job(storage_dir: str, job_id: str, target: Callable, args: tuple,
+                 cleanup: Sequence[str], kwargs: Optional[Dict[str, Any]] = None) -> None:
+    """Executa o job no processo do pool, gravando fases e resultado no SQLite"""
+    jobs = JobStore(storage_dir)
+    jobs.mark_running(job_id)
+    try:
+        result = target(*args, **(kwargs or {}),
+                        progress_callback=lambda stage, progress: jobs.update_stage(job_id, stage, progress))
+        if isinstance(result, dict) and result.get('success') is False:
+            jobs.fail(job_id, str(result.get('error', 'Falha na análise')), result)
+        else:
+            jobs.complete(job_id, result)
+    except Exception as e:
+        logger.error(f"❌ Job {job_id} falhou: {type(e).__name__}: {e}")
+        jobs.fail(job_id, f"{type(e).__name__}: {e}")
+    finally:
+        for path in cleanup:
+            try:
+                if path and os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif path and os.path.exists(path):
+                    os.unlink(path)
+            except Exception as cleanup_err:
+                logger.error(f"Erro ao remover arquivo temporário: {cleanup_err}")
+
+
+class JobQueue:
+    """Fila de análises GNSS executadas em um pool de processos"""
+
+    def __init__(self, storage_dir: str = None, max_workers: Optional[int] = None):
+        self.store = JobStore(storage_dir)
+        # Só falha os jobs de processos que morreram; os de outros workers vivos continuam
+        self.store.recover_interrupted()
+        self.max_workers = max_workers or int(os.getenv('GNSS_WORKERS', os.cpu_count() or 1))
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            logger.info(f"🧵 Pool de processamento iniciado com {self.max_workers} processo(s)")
+        return self._executor
+
+    def submit(self, target: Callable, *args, filename: Optional[str] = None,
+               cleanup: Sequence[str] = (), **kwargs) -> str:
+        """Enfileira `target(*args, **kwargs, progress_callback=...)` e retorna o ID do job
+
+        `target` precisa ser uma função de módulo (serializável por referência).
+        Os caminhos em `cleanup` (arquivos ou diretórios) são removidos quando o job termina.
+        """
+        job_id = self.store.create(filename)
+        call = (_execute_job, str(self.store.storage_dir), job_id, target, tuple(args), tuple(cleanup), kwargs)
+        try:
+            future = self._get_executor().submit(*call)
+        except BrokenProcessPool:
+            logger.warning("⚠️ Pool de processos quebrado, reiniciando")
+            self._executor = None
+            future = self._get_executor().submit(*call)
+
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+        logger.info(f"📥 Job {job_id} enfileirado ({filename})")
+        return job_id
+
+    def _on_done(self, job_id: str, future: Future) -> None:
+        """Garante um estado final quando o processo do pool morre sem gravar o resultado"""
+        if future.cancelled():
+            self.store.fail(job_id, 'Job cancelado')
+            return
+        error = future.exception()
+        if error is not None:
+            self.store.fail(job_id, f"{type(error).__name__}: {error}")
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id, include_result=True)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
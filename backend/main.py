@@ -8,6 +8,7 @@ import os
 import sys
 import logging
 import tempfile
+import shutil
 import zipfile
 import json
 import uuid
@@ -17,6 +18,8 @@ from pathlib import Path
 from typing import Dict, Any, Tuple, Optional, List
 from dataclasses import dataclass, asdict
 
+import numpy as np
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -89,6 +92,35 @@ else:
 logger.info(f"Build directory: {BUILD_DIR}")
 
 # Importações específicas do projeto
+try:
+    from .rinex_reader import RinexObsReader, decode_epoch
+    from .rinex_qc import DECODE_EPOCHS, QCReport, StreamingQC
+    from .obs_store import ObservationStore
+    from .cycle_slips import detect_cycle_slips
+    from .ionospheric_activity import estimate_ionospheric_activity
+    from .multipath import MULTIPATH_HIGH, MULTIPATH_MODERATE, estimate_multipath
+    from .rinex_compression import (NAVIGATION_EXTENSIONS_LABEL, RINEX_EXTENSIONS_LABEL, is_navigation_member,
+                                    is_rinex_member, list_navigation_members, list_rinex_members)
+    from .processing_stages import ProgressCallback, StageTimer
+    from .job_queue import JOB_QUEUED, JOB_RUNNING, JobQueue
+    from .archive_analysis import analyze_rinex_archive
+    from .baseline import process_baselines
+    from .transforms import ecef_to_geodetic
+except ImportError:
+    from rinex_reader import RinexObsReader, decode_epoch
+    from rinex_qc import DECODE_EPOCHS, QCReport, StreamingQC
+    from obs_store import ObservationStore
+    from cycle_slips import detect_cycle_slips
+    from ionospheric_activity import estimate_ionospheric_activity
+    from multipath import MULTIPATH_HIGH, MULTIPATH_MODERATE, estimate_multipath
+    from rinex_compression import (NAVIGATION_EXTENSIONS_LABEL, RINEX_EXTENSIONS_LABEL, is_navigation_member,
+                                   is_rinex_member, list_navigation_members, list_rinex_members)
+    from processing_stages import ProgressCallback, StageTimer
+    from job_queue import JOB_QUEUED, JOB_RUNNING, JobQueue
+    from archive_analysis import analyze_rinex_archive
+    from baseline import process_baselines
+    from transforms import ecef_to_geodetic
+
 try:
     import georinex as gr
     logger.info("GeorINEX library loaded successfully")
@@ -958,8 +990,14 @@ class ClientUpdateModel(BaseModel):
     website: Optional[str] = None
     is_active: Optional[bool] = None
 
-def analyze_rinex_file(file_path: str) -> Dict[str, Any]:
-    """Analisa arquivo RINEX e retorna parecer técnico com processamento geodésico completo"""
+def analyze_rinex_file(file_path: str, member: Optional[str] = None,
+                       navigation: Optional[List[Tuple[str, Optional[str]]]] = None,
+                       progress_callback: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """Analisa arquivo RINEX e retorna parecer técnico com processamento geodésico completo
+
+    `navigation` lista arquivos de navegação (caminho, membro do ZIP) usados para calcular
+    as órbitas dos satélites a partir das efemérides transmitidas.
+    """
     try:
         logger.info(f"🔍 Iniciando análise RINEX: {file_path}")
         
@@ -972,8 +1010,10 @@ def analyze_rinex_file(file_path: str) -> Dict[str, Any]:
                 from gnss_processor import GNSSProcessor
                 logger.info("🌐 Iniciando processamento geodésico completo")
                 
-                # Primeiro fazer análise simplificada para extrair dados básicos
-                basic_analysis = analyze_rinex_enhanced(file_path)
+                # Primeiro fazer análise simplificada para extrair dados básicos; a mesma
+                # leitura (cabeçalho, observações e QC) alimenta o processador geodésico
+                parsed: Dict[str, Any] = {}
+                basic_analysis = analyze_rinex_enhanced(file_path, member, progress_callback, parsed)
                 
                 if basic_analysis['success']:
                     # Usar processador geodésico para calcular coordenadas precisas
@@ -981,10 +1021,12 @@ def analyze_rinex_file(file_path: str) -> Dict[str, Any]:
                     
                     # Se temos posição aproximada do header, usar
                     if 'approx_position' in basic_analysis.get('file_info', {}):
-                        processor.receiver_position = basic_analysis['file_info']['approx_position']
+                        approx = basic_analysis['file_info']['approx_position']
+                        processor.receiver_position = np.array([approx['x'], approx['y'], approx['z']])
                     
-                    # Simular processamento geodésico com dados reais
-                    geodetic_result = processor.process_rinex(file_path)
+                    # Processamento geodésico sobre as observações já decodificadas
+                    geodetic_result = processor.process_rinex(file_path, member, progress_callback, navigation,
+                                                              parsed=parsed)
                     
                     if geodetic_result['success']:
                         # Combinar resultados da análise básica com processamento geodésico
@@ -1000,6 +1042,13 @@ def analyze_rinex_file(file_path: str) -> Dict[str, Any]:
                                 "recommendations": ["Processamento geodésico completo realizado"],
                                 "coordinates": geodetic_result['coordinates'],
                                 "precision": geodetic_result['precision'],
+                                "dop_analysis": dop_analysis_from_report(geodetic_result.get('dop')),
+                                "dop_series": geodetic_result.get('dop', {}).get('series'),
+                                "multipath_analysis": (geodetic_result.get('multipath')
+                                                       or basic_analysis['file_info'].get('multipath_analysis', {})),
+                                "cycle_slip_analysis": basic_analysis['file_info'].get('cycle_slip_analysis', {}),
+                                "ionospheric_activity": basic_analysis['file_info'].get('ionospheric_activity', {}),
+                                "decoded_window": basic_analysis['file_info'].get('decoded_window'),
                                 "processing_time": geodetic_result['processing_time'],
                                 "epochs_analyzed": basic_analysis['file_info'].get('epochs_analyzed', 0),
                                 "approx_position": basic_analysis['file_info'].get('approx_position')
@@ -1021,7 +1070,7 @@ def analyze_rinex_file(file_path: str) -> Dict[str, Any]:
         
         # Fallback para análise simplificada
         logger.info("Usando análise simplificada")
-        return analyze_rinex_enhanced(file_path)
+        return analyze_rinex_enhanced(file_path, member, progress_callback)
         
     except Exception as e:
         logger.error(f"Erro geral na análise: {str(e)}")
@@ -1030,104 +1079,45 @@ def analyze_rinex_file(file_path: str) -> Dict[str, Any]:
             "error": f"Erro ao processar arquivo: {str(e)}"
         }
 
-def calculate_simulated_dop(num_satellites: int, dop_type: str) -> float:
-    """Calcula valores DOP simulados baseados no número de satélites"""
-    import random
-    
-    # Base DOP values baseados no número de satélites
-    base_values = {
-        'PDOP': max(1.0, 6.0 / max(num_satellites, 4)),
-        'HDOP': max(0.8, 4.0 / max(num_satellites, 4)), 
-        'VDOP': max(1.2, 8.0 / max(num_satellites, 4)),
-        'GDOP': max(1.5, 8.0 / max(num_satellites, 4))
-    }
-    
-    base = base_values.get(dop_type, 2.0)
-    # Adiciona variação realística
-    variation = random.uniform(0.9, 1.1)
-    return round(base * variation, 2)
-
-def analyze_multipath_simulation(num_satellites: int) -> float:
-    """Simula análise de multipath baseada na geometria de satélites"""
-    import random
-    
-    # Menos satélites = maior probabilidade de multipath
-    base_multipath = max(0.1, 1.0 / num_satellites)
-    noise = random.uniform(0.05, 0.25)
-    return round(base_multipath + noise, 3)
-
-def detect_cycle_slips_simulation(sat_ids: list) -> str:
-    """Simula detecção de cycle slips"""
-    import random
-    
-    # 2% de chance de cycle slip por época processada
-    if random.random() < 0.02 and sat_ids:
-        return random.choice(sat_ids)
-    return None
-
-def calculate_positioning_statistics(epoch_count: int, duration_hours: float, num_satellites: int) -> dict:
-    """Calcula estatísticas de posicionamento simuladas"""
-    import random
-    
-    # Precisão baseada em fatores realísticos
-    base_precision = 0.5  # metros
-    
-    # Fatores que afetam precisão
-    satellite_factor = max(0.5, 1.0 - (num_satellites - 4) * 0.05)
-    duration_factor = max(0.7, 1.0 - duration_hours * 0.02)
-    
-    horizontal_precision = base_precision * satellite_factor * duration_factor * random.uniform(0.8, 1.2)
-    vertical_precision = horizontal_precision * 1.5  # Vertical sempre pior
-    
-    return {
-        'horizontal_rms': round(horizontal_precision, 3),
-        'vertical_rms': round(vertical_precision, 3),
-        'position_rms': round((horizontal_precision**2 + vertical_precision**2)**0.5, 3),
-        'estimated_accuracy': '±' + str(round(horizontal_precision * 2, 2)) + 'm (95%)'
-    }
-
-def analyze_atmospheric_conditions(duration_hours: float, epoch_count: int) -> dict:
-    """Simula análise das condições atmosféricas"""
-    import random
-    
-    # Simula variações ionosféricas e troposféricas típicas
-    ionospheric_var = random.uniform(0.1, 0.8)  # TECU
-    tropospheric_var = random.uniform(0.05, 0.3)  # metros
-    
-    return {
-        'ionospheric_activity': 'Baixa' if ionospheric_var < 0.3 else 'Moderada' if ionospheric_var < 0.6 else 'Alta',
-        'ionospheric_delay_rms': round(ionospheric_var, 2),
-        'tropospheric_delay_rms': round(tropospheric_var, 2),
-        'atmospheric_stability': 'Excelente' if ionospheric_var < 0.2 and tropospheric_var < 0.1 else 'Boa'
-    }
+def dop_analysis_from_report(dop_report: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte o resumo de DOP do processamento geodésico no formato do relatório (medianas e percentis)"""
+    summary = dop_report.get('summary', {}) if dop_report else {}
+    analysis: Dict[str, Any] = {}
+    for name, stats in summary.items():
+        analysis[name.upper()] = round(stats['p50'], 2)
+    if analysis:
+        analysis['statistics'] = {
+            name.upper(): {key: round(value, 2) for key, value in stats.items()}
+            for name, stats in summary.items()
+        }
+    return analysis
 
 def xyz_to_latlon(x: float, y: float, z: float) -> Tuple[float, float]:
     """Converte coordenadas cartesianas ECEF para lat/lon (WGS84)"""
-    import math
-    
-    # Constantes WGS84
-    a = 6378137.0  # Semi-eixo maior
-    e2 = 0.00669437999014  # Primeira excentricidade ao quadrado
-    
-    # Cálculo da longitude
-    lon = math.atan2(y, x)
-    
-    # Cálculo iterativo da latitude
-    p = math.sqrt(x*x + y*y)
-    lat = math.atan2(z, p * (1 - e2))
-    
-    # Iteração para convergência
-    for _ in range(5):
-        N = a / math.sqrt(1 - e2 * math.sin(lat)**2)
-        lat = math.atan2(z + e2 * N * math.sin(lat), p)
-    
-    return math.degrees(lat), math.degrees(lon)
-
-def analyze_rinex_enhanced(file_path: str) -> Dict[str, Any]:
-    """Análise técnica completa de arquivo RINEX com processamento geodésico detalhado"""
+    lat, lon, _ = ecef_to_geodetic(np.array([x, y, z]))
+    return float(np.degrees(lat)), float(np.degrees(lon))
+
+def format_heights(coords: Dict[str, Any]) -> str:
+    """Linhas de altura elipsoidal e, com modelo geoidal, ondulação e altitude ortométrica"""
+    lines = [f"🏔️  Altura elipsoidal (h): {coords.get('ellipsoidal_height', coords['altitude']):.3f} m"]
+    if coords.get('orthometric_height') is not None:
+        lines.append(f"🌊 Ondulação geoidal (N): {coords['geoid_undulation']:.3f} m ({coords['geoid_model']})")
+        lines.append(f"🏔️  Altitude ortométrica (H): {coords['orthometric_height']:.3f} m")
+    else:
+        lines.append("🌊 Altitude ortométrica: indisponível (grade geoidal não encontrada)")
+    return "\n".join(lines)
+
+def analyze_rinex_enhanced(file_path: str, member: Optional[str] = None,
+                           progress_callback: Optional[ProgressCallback] = None,
+                           rinex_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Análise técnica completa de arquivo RINEX com processamento geodésico detalhado
+
+    Com `rinex_data`, todas as épocas são decodificadas e o cabeçalho, o armazenamento
+    colunar e o relatório de QC são devolvidos nesse dicionário, para que o processamento
+    geodésico os reaproveite sem ler o arquivo de novo.
+    """
     try:
-        import time
-        analysis_start_time = time.time()
+        stages = StageTimer(progress_callback)
         
         # Fuso horário GMT-3 (Brasília)
         brasilia_tz = timezone(timedelta(hours=-3))
@@ -1141,10 +1131,8 @@ def analyze_rinex_enhanced(file_path: str) -> Dict[str, Any]:
         satellite_systems = {'G': 0, 'R': 0, 'E': 0, 'C': 0, 'J': 0}  # GPS, GLONASS, Galileo, BeiDou, QZSS
         obs_types = set()
         signal_strength_data = []
-        epoch_intervals = []
-        multipath_indicators = []
+        multipath_analysis = {}
         cycle_slips = []
-        dop_values = {'PDOP': [], 'HDOP': [], 'VDOP': [], 'GDOP': []}
         elevation_angles = {}
         azimuth_angles = {}
         carrier_to_noise = {}
@@ -1158,254 +1146,115 @@ def analyze_rinex_enhanced(file_path: str) -> Dict[str, Any]:
         start_time = None
         end_time = None
         
-        # Tenta diferentes encodings
-        encodings = ['utf-8', 'latin-1', 'ascii', 'cp1252']
-        lines = []
-        
-        logger.info("🔄 Carregando arquivo RINEX...")
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    lines = f.readlines()
-                logger.info(f"✅ Arquivo lido com encoding: {encoding}")
-                break
-            except UnicodeDecodeError:
-                continue
-        
-        if not lines:
-            raise Exception("Não foi possível ler o arquivo com nenhum encoding suportado")
-        
-        logger.info(f"📊 Arquivo carregado: {len(lines)} linhas para análise")
-        
-        # Simula processamento real com delays
-        logger.info("🧮 Iniciando processamento matemático...")
-        time.sleep(0.5)  # Simula cálculos iniciais
-        
         # Parse detalhado do header RINEX
-        logger.info("📋 Analisando cabeçalho geodésico RINEX...")
-        time.sleep(0.3)  # Simula análise do header
-        
-        header_end = False
-        rinex_version = None
+        with stages.stage('header'):
+            logger.info("🔄 Abrindo arquivo RINEX em modo streaming...")
+            logger.info("📋 Analisando cabeçalho geodésico RINEX...")
+            reader = RinexObsReader(file_path, member)
+        
+        header = reader.header
+        rinex_version = f"{header.version:.2f}" if header.version else None
+        receiver_info = header.receiver
+        antenna_info = header.antenna
+        obs_types_header = header.observables
+        interval = header.interval
         approx_position = None
-        receiver_info = {}
-        antenna_info = {}
-        obs_types_header = []
-        interval = None
-        
-        for i, line in enumerate(lines[:50]):  # Verifica primeiras 50 linhas para o header
-            if 'RINEX VERSION' in line:
-                rinex_version = line[:9].strip()
-                file_type = line[20:21].strip()
-                satellite_system = line[40:41].strip()
-                logger.info(f"✅ RINEX v{rinex_version} detectado - Tipo: {file_type}, Sistema: {satellite_system}")
-            elif 'APPROX POSITION XYZ' in line:
-                try:
-                    coords = line[:42].strip().split()
-                    if len(coords) >= 3:
-                        approx_position = {
-                            'x': float(coords[0]),
-                            'y': float(coords[1]),
-                            'z': float(coords[2])
-                        }
-                        # Converter para lat/lon aproximada
-                        lat, lon = xyz_to_latlon(approx_position['x'], approx_position['y'], approx_position['z'])
-                        logger.info(f"📍 Posição base: {lat:.6f}°N, {lon:.6f}°E, Alt: {approx_position['z']:.1f}m")
-                except:
-                    pass
-            elif 'REC #' in line:
-                receiver_info = {
-                    'number': line[:20].strip(),
-                    'type': line[20:40].strip(),
-                    'version': line[40:60].strip()
-                }
-                logger.info(f"📡 Receptor: {receiver_info['type']} v{receiver_info['version']}")
-            elif 'ANT #' in line:
-                antenna_info = {
-                    'number': line[:20].strip(),
-                    'type': line[20:40].strip()
-                }
-                logger.info(f"📶 Antena: {antenna_info['type']}")
-            elif 'INTERVAL' in line:
-                interval = float(line[:10].strip()) if line[:10].strip() else 30.0
-                logger.info(f"⏱️ Intervalo de observação: {interval}s")
-            elif 'SYS / # / OBS TYPES' in line or '# / TYPES OF OBSERV' in line:
-                # Extrai tipos de observação
-                obs_section = line[6:60].strip()
-                obs_types_header.extend(obs_section.split())
-            elif 'END OF HEADER' in line:
-                header_end = True
-                logger.info(f"✅ Cabeçalho processado ({i+1} linhas) - {len(obs_types_header)} tipos de observação")
-                break
-        
-        if not header_end:
-            logger.warning("⚠️ Final do header não encontrado, assumindo linha 12")
-        
-        # Análise das observações (versão 2)
-        epoch_count = 0
-        first_time = None
-        last_time = None
-        
-        logger.info("🛰️ Identificando épocas de observação...")
-        time.sleep(0.2)  # Simula inicialização do processamento
         
-        # Análise balanceada: processamento real mas otimizado
-        max_lines_to_process = min(len(lines), 30000)  # Processa até 30k linhas
-        logger.info(f"📈 Processando {max_lines_to_process:,} de {len(lines):,} linhas")
+        logger.info(f"✅ RINEX v{rinex_version} detectado - Tipo: {header.file_type}, Sistema: {header.satellite_system}")
+        if header.approx_position:
+            approx_position = {
+                'x': header.approx_position[0],
+                'y': header.approx_position[1],
+                'z': header.approx_position[2]
+            }
+            # Converter para lat/lon aproximada
+            lat, lon = xyz_to_latlon(approx_position['x'], approx_position['y'], approx_position['z'])
+            logger.info(f"📍 Posição base: {lat:.6f}°N, {lon:.6f}°E, Alt: {approx_position['z']:.1f}m")
+        if receiver_info:
+            logger.info(f"📡 Receptor: {receiver_info.get('type')} v{receiver_info.get('version')}")
+        if antenna_info:
+            logger.info(f"📶 Antena: {antenna_info.get('type')}")
+        if interval:
+            logger.info(f"⏱️ Intervalo de observação: {interval}s")
+        logger.info(f"✅ Cabeçalho processado ({header.header_lines} linhas) - {len(obs_types_header)} tipos de observação")
         
-        processed_lines = 0
+        logger.info("🛰️ Identificando épocas de observação...")
         
-        for i, line in enumerate(lines[13:max_lines_to_process], start=13):  # Skip header
-            if not line.strip():
-                continue
-                
-            processed_lines += 1
-            
-            # Verifica se é linha de época (formato RINEX v2)
-            if (len(line) > 29 and line[0] == ' ' and 
-                line[1:3].isdigit() and line[4:6].strip().isdigit() and line[7:9].strip().isdigit()):
-                
-                epoch_count += 1
+        # QC do arquivo inteiro em uma passada; sem processamento geodésico na sequência,
+        # só as primeiras épocas são decodificadas para perdas de ciclo e multicaminho
+        decode_limit = None if rinex_data is not None else DECODE_EPOCHS
+        store = ObservationStore(obs_types_header)
+        column_maps = {}
+        qc = StreamingQC(header)
+        expected_span = None
+        if header.time_of_first_obs and header.time_of_last_obs:
+            expected_span = max((header.time_of_last_obs - header.time_of_first_obs).total_seconds(), 1.0)
+        
+        with stages.stage('epochs'), reader:
+            for epoch in reader:
+                qc.add(epoch)
+                epoch_count = qc.report.epochs
                 
-                # Feedback de progresso mais detalhado
                 if epoch_count <= 3:
-                    logger.info(f"🔍 Processando época {epoch_count}: dados de {line[1:3].strip()}/{line[4:6].strip()}/{line[7:9].strip()}")
-                elif epoch_count % 500 == 0:  # Log a cada 500 épocas
-                    progress = (processed_lines / max_lines_to_process) * 100
-                    logger.info(f"🔄 Progresso: {epoch_count:,} épocas processadas ({progress:.1f}%)")
-                    time.sleep(0.1)  # Simula processamento intensivo
-                    
-                # Análise detalhada dos satélites desta época
-                satellite_section = line[32:68]  # Seção de satélites na linha de época
-                sat_ids = []
-                for j in range(0, len(satellite_section), 3):
-                    sat_id = satellite_section[j:j+3].strip()
-                    if sat_id and len(sat_id) >= 2:
-                        sat_ids.append(sat_id)
-                        satellites_found.add(sat_id)
-                        
-                        # Categoriza por sistema de satélites
-                        system = sat_id[0]
-                        if system in satellite_systems:
-                            satellite_systems[system] += 1
+                    logger.info(f"🔍 Processando época {epoch_count}: dados de {epoch.time.strftime('%d/%m/%y %H:%M:%S')}")
+                elif epoch_count % 10000 == 0:
+                    logger.info(f"🔄 Progresso: {epoch_count:,} épocas processadas")
+                    if expected_span:
+                        stages.update((epoch.time - header.time_of_first_obs).total_seconds() / expected_span)
                 
-                # Análise geodésica avançada por época
-                if epoch_count > 1:
-                    try:
-                        current_epoch_time = dt(
-                            int(line[1:3]) + 2000,
-                            int(line[4:6]),
-                            int(line[7:9]),
-                            int(line[10:12]),
-                            int(line[13:15]),
-                            int(float(line[16:26]))
-                        )
-                        if hasattr(analyze_rinex_enhanced, 'last_epoch_time'):
-                            interval_calc = (current_epoch_time - analyze_rinex_enhanced.last_epoch_time).total_seconds()
-                            epoch_intervals.append(interval_calc)
-                        analyze_rinex_enhanced.last_epoch_time = current_epoch_time
-                        
-                        # Simula cálculos geodésicos avançados
-                        if epoch_count % 100 == 0:  # A cada 100 épocas
-                            # Calcula DOP (Dilution of Precision) simulado
-                            pdop = calculate_simulated_dop(len(sat_ids), 'PDOP')
-                            hdop = calculate_simulated_dop(len(sat_ids), 'HDOP') 
-                            vdop = calculate_simulated_dop(len(sat_ids), 'VDOP')
-                            gdop = calculate_simulated_dop(len(sat_ids), 'GDOP')
-                            
-                            dop_values['PDOP'].append(pdop)
-                            dop_values['HDOP'].append(hdop)
-                            dop_values['VDOP'].append(vdop)
-                            dop_values['GDOP'].append(gdop)
-                            
-                            # Simula análise de multipath
-                            multipath_level = analyze_multipath_simulation(len(sat_ids))
-                            multipath_indicators.append(multipath_level)
-                            
-                            # Simula detecção de cycle slips
-                            if epoch_count > 200:
-                                cycle_slip_detected = detect_cycle_slips_simulation(sat_ids)
-                                if cycle_slip_detected:
-                                    cycle_slips.append({
-                                        'epoch': epoch_count,
-                                        'satellite': cycle_slip_detected,
-                                        'severity': 'low'
-                                    })
-                    except:
-                        pass
-                        
-                # Se há linha de continuação (mais de 12 satélites)
-                next_line_idx = i + 1
-                while (next_line_idx < len(lines) and len(lines[next_line_idx]) > 32 and 
-                       lines[next_line_idx][32:].strip() and not lines[next_line_idx][0].isdigit()):
-                    continuation_line = lines[next_line_idx]
-                    sat_section = continuation_line[32:68]
-                    for j in range(0, len(sat_section), 3):
-                        sat_id = sat_section[j:j+3].strip()
-                        if sat_id and len(sat_id) >= 2:
-                            sat_ids.append(sat_id)
-                            satellites_found.add(sat_id)
-                    next_line_idx += 1
-        
+                if decode_limit is None or epoch_count <= decode_limit:
+                    decoded_ids, values, lli, ssi = decode_epoch(epoch, header, column_maps)
+                    if decoded_ids:
+                        store.append_epoch(epoch.time, decoded_ids, values, epoch.flag, lli, ssi)
+            qc_report = qc.finish()
+        store.trim()
+        if rinex_data is not None:
+            rinex_data.update(header=header, observations=store, qc=qc_report)
+        
+        epoch_count = qc_report.epochs
+        satellites_found = set(qc_report.epochs_per_satellite)
+        satellite_systems.update(qc_report.observations_per_system)
         logger.info(f"✅ Processamento concluído: {epoch_count:,} épocas analisadas")
-        logger.info(f"🛰️ Satélites detectados: {len(satellites_found)} diferentes sistemas")
-        time.sleep(0.3)  # Simula consolidação dos dados
-        
-        # Sempre tenta calcular duração precisa baseada em timestamps reais
-        duration_hours = 0.0
+        logger.info(f"🛰️ Satélites detectados: {len(satellites_found)} "
+                    f"({', '.join(f'{k}: {v}' for k, v in sorted(qc_report.satellites_per_system.items()))})")
+        if qc_report.gap_count:
+            logger.info(f"🕳️ {qc_report.gap_count} lacunas ({qc_report.gap_seconds:.0f}s), "
+                        f"completude {qc_report.completeness:.1f}%")
+        decoded_window = {
+            'epochs': store.n_epochs,
+            'total_epochs': epoch_count,
+            'complete': store.n_epochs >= epoch_count,
+            'start': store.epoch_time(0).isoformat() if store.n_epochs else None,
+            'end': store.epoch_time(store.n_epochs - 1).isoformat() if store.n_epochs else None
+        }
+        if not decoded_window['complete']:
+            logger.info(f"🔗 Perdas de ciclo e multicaminho avaliados nas primeiras {store.n_epochs:,} épocas")
+        
+        # Perdas de ciclo: GF, Melbourne-Wübbena e LLI sobre a matriz satélite × época inteira
+        slip_detection = None
+        with stages.stage('cycle_slips'):
+            if store.n_records:
+                slip_detection = detect_cycle_slips(store)
+                cycle_slips = [event.as_dict() for event in slip_detection.events]
+                logger.info(f"🔗 Cycle slips: {len(cycle_slips)} eventos, {len(slip_detection.arcs)} arcos de fase")
+        
+        # Multicaminho MP1/MP2 sobre os mesmos arcos (sem órbitas não há faixas de elevação)
+        with stages.stage('multipath'):
+            if slip_detection is not None:
+                multipath_analysis = estimate_multipath(store, slip_detection).summary()
+                logger.info(f"📶 Multicaminho MP1 {multipath_analysis['mp1_rms']} m, MP2 {multipath_analysis['mp2_rms']} m (RMS)")
+        
+        # Duração real: da primeira à última época do arquivo inteiro
+        duration_hours = qc_report.span_seconds / 3600.0
         if epoch_count > 0:
-            # Procura timestamps de primeira e última epoch para calcular duração real
-            try:
-                logger.info("⏰ Calculando duração da sessão de observação...")
-                time.sleep(0.2)  # Simula cálculo temporal
-                
-                # Processa amostra representativa do arquivo
-                sample_lines = lines[13:min(len(lines), 15000)]  # Amostra maior para melhor precisão
-                for line in sample_lines:
-                    if (line.strip() and len(line) > 29 and line[0] == ' ' and
-                        line[1:3].isdigit() and line[4:6].strip().isdigit() and line[7:9].strip().isdigit()):
-                        
-                        # Extrai timestamp: " 23  7 24 20 57 15.0000000"
-                        try:
-                            year = int(line[1:3]) + 2000
-                            month = int(line[4:6])
-                            day = int(line[7:9])
-                            hour = int(line[10:12])
-                            minute = int(line[13:15])
-                            second = float(line[16:26])
-                            
-                            timestamp = dt(year, month, day, hour, minute, int(second))
-                            
-                            if first_time is None:
-                                first_time = timestamp
-                            last_time = timestamp
-                        except:
-                            continue
-                
-                if first_time and last_time:
-                    duration_seconds = (last_time - first_time).total_seconds()
-                    duration_hours = duration_seconds / 3600.0
-                    logger.info(f"✅ Duração precisa: {duration_hours:.2f}h ({first_time.strftime('%H:%M:%S')} até {last_time.strftime('%H:%M:%S')})")
-                else:
-                    # Fallback: estima baseado no número de épocas
-                    duration_hours = (epoch_count * 30) / 3600.0
-                    logger.info(f"📊 Duração estimada: {duration_hours:.2f}h (baseada em {epoch_count:,} épocas)")
-                    
-                # Simula análise final
-                logger.info("🧪 Executando análise de qualidade...")
-                time.sleep(0.4)
-                    
-            except Exception as e:
-                logger.warning(f"Erro ao calcular duração precisa: {e}")
-                # Fallback: estima baseado no número de épocas
-                duration_hours = (epoch_count * 30) / 3600.0
+            logger.info(f"✅ Duração: {duration_hours:.2f}h ({qc_report.first_epoch.strftime('%H:%M:%S')} "
+                        f"até {qc_report.last_epoch.strftime('%H:%M:%S')})")
         
         num_satellites = len(satellites_found)
         satellites_list = list(satellites_found)
         
         # Calcula tempo de processamento
-        analysis_end_time = time.time()
-        processing_time = analysis_end_time - analysis_start_time
+        processing_time = stages.elapsed
         
         # Log final com fuso horário brasileiro
         end_time_br = dt.now(brasilia_tz)
@@ -1413,48 +1262,48 @@ def analyze_rinex_enhanced(file_path: str) -> Dict[str, Any]:
         logger.info(f"⏱️ Processamento: {processing_time:.2f}s ({epoch_count/max(processing_time,0.1):.0f} épocas/segundo)")
         logger.info(f"🕐 Concluído em: {end_time_br.strftime('%d/%m/%Y %H:%M:%S')} (GMT-3)")
         
-        time.sleep(0.2)  # Pausa final para demonstrar conclusão
-        
-        # Executa análises geodésicas finais
-        logger.info("📊 Calculando estatísticas de posicionamento...")
-        time.sleep(0.3)
-        positioning_stats = calculate_positioning_statistics(epoch_count, duration_hours, num_satellites)
-        
-        logger.info("🌤️ Analisando condições atmosféricas...")
-        time.sleep(0.2)
-        atmospheric_conditions = analyze_atmospheric_conditions(duration_hours, epoch_count)
-        
-        # Calcula médias dos DOPs
+        # Atividade ionosférica (ROTI) medida na geometry-free dos mesmos arcos; a precisão
+        # posicional só existe com órbitas e vem do processamento geodésico
+        ionospheric_analysis = {}
+        with stages.stage('statistics'):
+            if slip_detection is not None:
+                logger.info("🌌 Calculando atividade ionosférica (ROTI)...")
+                ionospheric_analysis = estimate_ionospheric_activity(store, slip_detection).summary()
+                logger.info(f"🌌 ROTI p95 {ionospheric_analysis['roti_p95']} TECU/min "
+                            f"({ionospheric_analysis['ionospheric_activity']})")
+        
+        # DOP depende das órbitas dos satélites e é calculado no processamento geodésico
         avg_dops = {}
-        for dop_type, values in dop_values.items():
-            if values:
-                avg_dops[dop_type] = round(sum(values) / len(values), 2)
-            else:
-                avg_dops[dop_type] = calculate_simulated_dop(num_satellites, dop_type)
-        
-        logger.info(f"📡 DOP médio calculado: PDOP={avg_dops['PDOP']}, HDOP={avg_dops['HDOP']}")
         
         # Cria resultado detalhado
         result = create_detailed_analysis_result(
             num_satellites, duration_hours, satellites_list[:15], 
             satellite_systems, epoch_count, processing_time,
             receiver_info, antenna_info, approx_position,
-            epoch_intervals, rinex_version, obs_types_header,
-            avg_dops, multipath_indicators, cycle_slips,
-            positioning_stats, atmospheric_conditions
+            qc_report, rinex_version, obs_types_header,
+            avg_dops, multipath_analysis, cycle_slips,
+            ionospheric_analysis, decoded_window
         )
         
         # Adicionar informações técnicas extras
         if approx_position:
             result['file_info']['approx_position'] = approx_position
         result['file_info']['epochs_analyzed'] = epoch_count
+        result['file_info']['qc'] = qc_report.summary()
+        if slip_detection is not None:
+            result['file_info']['cycle_slip_analysis'].update({
+                'arcs': len(slip_detection.arcs),
+                'events_per_satellite': slip_detection.events_per_satellite(),
+                'events': cycle_slips[:200]
+            })
         result['file_info']['processing_details'] = {
-            'average_epoch_interval': sum(epoch_intervals) / len(epoch_intervals) if epoch_intervals else interval or 30.0,
-            'data_gaps': len([i for i in epoch_intervals if i > 60]) if epoch_intervals else 0,
+            'average_epoch_interval': qc_report.average_interval or interval or 30.0,
+            'data_gaps': qc_report.intervals_over(60),
             'satellite_systems_detected': {k: v for k, v in satellite_systems.items() if v > 0},
             'observation_types': len(obs_types_header),
             'receiver_info': receiver_info,
-            'antenna_info': antenna_info
+            'antenna_info': antenna_info,
+            'stage_timings': dict(stages.timings)
         }
         
         return result
@@ -1470,11 +1319,16 @@ def create_detailed_analysis_result(
     num_satellites: int, duration_hours: float, satellites_list: list,
     satellite_systems: dict, epoch_count: int, processing_time: float,
     receiver_info: dict, antenna_info: dict, approx_position: dict,
-    epoch_intervals: list, rinex_version: str, obs_types: list,
-    dop_values: dict, multipath_indicators: list, cycle_slips: list,
-    positioning_stats: dict, atmospheric_conditions: dict
+    qc: QCReport, rinex_version: str, obs_types: list,
+    dop_values: dict, multipath_analysis: dict, cycle_slips: list,
+    ionospheric_analysis: dict, decoded_window: dict
 ) -> Dict[str, Any]:
-    """Cria resultado detalhado da análise geodésica"""
+    """Cria resultado detalhado da análise geodésica
+
+    Perdas de ciclo e multicaminho cobrem só as épocas de `decoded_window`; as taxas
+    usam essa janela e não o total de épocas do arquivo.
+    """
+    slip_epochs = max(decoded_window['epochs'], 1)
     
     # Análise avançada de qualidade
     quality_issues = []
@@ -1507,9 +1361,9 @@ def create_detailed_analysis_result(
         quality_score -= 15
         
     # Análise de intervalos de época
-    if epoch_intervals:
-        avg_interval = sum(epoch_intervals) / len(epoch_intervals)
-        data_gaps = len([i for i in epoch_intervals if i > 60])
+    if qc.n_intervals:
+        avg_interval = qc.average_interval
+        data_gaps = qc.intervals_over(60)
         if data_gaps > 0:
             quality_issues.append(f"{data_gaps} interrupções na coleta detectadas (>60s)")
             quality_score -= data_gaps * 5
@@ -1537,38 +1391,30 @@ def create_detailed_analysis_result(
         quality_issues.append(f"HDOP elevado ({dop_values['HDOP']}) - precisão horizontal reduzida")
         quality_score -= 15
         
-    # Análise de multipath
-    if multipath_indicators:
-        avg_multipath = sum(multipath_indicators) / len(multipath_indicators)
-        if avg_multipath > 0.5:
+    # Análise de multipath (RMS do MP1 em metros)
+    avg_multipath = multipath_analysis.get('average_level')
+    if avg_multipath is not None:
+        if avg_multipath > MULTIPATH_HIGH:
             quality_issues.append(f"Alto nível de multipath detectado ({avg_multipath:.2f}) - ambiente com reflexões")
             quality_score -= 20
-        elif avg_multipath > 0.3:
+        elif avg_multipath > MULTIPATH_MODERATE:
             quality_issues.append(f"Multipath moderado ({avg_multipath:.2f}) - possíveis reflexões de sinal")
             quality_score -= 10
             
     # Análise de cycle slips
-    if len(cycle_slips) > epoch_count * 0.05:  # Mais de 5% das épocas
+    if len(cycle_slips) > slip_epochs * 0.05:  # Mais de 5% das épocas
         quality_issues.append(f"Muitos cycle slips detectados ({len(cycle_slips)}) - possível interferência")
         quality_score -= 15
     elif len(cycle_slips) > 0:
         quality_issues.append(f"Cycle slips detectados ({len(cycle_slips)}) - verificar ambiente de observação")
         quality_score -= 5
         
-    # Análise das condições atmosféricas
-    if atmospheric_conditions.get('ionospheric_activity') == 'Alta':
-        quality_issues.append("Alta atividade ionosférica - pode afetar precisão")
+    # Atividade ionosférica (ROTI)
+    if ionospheric_analysis.get('ionospheric_activity') == 'Alta':
+        quality_issues.append(f"Alta atividade ionosférica (ROTI {ionospheric_analysis['roti_p95']} TECU/min) "
+                              "- pode afetar precisão")
         quality_score -= 10
         
-    # Análise de precisão estimada
-    horizontal_rms = positioning_stats.get('horizontal_rms', 1.0)
-    if horizontal_rms > 1.0:
-        quality_issues.append(f"Precisão horizontal estimada baixa ({horizontal_rms}m)")
-        quality_score -= 15
-    elif horizontal_rms > 0.5:
-        quality_issues.append(f"Precisão horizontal no limite INCRA ({horizontal_rms}m)")
-        quality_score -= 5
-        
     # Determina classificação final
     if quality_score >= 90:
         quality_status = "EXCELENTE"
@@ -1621,26 +1467,23 @@ def create_detailed_analysis_result(
                 "rinex_version": rinex_version or "Não identificado"
             },
             "technical_analysis": {
-                "observation_interval": round(sum(epoch_intervals) / len(epoch_intervals), 1) if epoch_intervals else 30.0,
-                "data_continuity": f"{100 - (len([i for i in epoch_intervals if i > 60]) / max(len(epoch_intervals), 1) * 100):.1f}%" if epoch_intervals else "100%",
+                "observation_interval": round(qc.average_interval, 1) if qc.n_intervals else 30.0,
+                "data_continuity": f"{100 - (qc.intervals_over(60) / qc.n_intervals * 100):.1f}%" if qc.n_intervals else "100%",
                 "processing_efficiency": f"{epoch_count / max(processing_time, 0.1):.0f} épocas/segundo",
                 "multi_constellation": active_systems >= 2,
                 "observation_types": len(obs_types)
             },
             "dop_analysis": dop_values,
-            "positioning_statistics": positioning_stats,
-            "atmospheric_conditions": atmospheric_conditions,
-            "multipath_analysis": {
-                "average_level": round(sum(multipath_indicators) / len(multipath_indicators), 3) if multipath_indicators else 0.0,
-                "peak_level": max(multipath_indicators) if multipath_indicators else 0.0,
-                "assessment": "Baixo" if not multipath_indicators or max(multipath_indicators) < 0.2 else "Moderado" if max(multipath_indicators) < 0.4 else "Alto"
-            },
+            "ionospheric_activity": ionospheric_analysis,
+            "multipath_analysis": multipath_analysis,
             "cycle_slip_analysis": {
                 "total_detected": len(cycle_slips),
-                "rate_percentage": round((len(cycle_slips) / max(epoch_count, 1)) * 100, 2),
-                "affected_satellites": list(set([slip['satellite'] for slip in cycle_slips])) if cycle_slips else [],
-                "assessment": "Excelente" if len(cycle_slips) == 0 else "Bom" if len(cycle_slips) < epoch_count * 0.02 else "Atenção"
+                "epochs_analyzed": decoded_window['epochs'],
+                "rate_percentage": round((len(cycle_slips) / slip_epochs) * 100, 2),
+                "affected_satellites": sorted(set(slip['satellite'] for slip in cycle_slips)),
+                "assessment": "Excelente" if len(cycle_slips) == 0 else "Bom" if len(cycle_slips) < slip_epochs * 0.02 else "Atenção"
             },
+            "decoded_window": decoded_window,
             "geodetic_validation": {
                 "coordinate_system": "SIRGAS 2000 (EPSG:4674)",
                 "datum": "SIRGAS 2000",
@@ -1654,7 +1497,7 @@ def create_detailed_analysis_result(
             num_satellites, duration_hours, quality_status, quality_issues,
             satellite_systems, receiver_info, antenna_info, quality_score,
             epoch_count, processing_time, technical_recommendations, incra_compliant,
-            dop_values, positioning_stats, atmospheric_conditions, multipath_indicators, cycle_slips
+            dop_values, ionospheric_analysis, multipath_analysis, cycle_slips, decoded_window
         )
     }
 
@@ -1732,7 +1575,7 @@ COORDENADAS CALCULADAS:
 ----------------------
 🌍 Latitude:  {coords['latitude']:.8f}°
 🌍 Longitude: {coords['longitude']:.8f}°
-🏔️  Altitude:  {coords['altitude']:.3f} m
+{format_heights(coords)}
 
 📍 UTM (SIRGAS 2000):
    Zona: {coords['utm']['zone']} {coords['utm']['hemisphere']}
@@ -1815,7 +1658,7 @@ COORDENADAS CALCULADAS:
 ----------------------
 🌍 Latitude:  {coords['latitude']:.8f}°
 🌍 Longitude: {coords['longitude']:.8f}°
-🏔️  Altitude:  {coords['altitude']:.3f} m
+{format_heights(coords)}
 
 📍 UTM:
    Zona: {coords['utm']['zone']} {coords['utm']['hemisphere']}
@@ -1884,16 +1727,30 @@ Sistema homologado para georreferenciamento rural
     
     return report
 
+def format_decoded_window(decoded_window: dict) -> str:
+    """Linha do relatório com as épocas efetivamente decodificadas (perdas de ciclo e multicaminho)"""
+    if decoded_window['complete']:
+        return f"🔍 Janela analisada: todas as {decoded_window['total_epochs']:,} épocas"
+    start = dt.fromisoformat(decoded_window['start']).strftime('%H:%M:%S') if decoded_window['start'] else '--'
+    end = dt.fromisoformat(decoded_window['end']).strftime('%H:%M:%S') if decoded_window['end'] else '--'
+    return (f"⚠️ Janela analisada: primeiras {decoded_window['epochs']:,} de {decoded_window['total_epochs']:,} "
+            f"épocas ({start} até {end})")
+
 def generate_advanced_technical_report(
     satellites: int, duration: float, quality: str, issues: list,
     satellite_systems: dict, receiver_info: dict, antenna_info: dict, 
     quality_score: int, epoch_count: int, processing_time: float,
     recommendations: list, incra_compliant: bool, dop_values: dict,
-    positioning_stats: dict, atmospheric_conditions: dict, 
-    multipath_indicators: list, cycle_slips: list
+    ionospheric_analysis: dict, multipath_analysis: dict,
+    cycle_slips: list, decoded_window: dict
 ) -> str:
     """Gera relatório técnico geodésico avançado"""
     
+    slip_epochs = max(decoded_window['epochs'], 1)
+    window_line = format_decoded_window(decoded_window)
+    roti_median, roti_p95 = (('N/A' if ionospheric_analysis.get(key) is None else ionospheric_analysis[key])
+                             for key in ('roti_median', 'roti_p95'))
+    
     # Mapear nomes dos sistemas
     system_names = {
         'G': 'GPS (USA)', 'R': 'GLONASS (Rússia)', 'E': 'Galileo (EU)',
@@ -1941,32 +1798,29 @@ ANÁLISE DOP (DILUIÇÃO DE PRECISÃO):
 📐 VDOP (Vertical): {dop_values.get('VDOP', 'N/A')}
 🌐 GDOP (Geometric): {dop_values.get('GDOP', 'N/A')}
 
-ESTATÍSTICAS DE POSICIONAMENTO:
-===============================
-🎯 Precisão Horizontal (RMS): {positioning_stats.get('horizontal_rms', 'N/A')}m
-📏 Precisão Vertical (RMS): {positioning_stats.get('vertical_rms', 'N/A')}m
-📊 Precisão Posicional (3D): {positioning_stats.get('position_rms', 'N/A')}m
-🔍 Acurácia Estimada: {positioning_stats.get('estimated_accuracy', 'N/A')}
-
-CONDIÇÕES ATMOSFÉRICAS:
-=======================
-🌌 Atividade Ionosférica: {atmospheric_conditions.get('ionospheric_activity', 'N/A')}
-📡 Atraso Ionosférico (RMS): {atmospheric_conditions.get('ionospheric_delay_rms', 'N/A')} TECU
-🌤️ Atraso Troposférico (RMS): {atmospheric_conditions.get('tropospheric_delay_rms', 'N/A')}m
-⛅ Estabilidade Atmosférica: {atmospheric_conditions.get('atmospheric_stability', 'N/A')}
+ATIVIDADE IONOSFÉRICA (ROTI):
+=============================
+🌌 Atividade Ionosférica: {ionospheric_analysis.get('ionospheric_activity', 'Não calculado')}
+📡 ROTI mediano: {roti_median} TECU/min
+📈 ROTI (percentil 95): {roti_p95} TECU/min
+📊 Janelas de 5 min: {ionospheric_analysis.get('windows', 0)}
+{window_line}
 
 ANÁLISE DE MULTIPATH:
 =====================
-📊 Nível Médio: {(sum(multipath_indicators)/len(multipath_indicators) if multipath_indicators else 0):.3f}
-📈 Pico Máximo: {(max(multipath_indicators) if multipath_indicators else 0):.3f}
-🔍 Avaliação: {'Baixo' if not multipath_indicators or max(multipath_indicators) < 0.2 else 'Moderado' if max(multipath_indicators) < 0.4 else 'Alto'}
+📊 MP1 (RMS): {multipath_analysis.get('mp1_rms', 'N/A')}m
+📊 MP2 (RMS): {multipath_analysis.get('mp2_rms', 'N/A')}m
+📈 Pior Satélite (MP1): {multipath_analysis.get('peak_level', 'N/A')}m
+🔍 Avaliação: {multipath_analysis.get('assessment', 'Não calculado')}
+{window_line}
 
 CYCLE SLIPS DETECTADOS:
 =======================
 🔢 Total Detectado: {len(cycle_slips)}
-📊 Taxa: {(len(cycle_slips)/max(epoch_count,1)*100):.2f}% das épocas
+📊 Taxa: {(len(cycle_slips)/slip_epochs*100):.2f}% das épocas
 🛰️ Satélites Afetados: {len(set([slip['satellite'] for slip in cycle_slips])) if cycle_slips else 0}
-✅ Status: {'Excelente' if len(cycle_slips) == 0 else 'Bom' if len(cycle_slips) < epoch_count * 0.02 else 'Requer Atenção'}
+✅ Status: {'Excelente' if len(cycle_slips) == 0 else 'Bom' if len(cycle_slips) < slip_epochs * 0.02 else 'Requer Atenção'}
+{window_line}
 
 AVALIAÇÃO PARA GEORREFERENCIAMENTO:
 ===================================
@@ -2098,151 +1952,153 @@ OnGeo - Análise Automatizada
     
     return report
 
+# Tamanho máximo de cada arquivo de observação enviado
+MAX_GNSS_FILE_SIZE = 500 * 1024 * 1024  # 500MB
+
+def validate_observation_upload(filename: str, file_size: int, allow_zip: bool = True) -> None:
+    """Valida tamanho e extensão de um arquivo de observação enviado (HTTPException quando inválido)
+
+    Usa o mesmo padrão dos membros RINEX de um ZIP; arquivos de navegação são recusados com
+    mensagem própria.
+    """
+    if file_size > MAX_GNSS_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Arquivo muito grande: {filename}. Tamanho máximo: {MAX_GNSS_FILE_SIZE // (1024*1024)}MB. "
+                   f"Seu arquivo: {file_size // (1024*1024)}MB"
+        )
+
+    if is_navigation_member(filename):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Arquivo de navegação não contém observações: {filename}. Envie-o no campo de navegação"
+        )
+
+    is_zip = os.path.splitext(filename.lower())[1] == '.zip'
+    if not (is_rinex_member(filename) or (allow_zip and is_zip)):
+        accepted = RINEX_EXTENSIONS_LABEL + (" ou .zip" if allow_zip else "")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tipo de arquivo não suportado: {filename}. Use: {accepted}"
+        )
+
 @app.post("/api/upload-gnss")
-async def upload_gnss_file(file: UploadFile = File(...)):
-    """Endpoint para upload e análise de arquivo GNSS"""
+async def upload_gnss_file(file: UploadFile = File(...), navigation_file: Optional[UploadFile] = File(None)):
+    """Endpoint para upload de arquivo GNSS: enfileira a análise e retorna o ID do job
+
+    O arquivo de navegação (efemérides transmitidas) pode vir em `navigation_file` ou
+    dentro do mesmo ZIP das observações.
+    """
     tmp_file_path = None
+    nav_tmp_path = None
+    job_id = None
     
     try:
-        import time
-        upload_start_time = time.time()
-        
         logger.info(f"=== INICIANDO UPLOAD GNSS ===")
         logger.info(f"Arquivo: {file.filename}")
         logger.info(f"Content-Type: {file.content_type}")
 
-        # Verificar tamanho do arquivo (500MB limite)
-        MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB
+        # Verificar tamanho (500MB limite) e extensão (mesmo padrão dos membros RINEX de um ZIP)
         file_content = await file.read()
         file_size = len(file_content)
         
         logger.info(f"Tamanho do arquivo: {file_size} bytes ({file_size / (1024*1024):.2f} MB)")
 
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"Arquivo muito grande. Tamanho máximo: {MAX_FILE_SIZE // (1024*1024)}MB. Seu arquivo: {file_size // (1024*1024)}MB"
-            )
-
-        # Reset file pointer
-        await file.seek(0)
-
-        # Verifica extensão do arquivo
-        allowed_extensions = ['.21o', '.rnx', '.zip', '.obs', '.nav', '.23o', '.22o', '.24o']
         filename = file.filename or "unknown"
         file_extension = os.path.splitext(filename.lower())[1]
-
-        if file_extension not in allowed_extensions:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Tipo de arquivo não suportado. Use: {', '.join(allowed_extensions)}"
-            )
+        validate_observation_upload(filename, file_size)
+
+        navigation: List[Tuple[str, Optional[str]]] = []
+        if navigation_file is not None and navigation_file.filename:
+            nav_extension = os.path.splitext(navigation_file.filename.lower())[1]
+            if not is_navigation_member(navigation_file.filename):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Arquivo de navegação não suportado. Use: {NAVIGATION_EXTENSIONS_LABEL}"
+                )
+            with tempfile.NamedTemporaryFile(delete=False, suffix=nav_extension) as nav_tmp:
+                nav_tmp.write(await navigation_file.read())
+                nav_tmp_path = nav_tmp.name
+            navigation.append((nav_tmp_path, None))
+            logger.info(f"Arquivo de navegação: {navigation_file.filename}")
 
         # Cria arquivo temporário
         logger.info("Criando arquivo temporário...")
         with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
+            tmp_file.write(file_content)
             tmp_file_path = tmp_file.name
+        member = None
         
         logger.info(f"Arquivo temporário criado: {tmp_file_path}")
         
-        # Se for ZIP, extrai o primeiro arquivo RINEX
+        # Se for ZIP, lê o maior membro RINEX em fluxo, sem extrair para disco
         if file_extension == '.zip':
             logger.info("Processando arquivo ZIP...")
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                with zipfile.ZipFile(tmp_file_path, 'r') as zip_ref:
-                    zip_ref.extractall(tmp_dir)
-                
-                # Procura por arquivos RINEX no ZIP
-                rinex_files = []
-                # Lista completa de extensões RINEX possíveis
-                rinex_extensions = (
-                    '.21o', '.22o', '.23o', '.24o', '.25o', '.26o', '.27o', '.28o', '.29o',
-                    '.30o', '.31o', '.32o', '.33o', '.34o', '.35o', '.36o', '.37o', '.38o', '.39o',
-                    '.rnx', '.obs', '.nav', '.o', '.d', '.n', '.g', '.h', '.l', '.p', '.m', '.s'
+            with zipfile.ZipFile(tmp_file_path, 'r') as zip_ref:
+                all_members = [info.filename for info in zip_ref.infolist() if not info.is_dir()]
+
+            # Debug: mostrar todos os arquivos encontrados
+            logger.info(f"Todos os arquivos no ZIP:")
+            for name in all_members:
+                logger.info(f"  {name} (extensão: {os.path.splitext(name.lower())[1]})")
+
+            # Membros RINEX (inclusive .crx/.gz/.Z/.bz2), ordenados por tamanho (maior primeiro)
+            rinex_members = list_rinex_members(tmp_file_path)
+            logger.info(f"Arquivos RINEX encontrados no ZIP: {len(rinex_members)}")
+
+            if not rinex_members:
+                # Listar extensões encontradas
+                found_extensions = {os.path.splitext(name.lower())[1] for name in all_members}
+                found_extensions.discard('')
+
+                detail_msg = f"Nenhum arquivo RINEX encontrado no ZIP. "
+                detail_msg += f"Total de {len(all_members)} arquivo(s) encontrado(s). "
+                if found_extensions:
+                    detail_msg += f"Extensões encontradas: {', '.join(sorted(found_extensions))}. "
+                detail_msg += f"Extensões RINEX aceitas: {RINEX_EXTENSIONS_LABEL}"
+
+                raise HTTPException(
+                    status_code=400,
+                    detail=detail_msg
                 )
-                
-                for root, dirs, files in os.walk(tmp_dir):
-                    for f in files:
-                        file_lower = f.lower()
-                        if file_lower.endswith(rinex_extensions):
-                            # Filtrar arquivos de metadados do macOS e outros arquivos temporários
-                            if not (f.startswith('._') or f.startswith('.DS_Store') or '__MACOSX' in root):
-                                rinex_files.append(os.path.join(root, f))
-                                logger.info(f"Arquivo RINEX válido encontrado: {f}")
-                            else:
-                                logger.info(f"Arquivo RINEX ignorado (metadados): {f}")
-                
-                # Debug: mostrar todos os arquivos encontrados
-                logger.info(f"Todos os arquivos no ZIP:")
-                for root, dirs, files in os.walk(tmp_dir):
-                    for f in files:
-                        logger.info(f"  {f} (extensão: {os.path.splitext(f.lower())[1]})")
-                
-                logger.info(f"Arquivos RINEX encontrados no ZIP: {len(rinex_files)}")
-                
-                if not rinex_files:
-                    # Contar total de arquivos para mensagem mais informativa
-                    total_files = sum(len(files) for _, _, files in os.walk(tmp_dir))
-                    
-                    # Listar extensões encontradas
-                    found_extensions = set()
-                    for root, dirs, files in os.walk(tmp_dir):
-                        for f in files:
-                            ext = os.path.splitext(f.lower())[1]
-                            if ext:
-                                found_extensions.add(ext)
-                    
-                    detail_msg = f"Nenhum arquivo RINEX encontrado no ZIP. "
-                    detail_msg += f"Total de {total_files} arquivo(s) encontrado(s). "
-                    if found_extensions:
-                        detail_msg += f"Extensões encontradas: {', '.join(sorted(found_extensions))}. "
-                    detail_msg += "Extensões RINEX aceitas: .21o, .22o, .23o, .24o, .rnx, .obs, .nav, etc."
-                    
-                    raise HTTPException(
-                        status_code=400, 
-                        detail=detail_msg
-                    )
-                
-                # Ordena arquivos por tamanho (maior primeiro) para priorizar arquivos principais
-                rinex_files_with_size = []
-                for file_path in rinex_files:
-                    try:
-                        file_size = os.path.getsize(file_path)
-                        rinex_files_with_size.append((file_path, file_size))
-                    except:
-                        rinex_files_with_size.append((file_path, 0))
-                
-                # Ordena por tamanho decrescente
-                rinex_files_with_size.sort(key=lambda x: x[1], reverse=True)
-                
-                # Log de todos os arquivos encontrados
-                logger.info(f"Arquivos RINEX encontrados (ordenados por tamanho):")
-                for i, (file_path, file_size) in enumerate(rinex_files_with_size):
-                    filename = os.path.basename(file_path)
-                    size_mb = file_size / (1024 * 1024)
-                    logger.info(f"  {i+1}. {filename} ({size_mb:.1f} MB)")
-                
-                # Analisa o maior arquivo encontrado
-                selected_file = rinex_files_with_size[0][0]
-                selected_size = rinex_files_with_size[0][1]
-                logger.info(f"Analisando maior arquivo: {os.path.basename(selected_file)} ({selected_size/(1024*1024):.1f} MB)")
-                result = analyze_rinex_file(selected_file)
-        else:
-            # Analisa arquivo RINEX diretamente
-            logger.info(f"Analisando arquivo RINEX: {tmp_file_path}")
-            result = analyze_rinex_file(tmp_file_path)
-        
-        logger.info("Análise concluída com sucesso")
-        logger.info(f"Resultado: {result.get('success', False)}")
-        
-        # Tempo total do upload
-        upload_end_time = time.time()
-        total_time = upload_end_time - upload_start_time
-        logger.info(f"⏱️ TEMPO TOTAL DO UPLOAD: {total_time:.2f} segundos")
+
+            # Log de todos os arquivos encontrados
+            logger.info(f"Arquivos RINEX encontrados (ordenados por tamanho):")
+            for i, info in enumerate(rinex_members):
+                logger.info(f"  {i+1}. {info.filename} ({info.file_size / (1024 * 1024):.1f} MB)")
+
+            # Arquivos de navegação do ZIP são usados nas análises de todas as sessões
+            nav_members = list_navigation_members(tmp_file_path)
+            for info in nav_members:
+                logger.info(f"  Navegação: {info.filename}")
+                navigation.append((tmp_file_path, info.filename))
+
+            # Vários arquivos: todos são analisados em paralelo, com resumo consolidado
+            if len(rinex_members) > 1:
+                logger.info(f"Analisando {len(rinex_members)} arquivos em paralelo")
+                job_id = get_gnss_job_queue().submit(
+                    analyze_rinex_archive, tmp_file_path, analyze_rinex_file,
+                    filename=filename, cleanup=[tmp_file_path, nav_tmp_path], navigation=navigation
+                )
+            else:
+                member = rinex_members[0].filename
+                logger.info(f"Analisando arquivo: {member}")
+        
+        # A análise roda no pool de processos; o arquivo temporário passa a pertencer ao job
+        if job_id is None:
+            job_id = get_gnss_job_queue().submit(
+                analyze_rinex_file, tmp_file_path, member, navigation,
+                filename=filename, cleanup=[tmp_file_path, nav_tmp_path]
+            )
+        logger.info(f"Análise enfileirada: job {job_id}")
         
-        return result
+        return {
+            "success": True,
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/api/gnss-jobs/{job_id}",
+            "result_url": f"/api/gnss-jobs/{job_id}/result"
+        }
     
     except HTTPException:
         raise  # Re-raise HTTPExceptions sem modificar
@@ -2253,13 +2109,104 @@ async def upload_gnss_file(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
     
     finally:
-        # Limpa arquivo temporário
-        if tmp_file_path and os.path.exists(tmp_file_path):
-            try:
-                os.unlink(tmp_file_path)
-                logger.info(f"Arquivo temporário removido: {tmp_file_path}")
-            except Exception as cleanup_err:
-                logger.error(f"Erro ao remover arquivo temporário: {cleanup_err}")
+        # Limpa arquivos temporários que não foram entregues a um job
+        for path in (tmp_file_path, nav_tmp_path):
+            if job_id is None and path and os.path.exists(path):
+                try:
+                    os.unlink(path)
+                    logger.info(f"Arquivo temporário removido: {path}")
+                except Exception as cleanup_err:
+                    logger.error(f"Erro ao remover arquivo temporário: {cleanup_err}")
+
+@app.post("/api/process-baseline")
+async def process_baseline(base_file: UploadFile = File(...), rover_files: List[UploadFile] = File(...),
+                           navigation_file: UploadFile = File(...)):
+    """Processamento relativo estático: enfileira as linhas de base dos rovers contra a base
+
+    Cada rover é processado em um processo separado por duplas diferenças; o resultado traz a
+    solução (fixa ou float) e o vetor de cada linha de base.
+    """
+    work_dir = None
+    job_id = None
+
+    try:
+        if not is_navigation_member(navigation_file.filename or ''):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Arquivo de navegação não suportado. Use: {NAVIGATION_EXTENSIONS_LABEL}"
+            )
+
+        # Arquivos com os nomes originais num diretório temporário que passa a pertencer ao job
+        work_dir = tempfile.mkdtemp(prefix='baseline_')
+
+        async def _save(upload: UploadFile, prefix: str, observation: bool = True) -> str:
+            # Base e rovers passam pela mesma validação do upload (sem ZIP: cada arquivo é uma sessão)
+            content = await upload.read()
+            if observation:
+                validate_observation_upload(upload.filename or 'rinex', len(content), allow_zip=False)
+            path = os.path.join(work_dir, f"{prefix}{os.path.basename(upload.filename or 'rinex')}")
+            with open(path, 'wb') as f:
+                f.write(content)
+            return path
+
+        base_path = await _save(base_file, '')
+        names = [os.path.basename(r.filename or 'rinex') for r in rover_files]
+        rover_paths = [await _save(r, f"{k + 1:02d}_" if names.count(names[k]) > 1 else '')
+                       for k, r in enumerate(rover_files)]
+        navigation = [(await _save(navigation_file, 'nav_', observation=False), None)]
+        logger.info(f"Linha de base: base {base_file.filename}, {len(rover_paths)} rover(s)")
+
+        job_id = get_gnss_job_queue().submit(
+            process_baselines, (base_path, None), [(path, None) for path in rover_paths], navigation,
+            filename=base_file.filename, cleanup=[work_dir]
+        )
+        return {
+            "success": True,
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/api/gnss-jobs/{job_id}",
+            "result_url": f"/api/gnss-jobs/{job_id}/result"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"ERRO no processamento da linha de base: {type(e).__name__}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
+
+    finally:
+        if job_id is None and work_dir and os.path.isdir(work_dir):
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+# Fila de análises GNSS (criada sob demanda por get_gnss_job_queue)
+gnss_job_queue: Optional[JobQueue] = None
+
+def get_gnss_job_queue() -> JobQueue:
+    """Fila de análises GNSS, criada no primeiro uso (os processos do pool não a recriam)"""
+    global gnss_job_queue
+    if gnss_job_queue is None:
+        gnss_job_queue = JobQueue()
+    return gnss_job_queue
+
+@app.get("/api/gnss-jobs/{job_id}")
+async def get_gnss_job_status(job_id: str):
+    """Estado de um job de análise GNSS com o progresso de cada fase"""
+    job = get_gnss_job_queue().status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+@app.get("/api/gnss-jobs/{job_id}/result")
+async def get_gnss_job_result(job_id: str):
+    """Resultado final de um job de análise GNSS (mesmo formato da antiga resposta do upload)"""
+    job = get_gnss_job_queue().result(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if job['status'] in (JOB_QUEUED, JOB_RUNNING):
+        raise HTTPException(status_code=409, detail=f"Job ainda em processamento ({job['status']})")
+    if job['result'] is not None:
+        return job['result']
+    return {"success": False, "error": job['error']}
 
 # Imports para budget calculator e pdf generator
 try:
@@ -2921,7 +2868,10 @@ async def get_client_by_email(email: str):
 async def api_endpoints():
     return {
         "endpoints": [
-            "/api/upload-gnss - Upload e análise de arquivos GNSS",
+            "/api/upload-gnss - Upload de arquivos GNSS (retorna ID do job de análise)",
+            "/api/process-baseline - Linhas de base estáticas base–rover (duplas diferenças)",
+            "/api/gnss-jobs/{job_id} - Estado e progresso por fase da análise GNSS",
+            "/api/gnss-jobs/{job_id}/result - Resultado da análise GNSS",
             "/api/calculate-budget - Calcular orçamento",
             "/api/generate-proposal-pdf - Gerar PDF da proposta",
             "/api/generate-gnss-report-pdf - Gerar PDF do relatório técnico GNSS",
@@ -2959,7 +2909,8 @@ async def api_info():
                 "budget_count": budget_count
             },
             "endpoints": [
-                "/api/upload-gnss - Upload e análise de arquivos GNSS",
+                "/api/upload-gnss - Upload de arquivos GNSS (retorna ID do job de análise)",
+                "/api/gnss-jobs/{job_id} - Estado da análise GNSS",
                 "/api/calculate-budget - Calcular orçamento",
                 "/api/generate-proposal-pdf - Gerar PDF da proposta",
                 "/api/budgets - Listar orçamentos salvos",
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Estimativa do multicaminho de código (MP1/MP2, estilo TEQC)
+Combinações de código e fase em duas frequências com a média de cada arco contínuo removida
+por reduções vetorizadas sobre os identificadores de arco; RMS por satélite e por faixa de elevação
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    from .cycle_slips import SlipDetection, detect_cycle_slips
+    from .obs_store import ObservationStore
+    from .observables import DualFrequency, dual_frequency
+except ImportError:
+    from cycle_slips import SlipDetection, detect_cycle_slips
+    from obs_store import ObservationStore
+    from observables import DualFrequency, dual_frequency
+
+# Arcos mais curtos que isto não têm média confiável e ficam de fora
+MIN_ARC_OBSERVATIONS = 10
+# Largura (graus) das faixas de elevação do resumo
+ELEVATION_BIN = 10.0
+# RMS do MP1 (m) que separam multicaminho baixo, moderado e alto
+MULTIPATH_MODERATE = 0.3
+MULTIPATH_HIGH = 0.5
+
+
+def assess_multipath(rms: float) -> str:
+    """Classificação do nível de multicaminho a partir do RMS (m)"""
+    if rms is None or not np.isfinite(rms):
+        return 'Não calculado'
+    if rms < MULTIPATH_MODERATE:
+        return 'Baixo'
+    if rms < MULTIPATH_HIGH:
+        return 'Moderado'
+    return 'Alto'
+
+
+def _rms_by_group(values: np.ndarray, groups: np.ndarray, n_groups: int):
+    """RMS e contagem dos valores finitos de cada grupo, via bincount"""
+    valid = np.isfinite(values)
+    counts = np.bincount(groups[valid], minlength=n_groups)
+    squares = np.bincount(groups[valid], weights=values[valid] ** 2, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, np.sqrt(squares / np.maximum(counts, 1)), np.nan), counts
+
+
+def _remove_arc_mean(values: np.ndarray, arc: np.ndarray, n_arcs: int, min_observations: int) -> np.ndarray:
+    """Subtrai a média de cada arco; arcos com poucas observações viram NaN"""
+    valid = np.isfinite(values)
+    counts = np.bincount(arc[valid], minlength=n_arcs)
+    sums = np.bincount(arc[valid], weights=values[valid], minlength=n_arcs)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(counts >= min_observations, sums / np.maximum(counts, 1), np.nan)
+    return values - mean[arc]
+
+
+@dataclass
+class MultipathResult:
+    """MP1/MP2 por registro (m, sem a média do arco) e os RMS agregados"""
+    mp1: np.ndarray
+    mp2: np.ndarray
+    satellites: List[str]
+    satellite_rms: np.ndarray          # (satélites, 2) RMS de MP1 e MP2
+    satellite_counts: np.ndarray       # registros com MP1 por satélite
+    bin_edges: Optional[np.ndarray]    # graus; None sem elevação
+    bin_rms: Optional[np.ndarray]      # (faixas, 2)
+    bin_counts: Optional[np.ndarray]
+
+    @property
+    def rms(self) -> np.ndarray:
+        """RMS global de MP1 e MP2"""
+        with np.errstate(invalid='ignore'):
+            return np.array([np.sqrt(np.nanmean(self.mp1 ** 2)) if np.isfinite(self.mp1).any() else np.nan,
+                             np.sqrt(np.nanmean(self.mp2 ** 2)) if np.isfinite(self.mp2).any() else np.nan])
+
+    def summary(self) -> Dict[str, Any]:
+        """Resumo para o relatório: RMS global, por satélite e por faixa de elevação"""
+        def _value(x):
+            return None if not np.isfinite(x) else round(float(x), 3)
+
+        mp1_rms, mp2_rms = self.rms
+        observed = self.satellite_counts > 0
+        summary: Dict[str, Any] = {
+            'average_level': _value(mp1_rms),
+            'peak_level': _value(np.nanmax(self.satellite_rms[observed, 0])) if observed.any() else None,
+            'assessment': assess_multipath(mp1_rms),
+            'mp1_rms': _value(mp1_rms),
+            'mp2_rms': _value(mp2_rms),
+            'per_satellite': {
+                sat: {'mp1': _value(self.satellite_rms[k, 0]), 'mp2': _value(self.satellite_rms[k, 1]),
+                      'observations': int(self.satellite_counts[k])}
+                for k, sat in enumerate(self.satellites) if observed[k]
+            }
+        }
+        if self.bin_edges is not None:
+            summary['per_elevation'] = [
+                {'elevation': f"{self.bin_edges[k]:.0f}-{self.bin_edges[k + 1]:.0f}°",
+                 'mp1': _value(self.bin_rms[k, 0]), 'mp2': _value(self.bin_rms[k, 1]),
+                 'observations': int(self.bin_counts[k])}
+                for k in range(len(self.bin_counts)) if self.bin_counts[k] > 0
+            ]
+        return summary
+
+
+def estimate_multipath(store: ObservationStore, detection: Optional[SlipDetection] = None,
+                       elevation: Optional[np.ndarray] = None, signals: Optional[DualFrequency] = None,
+                       min_arc_observations: int = MIN_ARC_OBSERVATIONS,
+                       bin_width: float = ELEVATION_BIN) -> MultipathResult:
+    """MP1 e MP2 de todos os registros numa passada vetorizada
+
+    MP1 = P1 - (1 + 2/(α-1))·L1 + 2/(α-1)·L2 e MP2 = P2 - 2α/(α-1)·L1 + (2α/(α-1) - 1)·L2, com
+    α = (f1/f2)² e fases em metros. As ambiguidades e vieses são constantes dentro de cada arco
+    da detecção de perdas de ciclo, então a média do arco é removida. `elevation` (rad, alinhada
+    aos registros) habilita o RMS por faixa de elevação.
+    """
+    signals = dual_frequency(store) if signals is None else signals
+    detection = detect_cycle_slips(store, signals) if detection is None else detection
+
+    alpha = (signals.f1 / signals.f2) ** 2
+    k1 = 2.0 / (alpha - 1.0)
+    k2 = 2.0 * alpha / (alpha - 1.0)
+    mp1 = signals.code1 - (1.0 + k1) * signals.phase1 + k1 * signals.phase2
+    mp2 = signals.code2 - k2 * signals.phase1 + (k2 - 1.0) * signals.phase2
+
+    n_arcs = int(detection.arc.max()) + 1 if len(detection.arc) else 0
+    mp1 = _remove_arc_mean(mp1, detection.arc, n_arcs, min_arc_observations)
+    mp2 = _remove_arc_mean(mp2, detection.arc, n_arcs, min_arc_observations)
+
+    n_sats = len(store.satellites)
+    rms1, counts = _rms_by_group(mp1, store.sat_index, n_sats)
+    rms2, _ = _rms_by_group(mp2, store.sat_index, n_sats)
+
+    bin_edges = bin_rms = bin_counts = None
+    if elevation is not None:
+        bin_edges = np.arange(0.0, 90.0 + bin_width, bin_width)
+        n_bins = len(bin_edges) - 1
+        degrees = np.degrees(np.asarray(elevation, dtype=np.float64))
+        above = np.isfinite(degrees) & (degrees >= 0.0)
+        bins = np.clip(np.floor(np.nan_to_num(degrees) / bin_width).astype(int), 0, n_bins - 1)
+        bin1, bin_counts = _rms_by_group(np.where(above, mp1, np.nan), bins, n_bins)
+        bin2, _ = _rms_by_group(np.where(above, mp2, np.nan), bins, n_bins)
+        bin_rms = np.stack([bin1, bin2], axis=1)
+
+    return MultipathResult(mp1=mp1, mp2=mp2, satellites=[str(s) for s in store.satellites],
+                           satellite_rms=np.stack([rms1, rms2], axis=1), satellite_counts=counts,
+                           bin_edges=bin_edges, bin_rms=bin_rms, bin_counts=bin_counts)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Armazenamento colunar de observações GNSS
+Guarda as observações em arrays NumPy (época, satélite, observável) em vez de dicionários por época
+"""
+
+from datetime import datetime as dt, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+GPS_EPOCH = dt(1980, 1, 6)
+SECONDS_PER_WEEK = 604800.0
+
+
+def to_gps_seconds(time: dt) -> float:
+    """Converte datetime para segundos contínuos desde a época GPS (1980-01-06)"""
+    return (time - GPS_EPOCH).total_seconds()
+
+
+def from_gps_seconds(seconds: float) -> dt:
+    """Converte segundos desde a época GPS para datetime"""
+    return GPS_EPOCH + timedelta(seconds=float(seconds))
+
+
+class ObservationStore:
+    """Observações em formato longo: uma linha por par (época, satélite), uma coluna por observável
+
+    Os registros são gravados na ordem das épocas, então `epoch_start[i]:epoch_start[i + 1]`
+    delimita os satélites da época `i` sem necessidade de busca.
+    """
+
+    def __init__(self, obs_codes: Sequence[str], capacity: int = 4096):
+        self.obs_codes: List[str] = list(obs_codes)
+        self._code_index: Dict[str, int] = {code: i for i, code in enumerate(self.obs_codes)}
+        self.satellites: List[str] = []
+        self._sat_index: Dict[str, int] = {}
+
+        self.n_epochs = 0
+        self.n_records = 0
+
+        self._times = np.empty(256, dtype=np.float64)
+        self._flags = np.empty(256, dtype=np.int8)
+        self._epoch_start = np.zeros(257, dtype=np.int64)
+
+        self._epoch_idx = np.empty(capacity, dtype=np.int32)
+        self._sat_idx = np.empty(capacity, dtype=np.int16)
+        self._values = np.empty((capacity, len(self.obs_codes)), dtype=np.float64)
+        self._lli = np.zeros((capacity, len(self.obs_codes)), dtype=np.int8)
+        self._ssi = np.zeros((capacity, len(self.obs_codes)), dtype=np.int8)
+
+    # ------------------------------------------------------------------ escrita
+
+    def _grow_epochs(self) -> None:
+        size = max(len(self._times) * 2, 256)
+        self._times = np.resize(self._times, size)
+        self._flags = np.resize(self._flags, size)
+        self._epoch_start = np.resize(self._epoch_start, size + 1)
+
+    def _grow_records(self, needed: int) -> None:
+        size = max(len(self._epoch_idx) * 2, needed)
+        self._epoch_idx = np.resize(self._epoch_idx, size)
+        self._sat_idx = np.resize(self._sat_idx, size)
+        self._values = self._grow_block(self._values, size)
+        self._lli = self._grow_block(self._lli, size)
+        self._ssi = self._grow_block(self._ssi, size)
+
+    def _grow_block(self, block: np.ndarray, size: int) -> np.ndarray:
+        grown = np.zeros((size, block.shape[1]), dtype=block.dtype)
+        grown[:self.n_records] = block[:self.n_records]
+        return grown
+
+    def satellite_index(self, sat_id: str) -> int:
+        """Índice do satélite, registrando-o se ainda não existir"""
+        index = self._sat_index.get(sat_id)
+        if index is None:
+            index = len(self.satellites)
+            self._sat_index[sat_id] = index
+            self.satellites.append(sat_id)
+        return index
+
+    def append_epoch(self, time: dt, sat_ids: Iterable[str], values: np.ndarray, flag: int = 0,
+                     lli: Optional[np.ndarray] = None, ssi: Optional[np.ndarray] = None) -> None:
+        """Grava uma época inteira de uma vez (`values`, `lli` e `ssi` têm forma n_satélites × n_observáveis)"""
+        sat_indices = [self.satellite_index(s) for s in sat_ids]
+        count = len(sat_indices)
+
+        if self.n_epochs == len(self._times):
+            self._grow_epochs()
+        end = self.n_records + count
+        if end > len(self._epoch_idx):
+            self._grow_records(end)
+
+        self._times[self.n_epochs] = to_gps_seconds(time)
+        self._flags[self.n_epochs] = flag
+        self._epoch_idx[self.n_records:end] = self.n_epochs
+        self._sat_idx[self.n_records:end] = sat_indices
+        self._values[self.n_records:end] = values
+        self._lli[self.n_records:end] = 0 if lli is None else lli
+        self._ssi[self.n_records:end] = 0 if ssi is None else ssi
+
+        self.n_records = end
+        self.n_epochs += 1
+        self._epoch_start[self.n_epochs] = end
+
+    # ------------------------------------------------------------------ leitura
+
+    @property
+    def times(self) -> np.ndarray:
+        """Instante de cada época em segundos GPS contínuos"""
+        return self._times[:self.n_epochs]
+
+    @property
+    def flags(self) -> np.ndarray:
+        return self._flags[:self.n_epochs]
+
+    @property
+    def epoch_start(self) -> np.ndarray:
+        return self._epoch_start[:self.n_epochs + 1]
+
+    @property
+    def epoch_index(self) -> np.ndarray:
+        """Época de cada registro"""
+        return self._epoch_idx[:self.n_records]
+
+    @property
+    def sat_index(self) -> np.ndarray:
+        """Satélite de cada registro"""
+        return self._sat_idx[:self.n_records]
+
+    def has(self, code: str) -> bool:
+        return code in self._code_index
+
+    def column(self, code: str) -> np.ndarray:
+        """Valores de um observável para todos os registros (NaN quando ausente)"""
+        return self._values[:self.n_records, self._code_index[code]]
+
+    def lli(self, code: str) -> np.ndarray:
+        """Indicador de perda de travamento (LLI) de um observável para todos os registros"""
+        return self._lli[:self.n_records, self._code_index[code]]
+
+    def ssi(self, code: str) -> np.ndarray:
+        """Indicador de intensidade do sinal (1-9, 0 = desconhecido) de um observável"""
+        return self._ssi[:self.n_records, self._code_index[code]]
+
+    def epoch_time(self, epoch: int) -> dt:
+        return from_gps_seconds(self._times[epoch])
+
+    def epoch_slice(self, epoch: int) -> slice:
+        """Faixa de registros pertencente a uma época"""
+        return slice(int(self._epoch_start[epoch]), int(self._epoch_start[epoch + 1]))
+
+    def epoch_satellites(self, epoch: int) -> List[str]:
+        return [self.satellites[i] for i in self._sat_idx[self.epoch_slice(epoch)]]
+
+    def matrix(self, code: str, dtype=np.float64) -> np.ndarray:
+        """Matriz densa época × satélite de um observável, com NaN onde não há observação"""
+        dense = np.full((self.n_epochs, len(self.satellites)), np.nan, dtype=dtype)
+        dense[self.epoch_index, self.sat_index] = self.column(code)
+        return dense
+
+    def lli_matrix(self, code: str) -> np.ndarray:
+        """Matriz densa época × satélite das flags LLI de um observável"""
+        dense = np.zeros((self.n_epochs, len(self.satellites)), dtype=np.int8)
+        dense[self.epoch_index, self.sat_index] = self.lli(code)
+        return dense
+
+    def epoch_range(self, first: int, last: int) -> 'ObservationStore':
+        """Visão das épocas `first:last` que compartilha os observáveis (sem cópia) com este armazenamento"""
+        lo, hi = int(self._epoch_start[first]), int(self._epoch_start[last])
+        view = ObservationStore.__new__(ObservationStore)
+        view.obs_codes, view._code_index = self.obs_codes, self._code_index
+        view.satellites, view._sat_index = self.satellites, self._sat_index
+        view.n_epochs, view.n_records = last - first, hi - lo
+        view._times = self._times[first:last]
+        view._flags = self._flags[first:last]
+        view._epoch_start = self._epoch_start[first:last + 1] - lo
+        view._epoch_idx = self._epoch_idx[lo:hi] - first
+        view._sat_idx = self._sat_idx[lo:hi]
+        view._values = self._values[lo:hi]
+        view._lli = self._lli[lo:hi]
+        view._ssi = self._ssi[lo:hi]
+        return view
+
+    def satellite_counts(self) -> np.ndarray:
+        """Número de épocas observadas por satélite"""
+        return np.bincount(self.sat_index, minlength=len(self.satellites))
+
+    def satellites_per_epoch(self) -> np.ndarray:
+        return np.diff(self.epoch_start)
+
+    def statistics(self) -> Dict[str, object]:
+        """Estatísticas globais da sessão calculadas diretamente dos arrays"""
+        times = self.times
+        duration = float(times[-1] - times[0]) if self.n_epochs > 1 else 0.0
+        intervals = np.diff(times)
+        return {
+            'epochs': self.n_epochs,
+            'records': self.n_records,
+            'satellites': len(self.satellites),
+            'duration_hours': duration / 3600.0,
+            'interval': float(np.median(intervals)) if len(intervals) else None,
+            'mean_satellites_per_epoch': float(self.satellites_per_epoch().mean()) if self.n_epochs else 0.0,
+            'observations_per_satellite': dict(zip(self.satellites, self.satellite_counts().tolist()))
+        }
+
+    def nbytes(self) -> int:
+        """Memória ocupada pelos dados válidos"""
+        return (self.n_epochs * (8 + 1 + 8) +
+                self.n_records * (4 + 2 + 10 * len(self.obs_codes)))
+
+    def trim(self) -> 'ObservationStore':
+        """Libera a capacidade excedente após o carregamento"""
+        self._times = self._times[:self.n_epochs].copy()
+        self._flags = self._flags[:self.n_epochs].copy()
+        self._epoch_start = self._epoch_start[:self.n_epochs + 1].copy()
+        self._epoch_idx = self._epoch_idx[:self.n_records].copy()
+        self._sat_idx = self._sat_idx[:self.n_records].copy()
+        self._values = self._values[:self.n_records].copy()
+        self._lli = self._lli[:self.n_records].copy()
+        self._ssi = self._ssi[:self.n_records].copy()
+        return self
+
+    def __len__(self) -> int:
+        return self.n_epochs
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tabelas de sinais GNSS e seleção vetorizada dos observáveis de duas frequências
+Escolhe, registro a registro, o código e a fase de cada portadora conforme a constelação,
+com as frequências correspondentes e as flags LLI da fase escolhida
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+try:
+    from .ephemeris import SPEED_OF_LIGHT
+    from .obs_store import ObservationStore
+except ImportError:
+    from ephemeris import SPEED_OF_LIGHT
+    from obs_store import ObservationStore
+
+# Frequências (Hz) das duas portadoras usadas nas combinações, por constelação
+# (GLONASS fica de fora: cada satélite transmite numa frequência própria)
+FREQUENCIES = {
+    'G': (1575.42e6, 1227.60e6),
+    'J': (1575.42e6, 1227.60e6),
+    'E': (1575.42e6, 1176.45e6),
+    'C': (1561.098e6, 1268.52e6),
+}
+# Frequência central da banda G1 do GLONASS (FDMA), para escalar modelos ionosféricos
+GLONASS_G1 = 1602.0e6
+
+# Observáveis de cada frequência em ordem de preferência (RINEX 2 e códigos RINEX 3)
+CODE_OBSERVABLES = {
+    'G': (['P1', 'C1', 'C1W', 'C1C', 'C1X'], ['P2', 'C2', 'C2W', 'C2L', 'C2X', 'C2S']),
+    'J': (['C1C', 'C1X'], ['C2L', 'C2X', 'C2S']),
+    'E': (['C1C', 'C1X', 'C1'], ['C5Q', 'C5X', 'C5']),
+    'C': (['C2I', 'C1I'], ['C6I']),
+}
+PHASE_OBSERVABLES = {
+    'G': (['L1', 'L1W', 'L1C', 'L1X'], ['L2', 'L2W', 'L2L', 'L2X', 'L2S']),
+    'J': (['L1C', 'L1X'], ['L2L', 'L2X', 'L2S']),
+    'E': (['L1C', 'L1X', 'L1'], ['L5Q', 'L5X', 'L5']),
+    'C': (['L2I', 'L1I'], ['L6I']),
+}
+
+
+def select_by_system(store: ObservationStore, systems: np.ndarray,
+                     observables: Dict[str, Tuple[List[str], List[str]]],
+                     band: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Coluna de um observável por registro, usando a preferência de códigos da constelação
+
+    Retorna os valores (NaN quando ausente) e o LLI do observável que forneceu cada valor.
+    """
+    column = np.full(store.n_records, np.nan)
+    lli = np.zeros(store.n_records, dtype=np.int8)
+    for system, codes in observables.items():
+        rows = systems == system
+        if not rows.any():
+            continue
+        for code in codes[band]:
+            if not store.has(code):
+                continue
+            values = store.column(code)
+            fill = rows & np.isnan(column) & np.isfinite(values)
+            column[fill] = values[fill]
+            lli[fill] = store.lli(code)[fill]
+    return column, lli
+
+
+@dataclass
+class DualFrequency:
+    """Observáveis de duas portadoras alinhados aos registros do armazenamento (metros)"""
+    systems: np.ndarray      # constelação de cada registro
+    f1: np.ndarray           # Hz; NaN em constelações sem tabela de sinais
+    f2: np.ndarray
+    code1: np.ndarray
+    code2: np.ndarray
+    phase1: np.ndarray       # fase convertida para metros
+    phase2: np.ndarray
+    lli: np.ndarray          # bit 0 do LLI em alguma das fases escolhidas
+
+    @property
+    def wavelength1(self) -> np.ndarray:
+        return SPEED_OF_LIGHT / self.f1
+
+    @property
+    def wavelength2(self) -> np.ndarray:
+        return SPEED_OF_LIGHT / self.f2
+
+
+def dual_frequency(store: ObservationStore) -> DualFrequency:
+    """Seleciona código e fase das duas portadoras de todos os registros numa passada"""
+    sat_names = np.asarray(store.satellites, dtype='<U3')
+    systems = sat_names.astype('<U1')[store.sat_index]
+
+    f1 = np.full(store.n_records, np.nan)
+    f2 = np.full(store.n_records, np.nan)
+    for system, (freq1, freq2) in FREQUENCIES.items():
+        f1[systems == system] = freq1
+        f2[systems == system] = freq2
+
+    code1, _ = select_by_system(store, systems, CODE_OBSERVABLES, 0)
+    code2, _ = select_by_system(store, systems, CODE_OBSERVABLES, 1)
+    phase1, lli1 = select_by_system(store, systems, PHASE_OBSERVABLES, 0)
+    phase2, lli2 = select_by_system(store, systems, PHASE_OBSERVABLES, 1)
+
+    return DualFrequency(
+        systems=systems, f1=f1, f2=f2, code1=code1, code2=code2,
+        phase1=phase1 * SPEED_OF_LIGHT / f1, phase2=phase2 * SPEED_OF_LIGHT / f2,
+        lli=((lli1 | lli2) & 1) == 1
+    )
@@ -17,14 +17,15 @@ class PDFGenerator:
     
     def _evaluate_dop(self, dop_value: float, dop_type: str) -> str:
         """Avalia valores DOP para classificação"""
-        if dop_value == 'N/A' or dop_value > 100:
+        if not isinstance(dop_value, (int, float)) or not (dop_value == dop_value) or dop_value > 100:
             return 'Não calculado'
         
         thresholds = {
             'PDOP': [(1, 'Excelente'), (2, 'Bom'), (3, 'Moderado'), (6, 'Ruim')],
             'HDOP': [(1, 'Excelente'), (2, 'Bom'), (3, 'Moderado'), (5, 'Ruim')],
             'VDOP': [(1, 'Excelente'), (2, 'Bom'), (4, 'Moderado'), (8, 'Ruim')],
-            'GDOP': [(1, 'Excelente'), (2, 'Bom'), (4, 'Moderado'), (8, 'Ruim')]
+            'GDOP': [(1, 'Excelente'), (2, 'Bom'), (4, 'Moderado'), (8, 'Ruim')],
+            'TDOP': [(0.8, 'Excelente'), (1.5, 'Bom'), (2.5, 'Moderado'), (5, 'Ruim')]
         }
         
         for threshold, rating in thresholds.get(dop_type, []):
@@ -181,20 +182,25 @@ class PDFGenerator:
         if not dop_analysis or not isinstance(dop_analysis, dict):
             dop_analysis = {}
             
-        pdop = dop_analysis.get('PDOP', 'N/A')
-        hdop = dop_analysis.get('HDOP', 'N/A')
-        vdop = dop_analysis.get('VDOP', 'N/A')
-        gdop = dop_analysis.get('GDOP', 'N/A')
-        
-        dop_data = [
-            ['Tipo DOP', 'Valor', 'Avaliação'],
-            ['PDOP (Position)', str(pdop), self._evaluate_dop(pdop if isinstance(pdop, (int, float)) else 999, 'PDOP')],
-            ['HDOP (Horizontal)', str(hdop), self._evaluate_dop(hdop if isinstance(hdop, (int, float)) else 999, 'HDOP')],
-            ['VDOP (Vertical)', str(vdop), self._evaluate_dop(vdop if isinstance(vdop, (int, float)) else 999, 'VDOP')],
-            ['GDOP (Geometric)', str(gdop), self._evaluate_dop(gdop if isinstance(gdop, (int, float)) else 999, 'GDOP')],
-        ]
-        
-        dop_table = Table(dop_data, colWidths=[5*cm, 3*cm, 8*cm])
+        # Medianas e percentis calculados da geometria real de cada época
+        dop_statistics = dop_analysis.get('statistics', {})
+        if not isinstance(dop_statistics, dict):
+            dop_statistics = {}
+        
+        dop_data = [['Tipo DOP', 'Mediana', 'P95', 'Máximo', 'Avaliação']]
+        for dop_type, label in [('PDOP', 'PDOP (Position)'), ('HDOP', 'HDOP (Horizontal)'),
+                                ('VDOP', 'VDOP (Vertical)'), ('GDOP', 'GDOP (Geometric)'),
+                                ('TDOP', 'TDOP (Time)')]:
+            value = dop_analysis.get(dop_type, 'N/A')
+            if dop_type == 'TDOP' and value == 'N/A':
+                continue
+            stats = dop_statistics.get(dop_type, {})
+            dop_data.append([
+                label, str(value), str(stats.get('p95', '-')), str(stats.get('max', '-')),
+                self._evaluate_dop(value, dop_type)
+            ])
+        
+        dop_table = Table(dop_data, colWidths=[4*cm, 2.5*cm, 2.5*cm, 2.5*cm, 4.5*cm])
         dop_table.setStyle(TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), colors.purple),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
@@ -284,8 +290,9 @@ class PDFGenerator:
         if not cycle_slip_analysis or not isinstance(cycle_slip_analysis, dict):
             cycle_slip_analysis = {}
             
-        multipath_avg = multipath_analysis.get('average_level', 'N/A')
-        multipath_peak = multipath_analysis.get('peak_level', 'N/A')
+        multipath_avg = multipath_analysis.get('average_level')
+        multipath_mp2 = multipath_analysis.get('mp2_rms')
+        multipath_peak = multipath_analysis.get('peak_level')
         multipath_assessment = multipath_analysis.get('assessment', 'N/A')
         cycle_slips_total = cycle_slip_analysis.get('total_detected', 'N/A')
         cycle_slips_rate = cycle_slip_analysis.get('rate_percentage', 'N/A')
@@ -293,8 +300,9 @@ class PDFGenerator:
         
         signal_data = [
             ['Parâmetro', 'Valor', 'Status'],
-            ['Multipath Médio', str(multipath_avg), str(multipath_assessment)],
-            ['Pico de Multipath', str(multipath_peak), 'Máximo Detectado'],
+            ['Multipath MP1 (RMS)', f"{multipath_avg:.3f} m" if multipath_avg is not None else 'N/A', str(multipath_assessment)],
+            ['Multipath MP2 (RMS)', f"{multipath_mp2:.3f} m" if multipath_mp2 is not None else 'N/A', 'Segunda Frequência'],
+            ['Pior Satélite (MP1)', f"{multipath_peak:.3f} m" if multipath_peak is not None else 'N/A', 'Máximo por Satélite'],
             ['Cycle Slips Detectados', str(cycle_slips_total), str(cycle_slips_assessment)],
             ['Taxa de Cycle Slips', f"{cycle_slips_rate}%" if cycle_slips_rate != 'N/A' else cycle_slips_rate, 'Por Época'],
         ]
@@ -310,6 +318,29 @@ class PDFGenerator:
             ('ALIGN', (1, 0), (1, -1), 'CENTER'),
         ]))
         story.append(signal_table)
+        story.append(Spacer(1, 10))
+        
+        # Multipath por faixa de elevação (disponível quando há órbitas dos satélites)
+        per_elevation = multipath_analysis.get('per_elevation') or []
+        if per_elevation:
+            elevation_data = [['Elevação', 'MP1 RMS (m)', 'MP2 RMS (m)', 'Observações']]
+            for row in per_elevation:
+                elevation_data.append([
+                    str(row.get('elevation', '')),
+                    'N/A' if row.get('mp1') is None else f"{row['mp1']:.3f}",
+                    'N/A' if row.get('mp2') is None else f"{row['mp2']:.3f}",
+                    str(row.get('observations', 0))
+                ])
+            elevation_table = Table(elevation_data, colWidths=[4*cm, 4*cm, 4*cm, 4*cm])
+            elevation_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.teal),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ]))
+            story.append(elevation_table)
         story.append(Spacer(1, 15))
         
         # Seção 7: Validação Geodésica
@@ -318,6 +349,13 @@ class PDFGenerator:
         if not geodetic_validation or not isinstance(geodetic_validation, dict):
             geodetic_validation = {}
             
+        coordinates = file_info.get('coordinates')
+        if isinstance(coordinates, dict) and coordinates.get('latitude') is not None:
+            story.append(self._coordinates_table(coordinates))
+            story.append(Spacer(1, 10))
+            if coordinates.get('geoid_model'):
+                geodetic_validation = {**geodetic_validation, 'geoid_model': coordinates['geoid_model']}
+            
         geodetic_data = [
             ['Especificação', 'Valor'],
             ['Sistema de Coordenadas', str(geodetic_validation.get('coordinate_system', 'SIRGAS 2000'))],
@@ -408,6 +446,36 @@ class PDFGenerator:
         
         return pdf_path
 
+    def _coordinates_table(self, coordinates: Dict[str, Any]) -> Table:
+        """Tabela de coordenadas com altura elipsoidal, ondulação geoidal e altitude ortométrica"""
+        def meters(value):
+            return 'N/A' if value is None else f"{value:.3f} m"
+        
+        data = [
+            ['Coordenada', 'Valor'],
+            ['Latitude', f"{coordinates['latitude']:.8f}°"],
+            ['Longitude', f"{coordinates['longitude']:.8f}°"],
+            ['Altura Elipsoidal (h)', meters(coordinates.get('ellipsoidal_height', coordinates.get('altitude')))],
+            ['Ondulação Geoidal (N)', meters(coordinates.get('geoid_undulation'))],
+            ['Altitude Ortométrica (H = h - N)', meters(coordinates.get('orthometric_height'))],
+        ]
+        utm = coordinates.get('utm')
+        if isinstance(utm, dict):
+            data += [
+                ['UTM Zona', f"{utm.get('zone')} {utm.get('hemisphere', '')}"],
+                ['UTM E / N', f"{utm.get('easting', 0):.3f} m / {utm.get('northing', 0):.3f} m"],
+            ]
+        table = Table(data, colWidths=[8*cm, 8*cm])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.navy),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]))
+        return table
+    
     def generate_budget_pdf(self, budget_data: Dict[str, Any], filename: Optional[str] = None) -> str:
         """Gera PDF da proposta de orçamento"""
         
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+Filtro de Kalman estendido para PPP (Precise Point Positioning) com ambiguidades reais
+Estados: posição, relógio do receptor, atraso troposférico úmido zenital e uma ambiguidade por
+satélite, atualizados época a época a partir de um fluxo de observações livres da ionosfera.
+A cada época as ambiguidades entre satélites são decompostas em wide-lane (Melbourne-Wübbena)
+e narrow-lane, e a narrow-lane é fixada pelo LAMBDA com teste da razão
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .ambiguity_resolution import RATIO_THRESHOLD, resolve_ambiguities
+    from .atmosphere import Troposphere
+    from .cycle_slips import GF_WINDOW, MAX_GAP_INTERVALS, MW_WINDOW, detect_cycle_slips
+    from .ephemeris import SPEED_OF_LIGHT, OrbitSource
+    from .geometry import ELEVATION_MASK, elevation_azimuth, elevation_weights, enu_rotation, geodetic_angles
+    from .obs_store import ObservationStore
+    from .observables import dual_frequency
+    from .rts_smoother import RTSSmoother
+    from .spp_solver import solve_spp_batch
+except ImportError:
+    from ambiguity_resolution import RATIO_THRESHOLD, resolve_ambiguities
+    from atmosphere import Troposphere
+    from cycle_slips import GF_WINDOW, MAX_GAP_INTERVALS, MW_WINDOW, detect_cycle_slips
+    from ephemeris import SPEED_OF_LIGHT, OrbitSource
+    from geometry import ELEVATION_MASK, elevation_azimuth, elevation_weights, enu_rotation, geodetic_angles
+    from obs_store import ObservationStore
+    from observables import dual_frequency
+    from rts_smoother import RTSSmoother
+    from spp_solver import solve_spp_batch
+
+logger = logging.getLogger(__name__)
+
+# Índices dos estados fixos; as ambiguidades ocupam as posições seguintes
+POSITION, CLOCK, ZWD = slice(0, 3), 3, 4
+FIXED_STATES = 5
+
+# Sigma horizontal (m) a partir do qual a solução é considerada convergida
+CONVERGED_SIGMA = 0.10
+
+# Resolução de ambiguidades: épocas de Melbourne-Wübbena por arco antes de fixar a wide-lane,
+# afastamento máximo (ciclos) da wide-lane média ao inteiro, mínimo de ambiguidades
+# narrow-lane na busca e sigma horizontal (m) acima do qual nem se tenta fixar
+WIDELANE_EPOCHS = 10
+WIDELANE_FRACTION = 0.25
+MIN_FIXED_AMBIGUITIES = 4
+AR_MAX_SIGMA = 0.5
+
+# Épocas vizinhas incluídas de cada lado de um bloco para as janelas da detecção de perdas de ciclo
+SLIP_MARGIN = 2 * (MW_WINDOW + GF_WINDOW)
+
+
+@dataclass
+class PPPEpoch:
+    """Observações de uma época prontas para o filtro (combinação livre da ionosfera, em metros)"""
+    time: float                  # segundos GPS contínuos
+    satellites: List[str]
+    code: np.ndarray             # pseudodistância corrigida do relógio do satélite
+    phase: np.ndarray            # fase em metros corrigida do relógio do satélite (NaN sem fase)
+    sat_positions: np.ndarray    # (n, 3) no instante de transmissão, já girados pela rotação da Terra
+    slips: np.ndarray            # perda de ciclo detectada: a ambiguidade do satélite é reiniciada
+    widelane: Optional[np.ndarray] = None      # Melbourne-Wübbena em ciclos wide-lane
+    frequencies: Optional[np.ndarray] = None   # (n, 2) Hz das duas portadoras
+
+
+@dataclass
+class PPPSolution:
+    """Estado do filtro após a atualização de uma época"""
+    time: float
+    position: np.ndarray
+    clock_bias: float            # metros
+    zwd: float                   # atraso úmido zenital (m)
+    sigma_enu: np.ndarray        # desvio padrão leste, norte, vertical (m)
+    satellites: List[str]
+    residuals: np.ndarray        # resíduos pós-ajuste da fase (m)
+    dop: Dict[str, float] = field(default_factory=dict)
+    rejected: int = 0
+    fixed: bool = False          # ambiguidades narrow-lane fixadas e validadas nesta época
+    ratio: float = 0.0           # teste da razão do LAMBDA (0 quando não houve busca)
+    fixed_ambiguities: int = 0
+    fixed_position: Optional[np.ndarray] = None   # posição condicionada aos inteiros
+
+    @property
+    def sigma_horizontal(self) -> float:
+        return float(np.hypot(self.sigma_enu[0], self.sigma_enu[1]))
+
+    @property
+    def converged(self) -> bool:
+        return self.sigma_horizontal < CONVERGED_SIGMA
+
+
+def ppp_epochs(store: ObservationStore, orbits: OrbitSource, block_epochs: int = 1000) -> Iterator[PPPEpoch]:
+    """Gera as épocas do filtro a partir do armazenamento colunar
+
+    As combinações, as perdas de ciclo e os estados dos satélites são calculados em blocos de
+    `block_epochs` épocas numa única chamada vetorizada; as épocas são então entregues uma a
+    uma. A detecção de perdas de ciclo usa janelas antes/depois de cada época, então cada bloco
+    é analisado com `SLIP_MARGIN` épocas vizinhas de cada lado. A memória de trabalho fica
+    limitada ao bloco. Satélites sem duas frequências ou sem órbita ficam de fora.
+    """
+    sat_names = np.asarray(store.satellites, dtype='<U3')
+    intervals = np.diff(store.times)
+    max_gap = MAX_GAP_INTERVALS * float(np.median(intervals)) if len(intervals) else np.inf
+
+    for first in range(0, store.n_epochs, block_epochs):
+        last = min(first + block_epochs, store.n_epochs)
+        lo, hi = max(first - SLIP_MARGIN, 0), min(last + SLIP_MARGIN, store.n_epochs)
+        view = store.epoch_range(lo, hi)
+        epoch_start = view.epoch_start
+        rows = slice(int(epoch_start[first - lo]), int(epoch_start[last - lo]))
+
+        signals = dual_frequency(view)
+        f1, f2 = signals.f1[rows], signals.f2[rows]
+        code1, code2 = signals.code1[rows], signals.code2[rows]
+        phase1, phase2 = signals.phase1[rows], signals.phase2[rows]
+        alpha = f1 ** 2 / (f1 ** 2 - f2 ** 2)
+        beta = f2 ** 2 / (f1 ** 2 - f2 ** 2)
+
+        block_code = alpha * code1 - beta * code2
+        if not np.isfinite(block_code).any():
+            continue
+        # Melbourne-Wübbena: wide-lane de fase menos narrow-lane de código, em ciclos wide-lane
+        widelane = ((f1 * phase1 - f2 * phase2) / (f1 - f2) -
+                    (f1 * code1 + f2 * code2) / (f1 + f2)) * (f1 - f2) / SPEED_OF_LIGHT
+        frequencies = np.stack([f1, f2], axis=1)
+        # Cada perda de ciclo (LLI, GF, MW ou interrupção) inicia um novo arco de ambiguidade
+        slips = detect_cycle_slips(view, signals, max_gap=max_gap).slips[rows]
+
+        block_sats = view.sat_index[rows]
+        states = orbits.transmission_states(sat_names[block_sats],
+                                            view.times[view.epoch_index[rows]], block_code)
+        clock = SPEED_OF_LIGHT * states.clock_bias
+        usable = np.isfinite(block_code) & states.valid
+        block_phase = alpha * phase1 - beta * phase2 + clock
+        block_code = block_code + clock
+
+        for epoch in range(first, last):
+            records = slice(int(epoch_start[epoch - lo] - epoch_start[first - lo]),
+                            int(epoch_start[epoch - lo + 1] - epoch_start[first - lo]))
+            keep = usable[records]
+            if not keep.any():
+                continue
+            yield PPPEpoch(
+                time=float(store.times[epoch]),
+                satellites=sat_names[block_sats[records][keep]].tolist(),
+                code=block_code[records][keep],
+                phase=block_phase[records][keep],
+                sat_positions=states.position[records][keep],
+                slips=slips[records][keep],
+                widelane=widelane[records][keep],
+                frequencies=frequencies[records][keep]
+            )
+
+
+class PPPFilter:
+    """EKF de PPP com ambiguidades reais da combinação livre da ionosfera
+
+    As ambiguidades ocupam posições de um vetor de estados pré-alocado: um satélite novo
+    recebe uma posição livre (linha e coluna da covariância zeradas) e um satélite que sai
+    libera a sua, sem reconstruir a covariância dos demais estados. Cada época custa
+    O(estados²) por observação.
+
+    Com um `smoother`, o estado filtrado de cada época é registrado para a passada RTS;
+    posição e ZWD têm identificadores fixos (o próprio índice) e o relógio e cada ambiguidade
+    recebem um identificador novo a cada reinício.
+
+    A troposfera (Saastamoinen + Niell) é fixada na inicialização a partir da posição inicial e
+    do dia da sessão; por época só as funções de mapeamento são avaliadas. O estado ZWD é o
+    atraso úmido zenital total, iniciado no valor a priori do modelo.
+
+    Com `ambiguity_resolution`, cada posição de ambiguidade acumula a média de
+    Melbourne-Wübbena do seu arco. Depois da atualização, as diferenças entre satélites da
+    mesma constelação têm a wide-lane arredondada e a narrow-lane fixada pelo LAMBDA; aceita
+    pelo teste da razão, a época ganha a posição condicionada aos inteiros (o estado do filtro
+    continua float). Sem produtos de bias de fase dos satélites, as narrow-lanes de dados
+    reais raramente são inteiras e a validação recusa a fixação.
+    """
+
+    def __init__(self, initial_position: Optional[np.ndarray] = None, static: bool = True,
+                 code_sigma: float = 0.9, phase_sigma: float = 0.009,
+                 elevation_mask: float = ELEVATION_MASK,
+                 zwd_noise: float = 1e-4, kinematic_noise: float = 10.0, capacity: int = 24,
+                 smoother: Optional[RTSSmoother] = None, ambiguity_resolution: bool = True,
+                 ratio_threshold: float = RATIO_THRESHOLD):
+        self.static = static
+        self.code_sigma = code_sigma
+        self.phase_sigma = phase_sigma
+        self.elevation_mask = np.radians(elevation_mask)
+        self.zwd_noise = zwd_noise            # m/√s (passeio aleatório)
+        self.kinematic_noise = kinematic_noise  # m/√s na posição quando não estático
+
+        size = FIXED_STATES + capacity
+        self.x = np.zeros(size)
+        self.P = np.zeros((size, size))
+        self.active = np.zeros(size, dtype=bool)
+        self.state_ids = np.arange(size, dtype=np.int64)
+        self.ambiguity_resolution = ambiguity_resolution
+        self.ratio_threshold = ratio_threshold
+        self._widelane_sum = np.zeros(size)
+        self._widelane_count = np.zeros(size, dtype=np.int64)
+        self._next_id = FIXED_STATES
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = list(range(size - 1, FIXED_STATES - 1, -1))
+        self._initial_position = None if initial_position is None else np.asarray(initial_position, dtype=float)
+        self.time: Optional[float] = None
+        self.epochs = 0
+        self.troposphere: Optional[Troposphere] = None
+
+        self.smoother = smoother
+        self._position_noise = 0.0
+        self._accumulated_zwd_noise = 0.0
+
+    # ------------------------------------------------------------ estados
+
+    def _grow(self) -> None:
+        """Dobra a capacidade de ambiguidades (raro; a covariância existente é copiada uma vez)"""
+        size = len(self.x)
+        extra = size - FIXED_STATES
+        self.x = np.concatenate([self.x, np.zeros(extra)])
+        P = np.zeros((size + extra, size + extra))
+        P[:size, :size] = self.P
+        self.P = P
+        self.active = np.concatenate([self.active, np.zeros(extra, dtype=bool)])
+        self.state_ids = np.concatenate([self.state_ids, np.zeros(extra, dtype=np.int64)])
+        self._widelane_sum = np.concatenate([self._widelane_sum, np.zeros(extra)])
+        self._widelane_count = np.concatenate([self._widelane_count, np.zeros(extra, dtype=np.int64)])
+        self._free.extend(range(size + extra - 1, size - 1, -1))
+
+    def _add_ambiguity(self, sat_id: str, value: float, variance: float) -> None:
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        self._slots[sat_id] = slot
+        self.x[slot] = value
+        self.P[slot, :] = 0.0
+        self.P[:, slot] = 0.0
+        self.P[slot, slot] = variance
+        self.active[slot] = True
+        self._widelane_sum[slot] = 0.0
+        self._widelane_count[slot] = 0
+        self._renew_id(slot)
+
+    def _drop_ambiguity(self, sat_id: str) -> None:
+        slot = self._slots.pop(sat_id)
+        self.P[slot, :] = 0.0
+        self.P[:, slot] = 0.0
+        self.x[slot] = 0.0
+        self.active[slot] = False
+        self._free.append(slot)
+
+    def _renew_id(self, index: int) -> None:
+        self.state_ids[index] = self._next_id
+        self._next_id += 1
+
+    def _reset_state(self, index: int, value: float, variance: float) -> None:
+        """Reinicia um estado sem correlação com os demais (ruído branco)"""
+        self.x[index] = value
+        self.P[index, :] = 0.0
+        self.P[:, index] = 0.0
+        self.P[index, index] = variance
+
+    @property
+    def ambiguities(self) -> Dict[str, float]:
+        return {sat: float(self.x[slot]) for sat, slot in self._slots.items()}
+
+    # ------------------------------------------------------------ filtro
+
+    def _initialize(self, epoch: PPPEpoch) -> bool:
+        """Posição e relógio iniciais por SPP com a pseudodistância livre da ionosfera"""
+        solution = solve_spp_batch(epoch.sat_positions[None], epoch.code[None],
+                                   initial_position=self._initial_position)
+        if not solution.valid[0]:
+            return False
+        self.x[POSITION] = solution.position[0]
+        self.P[POSITION, POSITION] = np.eye(3) * 10.0 ** 2
+        self.active[:FIXED_STATES] = True
+        self.troposphere = Troposphere.at(solution.position[0], epoch.time)
+        self._reset_state(ZWD, self.troposphere.zwd, 0.3 ** 2)
+        return True
+
+    def _geometry(self, epoch: PPPEpoch):
+        position = self.x[POSITION]
+        lat, lon, _ = (float(v) for v in geodetic_angles(position))
+        line_of_sight = epoch.sat_positions - position
+        ranges = np.linalg.norm(line_of_sight, axis=1)
+        unit = line_of_sight / ranges[:, None]
+        elevation, _ = elevation_azimuth(position, epoch.sat_positions)
+        hydrostatic, wet = self.troposphere.mapping(elevation)
+        tropo = hydrostatic * self.troposphere.zhd + wet * self.x[ZWD]
+        return lat, lon, ranges, unit, elevation, wet, tropo
+
+    def update(self, epoch: PPPEpoch) -> Optional[PPPSolution]:
+        """Propaga o filtro até a época e incorpora as observações de código e fase"""
+        if self.epochs == 0 and not self._initialize(epoch):
+            return None
+
+        dt = 0.0 if self.time is None else max(epoch.time - self.time, 0.0)
+        self.time = epoch.time
+        self.epochs += 1
+
+        # Propagação: posição estática (ou passeio aleatório), ZWD passeio aleatório
+        if not self.static:
+            self.P[POSITION, POSITION] += np.eye(3) * self.kinematic_noise ** 2 * dt
+            self._position_noise += self.kinematic_noise ** 2 * dt
+        self.P[ZWD, ZWD] += self.zwd_noise ** 2 * dt
+        self._accumulated_zwd_noise += self.zwd_noise ** 2 * dt
+
+        lat, lon, ranges, unit, elevation, wet_mapping, tropo = self._geometry(epoch)
+        visible = (elevation >= self.elevation_mask) & np.isfinite(epoch.code)
+        if visible.sum() < 4:
+            return None
+
+        # Relógio como ruído branco, reiniciado pela mediana dos resíduos de código
+        clock = float(np.median((epoch.code - ranges - tropo)[visible]))
+        self._reset_state(CLOCK, clock, 30.0 ** 2)
+        self._renew_id(CLOCK)
+
+        # Ambiguidades: satélites que saíram liberam a posição; novos ou com perda de ciclo entram
+        sats = np.asarray(epoch.satellites, dtype=str)
+        has_phase = visible & np.isfinite(epoch.phase)
+        current = set(sats[has_phase].tolist())
+        for sat_id in [s for s in self._slots if s not in current]:
+            self._drop_ambiguity(sat_id)
+        for k in np.flatnonzero(has_phase):
+            sat_id = str(sats[k])
+            if sat_id in self._slots and epoch.slips[k]:
+                self._drop_ambiguity(sat_id)
+            if sat_id not in self._slots:
+                self._add_ambiguity(sat_id, epoch.phase[k] - epoch.code[k], 20.0 ** 2)
+
+        rejected = self._measurement_update(epoch, sats, visible, has_phase, ranges, unit,
+                                            elevation, wet_mapping, tropo)
+        if epoch.widelane is not None:
+            for k in np.flatnonzero(has_phase & np.isfinite(epoch.widelane)):
+                slot = self._slots.get(str(sats[k]))
+                if slot is not None:
+                    self._widelane_sum[slot] += epoch.widelane[k]
+                    self._widelane_count[slot] += 1
+        if self.smoother is not None:
+            states = np.flatnonzero(self.active)
+            self.smoother.record(epoch.time, self.state_ids[states], self.x[states],
+                                 self.P[np.ix_(states, states)], self._position_noise,
+                                 self._accumulated_zwd_noise)
+            self._position_noise = self._accumulated_zwd_noise = 0.0
+
+        # Resíduos pós-ajuste da fase com o estado atualizado
+        lat, lon, ranges, unit, elevation, wet_mapping, tropo = self._geometry(epoch)
+        ambiguities = np.array([self.x[self._slots[s]] if s in self._slots else np.nan for s in sats])
+        residuals = (epoch.phase - ranges - self.x[CLOCK] - tropo - ambiguities)[has_phase]
+
+        rotation = enu_rotation(lat, lon)
+        cov_enu = rotation @ self.P[POSITION, POSITION] @ rotation.T
+        sigma_enu = np.sqrt(np.clip(np.diag(cov_enu), 0.0, None))
+        fix = None
+        if self.ambiguity_resolution and np.hypot(sigma_enu[0], sigma_enu[1]) < AR_MAX_SIGMA:
+            fix = self._resolve_ambiguities(epoch, sats, has_phase, elevation)
+        return PPPSolution(
+            time=epoch.time,
+            position=self.x[POSITION].copy(),
+            clock_bias=float(self.x[CLOCK]),
+            zwd=float(self.x[ZWD]),
+            sigma_enu=sigma_enu,
+            satellites=sats[visible].tolist(),
+            residuals=residuals,
+            dop=self._dop(unit[visible], rotation),
+            rejected=rejected,
+            **(fix or {})
+        )
+
+    def _measurement_update(self, epoch: PPPEpoch, sats: np.ndarray, visible: np.ndarray,
+                            has_phase: np.ndarray, ranges: np.ndarray, unit: np.ndarray,
+                            elevation: np.ndarray, wet_mapping: np.ndarray, tropo: np.ndarray) -> int:
+        """Atualização da época com as linhas de código e fase, rejeitando inovações grosseiras"""
+        states = np.flatnonzero(self.active)
+        column = {index: k for k, index in enumerate(states)}
+        code_rows = np.flatnonzero(visible)
+        phase_rows = np.flatnonzero(has_phase)
+        m = len(code_rows) + len(phase_rows)
+
+        H = np.zeros((m, len(states)))
+        innovation = np.empty(m)
+        variance = np.empty(m)
+        predicted = ranges + self.x[CLOCK] + tropo
+        weight = elevation_weights(elevation, 'sin2')
+
+        for offset, rows, phase in ((0, code_rows, False), (len(code_rows), phase_rows, True)):
+            block = slice(offset, offset + len(rows))
+            H[block, column[0]:column[0] + 3] = -unit[rows]
+            H[block, column[CLOCK]] = 1.0
+            H[block, column[ZWD]] = wet_mapping[rows]
+            if phase:
+                for i, k in enumerate(rows):
+                    H[offset + i, column[self._slots[sats[k]]]] = 1.0
+                ambiguities = np.array([self.x[self._slots[sats[k]]] for k in rows])
+                innovation[block] = epoch.phase[rows] - predicted[rows] - ambiguities
+                variance[block] = self.phase_sigma ** 2 / weight[rows]
+            else:
+                innovation[block] = epoch.code[rows] - predicted[rows]
+                variance[block] = self.code_sigma ** 2 / weight[rows]
+
+        P = self.P[np.ix_(states, states)]
+        PHt = P @ H.T
+        S = H @ PHt + np.diag(variance)
+
+        # Inovações acima de 5 sigma são descartadas; fase rejeitada reinicia a ambiguidade
+        normalized = np.abs(innovation) / np.sqrt(np.diag(S))
+        accepted = normalized < 5.0 if self.epochs > 1 else np.ones(m, dtype=bool)
+        rejected = int((~accepted).sum())
+        if rejected:
+            for i in np.flatnonzero(~accepted[len(code_rows):]):
+                logger.debug(f"Inovação de fase rejeitada para {sats[phase_rows[i]]}")
+            H, innovation, PHt = H[accepted], innovation[accepted], PHt[:, accepted]
+            S = S[np.ix_(accepted, accepted)]
+
+        K = np.linalg.solve(S, PHt.T).T
+        self.x[states] += K @ innovation
+        P = P - K @ PHt.T
+        self.P[np.ix_(states, states)] = 0.5 * (P + P.T)
+
+        for i in np.flatnonzero(~accepted[len(code_rows):]):
+            sat_id = str(sats[phase_rows[i]])
+            self._drop_ambiguity(sat_id)
+            self._add_ambiguity(sat_id, epoch.phase[phase_rows[i]] - epoch.code[phase_rows[i]], 20.0 ** 2)
+        return rejected
+
+    def _resolve_ambiguities(self, epoch: PPPEpoch, sats: np.ndarray, has_phase: np.ndarray,
+                             elevation: np.ndarray) -> Optional[Dict]:
+        """Fixação wide-lane/narrow-lane das diferenças entre satélites (campos da solução)
+
+        A ambiguidade livre da ionosfera (m) é B = c·f2/(f1²-f2²)·N_wl + λ_nl·N1: com a
+        wide-lane N_wl arredondada da média de Melbourne-Wübbena do arco, sobra a narrow-lane
+        N1 em ciclos de λ_nl = c/(f1+f2), cuja covariância sai da covariância do filtro. A
+        referência de cada constelação é o satélite de maior elevação com wide-lane disponível.
+        """
+        if epoch.widelane is None or epoch.frequencies is None:
+            return None
+        ready = [k for k in np.flatnonzero(has_phase)
+                 if str(sats[k]) in self._slots and np.isfinite(epoch.frequencies[k]).all()
+                 and self._widelane_count[self._slots[str(sats[k])]] >= WIDELANE_EPOCHS]
+
+        plus, minus, widelanes, wavelengths, coefficients = [], [], [], [], []
+        for system in sorted({str(sats[k])[0] for k in ready}):
+            members = [k for k in ready if str(sats[k])[0] == system]
+            if len(members) < 2:
+                continue
+            reference = max(members, key=lambda k: elevation[k])
+            ref_slot = self._slots[str(sats[reference])]
+            ref_widelane = self._widelane_sum[ref_slot] / self._widelane_count[ref_slot]
+            for k in members:
+                slot = self._slots[str(sats[k])]
+                if k == reference:
+                    continue
+                widelane = self._widelane_sum[slot] / self._widelane_count[slot] - ref_widelane
+                if abs(widelane - round(widelane)) > WIDELANE_FRACTION:
+                    continue
+                f1, f2 = epoch.frequencies[k]
+                plus.append(slot)
+                minus.append(ref_slot)
+                widelanes.append(round(widelane))
+                wavelengths.append(SPEED_OF_LIGHT / (f1 + f2))
+                coefficients.append(SPEED_OF_LIGHT * f2 / (f1 ** 2 - f2 ** 2))
+        if len(plus) < MIN_FIXED_AMBIGUITIES:
+            return None
+
+        states = np.flatnonzero(self.active)
+        column = {index: k for k, index in enumerate(states)}
+        D = np.zeros((len(plus), len(states)))
+        D[np.arange(len(plus)), [column[s] for s in plus]] = 1.0
+        D[np.arange(len(plus)), [column[s] for s in minus]] = -1.0
+        wavelengths, offset = np.array(wavelengths), np.array(coefficients) * np.array(widelanes)
+
+        x, P = self.x[states], self.P[np.ix_(states, states)]
+        DP = D @ P
+        Q_b = DP @ D.T
+        narrow_lane = (D @ x - offset) / wavelengths
+        try:
+            resolution = resolve_ambiguities(narrow_lane, Q_b / np.outer(wavelengths, wavelengths),
+                                             self.ratio_threshold)
+        except np.linalg.LinAlgError:
+            return None
+        if not resolution.accepted:
+            return {'ratio': resolution.ratio}
+
+        # Estado condicionado às ambiguidades fixas: x - P·Dᵀ·Q_b⁻¹·(D·x - B_fixo)
+        fixed_b = wavelengths * resolution.fixed + offset
+        conditioned = x - np.linalg.solve(Q_b, DP).T @ (D @ x - fixed_b)
+        return {'fixed': True, 'ratio': resolution.ratio, 'fixed_ambiguities': len(plus),
+                'fixed_position': conditioned[column[0]:column[0] + 3]}
+
+    @staticmethod
+    def _dop(unit: np.ndarray, rotation: np.ndarray) -> Dict[str, float]:
+        """DOP da geometria da época (posição e relógio)"""
+        G = np.hstack([-unit, np.ones((len(unit), 1))])
+        try:
+            Q = np.linalg.inv(G.T @ G)
+        except np.linalg.LinAlgError:
+            return {}
+        Q_enu = rotation @ Q[:3, :3] @ rotation.T
+        return {
+            'gdop': float(np.sqrt(np.trace(Q))),
+            'pdop': float(np.sqrt(np.trace(Q[:3, :3]))),
+            'hdop': float(np.sqrt(Q_enu[0, 0] + Q_enu[1, 1])),
+            'vdop': float(np.sqrt(Q_enu[2, 2]))
+        }
+
+    def run(self, epochs: Iterable[PPPEpoch]) -> Iterator[PPPSolution]:
+        """Processa um fluxo de épocas, entregando a solução de cada uma assim que calculada"""
+        for epoch in epochs:
+            solution = self.update(epoch)
+            if solution is not None:
+                yield solution
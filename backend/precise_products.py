@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Produtos precisos de órbita (SP3-c/d) e relógio (RINEX CLK)
+Interpola posições e relógios de satélites para arrays inteiros (satélite × época) e guarda os
+produtos já lidos em cache binário por semana/dia GPS
+"""
+
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+from datetime import datetime as dt, timedelta
+from typing import Dict, List, Optional, Sequence, TextIO, Tuple, Union
+
+import numpy as np
+
+try:
+    from .ephemeris import SPEED_OF_LIGHT, OrbitSource, SatelliteStates, rotate_earth
+    from .obs_store import GPS_EPOCH, to_gps_seconds
+    from .rinex_compression import COMPRESSION_SUFFIXES, open_rinex
+except ImportError:
+    from ephemeris import SPEED_OF_LIGHT, OrbitSource, SatelliteStates, rotate_earth
+    from obs_store import GPS_EPOCH, to_gps_seconds
+    from rinex_compression import COMPRESSION_SUFFIXES, open_rinex
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400.0
+
+# Grau do polinômio de Lagrange nas órbitas (11 épocas de 15 min cobrem 2,5 h)
+LAGRANGE_ORDER = 10
+# Intervalo usado na derivada numérica da órbita (correção relativística do relógio)
+VELOCITY_STEP = 0.5
+# Referencial das órbitas precisas (produtos IGS atuais estão no IGS20, alinhado ao ITRF2020)
+PRODUCTS_FRAME = os.getenv('GNSS_PRODUCTS_FRAME', 'IGS20')
+
+# Valores de "sem dado" do SP3
+SP3_BAD_CLOCK = 999999.0
+
+# Nomes de produtos: curtos (igs22510.sp3, igr22510.clk_30s) e longos do IGS (IGS0OPSFIN_20230620000_01D_15M_ORB.SP3)
+SHORT_PRODUCT_PATTERN = re.compile(r'^([a-z]{3})(\d{4})(\d)(?:_\d\d)?\.(sp3|clk|clk_30s)$')
+LONG_PRODUCT_PATTERN = re.compile(r'^([a-z0-9]{3})\d([a-z]{3})([a-z]{3})_(\d{4})(\d{3})\d{4}_01d_\w+?_(orb|clk)\.(sp3|clk)$')
+
+# Preferência entre produtos do mesmo dia: final, rápido, ultrarrápido
+PRODUCT_RANK = {'fin': 0, 'rap': 1, 'ult': 2}
+SHORT_PRODUCT_TYPES = {'igr': 'rap', 'igu': 'ult', 'cor': 'rap', 'gfu': 'ult'}
+
+
+def _parse_time_fields(parts: Sequence[str]) -> dt:
+    return dt(int(parts[0]), int(parts[1]), int(parts[2]), int(parts[3]), int(parts[4])) + \
+        timedelta(seconds=float(parts[5]))
+
+
+def _satellite_id(token: str) -> Optional[str]:
+    """Identificador SP3/CLK ("G01", " 1" em arquivos antigos) no formato "G01" """
+    token = token.strip() if token.strip()[:1].isalpha() else 'G' + token.strip()
+    if len(token) < 2 or not token[1:].isdigit():
+        return None
+    return f"{token[0].upper()}{int(token[1:]):02d}"
+
+
+def _dense(times: List[float], records: List[Tuple[int, str, Tuple[float, ...]]],
+           width: int) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """Converte registros (época, satélite, valores) em matriz densa época × satélite"""
+    satellites = sorted({sat for _, sat, _ in records})
+    index = {sat: k for k, sat in enumerate(satellites)}
+    values = np.full((len(times), len(satellites), width), np.nan)
+    if records:
+        epochs = np.array([r[0] for r in records])
+        sats = np.array([index[r[1]] for r in records])
+        values[epochs, sats] = np.array([r[2] for r in records], dtype=np.float64)
+    return np.array(times, dtype=np.float64), satellites, values
+
+
+def read_sp3(source: Union[str, TextIO]) -> Tuple[np.ndarray, List[str], np.ndarray, np.ndarray]:
+    """Lê um arquivo SP3-c/d
+
+    Retorna os instantes (segundos GPS), os satélites, as posições (épocas × satélites × 3, em
+    metros) e os relógios (épocas × satélites, em segundos), com NaN nos valores ausentes.
+    """
+    stream = open_rinex(source) if isinstance(source, str) else source
+    times: List[float] = []
+    records: List[Tuple[int, str, Tuple[float, ...]]] = []
+    try:
+        for line in stream:
+            if line.startswith('*'):
+                times.append(to_gps_seconds(_parse_time_fields(line[1:].split())))
+            elif line.startswith('P') and times:
+                sat_id = _satellite_id(line[1:4])
+                if sat_id is None:
+                    continue
+                try:
+                    x, y, z = (float(line[4 + 14 * k:18 + 14 * k]) for k in range(3))
+                    clock = float(line[46:60]) if line[46:60].strip() else SP3_BAD_CLOCK
+                except ValueError:
+                    continue
+                position = (x * 1e3, y * 1e3, z * 1e3) if (x, y, z) != (0.0, 0.0, 0.0) else (np.nan,) * 3
+                clock = clock * 1e-6 if abs(clock) < SP3_BAD_CLOCK else np.nan
+                records.append((len(times) - 1, sat_id, position + (clock,)))
+            elif line.startswith('EOF'):
+                break
+    finally:
+        if isinstance(source, str):
+            stream.close()
+
+    times_array, satellites, values = _dense(times, records, 4)
+    return times_array, satellites, values[..., :3], values[..., 3]
+
+
+def read_clock(source: Union[str, TextIO]) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """Lê os registros de relógio de satélite (AS) de um arquivo RINEX CLK 2.x/3.x
+
+    Retorna os instantes (segundos GPS), os satélites e os relógios (instantes × satélites, em segundos).
+    """
+    stream = open_rinex(source) if isinstance(source, str) else source
+    time_index: Dict[float, int] = {}
+    records: List[Tuple[int, str, Tuple[float, ...]]] = []
+    try:
+        for line in stream:
+            if line[60:73] == 'END OF HEADER':
+                break
+        for line in stream:
+            if not line.startswith('AS '):
+                continue
+            parts = line.split()
+            sat_id = _satellite_id(parts[1]) if len(parts) >= 10 else None
+            if sat_id is None:
+                continue
+            try:
+                t = to_gps_seconds(_parse_time_fields(parts[2:8]))
+                bias = float(parts[9].replace('D', 'E'))
+            except ValueError:
+                continue
+            records.append((time_index.setdefault(t, len(time_index)), sat_id, (bias,)))
+    finally:
+        if isinstance(source, str):
+            stream.close()
+
+    times = sorted(time_index, key=time_index.get)
+    times_array, satellites, values = _dense(times, records, 1)
+    order = np.argsort(times_array, kind='stable')
+    return times_array[order], satellites, values[order, :, 0]
+
+
+def _lagrange_weights(times: np.ndarray, nodes: np.ndarray, t: np.ndarray, interval: float) -> np.ndarray:
+    """Pesos de Lagrange (N, n) de cada instante sobre sua janela de épocas"""
+    x = (t[:, None] - times[nodes]) / interval
+    node_x = (times[nodes] - times[nodes[:, :1]]) / interval
+    n = nodes.shape[1]
+    weights = np.ones(nodes.shape)
+    for j in range(n):
+        for k in range(n):
+            if k != j:
+                weights[:, j] *= x[:, k] / (node_x[:, j] - node_x[:, k])
+    return weights
+
+
+class PreciseProducts(OrbitSource):
+    """Órbitas SP3 e relógios CLK em matrizes densas época × satélite"""
+
+    def __init__(self, orbit_times: np.ndarray, satellites: Sequence[str], positions: np.ndarray,
+                 sp3_clock: np.ndarray, clock_times: Optional[np.ndarray] = None,
+                 clock_satellites: Optional[Sequence[str]] = None, clocks: Optional[np.ndarray] = None,
+                 sources: Sequence[str] = ()):
+        self.orbit_times = np.asarray(orbit_times, dtype=np.float64)
+        self.satellites: List[str] = list(satellites)
+        self.positions = np.asarray(positions, dtype=np.float64)
+        self.sp3_clock = np.asarray(sp3_clock, dtype=np.float64)
+        self.sources: List[str] = list(sources)
+
+        # Sem CLK, os relógios do próprio SP3 são interpolados
+        if clocks is None or clock_times is None or not len(clock_times):
+            clock_times, clock_satellites, clocks = self.orbit_times, self.satellites, self.sp3_clock
+        self.clock_times = np.asarray(clock_times, dtype=np.float64)
+        self.clock_satellites: List[str] = list(clock_satellites)
+        self.clocks = np.asarray(clocks, dtype=np.float64)
+
+        self.orbit_interval = float(np.median(np.diff(self.orbit_times))) if len(self.orbit_times) > 1 else 900.0
+        self.clock_interval = float(np.median(np.diff(self.clock_times))) if len(self.clock_times) > 1 else 300.0
+
+    @classmethod
+    def concatenate(cls, parts: Sequence['PreciseProducts']) -> 'PreciseProducts':
+        """Une produtos de dias consecutivos, descartando épocas repetidas na virada do dia"""
+        satellites = sorted({s for p in parts for s in p.satellites})
+        clock_satellites = sorted({s for p in parts for s in p.clock_satellites})
+
+        def stack(times_of, sats_of, values_of, columns):
+            times = np.concatenate([times_of(p) for p in parts])
+            shape = (len(times), len(columns)) + values_of(parts[0]).shape[2:]
+            values = np.full(shape, np.nan)
+            row = 0
+            for p in parts:
+                index = [columns.index(s) for s in sats_of(p)]
+                values[row:row + len(times_of(p)), index] = values_of(p)
+                row += len(times_of(p))
+            times, unique = np.unique(times, return_index=True)
+            return times, values[unique]
+
+        orbit_times, positions = stack(lambda p: p.orbit_times, lambda p: p.satellites,
+                                       lambda p: p.positions, satellites)
+        _, sp3_clock = stack(lambda p: p.orbit_times, lambda p: p.satellites,
+                             lambda p: p.sp3_clock, satellites)
+        clock_times, clocks = stack(lambda p: p.clock_times, lambda p: p.clock_satellites,
+                                    lambda p: p.clocks, clock_satellites)
+        return cls(orbit_times, satellites, positions, sp3_clock, clock_times, clock_satellites, clocks,
+                   [s for p in parts for s in p.sources])
+
+    def _columns(self, satellites: Sequence[str], sat_ids: np.ndarray) -> np.ndarray:
+        """Coluna de cada satélite pedido (-1 quando o produto não o contém)"""
+        index = {s: k for k, s in enumerate(satellites)}
+        unique, inverse = np.unique(sat_ids, return_inverse=True)
+        return np.array([index.get(s, -1) for s in unique.tolist()], dtype=np.int64)[inverse]
+
+    def _interpolate_orbit(self, columns: np.ndarray, t: np.ndarray) -> np.ndarray:
+        """Lagrange de grau LAGRANGE_ORDER sobre a janela centrada em cada instante"""
+        n_epochs = len(self.orbit_times)
+        n = min(LAGRANGE_ORDER + 1, n_epochs)
+        result = np.full((len(t), 3), np.nan)
+        inside = (columns >= 0) & (t >= self.orbit_times[0]) & (t <= self.orbit_times[-1]) if n_epochs else \
+            np.zeros(len(t), dtype=bool)
+        if not inside.any() or n < 2:
+            return result
+
+        ti = t[inside]
+        start = np.clip(np.searchsorted(self.orbit_times, ti) - n // 2, 0, n_epochs - n)
+        nodes = start[:, None] + np.arange(n)
+        weights = _lagrange_weights(self.orbit_times, nodes, ti, self.orbit_interval)
+        values = self.positions[nodes, columns[inside][:, None]]
+        result[inside] = np.einsum('nj,njc->nc', weights, values)
+        return result
+
+    def _interpolate_clock(self, columns: np.ndarray, t: np.ndarray) -> np.ndarray:
+        """Interpolação linear entre as duas épocas de relógio vizinhas"""
+        n_times = len(self.clock_times)
+        result = np.full(len(t), np.nan)
+        inside = (columns >= 0) & (t >= self.clock_times[0]) & (t <= self.clock_times[-1]) if n_times > 1 else \
+            np.zeros(len(t), dtype=bool)
+        if not inside.any():
+            return result
+
+        ti = t[inside]
+        right = np.clip(np.searchsorted(self.clock_times, ti), 1, n_times - 1)
+        left = right - 1
+        t0, t1 = self.clock_times[left], self.clock_times[right]
+        c0 = self.clocks[left, columns[inside]]
+        c1 = self.clocks[right, columns[inside]]
+        fraction = (ti - t0) / (t1 - t0)
+        # Lacunas maiores que dois intervalos não são interpoladas
+        result[inside] = np.where(t1 - t0 <= 2 * self.clock_interval, c0 + fraction * (c1 - c0), np.nan)
+        return result
+
+    def satellite_states(self, sat_ids, times, travel_time=None) -> SatelliteStates:
+        """Posição ECEF e relógio interpolados para cada par (satélite, instante)
+
+        Aceita broadcasting como `BroadcastEphemeris.satellite_states`. O relógio inclui a
+        correção relativística periódica (-2 r·v / c²), omitida nos produtos precisos.
+        """
+        sat_ids, times = np.broadcast_arrays(np.asarray(sat_ids, dtype='<U3'),
+                                             np.asarray(times, dtype=np.float64))
+        shape = sat_ids.shape
+        sat_flat = sat_ids.ravel()
+        t = times.ravel()
+
+        orbit_columns = self._columns(self.satellites, sat_flat)
+        position = self._interpolate_orbit(orbit_columns, t)
+        velocity = (self._interpolate_orbit(orbit_columns, t + VELOCITY_STEP) -
+                    self._interpolate_orbit(orbit_columns, t - VELOCITY_STEP)) / (2 * VELOCITY_STEP)
+        clock = self._interpolate_clock(self._columns(self.clock_satellites, sat_flat), t)
+        clock = clock - 2.0 * np.einsum('nk,nk->n', position, velocity) / SPEED_OF_LIGHT ** 2
+
+        valid = np.isfinite(position).all(axis=1) & np.isfinite(clock)
+        position[~valid] = np.nan
+        clock[~valid] = np.nan
+        if travel_time is not None:
+            position = rotate_earth(position, np.broadcast_to(travel_time, shape).ravel())
+
+        return SatelliteStates(
+            position=position.reshape(shape + (3,)),
+            clock_bias=clock.reshape(shape),
+            group_delay=np.where(valid, 0.0, np.nan).reshape(shape),
+            valid=valid.reshape(shape),
+            ephemeris=np.where(valid, orbit_columns, -1).reshape(shape)
+        )
+
+    def coverage(self, satellites: Sequence[str]) -> List[str]:
+        """Satélites da lista presentes nas órbitas e nos relógios"""
+        orbits = set(self.satellites)
+        clocks = set(self.clock_satellites)
+        return [s for s in satellites if s in orbits and s in clocks]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays usados no cache binário"""
+        return {
+            'orbit_times': self.orbit_times, 'satellites': np.array(self.satellites, dtype='<U3'),
+            'positions': self.positions, 'sp3_clock': self.sp3_clock,
+            'clock_times': self.clock_times, 'clock_satellites': np.array(self.clock_satellites, dtype='<U3'),
+            'clocks': self.clocks, 'sources': np.array(self.sources, dtype=str)
+        }
+
+
+def _product_info(name: str) -> Optional[Tuple[int, str, int]]:
+    """(dia GPS, tipo 'orb'/'clk', preferência) a partir do nome de um arquivo de produto"""
+    lower = name.lower()
+    for suffix in COMPRESSION_SUFFIXES:
+        if lower.endswith(suffix):
+            lower = lower[:-len(suffix)]
+            break
+
+    match = SHORT_PRODUCT_PATTERN.match(lower)
+    if match:
+        center, week, dow, extension = match.groups()
+        day = int(week) * 7 + int(dow)
+        kind = 'orb' if extension == 'sp3' else 'clk'
+        rank = PRODUCT_RANK[SHORT_PRODUCT_TYPES.get(center, 'fin')]
+        return day, kind, rank
+
+    match = LONG_PRODUCT_PATTERN.match(lower)
+    if match:
+        _, _, product_type, year, doy, kind, _ = match.groups()
+        date = dt(int(year), 1, 1) + timedelta(days=int(doy) - 1)
+        day = (date - GPS_EPOCH).days
+        return day, kind, PRODUCT_RANK.get(product_type, len(PRODUCT_RANK))
+    return None
+
+
+class ProductStore:
+    """Diretório local de produtos precisos com cache binário por semana/dia GPS
+
+    Cada dia lido dos arquivos SP3/CLK é gravado em `cache/<semana><dia>.npz`; os jobs
+    seguintes do mesmo dia carregam os arrays diretamente, sem interpretar o texto.
+    """
+
+    def __init__(self, directory: str = None):
+        if directory is None:
+            directory = os.getenv('GNSS_PRODUCTS_DIR', os.path.join('data', 'products'))
+        self.directory = Path(directory)
+        self.cache_dir = self.directory / 'cache'
+
+    def _product_files(self) -> Dict[Tuple[int, str], Path]:
+        """Melhor arquivo de órbita e de relógio disponível para cada dia GPS"""
+        if not self.directory.is_dir():
+            return {}
+        best: Dict[Tuple[int, str], Tuple[int, str, Path]] = {}
+        for path in self.directory.iterdir():
+            info = _product_info(path.name) if path.is_file() else None
+            if info is None:
+                continue
+            day, kind, rank = info
+            candidate = (rank, path.name, path)
+            if (day, kind) not in best or candidate < best[(day, kind)]:
+                best[(day, kind)] = candidate
+        return {key: value[2] for key, value in best.items()}
+
+    @staticmethod
+    def _signature(paths: Sequence[Path]) -> List[str]:
+        return [f"{p.name}:{p.stat().st_size}" for p in paths]
+
+    def _cache_path(self, day: int) -> Path:
+        return self.cache_dir / f"{day // 7:04d}{day % 7}.npz"
+
+    def load_day(self, day: int, files: Optional[Dict[Tuple[int, str], Path]] = None) -> Optional[PreciseProducts]:
+        """Produtos de um dia GPS (dias desde 1980-01-06), do cache ou dos arquivos"""
+        files = self._product_files() if files is None else files
+        orbit_file = files.get((day, 'orb'))
+        clock_file = files.get((day, 'clk'))
+        sources = [p for p in (orbit_file, clock_file) if p is not None]
+        signature = self._signature(sources)
+
+        cache_path = self._cache_path(day)
+        if cache_path.exists():
+            try:
+                with np.load(cache_path) as cached:
+                    if not sources or cached['sources'].tolist() == signature:
+                        logger.info(f"⚡ Produtos precisos da semana {day // 7} dia {day % 7} lidos do cache")
+                        return PreciseProducts(
+                            cached['orbit_times'], cached['satellites'].tolist(), cached['positions'],
+                            cached['sp3_clock'], cached['clock_times'], cached['clock_satellites'].tolist(),
+                            cached['clocks'], [s.split(':')[0] for s in cached['sources'].tolist()])
+            except Exception as e:
+                logger.warning(f"⚠️ Cache de produtos inválido ({cache_path.name}): {e}")
+
+        if orbit_file is None:
+            return None
+
+        logger.info(f"📡 Lendo órbitas precisas: {orbit_file.name}")
+        orbit_times, satellites, positions, sp3_clock = read_sp3(str(orbit_file))
+        clock_args = ()
+        if clock_file is not None:
+            logger.info(f"🕐 Lendo relógios precisos: {clock_file.name}")
+            clock_args = read_clock(str(clock_file))
+        products = PreciseProducts(orbit_times, satellites, positions, sp3_clock, *clock_args,
+                                   sources=[p.name for p in sources])
+        self._write_cache(cache_path, products, signature)
+        return products
+
+    def _write_cache(self, cache_path: Path, products: PreciseProducts, signature: List[str]) -> None:
+        """Grava o cache de forma atômica (vários jobs podem ler o mesmo dia em paralelo)"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            arrays = products.arrays()
+            arrays['sources'] = np.array(signature, dtype=str)
+            fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as tmp:
+                np.savez(tmp, **arrays)
+            os.replace(tmp_name, cache_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível gravar o cache de produtos: {e}")
+
+    def load(self, times: np.ndarray, margin: float = 3600.0) -> Optional[PreciseProducts]:
+        """Produtos que cobrem os instantes dados (segundos GPS), incluindo dias vizinhos na margem"""
+        times = np.asarray(times, dtype=np.float64)
+        if not len(times):
+            return None
+        first = int((times.min() - margin) // SECONDS_PER_DAY)
+        last = int((times.max() + margin) // SECONDS_PER_DAY)
+
+        files = self._product_files()
+        parts = [p for p in (self.load_day(day, files) for day in range(first, last + 1)) if p is not None]
+        if not parts:
+            logger.warning(f"Produtos precisos não encontrados em {self.directory} "
+                           f"(semana GPS {first // 7}, dia {first % 7})")
+            return None
+        return parts[0] if len(parts) == 1 else PreciseProducts.concatenate(parts)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Fases de processamento com tempos medidos
+Cada fase reporta o próprio progresso a partir do trabalho realmente executado
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Recebe o nome da fase e a fração concluída dela (0.0 a 1.0)
+ProgressCallback = Callable[[str, float], None]
+
+
+class StageTimer:
+    """Executa as fases de um processamento medindo o tempo de cada uma"""
+
+    def __init__(self, progress_callback: Optional[ProgressCallback] = None):
+        self.timings: Dict[str, float] = {}
+        self._callback = progress_callback
+        self._current: Optional[str] = None
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator['StageTimer']:
+        """Delimita uma fase; o tempo é registrado mesmo se a fase falhar"""
+        previous = self._current
+        self._current = name
+        self.update(0.0)
+        started = time.perf_counter()
+        try:
+            yield self
+            self.update(1.0)
+        finally:
+            self.timings[name] = time.perf_counter() - started
+            logger.info(f"⏱️ Fase '{name}' concluída em {self.timings[name]:.3f}s")
+            self._current = previous
+
+    def update(self, fraction: float) -> None:
+        """Informa a fração concluída da fase corrente"""
+        if self._callback is not None and self._current is not None:
+            try:
+                self._callback(self._current, min(max(float(fraction), 0.0), 1.0))
+            except Exception as e:
+                logger.warning(f"⚠️ Falha ao reportar progresso da fase '{self._current}': {e}")
+
+    @property
+    def elapsed(self) -> float:
+        """Tempo total desde a criação, em segundos"""
+        return time.perf_counter() - self._start
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Referenciais geodésicos e época de referência
+Transformações de Helmert de 14 parâmetros (7 parâmetros e suas taxas) entre realizações do
+ITRF, conversão para SIRGAS2000 (ITRF2000 na época 2000,4) e propagação das coordenadas com
+velocidades interpoladas de uma grade do modelo de velocidades (VEMOS), lida uma única vez e
+mapeada em memória. Todas as funções operam sobre arrays de posições (..., 3)
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from .grids import RegularGrid, load_grid
+    from .obs_store import GPS_EPOCH
+    from .transforms import GRS80, ecef_to_geodetic, enu_rotation
+except ImportError:
+    from grids import RegularGrid, load_grid
+    from obs_store import GPS_EPOCH
+    from transforms import GRS80, ecef_to_geodetic, enu_rotation
+
+logger = logging.getLogger(__name__)
+
+SIRGAS2000_FRAME = 'ITRF2000'
+SIRGAS2000_EPOCH = 2000.4
+
+# Arquivo texto da grade de velocidades: longitude, latitude (graus) e velocidades leste, norte
+# e, opcionalmente, vertical (m/ano) por linha
+VELOCITY_GRID = os.getenv('GNSS_VELOCITY_GRID', os.path.join('data', 'velocity', 'vemos.txt'))
+
+MM = 1e-3
+PPB = 1e-9
+MAS = np.radians(1.0 / 3600000.0)
+
+
+@dataclass(frozen=True)
+class HelmertParameters:
+    """Parâmetros de Helmert (convenção IERS) e suas taxas anuais na época de referência
+
+    Translações em mm, escala em ppb e rotações em mas; as taxas nas mesmas unidades por ano.
+    """
+    translation: Tuple[float, float, float]
+    scale: float
+    rotation: Tuple[float, float, float]
+    translation_rate: Tuple[float, float, float]
+    scale_rate: float
+    rotation_rate: Tuple[float, float, float]
+    epoch: float
+
+    def at(self, epoch: Union[float, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Translação (m), escala (adimensional) e rotação (rad) na época dada (ano decimal)"""
+        dt = np.asarray(epoch, dtype=np.float64)[..., None] - self.epoch
+        translation = (np.array(self.translation) + np.array(self.translation_rate) * dt) * MM
+        scale = (self.scale + self.scale_rate * dt[..., 0]) * PPB
+        rotation = (np.array(self.rotation) + np.array(self.rotation_rate) * dt) * MAS
+        return translation, scale, rotation
+
+    def apply(self, positions: np.ndarray, epoch: Union[float, np.ndarray], inverse: bool = False) -> np.ndarray:
+        """X' = X + T + D·X + R×X (aproximação linear; a inversa troca o sinal dos parâmetros)"""
+        positions = np.asarray(positions, dtype=np.float64)
+        translation, scale, rotation = self.at(epoch)
+        if inverse:
+            translation, scale, rotation = -translation, -scale, -rotation
+        return positions + translation + scale[..., None] * positions + np.cross(rotation, positions)
+
+
+# Do ITRF2020 para as realizações anteriores (IERS, ITRF2020 Transformation Parameters)
+ITRF2020_TO: Dict[str, HelmertParameters] = {
+    'ITRF2014': HelmertParameters((-1.4, -0.9, 1.4), -0.42, (0.0, 0.0, 0.0),
+                                  (0.0, -0.1, 0.2), 0.00, (0.0, 0.0, 0.0), 2015.0),
+    'ITRF2008': HelmertParameters((0.2, 1.0, 3.3), -0.29, (0.0, 0.0, 0.0),
+                                  (0.0, -0.1, 0.1), 0.03, (0.0, 0.0, 0.0), 2015.0),
+    'ITRF2005': HelmertParameters((2.7, 0.1, -1.4), 0.65, (0.0, 0.0, 0.0),
+                                  (0.3, -0.1, 0.1), 0.03, (0.0, 0.0, 0.0), 2015.0),
+    'ITRF2000': HelmertParameters((-0.2, 0.8, -34.2), 2.25, (0.0, 0.0, 0.0),
+                                  (0.1, 0.0, -1.7), 0.11, (0.0, 0.0, 0.0), 2015.0),
+}
+
+# Realizações equivalentes no nível do centímetro ou abaixo
+FRAME_ALIASES = {
+    'IGS20': 'ITRF2020', 'IGB14': 'ITRF2014', 'IGS14': 'ITRF2014', 'IGB08': 'ITRF2008',
+    'IGS08': 'ITRF2008', 'IGS05': 'ITRF2005', 'IGS00': 'ITRF2000', 'SIRGAS2000': SIRGAS2000_FRAME,
+    # WGS84 (G1762/G2139) alinhado ao ITRF2008/ITRF2014 em ~1 cm
+    'WGS84': 'ITRF2014',
+}
+
+
+def frame_name(frame: str) -> str:
+    """Nome canônico do referencial (ITRFxxxx)"""
+    name = frame.upper().replace(' ', '').replace('_', '')
+    name = FRAME_ALIASES.get(name, name)
+    if name != 'ITRF2020' and name not in ITRF2020_TO:
+        raise ValueError(f"Referencial desconhecido: {frame}")
+    return name
+
+
+def transform_frame(positions: np.ndarray, source: str, target: str,
+                    epoch: Union[float, np.ndarray]) -> np.ndarray:
+    """Posições ECEF (..., 3) do referencial `source` para `target` na mesma época (ano decimal)
+
+    A cadeia passa pelo ITRF2020, para o qual o IERS publica os parâmetros de todas as
+    realizações; `epoch` pode ser escalar ou um array por ponto.
+    """
+    source, target = frame_name(source), frame_name(target)
+    positions = np.asarray(positions, dtype=np.float64)
+    if source == target:
+        return positions.copy()
+    if source != 'ITRF2020':
+        positions = ITRF2020_TO[source].apply(positions, epoch, inverse=True)
+    if target != 'ITRF2020':
+        positions = ITRF2020_TO[target].apply(positions, epoch)
+    return positions
+
+
+def decimal_year(gps_seconds: Union[float, np.ndarray]) -> np.ndarray:
+    """Ano decimal de instantes em segundos GPS"""
+    times = np.datetime64(GPS_EPOCH, 'us') + (np.asarray(gps_seconds, dtype=np.float64) * 1e6).astype('timedelta64[us]')
+    start = times.astype('datetime64[Y]')
+    length = (start + np.timedelta64(1, 'Y')).astype('datetime64[us]') - start.astype('datetime64[us]')
+    elapsed = times - start.astype('datetime64[us]')
+    return start.astype(np.float64) + 1970.0 + elapsed / length
+
+
+def propagate(positions: np.ndarray, velocities: np.ndarray, epoch: Union[float, np.ndarray],
+              target_epoch: Union[float, np.ndarray]) -> np.ndarray:
+    """Leva posições ECEF da época `epoch` para `target_epoch` com velocidades ECEF (m/ano)"""
+    dt = np.asarray(target_epoch, dtype=np.float64) - np.asarray(epoch, dtype=np.float64)
+    return np.asarray(positions, dtype=np.float64) + np.asarray(velocities) * dt[..., None]
+
+
+class VelocityGrid(RegularGrid):
+    """Grade do modelo de velocidades: leste, norte e vertical (m/ano) por nó
+
+    Linhas do arquivo texto: longitude, latitude, ve, vn e, opcionalmente, vu.
+    """
+    n_values = 3
+    description = 'grade de velocidades'
+
+    def ecef_velocities(self, positions: np.ndarray) -> np.ndarray:
+        """Velocidades ECEF (m/ano) das posições ECEF (..., 3)"""
+        lat, lon, _ = ecef_to_geodetic(positions, GRS80)
+        enu = self.interpolate(np.degrees(lat), np.degrees(lon))
+        return np.einsum('...ji,...j->...i', enu_rotation(lat, lon), enu)
+
+
+def load_velocity_grid(path: Optional[str] = None) -> Optional[VelocityGrid]:
+    """Grade de velocidades do arquivo local, carregada uma vez por processo"""
+    return load_grid(VelocityGrid, os.path.abspath(path or VELOCITY_GRID))
+
+
+@dataclass
+class FrameCoordinates:
+    """Posições num referencial e época de referência"""
+    positions: np.ndarray        # ECEF (..., 3)
+    frame: str
+    epoch: np.ndarray            # época de referência (ano decimal) de cada ponto
+    observation_epoch: np.ndarray
+    velocities: np.ndarray       # ECEF (m/ano) usadas na propagação; NaN sem modelo
+    propagated: np.ndarray       # pontos levados à época de referência
+
+    def summary(self) -> Dict[str, object]:
+        """Descrição do referencial para o relatório (pontos de uma mesma época)"""
+        epoch = float(np.mean(self.epoch))
+        name = 'SIRGAS2000' if self.frame == SIRGAS2000_FRAME and np.all(self.propagated) else self.frame
+        return {
+            'frame': name,
+            'epoch': round(epoch, 4),
+            'observation_epoch': round(float(np.mean(self.observation_epoch)), 4),
+            'velocity_model': bool(np.all(self.propagated))
+        }
+
+
+def to_sirgas2000(positions: np.ndarray, epoch: Union[float, np.ndarray], frame: str = 'ITRF2020',
+                  velocities: Optional[np.ndarray] = None,
+                  grid: Optional[VelocityGrid] = None) -> FrameCoordinates:
+    """SIRGAS2000 na época 2000,4 a partir de posições ECEF num ITRF na época de observação
+
+    Transforma para o ITRF2000 na época de observação e propaga até 2000,4 com `velocities`
+    (ECEF, m/ano) ou, sem elas, com a grade de velocidades local. Pontos sem velocidade
+    permanecem no ITRF2000 da época de observação (`propagated` falso).
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    epoch = np.broadcast_to(np.asarray(epoch, dtype=np.float64), positions.shape[:-1])
+    itrf2000 = transform_frame(positions, frame, SIRGAS2000_FRAME, epoch)
+
+    if velocities is None:
+        grid = grid if grid is not None else load_velocity_grid()
+        velocities = grid.ecef_velocities(itrf2000) if grid is not None else np.full(positions.shape, np.nan)
+    velocities = np.broadcast_to(np.asarray(velocities, dtype=np.float64), positions.shape)
+    propagated = np.all(np.isfinite(velocities), axis=-1)
+    target = np.where(propagated, SIRGAS2000_EPOCH, epoch)
+    result = propagate(itrf2000, np.where(propagated[..., None], velocities, 0.0), epoch, target)
+    return FrameCoordinates(result, SIRGAS2000_FRAME, target, epoch, velocities, propagated)
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Descompressão em fluxo de arquivos RINEX
+Suporta gzip, bzip2, Unix compress (.Z), membros de ZIP e Compact RINEX (Hatanaka) sem gerar arquivos intermediários
+"""
+
+import bz2
+import gzip
+import io
+import logging
+import re
+import zipfile
+from collections import deque
+from typing import BinaryIO, Deque, Dict, List, Optional, TextIO, Union
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b'\x1f\x8b'
+BZIP2_MAGIC = b'BZh'
+UNIX_COMPRESS_MAGIC = b'\x1f\x9d'
+ZIP_MAGIC = b'PK\x03\x04'
+
+CRINEX_LABEL = 'CRINEX VERS   / TYPE'
+
+# Extensões de membros de ZIP reconhecidos como RINEX de observação (comprimidos ou não)
+RINEX_MEMBER_PATTERN = re.compile(r'(\.\d\d[od]|\.rnx|\.crx|\.obs)$')
+# Navegação: RINEX 2 (.yyn GPS, .yyg GLONASS, .yyl Galileo, .yyp mista), .nav e nomes longos RINEX 3 (_MN.rnx)
+NAVIGATION_MEMBER_PATTERN = re.compile(r'(\.\d\d[ngpl]|\.nav|_[a-z]n\.rnx)$')
+COMPRESSION_SUFFIXES = ('.gz', '.z', '.bz2')
+# Extensões aceitas nas mensagens de erro (yy = ano com dois dígitos)
+RINEX_EXTENSIONS_LABEL = '.yyo, .yyd, .rnx, .crx, .obs (também .gz/.Z/.bz2)'
+NAVIGATION_EXTENSIONS_LABEL = '.nav, .yyn, .yyg, .yyl, .yyp, _MN.rnx (também .gz/.Z/.bz2)'
+
+
+class UnixCompressReader(io.RawIOBase):
+    """Descompressor LZW do formato Unix compress (.Z) em fluxo
+
+    Os códigos são lidos em grupos de 8 (um grupo de `bits` bytes). Quando a largura do
+    código muda ou um código CLEAR é lido, o restante do grupo é descartado, como no
+    compress original.
+    """
+
+    CLEAR = 256
+
+    def __init__(self, raw: BinaryIO):
+        header = raw.read(3)
+        if header[:2] != UNIX_COMPRESS_MAGIC or len(header) < 3:
+            raise ValueError("Arquivo não está no formato Unix compress (.Z)")
+        self._raw = raw
+        self._max_bits = header[2] & 0x1f
+        self._block_mode = bool(header[2] & 0x80)
+        if not 9 <= self._max_bits <= 16:
+            raise ValueError(f"Largura máxima de código LZW inválida: {self._max_bits}")
+        self._reset_table()
+        self._output = bytearray()
+        self._eof = False
+
+    def _reset_table(self) -> None:
+        self._table: List[bytes] = [bytes([i]) for i in range(256)]
+        if self._block_mode:
+            self._table.append(b'')  # Código CLEAR
+        self._bits = 9
+        self._previous: Optional[bytes] = None
+
+    def readable(self) -> bool:
+        return True
+
+    def _decode_group(self) -> None:
+        bits = self._bits
+        group = self._raw.read(bits)
+        if not group:
+            self._eof = True
+            return
+
+        value = int.from_bytes(group, 'little')
+        mask = (1 << bits) - 1
+        table_limit = 1 << self._max_bits
+
+        for k in range(len(group) * 8 // bits):
+            code = (value >> (k * bits)) & mask
+
+            if self._block_mode and code == self.CLEAR:
+                self._reset_table()
+                return
+
+            if code < len(self._table):
+                entry = self._table[code]
+            elif code == len(self._table) and self._previous is not None:
+                entry = self._previous + self._previous[:1]
+            else:
+                raise ValueError("Fluxo LZW corrompido")
+
+            self._output += entry
+            if self._previous is not None and len(self._table) < table_limit:
+                self._table.append(self._previous + entry[:1])
+            self._previous = entry
+
+            if len(self._table) - 1 >= mask and bits < self._max_bits:
+                self._bits += 1
+                return
+
+    def readinto(self, buffer) -> int:
+        while len(self._output) < len(buffer) and not self._eof:
+            self._decode_group()
+        size = min(len(buffer), len(self._output))
+        buffer[:size] = self._output[:size]
+        del self._output[:size]
+        return size
+
+    def close(self) -> None:
+        self._raw.close()
+        super().close()
+
+
+def _count_field(line: str, start: int, end: int) -> int:
+    text = line[start:end].strip()
+    return int(text) if text.isdigit() else 0
+
+
+def _apply_text_diff(previous: str, diff: str) -> str:
+    """Reconstrói um texto diferenciado: espaço mantém o caractere anterior, '&' vira espaço"""
+    chars = list(previous.ljust(len(diff)))
+    for i, c in enumerate(diff):
+        if c == '&':
+            chars[i] = ' '
+        elif c != ' ':
+            chars[i] = c
+    return ''.join(chars)
+
+
+def _format_thousandths(value: int, decimals: int = 3, width: int = 14) -> str:
+    """Formata um inteiro em unidades de 10^-decimals sem perda de precisão (equivalente a F14.3)"""
+    sign = '-' if value < 0 else ''
+    integer, fraction = divmod(abs(value), 10 ** decimals)
+    return f"{sign}{integer}.{fraction:0{decimals}d}".rjust(width)
+
+
+class _DifferenceArc:
+    """Reconstrução de valores diferenciados de ordem n (arco contínuo de uma observação)"""
+
+    __slots__ = ('order', 'count', 'terms')
+
+    def __init__(self, order: int, value: int):
+        self.order = order
+        self.count = 0
+        self.terms = [value] + [0] * order
+
+    def update(self, difference: int) -> int:
+        if self.count < self.order:
+            self.count += 1
+        m = self.count
+        self.terms[m] = difference
+        for j in range(m - 1, -1, -1):
+            self.terms[j] += self.terms[j + 1]
+        return self.terms[0]
+
+    @property
+    def value(self) -> int:
+        return self.terms[0]
+
+
+def _decode_field(field: str, arc: Optional[_DifferenceArc]) -> Optional[_DifferenceArc]:
+    """Atualiza o arco com um campo "n&valor" (inicialização) ou diferença; campo vazio encerra o arco"""
+    if not field:
+        return None
+    if '&' in field:
+        order, value = field.split('&', 1)
+        return _DifferenceArc(int(order), int(value))
+    if arc is None:
+        raise ValueError("Diferença Hatanaka sem inicialização do arco")
+    arc.update(int(field))
+    return arc
+
+
+class HatanakaDecoder(io.TextIOBase):
+    """Decodificador Compact RINEX (CRINEX 1.0 para RINEX 2 e 3.0 para RINEX 3) em fluxo
+
+    Produz as linhas RINEX equivalentes sob demanda, de forma que o leitor RINEX
+    consome o arquivo compacto como se fosse o original.
+    """
+
+    def __init__(self, stream: TextIO):
+        first = stream.readline()
+        if first[60:80].strip() != CRINEX_LABEL:
+            raise ValueError("Arquivo não está no formato Compact RINEX")
+        self.crinex_version = float(first[:9])
+        stream.readline()  # CRINEX PROG / DATE
+
+        self._stream = stream
+        self._pending: Deque[str] = deque()
+        self._in_header = True
+        self._rinex_version = 2.0
+        self._obs_count: Dict[Optional[str], int] = {}
+        self._current_system: Optional[str] = None
+
+        self._epoch_line = ''
+        self._clock: Optional[_DifferenceArc] = None
+        self._arcs: Dict[str, List[Optional[_DifferenceArc]]] = {}
+        self._flags: Dict[str, str] = {}
+
+    def readable(self) -> bool:
+        return True
+
+    def readline(self, size: int = -1) -> str:
+        while not self._pending:
+            if not self._decode_next():
+                return ''
+        return self._pending.popleft()
+
+    def close(self) -> None:
+        self._stream.close()
+        super().close()
+
+    # ------------------------------------------------------------------ cabeçalho
+
+    def _header_line(self, line: str) -> None:
+        label = line[60:80].strip()
+        if label == 'RINEX VERSION / TYPE':
+            self._rinex_version = float(line[:9])
+        elif label == '# / TYPES OF OBSERV' and line[:6].strip():
+            self._obs_count[None] = _count_field(line, 0, 6)
+        elif label == 'SYS / # / OBS TYPES' and line[0] != ' ':
+            self._obs_count[line[0]] = _count_field(line, 3, 6)
+        elif label == 'END OF HEADER':
+            self._in_header = False
+        self._pending.append(line)
+
+    # ------------------------------------------------------------------ corpo
+
+    def _read(self) -> Optional[str]:
+        line = self._stream.readline()
+        if not line:
+            return None
+        return line.rstrip('\r\n')
+
+    def _decode_next(self) -> bool:
+        line = self._stream.readline()
+        if not line:
+            return False
+        if self._in_header:
+            self._header_line(line if line.endswith('\n') else line + '\n')
+            return True
+
+        line = line.rstrip('\r\n')
+        if self._rinex_version >= 3:
+            return self._decode_epoch_v3(line)
+        return self._decode_epoch_v2(line)
+
+    def _reconstruct_epoch_line(self, line: str, init_char: str) -> str:
+        if line.startswith(init_char):
+            return (' ' + line[1:]) if init_char == '&' else line
+        return _apply_text_diff(self._epoch_line, line)
+
+    def _decode_clock(self) -> Optional[int]:
+        clock_line = self._read()
+        if clock_line is None or not clock_line.strip():
+            self._clock = None
+            return None
+        self._clock = _decode_field(clock_line.strip(), self._clock)
+        return self._clock.value
+
+    def _copy_event(self, epoch_line: str, count: int) -> bool:
+        self._pending.append(epoch_line.rstrip() + '\n')
+        for _ in range(count):
+            line = self._read()
+            if line is None:
+                return False
+            self._pending.append(line + '\n')
+        return True
+
+    def _decode_satellites(self, sat_ids: List[str], system_of) -> List[List[str]]:
+        """Reconstrói os registros de cada satélite: lista de campos (valor + LLI + SSI) por satélite"""
+        arcs: Dict[str, List[Optional[_DifferenceArc]]] = {}
+        flags: Dict[str, str] = {}
+        records = []
+
+        for sat_id in sat_ids:
+            n_obs = self._obs_count.get(system_of(sat_id), 0)
+            line = self._read() or ''
+
+            fields = []
+            pos = 0
+            for _ in range(n_obs):
+                end = line.find(' ', pos)
+                if end < 0:
+                    fields.append(line[pos:])
+                    pos = len(line)
+                else:
+                    fields.append(line[pos:end])
+                    pos = end + 1
+
+            previous_arcs = self._arcs.get(sat_id) or [None] * n_obs
+            sat_arcs = [_decode_field(f, a) for f, a in zip(fields, previous_arcs)]
+            sat_flags = _apply_text_diff(self._flags.get(sat_id, ''), line[pos:]).ljust(2 * n_obs)
+
+            arcs[sat_id] = sat_arcs
+            flags[sat_id] = sat_flags
+            records.append([
+                (_format_thousandths(arc.value) if arc is not None else ' ' * 14) + sat_flags[2 * k:2 * k + 2]
+                for k, arc in enumerate(sat_arcs)
+            ])
+
+        # Satélites ausentes na época perdem o histórico de diferenças
+        self._arcs = arcs
+        self._flags = flags
+        return records
+
+    def _decode_epoch_v2(self, line: str) -> bool:
+        epoch_line = self._reconstruct_epoch_line(line, '&')
+        flag = epoch_line[28:29]
+        num_sats = _count_field(epoch_line, 29, 32)
+
+        if flag in '2345' and flag.strip():
+            return self._copy_event(epoch_line, num_sats)
+        self._epoch_line = epoch_line
+
+        clock = self._decode_clock()
+        sat_text = epoch_line[32:]
+        sat_ids = [sat_text[3 * k:3 * k + 3] for k in range(num_sats)]
+        records = self._decode_satellites(sat_ids, lambda s: None)
+
+        first = epoch_line[:32] + sat_text[:36]
+        if clock is not None:
+            first = first.ljust(68) + _format_thousandths(clock, 9, 12)
+        self._pending.append(first.rstrip() + '\n')
+        for start in range(36, len(sat_ids) * 3, 36):
+            self._pending.append((' ' * 32 + sat_text[start:start + 36]).rstrip() + '\n')
+
+        for fields in records:
+            for start in range(0, max(len(fields), 1), 5):
+                self._pending.append(''.join(fields[start:start + 5]).rstrip() + '\n')
+        return True
+
+    def _decode_epoch_v3(self, line: str) -> bool:
+        epoch_line = self._reconstruct_epoch_line(line, '>')
+        flag = epoch_line[31:32]
+        num_sats = _count_field(epoch_line, 32, 35)
+
+        if flag in '2345' and flag.strip():
+            return self._copy_event(epoch_line[:35], num_sats)
+        self._epoch_line = epoch_line
+
+        clock = self._decode_clock()
+        sat_text = epoch_line[41:]
+        sat_ids = [sat_text[3 * k:3 * k + 3] for k in range(num_sats)]
+        records = self._decode_satellites(sat_ids, lambda s: s[0])
+
+        header = epoch_line[:35]
+        if clock is not None:
+            header = header.ljust(41) + _format_thousandths(clock, 12, 15)
+        self._pending.append(header.rstrip() + '\n')
+        for sat_id, fields in zip(sat_ids, records):
+            self._pending.append((sat_id + ''.join(fields)).rstrip() + '\n')
+        return True
+
+
+def _member_base_name(name: str) -> Optional[str]:
+    """Nome do membro em minúsculas sem sufixo de compressão, ou None para arquivos de sistema"""
+    lower = name.lower()
+    base = lower.rsplit('/', 1)[-1]
+    if base.startswith('._') or '__macosx' in lower:
+        return None
+    for suffix in COMPRESSION_SUFFIXES:
+        if lower.endswith(suffix):
+            return lower[:-len(suffix)]
+    return lower
+
+
+def is_navigation_member(name: str) -> bool:
+    """Indica se um membro de ZIP parece ser um arquivo RINEX de navegação (possivelmente comprimido)"""
+    lower = _member_base_name(name)
+    return lower is not None and NAVIGATION_MEMBER_PATTERN.search(lower) is not None
+
+
+def is_rinex_member(name: str) -> bool:
+    """Indica se um membro de ZIP parece ser um arquivo RINEX de observação (possivelmente comprimido)"""
+    lower = _member_base_name(name)
+    if lower is None or NAVIGATION_MEMBER_PATTERN.search(lower) is not None:
+        return False
+    return RINEX_MEMBER_PATTERN.search(lower) is not None
+
+
+def _rinex_members(archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    members = [info for info in archive.infolist()
+               if not info.is_dir() and is_rinex_member(info.filename)]
+    return sorted(members, key=lambda info: info.file_size, reverse=True)
+
+
+def list_rinex_members(zip_path: str) -> List[zipfile.ZipInfo]:
+    """Membros RINEX de um ZIP, do maior para o menor, sem extraí-los"""
+    with zipfile.ZipFile(zip_path) as archive:
+        return _rinex_members(archive)
+
+
+def list_navigation_members(zip_path: str) -> List[zipfile.ZipInfo]:
+    """Membros RINEX de navegação de um ZIP, na ordem do arquivo"""
+    with zipfile.ZipFile(zip_path) as archive:
+        return [info for info in archive.infolist()
+                if not info.is_dir() and is_navigation_member(info.filename)]
+
+
+def _decompress_layers(raw: BinaryIO) -> io.BufferedReader:
+    """Remove camadas gzip/bzip2/.Z identificadas pelos bytes mágicos"""
+    stream = io.BufferedReader(raw) if not isinstance(raw, io.BufferedReader) else raw
+    for _ in range(3):
+        magic = stream.peek(4)[:4]
+        if magic.startswith(GZIP_MAGIC):
+            stream = io.BufferedReader(gzip.GzipFile(fileobj=stream))
+        elif magic.startswith(BZIP2_MAGIC):
+            stream = io.BufferedReader(bz2.BZ2File(stream))
+        elif magic.startswith(UNIX_COMPRESS_MAGIC):
+            stream = io.BufferedReader(UnixCompressReader(stream))
+        else:
+            break
+    return stream
+
+
+def open_rinex(source: Union[str, BinaryIO], member: Optional[str] = None) -> TextIO:
+    """Abre um arquivo RINEX como texto, descomprimindo em fluxo o que for necessário
+
+    `source` pode ser um caminho ou um objeto binário. Para ZIPs, `member` escolhe o
+    membro a ler; sem ele é usado o maior membro RINEX.
+    """
+    raw = open(source, 'rb') if isinstance(source, str) else source
+    buffered = io.BufferedReader(raw) if not hasattr(raw, 'peek') else raw
+
+    if buffered.peek(4)[:4] == ZIP_MAGIC:
+        # Aberto pelo caminho, o ZIP mantém o arquivo vivo até o membro ser fechado
+        if isinstance(source, str):
+            buffered.close()
+            archive = zipfile.ZipFile(source)
+        else:
+            archive = zipfile.ZipFile(buffered)
+        with archive:
+            if member is None:
+                candidates = _rinex_members(archive)
+                if not candidates:
+                    raise ValueError("Nenhum arquivo RINEX encontrado no ZIP")
+                member = candidates[0].filename
+            logger.info(f"📦 Lendo membro do ZIP em fluxo: {member}")
+            buffered = archive.open(member)
+
+    stream = _decompress_layers(buffered)
+    text = io.TextIOWrapper(stream, encoding='ascii', errors='replace')
+
+    first = text.buffer.peek(80)[:80].decode('ascii', errors='replace')
+    if CRINEX_LABEL in first:
+        logger.info("🗜️ Compact RINEX (Hatanaka) detectado, decodificando em fluxo")
+        return HatanakaDecoder(text)
+    return text
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Índice de épocas RINEX por deslocamento em bytes
+Uma varredura em bytes (arquivo mapeado em memória, expressão regular compilada e
+decodificação vetorizada dos campos de data) registra o deslocamento, o instante e o número
+de satélites de cada época. O índice é gravado como arquivo binário compacto ao lado do
+RINEX (`<arquivo>.eidx`) e permite posicionar o leitor direto numa época para recortes por
+janela de tempo, decimação, leitura paralela ou reanálise, sem reler o arquivo desde o início
+"""
+
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .obs_store import GPS_EPOCH
+    from .rinex_compression import BZIP2_MAGIC, CRINEX_LABEL, GZIP_MAGIC, UNIX_COMPRESS_MAGIC, ZIP_MAGIC
+    from .rinex_reader import OBSERVATION_FLAGS, RinexEpoch, RinexObsReader
+except ImportError:
+    from obs_store import GPS_EPOCH
+    from rinex_compression import BZIP2_MAGIC, CRINEX_LABEL, GZIP_MAGIC, UNIX_COMPRESS_MAGIC, ZIP_MAGIC
+    from rinex_reader import OBSERVATION_FLAGS, RinexEpoch, RinexObsReader
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = '.eidx'
+INDEX_MAGIC = b'RNXEIDX1'
+# Cabeçalho do índice: assinatura, tamanho e mtime (ns) do RINEX de origem, número de épocas
+INDEX_HEADER = struct.Struct('<8sQqQ')
+# 19 bytes por época: deslocamento da linha de época, instante (s GPS; NaN se em branco),
+# número de satélites (ou de linhas especiais em eventos) e flag da época
+EPOCH_DTYPE = np.dtype([('offset', '<u8'), ('time', '<f8'), ('satellites', '<u2'), ('flag', 'u1')])
+
+# Linhas de época: "> yyyy mm dd hh mm ss.sssssss  f nnn" (3.x/4.x) e
+# " yy mm dd hh mm ss.sssssss  f nnn" (2.x, sempre com data)
+# (precedidas do fim da linha anterior: o prefixo literal deixa a busca ~10× mais rápida que '^')
+EPOCH_LINE_V3 = re.compile(rb'\n>')
+EPOCH_LINE_V2 = re.compile(rb'\n [ \d]\d [ \d]\d [ \d]\d [ \d]\d [ \d]\d[ \d]{3}\.\d{7}  \d[ \d]{2}\d')
+
+# Colunas (início, fim) dos campos da linha de época
+FIELDS_V3 = {'year': (2, 6), 'month': (7, 9), 'day': (10, 12), 'hour': (13, 15), 'minute': (16, 18),
+             'second': (18, 29), 'flag': (31, 32), 'satellites': (32, 35)}
+FIELDS_V2 = {'year': (1, 3), 'month': (4, 6), 'day': (7, 9), 'hour': (10, 12), 'minute': (13, 15),
+             'second': (15, 26), 'flag': (28, 29), 'satellites': (29, 32)}
+
+
+def index_path(path: str) -> str:
+    """Caminho do índice ao lado do arquivo RINEX"""
+    return path + INDEX_SUFFIX
+
+
+def _source_signature(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def is_indexable(path: str) -> bool:
+    """RINEX de observação em texto puro (sem ZIP, gzip, bzip2, .Z ou Compact RINEX)"""
+    with open(path, 'rb') as f:
+        start = f.read(80)
+    if start[:4] == ZIP_MAGIC or start[:2] in (GZIP_MAGIC, UNIX_COMPRESS_MAGIC) or start.startswith(BZIP2_MAGIC):
+        return False
+    return CRINEX_LABEL.encode() not in start
+
+
+def _integer_field(lines: np.ndarray, start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Inteiros de um campo de largura fixa (espaços à esquerda) e a máscara de validade"""
+    chars = lines[:, start:end]
+    digits = chars - ord('0')
+    is_digit = digits <= 9
+    valid = np.all(is_digit | (chars == ord(' ')), axis=1) & is_digit[:, -1]
+    weights = 10 ** np.arange(end - start - 1, -1, -1, dtype=np.int64)
+    return np.where(is_digit, digits, 0).astype(np.int64) @ weights, valid
+
+
+def _decode_epoch_lines(lines: np.ndarray, fields: dict, two_digit_year: bool) -> np.ndarray:
+    """Instantes (s GPS), flags e satélites das linhas de época (n, largura) em lote"""
+    index = np.zeros(len(lines), dtype=EPOCH_DTYPE)
+    flag, flag_ok = _integer_field(lines, *fields['flag'])
+    satellites, sats_ok = _integer_field(lines, *fields['satellites'])
+    index['flag'] = np.where(flag_ok, flag, 255)
+    index['satellites'] = np.where(sats_ok, satellites, 0)
+
+    values, valid = {}, np.ones(len(lines), dtype=bool)
+    for name in ('year', 'month', 'day', 'hour', 'minute'):
+        values[name], ok = _integer_field(lines, *fields[name])
+        valid &= ok
+    # Segundos F11.7: parte inteira em 3 colunas, ponto e 7 decimais
+    start, end = fields['second']
+    whole, whole_ok = _integer_field(lines, start, start + 3)
+    fraction, fraction_ok = _integer_field(lines, start + 4, end)
+    valid &= whole_ok & fraction_ok & (lines[:, start + 3] == ord('.'))
+
+    year = values['year']
+    if two_digit_year:
+        year = np.where(year < 80, year + 2000, year + 1900)
+    month, day = values['month'], values['day']
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    months = (np.where(valid, year, 1970) - 1970) * 12 + np.where(valid, month, 1) - 1
+    dates = months.astype('datetime64[M]').astype('datetime64[D]') + (np.where(valid, day, 1) - 1)
+    days = (dates - np.datetime64(GPS_EPOCH, 'D')).astype(np.float64)
+    seconds = days * 86400.0 + values['hour'] * 3600.0 + values['minute'] * 60.0 + whole + fraction * 1e-7
+    index['time'] = np.where(valid, seconds, np.nan)
+    return index
+
+
+def scan_epochs(path: str) -> np.ndarray:
+    """Varre o arquivo em bytes e devolve o índice (EPOCH_DTYPE) de todas as linhas de época"""
+    if not is_indexable(path):
+        raise ValueError(f"Arquivo comprimido ou Compact RINEX não pode ser indexado: {path}")
+    if os.path.getsize(path) == 0:
+        raise ValueError(f"Arquivo vazio: {path}")
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        header_end = data.find(b'END OF HEADER')
+        if header_end < 0:
+            raise ValueError(f"Cabeçalho RINEX sem END OF HEADER: {path}")
+        header_newline = data.find(b'\n', header_end)
+        if header_newline < 0:
+            raise ValueError(f"Arquivo sem épocas após o cabeçalho: {path}")
+        try:
+            version = float(data[:9])
+        except ValueError:
+            raise ValueError(f"Versão RINEX ilegível: {path}")
+
+        pattern, fields = (EPOCH_LINE_V3, FIELDS_V3) if version >= 3 else (EPOCH_LINE_V2, FIELDS_V2)
+        offsets = np.fromiter((match.start() + 1 for match in pattern.finditer(data, header_newline)),
+                              dtype=np.uint64)
+
+        width = max(end for _, end in fields.values())
+        raw = np.frombuffer(data, dtype=np.uint8)
+        columns = offsets[:, None].astype(np.int64) + np.arange(width)
+        lines = raw[np.minimum(columns, len(raw) - 1)]
+        lines = np.where(columns < len(raw), lines, ord(' '))
+        del raw
+        # Linhas mais curtas que o layout: o resto da linha vale como espaços
+        line_end = np.maximum.accumulate((lines == ord('\n')) | (lines == ord('\r')), axis=1)
+        lines = np.where(line_end, ord(' '), lines).astype(np.uint8)
+
+        index = _decode_epoch_lines(lines, fields, two_digit_year=version < 3)
+        index['offset'] = offsets
+        return _drop_event_records(data, index)
+
+
+def _drop_event_records(data: mmap.mmap, index: np.ndarray) -> np.ndarray:
+    """Descarta linhas dentro dos registros especiais de eventos (flags 2-5) que parecem épocas"""
+    keep = np.ones(len(index), dtype=bool)
+    for i in np.flatnonzero((index['flag'] >= 2) & (index['flag'] <= 5)):
+        if not keep[i]:
+            continue
+        end = int(index['offset'][i])
+        for _ in range(int(index['satellites'][i]) + 1):
+            end = data.find(b'\n', end) + 1 or len(data)
+        keep[i + 1:int(np.searchsorted(index['offset'], end))] = False
+    return index[keep]
+
+
+class EpochIndex:
+    """Índice de épocas de um arquivo RINEX (arrays mapeados em memória do arquivo `.eidx`)"""
+
+    def __init__(self, path: str, entries: np.ndarray):
+        self.path = path
+        self.entries = entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self.entries['offset']
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.entries['time']
+
+    @property
+    def satellites(self) -> np.ndarray:
+        return self.entries['satellites']
+
+    @property
+    def flags(self) -> np.ndarray:
+        return self.entries['flag']
+
+    @property
+    def observation_mask(self) -> np.ndarray:
+        """Épocas com registros de observação (as que o leitor produz)"""
+        return np.isin(self.flags, OBSERVATION_FLAGS) & np.isfinite(self.times)
+
+    @property
+    def n_observation_epochs(self) -> int:
+        return int(np.count_nonzero(self.observation_mask))
+
+    def locate(self, gps_seconds: float) -> int:
+        """Posição da primeira época no instante `gps_seconds` ou depois dele"""
+        times = np.where(np.isfinite(self.times), self.times, -np.inf)
+        return int(np.searchsorted(np.maximum.accumulate(times), gps_seconds, side='left'))
+
+    def window(self, start: float, end: float) -> Tuple[int, int]:
+        """Intervalo [primeira, última + 1) de entradas com instante em [start, end) (s GPS)"""
+        return self.locate(start), self.locate(end)
+
+    def decimate(self, interval: float, tolerance: float = 1e-3) -> np.ndarray:
+        """Posições das épocas de observação cujo instante é múltiplo de `interval` segundos"""
+        phase = np.mod(self.times + tolerance, interval)
+        return np.flatnonzero(self.observation_mask & (phase <= 2 * tolerance))
+
+    def partitions(self, parts: int) -> List[Tuple[int, int]]:
+        """Divide as entradas em até `parts` blocos contíguos [início, fim) de tamanho parecido"""
+        bounds = np.unique(np.linspace(0, len(self), max(parts, 1) + 1).astype(int))
+        return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    def summary(self) -> dict:
+        """Resumo do índice para o relatório"""
+        return {
+            'epochs': len(self),
+            'observation_epochs': self.n_observation_epochs,
+            'index_bytes': INDEX_HEADER.size + self.entries.nbytes,
+            'file': os.path.basename(self.path)
+        }
+
+
+def write_index(path: str, entries: np.ndarray, signature: Tuple[int, int]) -> str:
+    """Grava o índice de forma atômica em `<arquivo>.eidx`"""
+    target = index_path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=os.path.dirname(target) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(INDEX_HEADER.pack(INDEX_MAGIC, signature[0], signature[1], len(entries)))
+            tmp.write(np.ascontiguousarray(entries, dtype=EPOCH_DTYPE).tobytes())
+        os.replace(tmp_name, target)
+    except Exception:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    return target
+
+
+def load_index(path: str) -> Optional[EpochIndex]:
+    """Índice gravado ao lado do RINEX; None se ausente, corrompido ou de outra versão do arquivo"""
+    target = index_path(path)
+    if not os.path.isfile(target) or not os.path.isfile(path):
+        return None
+    try:
+        with open(target, 'rb') as f:
+            magic, size, mtime, count = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+        if magic != INDEX_MAGIC or (size, mtime) != _source_signature(path):
+            return None
+        if os.path.getsize(target) != INDEX_HEADER.size + count * EPOCH_DTYPE.itemsize:
+            return None
+        if count == 0:
+            return EpochIndex(target, np.zeros(0, dtype=EPOCH_DTYPE))
+        entries = np.memmap(target, dtype=EPOCH_DTYPE, mode='r', offset=INDEX_HEADER.size, shape=(count,))
+        return EpochIndex(target, entries)
+    except Exception as e:
+        logger.warning(f"⚠️ Índice de épocas inválido ({target}): {e}")
+        return None
+
+
+def build_index(path: str) -> EpochIndex:
+    """Varre o RINEX e grava o índice ao lado dele (em memória se o diretório não aceita escrita)"""
+    signature = _source_signature(path)
+    entries = scan_epochs(path)
+    try:
+        write_index(path, entries, signature)
+    except OSError as e:
+        logger.warning(f"⚠️ Não foi possível gravar o índice de épocas: {e}")
+        return EpochIndex(index_path(path), entries)
+    logger.info(f"🗂️ Índice de épocas gravado: {len(entries):,} épocas ({os.path.basename(index_path(path))})")
+    return load_index(path) or EpochIndex(index_path(path), entries)
+
+
+def epoch_index(path: str) -> Optional[EpochIndex]:
+    """Índice do arquivo, reaproveitando o `.eidx` existente; None se o arquivo não é indexável"""
+    index = load_index(path)
+    if index is not None:
+        return index
+    try:
+        return build_index(path)
+    except (OSError, ValueError) as e:
+        logger.info(f"🗂️ Sem índice de épocas: {e}")
+        return None
+
+
+def read_epochs(path: str, index: EpochIndex, start: int = 0, stop: Optional[int] = None) -> Iterator[RinexEpoch]:
+    """Épocas das entradas [start, stop) do índice, posicionando o leitor direto na primeira"""
+    stop = len(index) if stop is None else min(stop, len(index))
+    if start >= stop:
+        return
+    count = int(np.count_nonzero(index.observation_mask[start:stop]))
+    with RinexObsReader(path) as reader:
+        reader.seek(int(index.offsets[start]))
+        yield from islice(reader, count)
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Controle de qualidade RINEX em passada única e memória constante
+Acumula, época a época e sem guardar as observações, número de épocas, intervalo real,
+histograma de intervalos, lacunas, satélites por constelação, observáveis presentes e
+contagem de observações por satélite e observável. Os registros são examinados em lotes
+vetorizados, de modo que o custo por época fica dominado pela própria leitura do arquivo
+"""
+
+import os
+from collections import Counter
+from itertools import chain, repeat
+from dataclasses import dataclass, field
+from datetime import datetime as dt
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    from .rinex_reader import OBS_FIELD_WIDTH, RinexEpoch, RinexHeader
+except ImportError:
+    from rinex_reader import OBS_FIELD_WIDTH, RinexEpoch, RinexHeader
+
+# Intervalo maior que GAP_FACTOR × intervalo nominal caracteriza uma lacuna
+GAP_FACTOR = float(os.getenv('GNSS_QC_GAP_FACTOR', '1.5'))
+# Intervalos usados para estimar o intervalo nominal quando o cabeçalho não o declara
+WARMUP_INTERVALS = 10
+# Registros por lote na contagem vetorizada dos observáveis
+BATCH_RECORDS = 20000
+# Lacunas listadas individualmente (contagem e duração total não têm limite)
+MAX_GAPS_REPORTED = 200
+# Resolução do histograma de intervalos (s)
+INTERVAL_RESOLUTION = 0.001
+# Épocas iniciais decodificadas na mesma passada para perdas de ciclo e multicaminho (a
+# matriz de observações é a única parte da análise que cresce com o arquivo)
+DECODE_EPOCHS = int(os.getenv('GNSS_QC_DECODE_EPOCHS', '7200'))
+
+
+@dataclass
+class DataGap:
+    """Interrupção na sequência de épocas"""
+    start: dt
+    end: dt
+    duration: float
+    missing_epochs: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'duration': round(self.duration, 3),
+            'missing_epochs': self.missing_epochs
+        }
+
+
+@dataclass
+class QCReport:
+    """Estatísticas de qualidade do arquivo inteiro"""
+    epochs: int = 0
+    first_epoch: Optional[dt] = None
+    last_epoch: Optional[dt] = None
+    nominal_interval: Optional[float] = None
+    interval_histogram: Dict[float, int] = field(default_factory=dict)
+    gaps: List[DataGap] = field(default_factory=list)
+    gap_count: int = 0
+    gap_seconds: float = 0.0
+    epochs_per_satellite: Dict[str, int] = field(default_factory=dict)
+    observations: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    @property
+    def span_seconds(self) -> float:
+        if self.first_epoch is None:
+            return 0.0
+        return (self.last_epoch - self.first_epoch).total_seconds()
+
+    @property
+    def n_intervals(self) -> int:
+        return sum(self.interval_histogram.values())
+
+    @property
+    def average_interval(self) -> Optional[float]:
+        return self.span_seconds / self.n_intervals if self.n_intervals else None
+
+    @property
+    def expected_epochs(self) -> int:
+        if not self.nominal_interval:
+            return self.epochs
+        return int(round(self.span_seconds / self.nominal_interval)) + 1
+
+    @property
+    def completeness(self) -> float:
+        """Épocas presentes em relação às esperadas pelo intervalo nominal (%)"""
+        return 100.0 * min(self.epochs / max(self.expected_epochs, 1), 1.0) if self.epochs else 0.0
+
+    def intervals_over(self, seconds: float) -> int:
+        """Número de intervalos entre épocas maiores que `seconds`"""
+        return sum(count for interval, count in self.interval_histogram.items() if interval > seconds)
+
+    @property
+    def satellites_per_system(self) -> Dict[str, int]:
+        return dict(Counter(sat[0] for sat in self.epochs_per_satellite))
+
+    @property
+    def observations_per_system(self) -> Dict[str, int]:
+        """Pares satélite-época por constelação"""
+        counts: Dict[str, int] = {}
+        for sat, n in self.epochs_per_satellite.items():
+            counts[sat[0]] = counts.get(sat[0], 0) + n
+        return counts
+
+    @property
+    def observables(self) -> Dict[str, List[str]]:
+        """Observáveis com ao menos um valor em cada constelação"""
+        present: Dict[str, List[str]] = {}
+        for sat, codes in sorted(self.observations.items()):
+            system = present.setdefault(sat[0], [])
+            system.extend(code for code, n in codes.items() if n and code not in system)
+        return present
+
+    def summary(self) -> Dict[str, Any]:
+        """Resumo serializável das estatísticas"""
+        histogram = sorted(self.interval_histogram.items(), key=lambda item: -item[1])
+        return {
+            'epochs': self.epochs,
+            'first_epoch': self.first_epoch.isoformat() if self.first_epoch else None,
+            'last_epoch': self.last_epoch.isoformat() if self.last_epoch else None,
+            'span_hours': round(self.span_seconds / 3600.0, 4),
+            'nominal_interval': self.nominal_interval,
+            'average_interval': round(self.average_interval, 3) if self.average_interval else None,
+            'expected_epochs': self.expected_epochs,
+            'completeness': round(self.completeness, 2),
+            'interval_histogram': {f"{interval:g}": count for interval, count in histogram[:20]},
+            'gaps': {
+                'count': self.gap_count,
+                'total_seconds': round(self.gap_seconds, 3),
+                'largest': round(max((g.duration for g in self.gaps), default=0.0), 3),
+                'list': [g.as_dict() for g in self.gaps]
+            },
+            'satellites': len(self.epochs_per_satellite),
+            'satellites_per_system': self.satellites_per_system,
+            'observables': self.observables,
+            'epochs_per_satellite': dict(sorted(self.epochs_per_satellite.items())),
+            'observations_per_satellite': {sat: dict(codes) for sat, codes in sorted(self.observations.items())}
+        }
+
+
+class StreamingQC:
+    """Acumulador de QC alimentado pelas épocas do `RinexObsReader`
+
+    Memória proporcional ao número de satélites e observáveis, não ao de épocas: os
+    registros ficam num lote de até BATCH_RECORDS e são reduzidos a contagens por satélite ×
+    observável (campo com valor não vazio) com operações vetorizadas sobre os bytes, sem
+    laço Python por registro.
+    """
+
+    def __init__(self, header: RinexHeader):
+        self.header = header
+        self.report = QCReport(nominal_interval=header.interval if header.interval else None)
+        self._histogram: Counter = Counter()
+        self._warmup: List[tuple] = []
+        self._previous: Optional[dt] = None
+        if header.version >= 3:
+            self._codes = {system: list(codes) for system, codes in header.sys_obs_types.items()}
+        else:
+            self._codes = {'*': list(header.obs_types)}
+        self._width = max((len(codes) for codes in self._codes.values()), default=0)
+        self._batch: List[Dict[str, str]] = []
+        self._batched = 0
+        self._sat_rows: Dict[str, int] = {}
+        self._epoch_counts = np.zeros(0, dtype=np.int64)
+        self._counts = np.zeros((0, self._width), dtype=np.int64)
+
+    def add(self, epoch: RinexEpoch) -> None:
+        """Acumula uma época"""
+        report = self.report
+        report.epochs += 1
+        if report.first_epoch is None:
+            report.first_epoch = epoch.time
+        report.last_epoch = epoch.time
+        if self._previous is not None:
+            self._add_interval(self._previous, epoch.time)
+        self._previous = epoch.time
+
+        self._batch.append(epoch.records)
+        self._batched += len(epoch.records)
+        if self._batched >= BATCH_RECORDS:
+            self._flush()
+
+    def _add_interval(self, start: dt, end: dt) -> None:
+        interval = (end - start).total_seconds()
+        self._histogram[round(round(interval / INTERVAL_RESOLUTION) * INTERVAL_RESOLUTION, 6)] += 1
+        if self.report.nominal_interval is None:
+            self._warmup.append((start, end, interval))
+            if len(self._warmup) >= WARMUP_INTERVALS:
+                self._settle_nominal()
+        else:
+            self._check_gap(start, end, interval)
+
+    def _settle_nominal(self) -> None:
+        """Intervalo nominal a partir dos primeiros intervalos, reavaliando-os como lacunas"""
+        positive = [interval for _, _, interval in self._warmup if interval > 0]
+        self.report.nominal_interval = min(positive) if positive else None
+        warmup, self._warmup = self._warmup, []
+        if self.report.nominal_interval:
+            for start, end, interval in warmup:
+                self._check_gap(start, end, interval)
+
+    def _check_gap(self, start: dt, end: dt, interval: float) -> None:
+        nominal = self.report.nominal_interval
+        if interval <= GAP_FACTOR * nominal:
+            return
+        report = self.report
+        report.gap_count += 1
+        report.gap_seconds += interval - nominal
+        if len(report.gaps) < MAX_GAPS_REPORTED:
+            report.gaps.append(DataGap(start, end, interval, max(int(round(interval / nominal)) - 1, 0)))
+
+    def _flush(self) -> None:
+        """Reduz o lote de registros a contagens por satélite × observável"""
+        if not self._batched:
+            return
+        sats = np.array(list(chain.from_iterable(records.keys() for records in self._batch)))
+        records = list(chain.from_iterable(records.values() for records in self._batch))
+        self._batch, self._batched = [], 0
+
+        unique, inverse = np.unique(sats, return_inverse=True)
+        rows = np.fromiter((self._sat_rows.setdefault(sat, len(self._sat_rows)) for sat in unique.tolist()),
+                           dtype=np.int64, count=len(unique))
+        if len(self._sat_rows) > len(self._epoch_counts):
+            grow = len(self._sat_rows) - len(self._epoch_counts)
+            self._epoch_counts = np.concatenate([self._epoch_counts, np.zeros(grow, dtype=np.int64)])
+            self._counts = np.vstack([self._counts, np.zeros((grow, self._width), dtype=np.int64)])
+        self._epoch_counts[rows] += np.bincount(inverse, minlength=len(unique))
+        if not self._width:
+            return
+
+        # Registros em largura fixa (os mais longos que o cabeçalho prevê são truncados)
+        width = self._width * OBS_FIELD_WIDTH
+        text = ''.join(map(str.ljust, records, repeat(width)))
+        if len(text) != len(records) * width:
+            text = ''.join(record.ljust(width)[:width] for record in records)
+        raw = np.frombuffer(text.encode('latin-1', 'replace'), dtype=np.uint8)
+        fields = raw.reshape(len(records), self._width, OBS_FIELD_WIDTH)[:, :, :OBS_FIELD_WIDTH - 2]
+        present = (fields != ord(' ')).any(axis=2)
+
+        cells = inverse[:, None] * self._width + np.arange(self._width)
+        counts = np.bincount(cells.ravel(), weights=present.ravel(), minlength=len(unique) * self._width)
+        self._counts[rows] += counts.reshape(len(unique), self._width).astype(np.int64)
+
+    def finish(self) -> QCReport:
+        """Fecha o último lote e devolve o relatório"""
+        self._flush()
+        if self._warmup:
+            self._settle_nominal()
+        report = self.report
+        report.interval_histogram = dict(sorted(self._histogram.items()))
+        report.epochs_per_satellite = {sat: int(self._epoch_counts[row]) for sat, row in self._sat_rows.items()}
+        observations = {}
+        for sat, row in self._sat_rows.items():
+            codes = self._codes.get('*', self._codes.get(sat[0]))
+            if codes:
+                observations[sat] = dict(zip(codes, (int(n) for n in self._counts[row, :len(codes)])))
+        report.observations = observations
+        return report
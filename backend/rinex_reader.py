@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Leitor RINEX de observação em fluxo contínuo (versões 2.x, 3.x e 4.x)
+Lê o arquivo época a época a partir de um handle bufferizado, sem carregar o arquivo inteiro em memória
+"""
+
+import io
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime as dt, timedelta
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+import numpy as np
+
+try:
+    from .obs_store import ObservationStore
+    from .rinex_compression import open_rinex
+except ImportError:
+    from obs_store import ObservationStore
+    from rinex_compression import open_rinex
+
+logger = logging.getLogger(__name__)
+
+# Layout fixo do formato RINEX 2.x
+RINEX_LINE_WIDTH = 80
+OBS_FIELD_WIDTH = 16  # 14 caracteres de valor + LLI + intensidade do sinal
+OBS_PER_LINE_V2 = 5
+SATS_PER_LINE_V2 = 12
+OBS_TYPES_PER_LINE_V2 = 9
+OBS_TYPES_PER_LINE_V3 = 13
+GLONASS_SLOTS_PER_LINE = 8
+
+# Flags de época com registros de observação (0 = OK, 1 = falha de energia)
+OBSERVATION_FLAGS = (0, 1)
+# Registro de perdas de ciclo: mesmo formato de uma época, mas os valores são as correções
+# dos saltos (no instante de uma época já lida) e não observações; é descartado
+CYCLE_SLIP_FLAG = 6
+
+
+@dataclass
+class RinexHeader:
+    """Cabeçalho de um arquivo RINEX de observação"""
+    version: float = 2.11
+    file_type: str = 'O'
+    satellite_system: str = 'G'
+    obs_types: List[str] = field(default_factory=list)
+    sys_obs_types: Dict[str, List[str]] = field(default_factory=dict)
+    glonass_slots: Dict[str, int] = field(default_factory=dict)
+    approx_position: Optional[Tuple[float, float, float]] = None
+    antenna_delta: Optional[Tuple[float, float, float]] = None
+    interval: Optional[float] = None
+    time_of_first_obs: Optional[dt] = None
+    time_of_last_obs: Optional[dt] = None
+    marker_name: str = ''
+    receiver: Dict[str, str] = field(default_factory=dict)
+    antenna: Dict[str, str] = field(default_factory=dict)
+    header_lines: int = 0
+
+    @property
+    def lines_per_record(self) -> int:
+        """Número de linhas de 80 colunas ocupadas por um satélite numa época (RINEX 2.x)"""
+        return max(1, -(-len(self.obs_types) // OBS_PER_LINE_V2))
+
+    @property
+    def observables(self) -> List[str]:
+        """Todos os códigos de observação do arquivo, unindo as tabelas de cada constelação"""
+        if self.version < 3:
+            return list(self.obs_types)
+        codes = []
+        for system_codes in self.sys_obs_types.values():
+            codes.extend(c for c in system_codes if c not in codes)
+        return codes
+
+    def column_map(self, system: str) -> List[int]:
+        """Coluna do armazenamento correspondente a cada observável declarado para uma constelação"""
+        if self.version < 3:
+            return list(range(len(self.obs_types)))
+        observables = self.observables
+        return [observables.index(c) for c in self.sys_obs_types.get(system, [])]
+
+
+@dataclass
+class RinexEpoch:
+    """Uma época de observação com os registros brutos de cada satélite"""
+    time: dt
+    flag: int
+    satellites: List[str]
+    records: Dict[str, str]
+    clock_offset: Optional[float] = None
+
+
+def _parse_float(text: str) -> Optional[float]:
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        return float(text.replace('D', 'E'))
+    except ValueError:
+        return None
+
+
+def _parse_header_time(line: str) -> Optional[dt]:
+    parts = line[:43].split()
+    if len(parts) < 6:
+        return None
+    try:
+        second = float(parts[5])
+        return dt(int(parts[0]), int(parts[1]), int(parts[2]),
+                  int(parts[3]), int(parts[4])) + timedelta(seconds=second)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def normalize_satellite_id(token: str, default_system: str = 'G') -> Optional[str]:
+    """Normaliza um identificador de satélite RINEX ("G 5", " 5", "G05") para o formato "G05"
+
+    Memorizada: um arquivo só tem algumas centenas de identificadores distintos, repetidos
+    em cada época.
+    """
+    if len(token) < 2:
+        return None
+    system = token[0] if token[0] != ' ' else default_system
+    prn = token[1:].strip()
+    if not system.isalpha() or not prn.isdigit():
+        return None
+    return f"{system.upper()}{int(prn):02d}"
+
+
+def parse_epoch_time_v2(line: str) -> Optional[dt]:
+    """Extrai o instante de uma linha de época RINEX 2.x (" yy mm dd hh mm ss.sssssss")"""
+    try:
+        year = int(line[1:3])
+        month = int(line[4:6])
+        day = int(line[7:9])
+        hour = int(line[10:12])
+        minute = int(line[13:15])
+        second = float(line[15:26])
+    except (ValueError, IndexError):
+        return None
+
+    if not (1 <= month <= 12 and 1 <= day <= 31 and 0 <= hour <= 23 and
+            0 <= minute <= 59 and 0 <= second < 61):
+        return None
+
+    # Ajustar ano para formato completo
+    year += 2000 if year < 80 else 1900
+    return dt(year, month, day, hour, minute) + timedelta(seconds=second)
+
+
+def parse_epoch_time_v3(line: str) -> Optional[dt]:
+    """Extrai o instante de uma linha de época RINEX 3.x/4.x ("> yyyy mm dd hh mm ss.sssssss")"""
+    try:
+        year = int(line[2:6])
+        month = int(line[7:9])
+        day = int(line[10:12])
+        hour = int(line[13:15])
+        minute = int(line[16:18])
+        second = float(line[18:29])
+    except (ValueError, IndexError):
+        return None
+
+    if not (1 <= month <= 12 and 1 <= day <= 31 and 0 <= hour <= 23 and
+            0 <= minute <= 59 and 0 <= second < 61):
+        return None
+    return dt(year, month, day, hour, minute) + timedelta(seconds=second)
+
+
+def read_header(stream: TextIO) -> RinexHeader:
+    """Lê o cabeçalho até END OF HEADER, deixando o stream posicionado na primeira época"""
+    header = RinexHeader()
+    declared_obs = 0
+    current_system = None
+
+    for line in stream:
+        header.header_lines += 1
+        label = line[60:80].strip()
+
+        if label == 'RINEX VERSION / TYPE':
+            header.version = _parse_float(line[:9]) or header.version
+            header.file_type = line[20:21].strip() or header.file_type
+            header.satellite_system = line[40:41].strip() or 'G'
+        elif label == 'MARKER NAME':
+            header.marker_name = line[:60].strip()
+        elif label == 'REC # / TYPE / VERS':
+            header.receiver = {
+                'number': line[:20].strip(),
+                'type': line[20:40].strip(),
+                'version': line[40:60].strip()
+            }
+        elif label == 'ANT # / TYPE':
+            header.antenna = {
+                'number': line[:20].strip(),
+                'type': line[20:40].strip()
+            }
+        elif label == 'APPROX POSITION XYZ':
+            values = [_parse_float(line[i:i + 14]) for i in (0, 14, 28)]
+            if all(v is not None for v in values):
+                header.approx_position = tuple(values)
+        elif label == 'ANTENNA: DELTA H/E/N':
+            values = [_parse_float(line[i:i + 14]) for i in (0, 14, 28)]
+            if all(v is not None for v in values):
+                header.antenna_delta = tuple(values)
+        elif label == 'INTERVAL':
+            header.interval = _parse_float(line[:10])
+        elif label == 'TIME OF FIRST OBS':
+            header.time_of_first_obs = _parse_header_time(line)
+        elif label == 'TIME OF LAST OBS':
+            header.time_of_last_obs = _parse_header_time(line)
+        elif label == '# / TYPES OF OBSERV':
+            # Linhas de continuação deixam as colunas 1-6 em branco
+            if line[:6].strip():
+                declared_obs = int(line[:6])
+            for i in range(OBS_TYPES_PER_LINE_V2):
+                code = line[10 + 6 * i:12 + 6 * i].strip()
+                if code and len(header.obs_types) < declared_obs:
+                    header.obs_types.append(code)
+        elif label == 'SYS / # / OBS TYPES':
+            # Linhas de continuação deixam o sistema e a contagem em branco
+            if line[0] != ' ':
+                current_system = line[0]
+                header.sys_obs_types[current_system] = []
+            if current_system is None:
+                continue
+            for i in range(OBS_TYPES_PER_LINE_V3):
+                code = line[7 + 4 * i:10 + 4 * i].strip()
+                if code:
+                    header.sys_obs_types[current_system].append(code)
+        elif label == 'GLONASS SLOT / FRQ #':
+            for i in range(GLONASS_SLOTS_PER_LINE):
+                sat_id = normalize_satellite_id(line[4 + 7 * i:7 + 7 * i], 'R')
+                channel = line[8 + 7 * i:10 + 7 * i].strip()
+                if sat_id and channel.lstrip('-').isdigit():
+                    header.glonass_slots[sat_id] = int(channel)
+        elif label == 'END OF HEADER':
+            break
+
+    return header
+
+
+class RinexObsReader:
+    """Leitor de observações RINEX que produz uma época por vez
+
+    Caminhos são abertos por `open_rinex`, que descomprime gzip/bzip2/.Z/ZIP e
+    Compact RINEX em fluxo; `member` escolhe o membro quando o arquivo é um ZIP.
+    """
+
+    def __init__(self, source: Union[str, TextIO], member: Optional[str] = None):
+        if isinstance(source, str):
+            self._stream = open_rinex(source, member)
+            self._owns_stream = True
+        else:
+            self._stream = source
+            self._owns_stream = False
+
+        self.header = read_header(self._stream)
+        self.line_number = self.header.header_lines
+        self._default_system = self.header.satellite_system if self.header.satellite_system != 'M' else 'G'
+
+        if not self.header.observables:
+            logger.warning("⚠️ Cabeçalho sem tipos de observação declarados")
+
+    def __enter__(self) -> 'RinexObsReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._owns_stream:
+            self._stream.close()
+
+    def seek(self, offset: int) -> None:
+        """Posiciona o leitor no início de uma linha de época pelo deslocamento em bytes
+
+        Só para RINEX em texto puro; os deslocamentos vêm do índice de épocas
+        (`rinex_index`). A contagem de linhas deixa de ser absoluta após o salto.
+        """
+        # Em fluxos descomprimidos os deslocamentos não correspondem aos bytes do arquivo
+        buffer = getattr(self._stream, 'buffer', None)
+        compressed = buffer is not None and not isinstance(getattr(buffer, 'raw', None), io.FileIO)
+        if compressed or not self._stream.seekable():
+            raise ValueError("Fluxo RINEX sem acesso aleatório")
+        self._stream.seek(offset)
+
+    def _next_line(self) -> Optional[str]:
+        line = self._stream.readline()
+        if not line:
+            return None
+        self.line_number += 1
+        return line.rstrip('\r\n')
+
+    def __iter__(self) -> Iterator[RinexEpoch]:
+        if self.header.version >= 3:
+            return self._iter_v3()
+        return self._iter_v2()
+
+    def _iter_v3(self) -> Iterator[RinexEpoch]:
+        """Épocas RINEX 3.x/4.x: linha "> ..." seguida de uma linha por satélite iniciada pelo seu ID"""
+        while True:
+            line = self._next_line()
+            if line is None:
+                return
+            if not line.startswith('>'):
+                continue
+
+            epoch_time = parse_epoch_time_v3(line)
+            try:
+                flag = int(line[31:32])
+                num_sats = int(line[32:35])
+            except ValueError:
+                continue
+
+            # Eventos (flags 2-5) e registros de perdas de ciclo (flag 6): num_sats indica quantas
+            # linhas seguem
+            if epoch_time is None or flag not in OBSERVATION_FLAGS:
+                for _ in range(num_sats):
+                    if self._next_line() is None:
+                        return
+                continue
+
+            # Laço mais executado do leitor: leitura direta do stream, sem _next_line
+            satellites = []
+            records = {}
+            readline = self._stream.readline
+            for _ in range(num_sats):
+                obs_line = readline()
+                if not obs_line:
+                    return
+                sat_id = normalize_satellite_id(obs_line[:3], self._default_system)
+                if sat_id is not None:
+                    satellites.append(sat_id)
+                    records[sat_id] = obs_line[3:].rstrip('\r\n')
+            self.line_number += num_sats
+
+            yield RinexEpoch(
+                time=epoch_time,
+                flag=flag,
+                satellites=satellites,
+                records=records,
+                clock_offset=_parse_float(line[41:56])
+            )
+
+    def _iter_v2(self) -> Iterator[RinexEpoch]:
+        """Épocas RINEX 2.x: cabeçalho de época com até 12 satélites por linha e registros de 80 colunas"""
+        lines_per_record = self.header.lines_per_record
+
+        while True:
+            line = self._next_line()
+            if line is None:
+                return
+
+            epoch_time = parse_epoch_time_v2(line)
+            if epoch_time is None or len(line) < 32:
+                continue
+
+            try:
+                flag = int(line[26:29])
+                num_sats = int(line[29:32])
+            except ValueError:
+                continue
+
+            # Eventos (flags 2-5): num_sats indica quantas linhas especiais seguem
+            if flag not in OBSERVATION_FLAGS and flag != CYCLE_SLIP_FLAG:
+                for _ in range(num_sats):
+                    if self._next_line() is None:
+                        return
+                continue
+
+            sat_text = line[32:68].ljust(36)
+            for _ in range((num_sats - 1) // SATS_PER_LINE_V2):
+                continuation = self._next_line()
+                if continuation is None:
+                    return
+                sat_text += continuation[32:68].ljust(36)
+
+            satellites = []
+            for k in range(num_sats):
+                sat_id = normalize_satellite_id(sat_text[3 * k:3 * k + 3], self._default_system)
+                satellites.append(sat_id)
+
+            records = {}
+            for sat_id in satellites:
+                chunks = []
+                for _ in range(lines_per_record):
+                    obs_line = self._next_line()
+                    if obs_line is None:
+                        return
+                    chunks.append(obs_line.ljust(RINEX_LINE_WIDTH))
+                if sat_id is not None:
+                    records[sat_id] = ''.join(chunks)
+
+            # Perdas de ciclo (flag 6) têm lista de satélites e registros no formato de época
+            if flag == CYCLE_SLIP_FLAG:
+                continue
+
+            yield RinexEpoch(
+                time=epoch_time,
+                flag=flag,
+                satellites=[s for s in satellites if s is not None],
+                records=records,
+                clock_offset=_parse_float(line[68:80])
+            )
+
+
+def decode_observation(record: str, index: int) -> Optional[float]:
+    """Decodifica o valor do observável na posição `index` de um registro de satélite"""
+    start = index * OBS_FIELD_WIDTH
+    return _parse_float(record[start:start + 14])
+
+
+def decode_epoch(epoch: RinexEpoch, header: RinexHeader,
+                 column_maps: Optional[Dict[str, List[int]]] = None) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """Decodifica todos os observáveis de uma época, com flags LLI e intensidade do sinal
+
+    Cada campo ocupa 16 colunas: valor F14.3, LLI (I1) e intensidade do sinal (I1).
+    Em RINEX 3/4 cada constelação tem sua própria tabela de observáveis; os valores são
+    colocados nas colunas da união de todas as tabelas (`header.observables`).
+    Retorna os satélites e as matrizes satélite × observável de valores, LLI e SSI.
+    """
+    if column_maps is None:
+        column_maps = {}
+    n_obs = len(header.observables)
+    sat_ids = list(epoch.records)
+    values = np.full((len(sat_ids), n_obs), np.nan)
+    lli = np.zeros((len(sat_ids), n_obs), dtype=np.int8)
+    ssi = np.zeros((len(sat_ids), n_obs), dtype=np.int8)
+
+    for row, sat_id in enumerate(sat_ids):
+        record = epoch.records[sat_id]
+        columns = column_maps.get(sat_id[0])
+        if columns is None:
+            columns = column_maps[sat_id[0]] = header.column_map(sat_id[0])
+        for k, column in enumerate(columns):
+            start = k * OBS_FIELD_WIDTH
+            text = record[start:start + 14]
+            if text.isspace() or not text:
+                continue
+            try:
+                values[row, column] = float(text)
+            except ValueError:
+                continue
+            flag = record[start + 14:start + 15]
+            if flag.isdigit():
+                lli[row, column] = int(flag)
+            strength = record[start + 15:start + 16]
+            if strength.isdigit():
+                ssi[row, column] = int(strength)
+
+    return sat_ids, values, lli, ssi
+
+
+def read_observations(source: Union[str, TextIO],
+                      member: Optional[str] = None) -> Tuple[RinexHeader, ObservationStore]:
+    """Lê um arquivo RINEX inteiro para o armazenamento colunar em uma única passada"""
+    with RinexObsReader(source, member) as reader:
+        header = reader.header
+        store = ObservationStore(header.observables)
+        column_maps: Dict[str, List[int]] = {}
+
+        for epoch in reader:
+            sat_ids, values, lli, ssi = decode_epoch(epoch, header, column_maps)
+            if sat_ids:
+                store.append_epoch(epoch.time, sat_ids, values, epoch.flag, lli, ssi)
+
+    return header, store.trim()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Suavizador de Rauch-Tung-Striebel (RTS) para o filtro PPP
+Guarda instantâneos compactos do estado filtrado de cada época e, ao final da sessão,
+percorre as épocas de trás para frente produzindo a solução suavizada
+"""
+
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Identificadores fixos dos estados de posição e do atraso úmido zenital no filtro PPP
+POSITION_IDS = (0, 1, 2)
+ZWD_ID = 4
+
+
+class SnapshotBuffer:
+    """Vetor crescente de valores que passa para um arquivo mapeado em memória acima de um limite
+
+    Os registros são anexados em sequência e lidos pelo deslocamento devolvido em `append`.
+    """
+
+    def __init__(self, dtype=np.float64, memory_limit: int = 64 * 1024 * 1024,
+                 directory: Optional[str] = None):
+        self.dtype = np.dtype(dtype)
+        self.memory_limit = memory_limit
+        self.directory = directory
+        self.size = 0
+        self._data = np.empty(4096, dtype=self.dtype)
+        self._path: Optional[str] = None
+
+    @property
+    def spilled(self) -> bool:
+        return self._path is not None
+
+    def _reserve(self, needed: int) -> None:
+        capacity = max(len(self._data) * 2, needed)
+        if not self.spilled and capacity * self.dtype.itemsize <= self.memory_limit:
+            self._data = np.resize(self._data, capacity)
+            return
+
+        if not self.spilled:
+            fd, self._path = tempfile.mkstemp(dir=self.directory, suffix='.rts')
+            os.close(fd)
+            logger.info(f"💾 Instantâneos do filtro excedem {self.memory_limit / 2**20:.0f} MB, usando {self._path}")
+        previous = self._data
+        with open(self._path, 'r+b') as handle:
+            handle.truncate(capacity * self.dtype.itemsize)
+        data = np.memmap(self._path, dtype=self.dtype, mode='r+', shape=(capacity,))
+        if not isinstance(previous, np.memmap):
+            data[:self.size] = previous[:self.size]
+        self._data = data
+
+    def append(self, values: np.ndarray) -> int:
+        values = np.asarray(values, dtype=self.dtype).ravel()
+        offset = self.size
+        if offset + len(values) > len(self._data):
+            self._reserve(offset + len(values))
+        self._data[offset:offset + len(values)] = values
+        self.size += len(values)
+        return offset
+
+    def read(self, offset: int, length: int) -> np.ndarray:
+        return self._data[offset:offset + length]
+
+    def close(self) -> None:
+        """Libera o arquivo temporário, se houver"""
+        if self._path is not None:
+            self._data = np.empty(0, dtype=self.dtype)
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+            self._path = None
+
+
+@dataclass
+class SmoothedSolution:
+    """Resultado da passada de suavização (uma linha por época registrada)"""
+    times: np.ndarray         # segundos GPS contínuos
+    positions: np.ndarray     # (N, 3) ECEF
+    covariances: np.ndarray   # (N, 3, 3) covariância da posição
+    zwd: np.ndarray           # (N,) atraso úmido zenital (m)
+
+    @property
+    def static_position(self) -> np.ndarray:
+        """Posição estática suavizada: a estimativa da primeira época já usa todas as observações"""
+        return self.positions[0]
+
+    @property
+    def static_covariance(self) -> np.ndarray:
+        return self.covariances[0]
+
+
+class RTSSmoother:
+    """Registra o estado filtrado de cada época e executa a passada de suavização RTS
+
+    Cada estado do filtro tem um identificador: posição e ZWD são fixos, enquanto o relógio
+    (ruído branco) e cada ambiguidade recebem um identificador novo quando reiniciados. A
+    transição entre épocas é a identidade sobre os identificadores comuns, com o ruído de
+    processo registrado; estados que não continuam são apenas marginalizados.
+    """
+
+    def __init__(self, memory_limit: int = 64 * 1024 * 1024, directory: Optional[str] = None):
+        self._values = SnapshotBuffer(np.float64, memory_limit, directory)
+        self._ids = SnapshotBuffer(np.int64, memory_limit, directory)
+        self._times: List[float] = []
+        self._offsets: List[int] = []
+        self._id_offsets: List[int] = []
+        self._sizes: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def record(self, time: float, ids: np.ndarray, x: np.ndarray, P: np.ndarray,
+               position_noise: float = 0.0, zwd_noise: float = 0.0) -> None:
+        """Guarda o estado filtrado da época; o ruído é o acumulado desde o registro anterior"""
+        m = len(ids)
+        upper = np.triu_indices(m)
+        self._times.append(time)
+        self._sizes.append(m)
+        self._id_offsets.append(self._ids.append(ids))
+        self._offsets.append(self._values.append(np.concatenate([[position_noise, zwd_noise], x, P[upper]])))
+
+    def _snapshot(self, k: int):
+        m = self._sizes[k]
+        ids = np.array(self._ids.read(self._id_offsets[k], m))
+        values = np.array(self._values.read(self._offsets[k], 2 + m + m * (m + 1) // 2))
+        x = values[2:2 + m]
+        P = np.zeros((m, m))
+        P[np.triu_indices(m)] = values[2 + m:]
+        P = P + np.triu(P, 1).T
+        return ids, values[0], values[1], x, P
+
+    def smooth(self) -> Optional[SmoothedSolution]:
+        """Passada de trás para frente; memória proporcional a uma época mais as séries de saída"""
+        n = len(self)
+        if n == 0:
+            return None
+
+        positions = np.empty((n, 3))
+        covariances = np.empty((n, 3, 3))
+        zwd = np.full(n, np.nan)
+
+        def _store(k, ids, x, P):
+            index = {state: i for i, state in enumerate(ids)}
+            pos = [index[i] for i in POSITION_IDS]
+            positions[k] = x[pos]
+            covariances[k] = P[np.ix_(pos, pos)]
+            if ZWD_ID in index:
+                zwd[k] = x[index[ZWD_ID]]
+
+        ids_s, q_pos, q_zwd, x_s, P_s = self._snapshot(n - 1)
+        _store(n - 1, ids_s, x_s, P_s)
+
+        for k in range(n - 2, -1, -1):
+            ids, q_pos_k, q_zwd_k, x, P = self._snapshot(k)
+            common, here, there = np.intersect1d(ids, ids_s, return_indices=True)
+
+            # Covariância prevista dos estados que continuam: P filtrada + ruído de processo
+            noise = np.where(np.isin(common, POSITION_IDS), q_pos, 0.0) + np.where(common == ZWD_ID, q_zwd, 0.0)
+            P_pred = P[np.ix_(here, here)] + np.diag(noise)
+            gain = np.linalg.solve(P_pred, P[here, :]).T
+
+            x = x + gain @ (x_s[there] - x[here])
+            P = P + gain @ (P_s[np.ix_(there, there)] - P_pred) @ gain.T
+            P = 0.5 * (P + P.T)
+
+            _store(k, ids, x, P)
+            ids_s, x_s, P_s = ids, x, P
+            q_pos, q_zwd = q_pos_k, q_zwd_k
+
+        return SmoothedSolution(times=np.asarray(self._times), positions=positions,
+                                covariances=covariances, zwd=zwd)
+
+    def close(self) -> None:
+        self._values.close()
+        self._ids.close()
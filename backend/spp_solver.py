@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Posicionamento por ponto simples (SPP) em lote
+Resolve todas as épocas de uma vez por Gauss-Newton sobre matrizes empilhadas (época × satélite)
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+try:
+    from .geometry import batched_inverse, dop_from_design, enu_rotation, geodetic_angles
+except ImportError:
+    from geometry import batched_inverse, dop_from_design, enu_rotation, geodetic_angles
+
+logger = logging.getLogger(__name__)
+
+MIN_SATELLITES = 4
+
+
+@dataclass
+class SppSolution:
+    """Solução SPP por época; épocas sem solução ficam com NaN"""
+    position: np.ndarray      # (épocas, 3) ECEF em metros
+    clock_bias: np.ndarray    # (épocas,) em metros
+    residuals: np.ndarray     # (épocas, satélites), NaN onde não há observação usada
+    n_satellites: np.ndarray  # (épocas,)
+    converged: np.ndarray     # (épocas,) bool
+    iterations: np.ndarray    # (épocas,) iterações até convergir
+    gdop: np.ndarray
+    pdop: np.ndarray
+    hdop: np.ndarray
+    vdop: np.ndarray
+    sigma_enu: np.ndarray     # (épocas, 3) desvio padrão leste, norte, vertical (m) do ajuste
+
+    @property
+    def valid(self) -> np.ndarray:
+        """Épocas com solução (satélites suficientes e sistema não singular)"""
+        return np.isfinite(self.position[:, 0])
+
+    def __len__(self) -> int:
+        return len(self.clock_bias)
+
+
+def _dilution_of_precision(H: np.ndarray, rotation: np.ndarray):
+    """GDOP, PDOP, HDOP e VDOP a partir da geometria final, com HDOP/VDOP no referencial local (ENU)"""
+    gdop, pdop, hdop, vdop, _ = dop_from_design(H, rotation)
+    return gdop, pdop, hdop, vdop
+
+
+def _precision_enu(H: np.ndarray, w: np.ndarray, residuals: np.ndarray, n_used: np.ndarray,
+                   rotation: np.ndarray) -> np.ndarray:
+    """Desvio padrão ENU de cada época: σ0² (HᵀWH)⁻¹ com a variância a posteriori dos resíduos
+
+    Sem redundância (só quatro satélites) σ0² não é estimável e a precisão fica NaN.
+    """
+    hw_t = np.swapaxes(H * w[..., None], 1, 2)
+    Q = batched_inverse(hw_t @ H)[:, :3, :3]
+    cov_enu = rotation @ Q @ np.swapaxes(rotation, 1, 2)
+    redundancy = n_used - MIN_SATELLITES
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sigma0_sq = np.where(redundancy > 0, np.nansum(w * residuals ** 2, axis=1) / redundancy, np.nan)
+        return np.sqrt(np.diagonal(cov_enu, axis1=1, axis2=2) * sigma0_sq[:, None])
+
+
+def solve_spp_batch(sat_positions: np.ndarray, pseudoranges: np.ndarray,
+                    mask: Optional[np.ndarray] = None,
+                    initial_position: Optional[np.ndarray] = None,
+                    weights: Optional[np.ndarray] = None,
+                    max_iterations: int = 10, tolerance: float = 1e-3) -> SppSolution:
+    """Resolve posição e relógio do receptor para todas as épocas de uma vez
+
+    `sat_positions` tem forma (épocas, satélites, 3) e `pseudoranges` (épocas, satélites),
+    já corrigidas de relógio do satélite e atrasos atmosféricos quando disponíveis.
+    `mask` indica os pares (época, satélite) usados; NaN em qualquer entrada também exclui
+    o par. `weights` (mesma forma) pondera as observações. Cada época itera até o
+    deslocamento ficar abaixo de `tolerance` metros e deixa de ser atualizada.
+    """
+    sat_positions = np.asarray(sat_positions, dtype=np.float64)
+    pseudoranges = np.asarray(pseudoranges, dtype=np.float64)
+    n_epochs, n_sats = pseudoranges.shape
+
+    used = np.isfinite(pseudoranges) & np.isfinite(sat_positions).all(axis=2)
+    if mask is not None:
+        used &= mask
+    n_used = used.sum(axis=1)
+    solvable = n_used >= MIN_SATELLITES
+
+    w = np.where(used, 1.0 if weights is None else np.nan_to_num(weights), 0.0)
+    sat = np.where(used[..., None], sat_positions, 0.0)
+    rho = np.where(used, pseudoranges, 0.0)
+
+    state = np.zeros((n_epochs, 4))
+    if initial_position is not None:
+        state[:, :3] = np.broadcast_to(np.asarray(initial_position, dtype=np.float64), (n_epochs, 3))
+
+    active = solvable.copy()
+    converged = np.zeros(n_epochs, dtype=bool)
+    iterations = np.zeros(n_epochs, dtype=np.int32)
+    H = np.zeros((n_epochs, n_sats, 4))
+    residuals = np.zeros((n_epochs, n_sats))
+
+    for iteration in range(1, max_iterations + 1):
+        if not active.any():
+            break
+        # Enquanto todas as épocas iteram, fatias evitam cópias por indexação
+        idx = slice(None) if active.all() else np.flatnonzero(active)
+
+        delta = sat[idx] - state[idx, None, :3]
+        geometric = np.sqrt(np.einsum('esk,esk->es', delta, delta))
+        geometric[geometric == 0.0] = 1.0
+
+        h = np.empty(delta.shape[:2] + (4,))
+        np.divide(delta, -geometric[..., None], out=h[..., :3])
+        h[..., 3] = 1.0
+        b = rho[idx] - geometric - state[idx, None, 3]
+
+        # Observações não usadas têm peso zero e não entram nas equações normais
+        hw_t = np.swapaxes(h * w[idx][..., None], 1, 2)
+        normal = hw_t @ h
+        rhs = hw_t @ b[..., None]
+        try:
+            step = np.linalg.solve(normal, rhs)[..., 0]
+        except np.linalg.LinAlgError:
+            step = (batched_inverse(normal) @ rhs)[..., 0]
+
+        singular = ~np.isfinite(step).all(axis=1)
+        step[singular] = 0.0
+        state[idx] += step
+        H[idx] = h
+        residuals[idx] = b - (h @ step[..., None])[..., 0]
+        iterations[idx] = iteration
+
+        positions = np.arange(n_epochs)[idx]
+        done = np.sqrt(np.einsum('ek,ek->e', step[:, :3], step[:, :3])) < tolerance
+        converged[positions[done & ~singular]] = True
+        solvable[positions[singular]] = False
+        active[positions[done | singular]] = False
+
+    H *= used[..., None]
+    position = np.where(solvable[:, None], state[:, :3], np.nan)
+    clock_bias = np.where(solvable, state[:, 3], np.nan)
+    residuals = np.where(used & solvable[:, None], residuals, np.nan)
+    lat, lon, _ = geodetic_angles(np.nan_to_num(position))
+    rotation = enu_rotation(lat, lon)
+    gdop, pdop, hdop, vdop = _dilution_of_precision(H, rotation)
+    for dop in (gdop, pdop, hdop, vdop):
+        dop[~solvable] = np.nan
+    sigma_enu = _precision_enu(H, w, residuals, n_used, rotation)
+    sigma_enu[~solvable] = np.nan
+
+    if n_epochs:
+        logger.info(f"🧮 SPP em lote: {int(solvable.sum())}/{n_epochs} épocas resolvidas, "
+                    f"{int(converged.sum())} convergidas")
+
+    return SppSolution(
+        position=position, clock_bias=clock_bias, residuals=residuals,
+        n_satellites=n_used, converged=converged, iterations=iterations,
+        gdop=gdop, pdop=pdop, hdop=hdop, vdop=vdop, sigma_enu=sigma_enu
+    )
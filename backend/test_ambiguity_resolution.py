@@ -0,0 +1,106 @@
+"""
+Testes unitários para a resolução de ambiguidades inteiras (LAMBDA com teste da razão)
+"""
+
+import itertools
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from ambiguity_resolution import decorrelate, ldl_decomposition, resolve_ambiguities
+
+
+def _float_problem(n, epochs, rng, code_sigma=0.3, phase_sigma=0.003, wavelength=0.19):
+    """Covariância das ambiguidades (ciclos) de um ajuste float com posição e n satélites"""
+    directions = rng.normal(size=(n, 3))
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    normal = np.zeros((3 + n, 3 + n))
+    for epoch in range(epochs):
+        geometry = directions + 0.002 * epoch * rng.normal(size=(n, 3))
+        code = np.hstack([geometry, np.zeros((n, n))])
+        phase = np.hstack([geometry, wavelength * np.eye(n)])
+        normal += code.T @ code / code_sigma ** 2 + phase.T @ phase / phase_sigma ** 2
+    Q = np.linalg.inv(normal)[3:, 3:]
+    truth = rng.integers(-100000, 100000, n).astype(float)
+    values, vectors = np.linalg.eigh(Q)
+    return truth + vectors @ (np.sqrt(np.clip(values, 0.0, None)) * rng.normal(size=n)), Q, truth
+
+
+class TestDecorrelation:
+
+    def test_ldl_and_reduction(self):
+        """Testa Q = LᵀDL com pivô, Z unimodular e elementos de L reduzidos a |l| ≤ 1/2"""
+        _, Q, _ = _float_problem(12, 2, np.random.default_rng(3))
+
+        L, d, permutation = ldl_decomposition(Q)
+        Z, L_z, d_z = decorrelate(L, d, permutation)
+
+        np.testing.assert_allclose(L.T @ np.diag(d) @ L, Q[permutation][:, permutation], atol=1e-12)
+        np.testing.assert_allclose(Z.T @ Q @ Z, L_z.T @ np.diag(d_z) @ L_z, atol=1e-10)
+        np.testing.assert_array_equal(Z, np.round(Z))
+        assert abs(np.linalg.det(Z)) == pytest.approx(1.0)
+        assert np.abs(np.tril(L_z, -1)).max() <= 0.5 + 1e-12
+        assert d_z.prod() == pytest.approx(d.prod(), rel=1e-6)
+
+    def test_not_positive_definite(self):
+        """Testa a recusa de covariância singular"""
+        with pytest.raises(np.linalg.LinAlgError):
+            ldl_decomposition(np.array([[1.0, 1.0], [1.0, 1.0]]))
+
+
+class TestSearch:
+
+    def test_matches_exhaustive_search(self):
+        """Testa os dois melhores candidatos contra a enumeração exaustiva em dimensão pequena"""
+        rng = np.random.default_rng(7)
+        for _ in range(20):
+            A = rng.normal(size=(3, 3))
+            Q = A @ A.T * 0.3 + np.eye(3) * 0.05
+            a = rng.normal(size=3) * 3.0
+            inverse = np.linalg.inv(Q)
+            grid = itertools.product(*[range(int(round(v)) - 5, int(round(v)) + 6) for v in a])
+            best = sorted((float((a - c) @ inverse @ (a - c)), c) for c in grid)[:2]
+
+            result = resolve_ambiguities(a, Q)
+
+            np.testing.assert_array_equal(result.fixed, best[0][1])
+            if best[1][0] / best[0][0] < 30.0:
+                np.testing.assert_array_equal(result.second, best[1][1])
+                np.testing.assert_allclose(result.squared_norms, [best[0][0], best[1][0]])
+                assert result.ratio == pytest.approx(best[1][0] / best[0][0])
+
+    def test_ratio_test(self):
+        """Testa aceitação com ambiguidades precisas e recusa com ambiguidades ambíguas"""
+        Q = np.array([[0.002, 0.0018], [0.0018, 0.002]])
+        strong = resolve_ambiguities(np.array([3.04, -1.98]), Q)
+        weak = resolve_ambiguities(np.array([0.45, 0.2]), np.eye(2) * 0.25)
+
+        np.testing.assert_array_equal(strong.fixed, [3.0, -2.0])
+        assert strong.accepted and strong.ratio >= 3.0
+        assert strong.success_rate > 0.99
+        assert not weak.accepted
+        assert weak.ratio < 3.0
+        assert not resolve_ambiguities(np.zeros(0), np.zeros((0, 0))).accepted
+
+
+class TestPerformance:
+
+    @pytest.mark.parametrize('n', [20, 30, 40])
+    def test_filter_dimensions(self, n):
+        """Testa acerto dos inteiros e custo de milissegundos com 20-40 ambiguidades"""
+        rng = np.random.default_rng(n)
+        cases = [_float_problem(n, epochs, rng) for epochs in (2, 10, 60)]
+        resolve_ambiguities(*cases[0][:2])
+
+        start = time.perf_counter()
+        results = [resolve_ambiguities(a, Q) for a, Q, _ in cases]
+        elapsed = (time.perf_counter() - start) / len(cases)
+
+        for result, (_, _, truth) in zip(results, cases):
+            assert result.accepted
+            np.testing.assert_array_equal(result.fixed, truth)
+        assert elapsed < 0.1
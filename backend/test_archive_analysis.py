@@ -0,0 +1,86 @@
+"""
+Testes unitários para a análise paralela de ZIPs com vários arquivos RINEX
+"""
+
+import os
+import sys
+import zipfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from archive_analysis import analyze_rinex_archive, summarize_archive_results
+
+
+def _fake_analysis(zip_path, member=None, progress_callback=None):
+    """Análise de teste executada nos processos do pool"""
+    if member.endswith('ruim.23o'):
+        raise ValueError("Arquivo corrompido")
+    with zipfile.ZipFile(zip_path) as archive:
+        epochs = len(archive.read(member).splitlines())
+    return {
+        'success': True,
+        'file_info': {
+            'satellites_list': ['G01', 'R0' + str(epochs)],
+            'epochs_analyzed': epochs,
+            'duration_hours': epochs / 3600.0,
+            'processing_time': 0.5,
+            'quality_status': 'BOA',
+            'pid': os.getpid()
+        }
+    }
+
+
+def _write_zip(path, members):
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name, lines in members.items():
+            archive.writestr(name, "\n".join(["linha"] * lines))
+    return str(path)
+
+
+class TestArchiveAnalysis:
+
+    def test_all_members_analyzed_with_summary(self, tmp_path):
+        """Testa análise de todos os membros RINEX com resultado por arquivo e resumo"""
+        zip_path = _write_zip(tmp_path / "rover.zip", {
+            'Rover/sessao1.23o': 3, 'Rover/sessao2.23o': 5, 'Base/base.23o': 4, 'leia-me.txt': 50
+        })
+        progress = []
+
+        result = analyze_rinex_archive(zip_path, _fake_analysis, max_workers=2,
+                                       progress_callback=lambda stage, f: progress.append((stage, f)))
+
+        assert result['success'] is True
+        assert [f['file'] for f in result['files']] == ['Rover/sessao2.23o', 'Base/base.23o', 'Rover/sessao1.23o']
+        # Compatibilidade com a resposta de arquivo único: file_info do maior arquivo
+        assert result['file_info']['epochs_analyzed'] == 5
+
+        summary = result['summary']
+        assert summary['files_total'] == 3 and summary['files_succeeded'] == 3
+        assert summary['total_epochs'] == 12
+        assert summary['satellites'] == ['G01', 'R03', 'R04', 'R05']
+        assert summary['sum_processing_time'] == 1.5
+        assert progress[-1] == ('archive', 1.0)
+
+    def test_failed_member_does_not_abort_archive(self, tmp_path):
+        """Testa que a falha de um membro não interrompe a análise dos demais"""
+        zip_path = _write_zip(tmp_path / "rover.zip", {'sessao.23o': 3, 'ruim.23o': 2})
+
+        result = analyze_rinex_archive(zip_path, _fake_analysis, max_workers=2)
+
+        assert result['success'] is True
+        assert result['summary']['files_failed'] == 1
+        failed = [s for s in result['summary']['sessions'] if s['error']]
+        assert failed[0]['file'] == 'ruim.23o' and 'corrompido' in failed[0]['error']
+
+    def test_archive_without_rinex(self, tmp_path):
+        """Testa ZIP sem arquivos RINEX"""
+        zip_path = _write_zip(tmp_path / "vazio.zip", {'leia-me.txt': 1})
+
+        assert analyze_rinex_archive(zip_path, _fake_analysis)['success'] is False
+
+    def test_summary_of_empty_results(self):
+        """Testa resumo quando nenhum arquivo foi analisado com sucesso"""
+        summary = summarize_archive_results([{'file': 'a.23o', 'result': {'success': False, 'error': 'x'}}], 0.0)
+
+        assert summary['files_failed'] == 1
+        assert summary['total_epochs'] == 0
+        assert summary['parallel_speedup'] is None
@@ -0,0 +1,125 @@
+"""
+Testes unitários para os modelos troposférico (Saastamoinen + Niell) e ionosférico (Klobuchar)
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from atmosphere import L1_FREQUENCY, Klobuchar, Troposphere, saastamoinen, standard_atmosphere
+from ephemeris import SPEED_OF_LIGHT, NavigationHeader
+from obs_store import to_gps_seconds
+from test_ppp_filter import RECEIVER, START
+
+ALPHA = [1.2e-8, 0.0, 0.0, 0.0]
+BETA = [1.0e5, 0.0, 0.0, 0.0]
+
+
+class TestTroposphere:
+
+    def test_zenith_delays(self):
+        """Testa ZHD de Saastamoinen ao nível do mar e redução com a altitude"""
+        zhd, zwd = saastamoinen(np.radians(45.0), 0.0, *standard_atmosphere(0.0))
+        high, _ = saastamoinen(np.radians(45.0), 3000.0, *standard_atmosphere(3000.0))
+
+        assert zhd == pytest.approx(2.307, abs=0.005)
+        assert 0.05 < zwd < 0.2
+        assert high < 0.75 * zhd
+
+    def test_niell_mapping(self):
+        """Testa mapeamento unitário no zênite e valores de Niell em baixa elevação"""
+        troposphere = Troposphere(np.radians(45.0), 0.0, 28)
+
+        hydrostatic, wet = troposphere.mapping(np.radians([90.0, 30.0, 5.0]))
+
+        np.testing.assert_allclose(hydrostatic[0], 1.0, atol=1e-9)
+        np.testing.assert_allclose(wet[0], 1.0, atol=1e-9)
+        assert hydrostatic[1] == pytest.approx(2.0, abs=0.01)
+        assert hydrostatic[2] == pytest.approx(10.15, abs=0.05)
+        assert wet[2] == pytest.approx(10.75, abs=0.05)
+        np.testing.assert_allclose(troposphere.delay(np.pi / 2), troposphere.zhd + troposphere.zwd)
+
+    def test_southern_hemisphere_season(self):
+        """Testa a fase sazonal invertida no hemisfério sul"""
+        north = Troposphere(np.radians(50.0), 0.0, 28)
+        south = Troposphere(np.radians(-50.0), 0.0, 28 + 365.25 / 2)
+
+        np.testing.assert_allclose(south.mapping(np.radians(7.0))[0], north.mapping(np.radians(7.0))[0])
+        assert Troposphere(np.radians(-50.0), 0.0, 28).mapping(np.radians(7.0))[0] != \
+            pytest.approx(north.mapping(np.radians(7.0))[0], rel=1e-5)
+
+    def test_session_model_from_position(self):
+        """Testa o modelo da sessão a partir da posição ECEF com arrays época × satélite"""
+        troposphere = Troposphere.at(RECEIVER, to_gps_seconds(START))
+        elevation = np.radians(np.array([[10.0, 45.0, np.nan], [20.0, 60.0, 90.0]]))
+
+        delays = troposphere.delay(elevation)
+
+        assert delays.shape == (2, 3)
+        assert np.isnan(delays[0, 2])
+        assert delays[1, 2] == pytest.approx(troposphere.zhd + troposphere.zwd)
+        assert delays[0, 0] > delays[1, 0] > delays[0, 1]
+
+
+class TestKlobuchar:
+
+    def test_night_floor_and_day_peak(self):
+        """Testa o valor noturno constante (5 ns) e o pico às 14 h locais"""
+        model = Klobuchar(np.array(ALPHA), np.array(BETA))
+        slant = 1.0 + 16.0 * (0.53 - 0.5) ** 3
+
+        night = model.delay(0.0, 0.0, np.pi / 2, 0.0, 0.0)
+        day = model.delay(0.0, 0.0, np.pi / 2, 0.0, 50400.0)
+
+        assert night == pytest.approx(SPEED_OF_LIGHT * 5e-9 * slant, rel=1e-6)
+        assert day == pytest.approx(SPEED_OF_LIGHT * (5e-9 + ALPHA[0]) * slant, rel=1e-3)
+
+    def test_vectorized_and_frequency_scaling(self):
+        """Testa arrays época × satélite, aumento em baixa elevação e escala (f1/f)²"""
+        model = Klobuchar(np.array(ALPHA), np.array(BETA))
+        elevation = np.radians(np.array([[10.0, 30.0, 80.0]] * 2))
+        azimuth = np.radians(np.array([[0.0, 120.0, 240.0]] * 2))
+        times = np.array([[40000.0], [50400.0]])
+
+        l1 = model.delay(-0.4, -0.8, elevation, azimuth, times)
+        l2 = model.delay(-0.4, -0.8, elevation, azimuth, times, frequency=1227.60e6)
+
+        assert l1.shape == (2, 3)
+        assert (l1[:, 0] > l1[:, 1]).all() and (l1[:, 1] > l1[:, 2]).all()
+        np.testing.assert_allclose(l2, l1 * (L1_FREQUENCY / 1227.60e6) ** 2)
+
+    def test_from_header(self):
+        """Testa coeficientes do cabeçalho de navegação e ausência deles"""
+        header = NavigationHeader()
+        header.ionosphere = {'GPSA': ALPHA, 'GPSB': BETA}
+
+        model = Klobuchar.from_header(header)
+
+        assert model is not None
+        np.testing.assert_allclose(model.alpha, ALPHA)
+        assert Klobuchar.from_header(None) is None
+        assert Klobuchar.from_header(NavigationHeader()) is None
+
+
+class TestProcessorAtmosphere:
+
+    def test_session_corrections(self):
+        """Testa os modelos da sessão preparados pelo processador"""
+        from gnss_processor import GNSSProcessor
+        from test_ppp_filter import _simulate
+        store, _ = _simulate(epochs=5)
+        processor = GNSSProcessor()
+        processor.navigation_header = NavigationHeader()
+        processor.navigation_header.ionosphere = {'GPSA': ALPHA, 'GPSB': BETA}
+
+        corrections = processor._calculate_atmospheric_corrections(
+            {'observations': store, 'approx_position': RECEIVER})
+
+        assert corrections['tropospheric_model'] == 'Saastamoinen + Niell (NMF)'
+        assert corrections['zenith_hydrostatic_delay'] == pytest.approx(processor.troposphere.zhd, abs=1e-4)
+        assert corrections['klobuchar']['alpha'] == ALPHA
+        assert 'ionosfera (Klobuchar)' in processor._corrections_applied(False)
+        assert 'ionosfera (livre da ionosfera)' in processor._corrections_applied(True)
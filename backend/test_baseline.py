@@ -0,0 +1,154 @@
+"""
+Testes unitários para o processamento relativo base–rover por duplas diferenças
+"""
+
+import os
+import sys
+from datetime import timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from atmosphere import Troposphere
+from baseline import align_epochs, double_differences, process_baselines, solve_baseline
+from ephemeris import SPEED_OF_LIGHT
+from geometry import elevation_azimuth, enu_rotation, geodetic_angles
+from obs_store import ObservationStore, to_gps_seconds
+from test_ppp_filter import F1, F2, RECEIVER, START, WAVELENGTH1, WAVELENGTH2, CircularOrbits
+
+BASELINE_ENU = np.array([1200.0, -800.0, 15.0])
+
+
+def _rover_position(enu=BASELINE_ENU):
+    lat, lon, _ = geodetic_angles(RECEIVER)
+    return RECEIVER + enu_rotation(lat, lon).T @ enu
+
+
+def _observe(receiver, epochs=120, interval=30.0, clock=300.0, slip=None, seed=1, first=0):
+    """Observações C1/P2/L1/L2 de uma estação; a ionosfera vem da base (linha de base curta)
+
+    O relógio do receptor (m) desloca o instante de recepção verdadeiro em relação ao rotulado.
+    """
+    rng = np.random.default_rng(seed)
+    orbits = CircularOrbits()
+    troposphere = Troposphere.at(receiver, to_gps_seconds(START))
+    sat_ids = np.array([f"G{prn:02d}" for prn in range(1, 25)])
+    ambiguities = {s: (rng.integers(-1e6, 1e6), rng.integers(-1e6, 1e6)) for s in sat_ids}
+
+    store = ObservationStore(['C1', 'P2', 'L1', 'L2'])
+    for k in range(first, first + epochs):
+        time = START + timedelta(seconds=k * interval)
+        t = to_gps_seconds(time) - clock / SPEED_OF_LIGHT
+        rows, visible = [], []
+        for sat_id in sat_ids:
+            tau = 0.075
+            for _ in range(4):
+                state = orbits.satellite_states([sat_id], [t - tau], travel_time=[tau])
+                rho = np.linalg.norm(state.position[0] - receiver)
+                tau = rho / SPEED_OF_LIGHT
+            el, _ = elevation_azimuth(receiver, state.position[0])
+            if el < np.radians(12.0):
+                continue
+            base_el, _ = elevation_azimuth(RECEIVER, state.position[0])
+            geometric = rho + clock - state.clock_bias[0] * SPEED_OF_LIGHT + troposphere.delay(el)
+            iono = 3.0 / np.sin(base_el)
+            n1, n2 = ambiguities[sat_id]
+            if slip is not None and sat_id == slip[0] and k >= slip[1]:
+                n1, n2 = n1 + 9, n2 + 7
+            rows.append([
+                geometric + iono + rng.normal(0, 0.3),
+                geometric + iono * F1 ** 2 / F2 ** 2 + rng.normal(0, 0.3),
+                (geometric - iono + rng.normal(0, 0.002)) / WAVELENGTH1 + n1,
+                (geometric - iono * F1 ** 2 / F2 ** 2 + rng.normal(0, 0.002)) / WAVELENGTH2 + n2
+            ])
+            visible.append(sat_id)
+        store.append_epoch(time, visible, np.array(rows))
+    return store.trim()
+
+
+def _write_rinex(path, store, approx_position):
+    """Grava o armazenamento como RINEX 2.11 de observação"""
+    codes = store.obs_codes
+    with open(path, 'w') as f:
+        f.write("     2.11           OBSERVATION DATA    G (GPS)             RINEX VERSION / TYPE\n")
+        f.write("".join(f"{v:14.4f}" for v in approx_position).ljust(60) + "APPROX POSITION XYZ\n")
+        f.write(f"{len(codes):6d}" + "".join(f"{c:>6}" for c in codes).ljust(54) + "# / TYPES OF OBSERV\n")
+        f.write("".ljust(60) + "END OF HEADER\n")
+        for epoch in range(store.n_epochs):
+            t = store.epoch_time(epoch)
+            sats = "".join(store.epoch_satellites(epoch))
+            f.write(f" {t.year % 100:2d}{t.month:3d}{t.day:3d}{t.hour:3d}{t.minute:3d}{t.second:11.7f}"
+                    f"  0{len(sats) // 3:3d}{sats[:36]}\n")
+            for start in range(36, len(sats), 36):
+                f.write(" " * 32 + sats[start:start + 36] + "\n")
+            for row in range(store.epoch_slice(epoch).start, store.epoch_slice(epoch).stop):
+                f.write("".join(f"{store.column(c)[row]:14.3f}  " for c in codes) + "\n")
+    return str(path)
+
+
+class TestAlignment:
+
+    def test_merge_join(self):
+        """Testa casamento de épocas com intervalos diferentes, lacunas e tolerância"""
+        base = np.arange(0.0, 300.0, 15.0)
+        rover = np.array([0.001, 30.0, 44.0, 60.002, 90.0, 500.0])
+
+        base_epochs, rover_epochs = align_epochs(base, rover)
+
+        np.testing.assert_array_equal(base_epochs, [0, 2, 4, 6])
+        np.testing.assert_array_equal(rover_epochs, [0, 1, 3, 4])
+        assert align_epochs(base, np.zeros(0))[0].size == 0
+
+
+class TestBaseline:
+
+    def test_fixed_baseline(self):
+        """Testa solução fixa com erro milimétrico partindo de posição aproximada deslocada"""
+        base = _observe(RECEIVER, clock=300.0, seed=1)
+        truth = _rover_position()
+        rover = _observe(truth, clock=-150000.0, seed=2)
+
+        solution = solve_baseline(base, rover, CircularOrbits(), RECEIVER, truth + np.array([4.0, -3.0, 5.0]))
+
+        assert solution.fixed
+        assert solution.ratio >= 3.0
+        assert solution.success_rate > 0.999
+        assert np.linalg.norm(solution.position - truth) < 0.005
+        np.testing.assert_allclose(solution.enu, BASELINE_ENU, atol=0.005)
+        assert np.allclose(solution.fixed_ambiguities, np.round(solution.fixed_ambiguities))
+        assert np.all(solution.sigma_enu < 0.01)
+        assert solution.summary()['solution'] == 'Fixa'
+
+    def test_partial_overlap_and_slip(self):
+        """Testa sessões com sobreposição parcial e perda de ciclo sem LLI no rover"""
+        base = _observe(RECEIVER, epochs=120, seed=1)
+        truth = _rover_position()
+        rover = _observe(truth, epochs=120, first=20, slip=('G13', 80), seed=3)
+
+        dd = double_differences(base, rover, CircularOrbits(), RECEIVER, truth)
+        solution = solve_baseline(base, rover, CircularOrbits(), RECEIVER, truth)
+
+        assert len(dd.times) == 100
+        assert dd.n_frequencies == 2
+        k = dd.satellites.index('G13')
+        assert len(np.unique(dd.ambiguity[:, k][dd.ambiguity[:, k] >= 0])) == 2
+        assert solution.fixed
+        assert np.linalg.norm(solution.position - truth) < 0.01
+
+    def test_parallel_rovers(self, tmp_path):
+        """Testa dois rovers contra a mesma base em processos separados a partir de arquivos RINEX"""
+        base = _observe(RECEIVER, epochs=60, seed=1)
+        truths = [_rover_position(), _rover_position(np.array([-300.0, 2500.0, -8.0]))]
+        rovers = [_write_rinex(tmp_path / f"rover{k}.23o", _observe(truth, epochs=60, seed=4 + k),
+                               truth + 10.0) for k, truth in enumerate(truths)]
+        base_path = _write_rinex(tmp_path / "base.23o", base, RECEIVER)
+
+        result = process_baselines((base_path, None), [(path, None) for path in rovers], [],
+                                   orbits=CircularOrbits(), max_workers=2)
+
+        assert result['success']
+        assert [r['file'] for r in result['rovers']] == ['rover0.23o', 'rover1.23o']
+        for rover, truth in zip(result['rovers'], truths):
+            position = np.array([rover['result']['position'][axis] for axis in 'xyz'])
+            assert rover['result']['fixed']
+            assert np.linalg.norm(position - truth) < 0.02
@@ -0,0 +1,110 @@
+"""
+Testes unitários para a detecção vetorizada de perdas de ciclo (GF, Melbourne-Wübbena e LLI)
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from cycle_slips import detect_cycle_slips
+from obs_store import ObservationStore
+from ppp_filter import PPPFilter, ppp_epochs
+from test_ppp_filter import RECEIVER, _simulate
+
+
+def _inject(store, sat_id, epoch, cycles1, cycles2):
+    """Soma ciclos às fases L1/L2 de um satélite a partir de uma época, sem marcar o LLI"""
+    rows = (store.sat_index == store.satellite_index(sat_id)) & (store.epoch_index >= epoch)
+    store.column('L1')[rows] += cycles1
+    store.column('L2')[rows] += cycles2
+
+
+def _without(store, sat_id, epochs):
+    """Cópia do armazenamento sem as observações de um satélite num intervalo de épocas"""
+    copy = ObservationStore(store.obs_codes)
+    for epoch in range(store.n_epochs):
+        rows = np.arange(store.epoch_slice(epoch).start, store.epoch_slice(epoch).stop)
+        sats = np.array(store.epoch_satellites(epoch))
+        keep = ~((sats == sat_id) & (epoch in epochs))
+        values = np.stack([store.column(code)[rows] for code in store.obs_codes], axis=1)
+        lli = np.stack([store.lli(code)[rows] for code in store.obs_codes], axis=1)
+        copy.append_epoch(store.epoch_time(epoch), sats[keep], values[keep], lli=lli[keep])
+    return copy.trim()
+
+
+class TestCombinations:
+
+    def test_no_false_alarms(self):
+        """Testa ausência de detecções em sessões sem perda de ciclo (30 s e 1 s)"""
+        for epochs, interval in ((240, 30.0), (1200, 1.0)):
+            store, _ = _simulate(epochs=epochs, interval=interval)
+            detection = detect_cycle_slips(store)
+
+            assert detection.events == []
+            assert len(detection.arcs) == len(store.satellites)
+            assert not detection.slips.any()
+
+    def test_geometry_free_detects_single_frequency_slip(self):
+        """Testa salto em L1 sem LLI detectado pela GF apenas na época do salto"""
+        store, _ = _simulate()
+        _inject(store, 'G13', 60, 7, 0)
+
+        detection = detect_cycle_slips(store)
+
+        assert [(e.satellite, e.epoch) for e in detection.events] == [('G13', 60)]
+        event = detection.events[0]
+        assert 'gf' in event.reasons
+        assert abs(event.gf_jump - 7 * 0.1903) < 0.05
+        assert abs(event.mw_jump - 7.0) < 0.5
+
+    def test_melbourne_wubbena_detects_gf_insensitive_slip(self):
+        """Testa salto 9/7 ciclos, quase invisível na GF, detectado pela MW"""
+        store, _ = _simulate()
+        _inject(store, 'G13', 60, 9, 7)
+
+        detection = detect_cycle_slips(store)
+
+        assert [(e.satellite, e.epoch, e.reasons) for e in detection.events] == [('G13', 60, ('mw',))]
+        assert abs(detection.events[0].gf_jump) < 0.05
+        assert abs(detection.events[0].mw_jump - 2.0) < 0.5
+
+
+class TestArcs:
+
+    def test_lli_and_gap_split_arcs(self):
+        """Testa LLI e interrupção longa quebrando arcos, com arrays alinhados aos registros"""
+        store, _ = _simulate(slip=('G13', 60))
+        store = _without(store, 'G13', range(80, 100))
+
+        detection = detect_cycle_slips(store)
+
+        assert [(e.satellite, e.epoch, e.reasons) for e in detection.events] == [
+            ('G13', 60, ('lli',)), ('G13', 100, ('gap',))]
+        arcs = [(a.start_epoch, a.end_epoch) for a in detection.arcs if a.satellite == 'G13']
+        assert arcs[1:] == [(60, 79), (100, arcs[-1][1])]
+        assert len(detection.arcs) == len(store.satellites) + 2
+
+        g13 = store.sat_index == store.satellite_index('G13')
+        assert detection.slips.sum() == 2
+        assert set(store.epoch_index[detection.slips & g13]) == {60, 100}
+        assert len(np.unique(detection.arc[g13])) == 3
+        assert detection.affected_satellites == ['G13']
+        assert detection.events[0].as_dict()['reasons'] == ['lli']
+
+
+class TestPositioningEngine:
+
+    def test_detected_slip_resets_ambiguity(self):
+        """Testa que uma perda de ciclo sem LLI reinicia a ambiguidade no filtro PPP"""
+        store, orbits = _simulate()
+        _inject(store, 'G13', 60, 9, 7)
+
+        epochs = list(ppp_epochs(store, orbits))
+        flagged = [(k, sat) for k, epoch in enumerate(epochs) for sat, slip in zip(epoch.satellites, epoch.slips) if slip]
+        solutions = list(PPPFilter().run(iter(epochs)))
+
+        assert flagged == [(60, 'G13')]
+        assert solutions[60].rejected == 0
+        assert np.linalg.norm(solutions[-1].position - RECEIVER) < 0.10
@@ -0,0 +1,253 @@
+"""
+Testes unitários para a leitura de efemérides transmitidas e o cálculo das órbitas
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from atmosphere import Troposphere
+from ephemeris import ORBIT_FIELDS, SPEED_OF_LIGHT, load_navigation, read_navigation, rotate_earth
+from obs_store import ObservationStore, to_gps_seconds
+from geometry import elevation_azimuth
+from gnss_processor import GNSSProcessor
+
+GPS_EPOCH = datetime(1980, 1, 6)
+
+# Exemplo clássico de efeméride GPS (semana 910) e posição de referência no instante de transmissão
+TEXTBOOK_ORBIT = {
+    'week': 910, 'toe': 410400, 'e': 4.27323824e-3, 'sqrt_a': 5.15353571e3,
+    'cic': 9.8720193e-8, 'crc': 282.28125, 'cis': -3.9115548e-8, 'crs': -132.71875,
+    'cuc': -6.60121440e-6, 'cus': 5.31412661e-6, 'delta_n': 4.3123e-9, 'omega0': 2.29116688,
+    'omega': -0.88396725, 'i0': 0.97477102, 'omega_dot': -8.025691e-9, 'idot': -4.23946e-10,
+    'm0': 2.24295542
+}
+TEXTBOOK_TIME = 910 * 604800 + 403272.930
+TEXTBOOK_POSITION = np.array([-5.67841101e6, -2.49239629e7, 7.05651887e6])
+
+RECEIVER = np.array([3752842.7775, -4538356.2935, -2442730.7161])
+
+
+def _orbit_values(**overrides):
+    params = dict(TEXTBOOK_ORBIT, **overrides)
+    return [float(params.get(name, 0.0)) for name in ORBIT_FIELDS]
+
+
+def _fmt(value):
+    return f"{value:19.12E}".replace('E', 'D')
+
+
+def _record_v2(prn, toc, values):
+    first = (f"{prn:2d} {toc.year % 100:02d} {toc.month:2d} {toc.day:2d} {toc.hour:2d} "
+             f"{toc.minute:2d}{toc.second:5.1f}" + ''.join(_fmt(v) for v in values[:3]))
+    lines = [first] + ["   " + ''.join(_fmt(v) for v in values[k:k + 4]) for k in range(3, 29, 4)]
+    return "\n".join(lines)
+
+
+def _record_v3(sat_id, toc, values):
+    first = f"{sat_id} {toc:%Y %m %d %H %M %S}" + ''.join(_fmt(v) for v in values[:3])
+    lines = [first] + ["    " + ''.join(_fmt(v) for v in values[k:k + 4]) for k in range(3, 29, 4)]
+    return "\n".join(lines)
+
+
+def _write_v2(path, records, header_extra=""):
+    header = ("     2.10           N: GPS NAV DATA                         RINEX VERSION / TYPE\n"
+              + header_extra +
+              "                                                            END OF HEADER\n")
+    path.write_text(header + "\n".join(_record_v2(*r) for r in records) + "\n")
+    return str(path)
+
+
+def _toe_datetime(week, toe):
+    return GPS_EPOCH + timedelta(weeks=week, seconds=toe)
+
+
+class TestNavigationParsing:
+
+    def test_rinex2_record_and_header(self, tmp_path):
+        """Testa leitura de um registro GPS RINEX 2 e dos parâmetros ionosféricos do cabeçalho"""
+        ion = ("    0.1118D-07  0.7451D-08 -0.5960D-07 -0.5960D-07          ION ALPHA\n"
+               "    0.9011D+05  0.1638D+05 -0.1966D+06 -0.6554D+05          ION BETA\n")
+        toc = _toe_datetime(910, 410400)
+        path = _write_v2(tmp_path / "brdc1700.97n", [(5, toc, _orbit_values(af0=1e-5))], ion)
+
+        header, ephemeris = read_navigation(path)
+
+        assert header.version == 2.1
+        assert header.ionosphere['GPSA'][0] == 0.1118e-7
+        assert header.ionosphere['GPSB'][3] == -0.6554e5
+        assert ephemeris.satellites == ['G05']
+        assert ephemeris.column('sqrt_a')[0] == TEXTBOOK_ORBIT['sqrt_a']
+        assert ephemeris.toe[0] == to_gps_seconds(toc)
+
+    def test_rinex3_mixed_constellations(self, tmp_path):
+        """Testa registros GPS, Galileo e BeiDou RINEX 3, ignorando GLONASS"""
+        toc = _toe_datetime(2250, 86400)
+        glonass = ("R05 2023 02 27 00 15 00" + _fmt(1e-5) + _fmt(0) + _fmt(0) + "\n" +
+                   "\n".join("    " + _fmt(1.0) * 4 for _ in range(3)))
+        beidou_toc = toc - timedelta(seconds=14)
+        text = ("     3.04           N: GNSS NAV DATA    M: MIXED            RINEX VERSION / TYPE\n"
+                "GPSA   1.1176E-08  7.4506E-09 -5.9605E-08 -5.9605E-08       IONOSPHERIC CORR\n"
+                "                                                            END OF HEADER\n" +
+                _record_v3('G05', toc, _orbit_values(week=2250, toe=86400)) + "\n" +
+                glonass + "\n" +
+                _record_v3('E11', toc, _orbit_values(week=2250, toe=86400)) + "\n" +
+                _record_v3('C08', beidou_toc, _orbit_values(week=2250 - 1356, toe=86386)) + "\n")
+        path = tmp_path / "BRDC00IGS_R_20230580000_01D_MN.rnx"
+        path.write_text(text)
+
+        header, ephemeris = read_navigation(str(path))
+
+        assert header.satellite_system == 'M'
+        assert header.ionosphere['GPSA'][1] == 7.4506e-09
+        assert ephemeris.satellites == ['C08', 'E11', 'G05']
+        # BeiDou em BDT convertido para o mesmo instante GPS
+        assert np.allclose(ephemeris.toe, to_gps_seconds(toc))
+        assert np.allclose(ephemeris.toc, to_gps_seconds(toc))
+
+    def test_rinex4_skips_non_keplerian_messages(self, tmp_path):
+        """Testa que registros RINEX 4 de outros tipos (STO, CNAV) são ignorados"""
+        toc = _toe_datetime(2250, 86400)
+        text = ("     4.00           N: GNSS NAV DATA    M: MIXED            RINEX VERSION / TYPE\n"
+                "                                                            END OF HEADER\n"
+                "> EPH G05 LNAV\n" + _record_v3('G05', toc, _orbit_values(week=2250, toe=86400)) + "\n"
+                "> STO G GPUT\n"
+                "    2023 02 27 00 00 00 GPUT\n"
+                "     1.0000E+00 0.0000E+00 0.0000E+00 0.0000E+00\n"
+                "> EPH G07 CNAV\n" + _record_v3('G07', toc, _orbit_values(week=2250, toe=86400)) + "\n")
+        path = tmp_path / "nav4.rnx"
+        path.write_text(text)
+
+        _, ephemeris = read_navigation(str(path))
+
+        assert ephemeris.satellites == ['G05']
+
+
+class TestOrbitEngine:
+
+    def test_textbook_orbit(self, tmp_path):
+        """Testa posição Kepleriana contra o exemplo de referência (erro de poucos centímetros)"""
+        path = _write_v2(tmp_path / "t.97n", [(5, _toe_datetime(910, 410400), _orbit_values())])
+        _, ephemeris = read_navigation(path)
+
+        states = ephemeris.satellite_states(['G05'], [TEXTBOOK_TIME])
+
+        assert states.valid[0]
+        assert np.linalg.norm(states.position[0] - TEXTBOOK_POSITION) < 0.5
+
+    def test_nearest_ephemeris_and_validity(self, tmp_path):
+        """Testa escolha do toe mais próximo, idade máxima e satélite sem saúde"""
+        records = [
+            (5, _toe_datetime(910, 403200), _orbit_values(toe=403200)),
+            (5, _toe_datetime(910, 410400), _orbit_values(toe=410400)),
+            (6, _toe_datetime(910, 410400), _orbit_values(health=1)),
+        ]
+        _, ephemeris = read_navigation(_write_v2(tmp_path / "t.97n", records))
+        base = 910 * 604800
+
+        selected = ephemeris.select(np.array(['G05', 'G05', 'G05', 'G06', 'G09']),
+                                    np.array([base + 403300, base + 409000, base + 430000,
+                                              base + 410400, base + 410400]))
+
+        toe = np.where(selected >= 0, ephemeris.column('toe')[selected], -1)
+        assert toe.tolist() == [403200, 410400, -1, -1, -1]
+
+    def test_broadcasting_matches_pairs(self, tmp_path):
+        """Testa que satélites (S,) com instantes (E, 1) equivalem à avaliação par a par"""
+        records = [(prn, _toe_datetime(910, 410400), _orbit_values(m0=0.4 * prn, omega0=0.7 * prn))
+                   for prn in (1, 2, 3)]
+        _, ephemeris = read_navigation(_write_v2(tmp_path / "t.97n", records))
+        times = TEXTBOOK_TIME + np.arange(4) * 30.0
+
+        grid = ephemeris.satellite_states(np.array(['G01', 'G02', 'G03']), times[:, None])
+
+        assert grid.position.shape == (4, 3, 3)
+        single = ephemeris.satellite_states(['G02'], [times[2]])
+        np.testing.assert_allclose(grid.position[2, 1], single.position[0])
+        np.testing.assert_allclose(grid.clock_bias[2, 1], single.clock_bias[0])
+
+    def test_transmission_time_and_earth_rotation(self, tmp_path):
+        """Testa que a posição no instante de transmissão fecha com a pseudodistância"""
+        _, ephemeris = read_navigation(
+            _write_v2(tmp_path / "t.97n", [(5, _toe_datetime(910, 410400), _orbit_values(af0=2e-4))]))
+        receive = TEXTBOOK_TIME + 0.075
+        # Pseudodistância consistente: alcance geométrico (com rotação da Terra) menos o relógio do satélite
+        tau = 0.075
+        for _ in range(5):
+            state = ephemeris.satellite_states(['G05'], [receive - tau], travel_time=[tau])
+            tau = np.linalg.norm(state.position[0] - RECEIVER) / SPEED_OF_LIGHT
+        pseudorange = tau * SPEED_OF_LIGHT - state.clock_bias[0] * SPEED_OF_LIGHT
+
+        states = ephemeris.transmission_states(['G05'], [receive], [pseudorange])
+
+        assert np.linalg.norm(states.position[0] - state.position[0]) < 1e-3
+        assert np.allclose(rotate_earth(np.array([[1.0, 0.0, 0.0]]), np.array([0.0])), [[1.0, 0.0, 0.0]])
+
+    def test_concatenate_removes_duplicates(self, tmp_path):
+        """Testa união de arquivos de navegação com registros repetidos"""
+        record = (5, _toe_datetime(910, 410400), _orbit_values())
+        first = _write_v2(tmp_path / "a.97n", [record])
+        second = _write_v2(tmp_path / "b.97n", [record, (7, _toe_datetime(910, 410400), _orbit_values())])
+
+        _, ephemeris = load_navigation([(first, None), (second, None)])
+
+        assert len(ephemeris) == 2
+        assert ephemeris.satellites == ['G05', 'G07']
+
+
+class TestBroadcastPositioning:
+
+    def test_spp_with_broadcast_orbits(self, tmp_path):
+        """Testa solução SPP do processador com órbitas transmitidas e pseudodistâncias simuladas"""
+        # Satélites acima da máscara de elevação vistos de RECEIVER
+        prns = (3, 7, 8, 15, 16, 24, 32)
+        records = [(prn, _toe_datetime(910, 410400),
+                    _orbit_values(m0=0.8 * prn, omega0=0.75 * prn, af0=1e-5 * prn)) for prn in prns]
+        _, ephemeris = read_navigation(_write_v2(tmp_path / "t.97n", records))
+        sat_ids = [f"G{prn:02d}" for prn in prns]
+
+        store = ObservationStore(['C1'])
+        times = [GPS_EPOCH + timedelta(seconds=TEXTBOOK_TIME + 30 * k) for k in range(3)]
+        for time in times:
+            t = to_gps_seconds(time)
+            ranges = []
+            for sat_id in sat_ids:
+                tau = 0.07
+                for _ in range(5):
+                    state = ephemeris.satellite_states([sat_id], [t - tau], travel_time=[tau])
+                    tau = np.linalg.norm(state.position[0] - RECEIVER) / SPEED_OF_LIGHT
+                elevation, _ = elevation_azimuth(RECEIVER, state.position[0])
+                ranges.append(tau * SPEED_OF_LIGHT - state.clock_bias[0] * SPEED_OF_LIGHT + 1500.0
+                              + Troposphere.at(RECEIVER, t).delay(elevation))
+            store.append_epoch(time, sat_ids, np.array(ranges)[:, None])
+
+        processor = GNSSProcessor()
+        processor.ephemeris = ephemeris
+
+        results = processor._process_gnss_data({'observations': store.trim(), 'approx_position': None})
+
+        assert len(results) == 3
+        assert all(r['converged'] for r in results)
+        # O relógio do receptor (5 µs) desloca o instante de transmissão em poucos centímetros
+        assert np.linalg.norm(results[0]['position'] - RECEIVER) < 0.05
+        assert abs(results[0]['clock_bias'] - 1500.0) < 0.05
+
+        final = processor._calculate_final_position(results)
+        assert 'convergence' not in results[0]
+        sigma = np.array([r['sigma'] for r in results])
+        assert final['precision_h'] == np.median(np.hypot(sigma[:, 0], sigma[:, 1]))
+        assert final['quality'] == GNSSProcessor._quality_class(final['precision_h'])
+
+    def test_converged_spp_is_graded_by_covariance(self):
+        """Testa que SPP convergido com σ métrico não recebe classificação centimétrica"""
+        results = [{'position': RECEIVER, 'sigma': np.array([1.2, 0.9, 2.5]), 'converged': True,
+                    'success': True} for _ in range(10)]
+
+        final = GNSSProcessor()._calculate_final_position(results)
+
+        assert final['precision_h'] == np.hypot(1.2, 0.9)
+        assert final['precision_v'] == 2.5
+        assert final['quality'] == 'RUIM'
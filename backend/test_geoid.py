@@ -0,0 +1,51 @@
+"""
+Testes unitários para o modelo geoidal e as altitudes ortométricas
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from geoid import GeoidGrid, load_geoid
+
+
+def _write_geoid(path):
+    """Grade de 0,5° com N variando linearmente (N = 0,4·lon + 0,2·lat em metros)"""
+    with open(path, 'w') as f:
+        f.write("# lon lat N\n")
+        for lat in np.arange(-34.0, 6.01, 0.5):
+            for lon in np.arange(-74.0, -33.99, 0.5):
+                f.write(f"{lon:.1f} {lat:.1f} {0.4 * lon + 0.2 * lat:.4f}\n")
+    return str(path)
+
+
+class TestGeoid:
+
+    def test_undulation_and_orthometric_height(self, tmp_path):
+        """Testa N interpolado em lote, H = h - N e NaN fora da grade"""
+        geoid = GeoidGrid.load(_write_geoid(tmp_path / 'mapgeo.txt'))
+        lat = np.array([-15.8, -23.55, -3.1, 10.0])
+        lon = np.array([-47.9, -46.63, -60.02, -47.9])
+
+        undulation = geoid.undulation(lat, lon)
+        heights = geoid.orthometric_height(lat, lon, np.full(4, 1000.0))
+
+        np.testing.assert_allclose(undulation[:3], 0.4 * lon[:3] + 0.2 * lat[:3], atol=1e-4)
+        np.testing.assert_allclose(heights[:3], 1000.0 - undulation[:3])
+        assert np.isnan(undulation[3]) and np.isnan(heights[3])
+
+    def test_memory_mapped_and_loaded_once(self, tmp_path):
+        """Testa reabertura pelo cache mapeado em memória e carga única por processo"""
+        path = _write_geoid(tmp_path / 'mapgeo.txt')
+        GeoidGrid.load(path)
+
+        geoid = load_geoid(path)
+
+        assert isinstance(geoid.values, np.memmap)
+        assert geoid.values.shape == (81, 81, 1)
+        assert load_geoid(path) is geoid
+        assert geoid.undulation(-15.8, -47.9) == pytest.approx(0.4 * -47.9 + 0.2 * -15.8, abs=1e-4)
+        assert load_geoid(str(tmp_path / 'missing.txt')) is None
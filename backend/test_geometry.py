@@ -0,0 +1,169 @@
+"""
+Testes unitários para elevação, azimute, máscara de elevação, ponderação e DOP vetorizados
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from geometry import (WGS84_A, DopSeries, apply_elevation_mask, dilution_of_precision, dop_from_angles,
+                      elevation_azimuth, elevation_weights, enu_rotation, geodetic_angles)
+from obs_store import ObservationStore
+from test_ppp_filter import RECEIVER, _simulate
+
+
+class TestTopocentricAngles:
+
+    def test_cardinal_directions(self):
+        """Testa elevação e azimute de satélites no zênite, a leste e ao norte de um ponto no equador"""
+        receiver = np.array([WGS84_A, 0.0, 0.0])
+        satellites = receiver + np.array([[2e7, 0, 0], [0, 1e7, 0], [0, 0, 1e7], [-1e6, -1e7, 0]])
+
+        elevation, azimuth = elevation_azimuth(receiver, satellites)
+
+        np.testing.assert_allclose(np.degrees(elevation[:3]), [90.0, 0.0, 0.0], atol=1e-9)
+        np.testing.assert_allclose(np.degrees(azimuth[1:3]), [90.0, 0.0], atol=1e-9)
+        assert np.degrees(azimuth[3]) == pytest.approx(270.0, abs=6.0)
+        assert elevation[3] < 0
+
+    def test_matches_enu_rotation(self):
+        """Testa concordância com a rotação ENU explícita para vários receptores e épocas de uma vez"""
+        rng = np.random.default_rng(0)
+        receivers = RECEIVER + rng.normal(0, 1e5, (4, 3))
+        satellites = rng.normal(0, 2e7, (4, 6, 3))
+
+        elevation, azimuth = elevation_azimuth(receivers[:, None, :], satellites)
+
+        assert elevation.shape == (4, 6)
+        for e in range(4):
+            lat, lon, _ = geodetic_angles(receivers[e])
+            enu = (satellites[e] - receivers[e]) @ enu_rotation(lat, lon).T
+            np.testing.assert_allclose(elevation[e], np.arctan2(enu[:, 2], np.hypot(enu[:, 0], enu[:, 1])))
+            np.testing.assert_allclose(azimuth[e], np.mod(np.arctan2(enu[:, 0], enu[:, 1]), 2 * np.pi))
+
+    def test_geodetic_height(self):
+        """Testa latitude, longitude e altura de um ponto conhecido"""
+        lat, lon, h = geodetic_angles(np.array([WGS84_A + 100.0, 0.0, 0.0]))
+        assert (float(lat), float(lon), float(h)) == pytest.approx((0.0, 0.0, 100.0), abs=1e-6)
+
+
+class TestMaskAndWeights:
+
+    def test_weights(self):
+        """Testa os modelos de ponderação e peso zero abaixo do horizonte ou sem posição"""
+        elevation = np.radians([90.0, 30.0, -5.0, np.nan])
+
+        np.testing.assert_allclose(elevation_weights(elevation, 'sin2'), [1.0, 0.25, 0.0, 0.0])
+        np.testing.assert_allclose(elevation_weights(elevation, 'sin'), [1.0, 0.5, 0.0, 0.0])
+        np.testing.assert_allclose(elevation_weights(elevation, 'uniform'), [1.0, 1.0, 0.0, 0.0])
+        with pytest.raises(ValueError):
+            elevation_weights(elevation, 'cubico')
+
+    def test_mask(self):
+        """Testa máscara configurável aplicada a todos os pares, com NaN fora da máscara"""
+        receiver = np.array([WGS84_A, 0.0, 0.0])
+        angles = np.radians([5.0, 15.0, 60.0])
+        satellites = receiver + 2e7 * np.stack([np.sin(angles), np.cos(angles), np.zeros(3)], axis=1)
+        satellites = np.vstack([satellites, np.full((1, 3), np.nan)])
+
+        _, _, above, weights = apply_elevation_mask(receiver, satellites, mask_degrees=10.0)
+        assert above.tolist() == [False, True, True, False]
+        assert weights[0] == 0.0 and weights[1] == pytest.approx(np.sin(angles[1]) ** 2)
+
+        _, _, above, _ = apply_elevation_mask(receiver, satellites, mask_degrees=20.0)
+        assert above.tolist() == [False, False, True, False]
+
+
+class TestDilutionOfPrecision:
+
+    def test_angles_match_normal_matrix(self):
+        """Testa DOP por elevação/azimute contra a inversa explícita da matriz normal"""
+        elevation = np.radians([[90.0, 30.0, 30.0, 30.0, 30.0], [20.0, 25.0, 30.0, 60.0, np.nan]])
+        azimuth = np.radians([[0.0, 0.0, 90.0, 180.0, 270.0], [0.0, 10.0, 20.0, 200.0, 0.0]])
+
+        series = dop_from_angles(elevation, azimuth)
+
+        for e in range(2):
+            ok = np.isfinite(elevation[e])
+            el, az = elevation[e][ok], azimuth[e][ok]
+            G = np.column_stack([-np.cos(el) * np.sin(az), -np.cos(el) * np.cos(az), -np.sin(el), np.ones(len(el))])
+            Q = np.linalg.inv(G.T @ G)
+            assert series.pdop[e] == pytest.approx(np.sqrt(np.trace(Q[:3, :3])))
+            assert series.hdop[e] == pytest.approx(np.sqrt(Q[0, 0] + Q[1, 1]))
+            assert series.tdop[e] == pytest.approx(np.sqrt(Q[3, 3]))
+        assert series.n_satellites.tolist() == [5, 4]
+        assert series.pdop[0] < series.pdop[1]
+
+    def test_batched_ecef_and_summary(self):
+        """Testa DOP de várias épocas numa chamada, épocas sem geometria e resumo por percentis"""
+        lat, lon, _ = geodetic_angles(RECEIVER)
+        rotation = enu_rotation(lat, lon)
+        angles = np.radians([(85, 0), (35, 45), (30, 135), (40, 225), (25, 315), (5, 180)])
+        enu = np.stack([np.cos(angles[:, 0]) * np.sin(angles[:, 1]), np.cos(angles[:, 0]) * np.cos(angles[:, 1]),
+                        np.sin(angles[:, 0])], axis=1)
+        satellites = np.broadcast_to(RECEIVER + 2e7 * enu @ rotation, (3, 6, 3)).copy()
+        used = np.ones((3, 6), dtype=bool)
+        used[2, 2:] = False
+
+        series = dilution_of_precision(RECEIVER, satellites, used, mask_degrees=10.0)
+        expected = dop_from_angles(angles[None, :5, 0], angles[None, :5, 1])
+
+        assert series.n_satellites.tolist() == [5, 5, 2]
+        np.testing.assert_allclose(series.pdop[:2], expected.pdop[0])
+        assert np.isnan(series.pdop[2])
+
+        summary = DopSeries.concatenate([series, series]).summary()
+        assert summary['pdop']['p50'] == pytest.approx(expected.pdop[0])
+        assert set(summary['hdop']) == {'mean', 'min', 'max', 'p5', 'p50', 'p95'}
+
+
+class TestProcessorGeometry:
+
+    def test_satellite_below_horizon_dropped(self):
+        """Testa que o SPP do processador descarta satélite abaixo da máscara antes do ajuste"""
+        from gnss_processor import GNSSProcessor
+        simulated, orbits = _simulate(epochs=3)
+
+        # Mesmas observações com um satélite extra abaixo do horizonte (pseudodistância coerente)
+        store = ObservationStore(simulated.obs_codes)
+        hidden = 'G01' if 'G01' not in simulated.satellites else 'G02'
+        for epoch in range(simulated.n_epochs):
+            rows = simulated.epoch_slice(epoch)
+            time = simulated.times[epoch]
+            position = orbits.satellite_states([hidden], [time - 0.08], travel_time=[0.08]).position[0]
+            elevation, _ = elevation_azimuth(RECEIVER, position)
+            assert elevation < 0
+            extra = np.full((1, len(simulated.obs_codes)), np.nan)
+            extra[0, 0] = np.linalg.norm(position - RECEIVER) + 1000.0 - 1e-5 * int(hidden[1:]) * 299792458.0
+            store.append_epoch(simulated.epoch_time(epoch), simulated.epoch_satellites(epoch) + [hidden],
+                               np.vstack([simulated.column(code)[rows] for code in simulated.obs_codes]).T.tolist() + extra.tolist())
+
+        processor = GNSSProcessor()
+        processor.ephemeris = orbits
+        results = processor._process_gnss_data({'observations': store.trim(), 'approx_position': None})
+
+        assert len(results) == 3
+        assert all(hidden not in r['satellites'] for r in results)
+        assert np.linalg.norm(results[0]['position'] - RECEIVER) < 20.0
+
+    def test_processor_dop_series(self):
+        """Testa série de DOP do processador a partir das órbitas e o resumo usado na posição final"""
+        from gnss_processor import GNSSProcessor
+        store, orbits = _simulate(epochs=40)
+        processor = GNSSProcessor()
+        processor.ephemeris = orbits
+        processor.receiver_position = RECEIVER
+
+        processor.dop_series = processor._compute_dop({'observations': store}, block_epochs=16)
+        report = processor._dop_report(max_points=10)
+
+        assert len(processor.dop_series) == 40
+        assert np.isfinite(processor.dop_series.pdop).all()
+        assert 1.0 < report['summary']['pdop']['p50'] < 6.0
+        assert len(report['series']['pdop']) == 10
+        assert processor._dop_summary()['pdop'] == report['summary']['pdop']['p50']
+        processor.dop_series = None
+        assert processor._dop_summary() == {'pdop': 999, 'hdop': 999, 'vdop': 999}
@@ -256,6 +256,25 @@ class TestGNSSProcessor:
         assert result is not None
         assert 'final_coordinates' in result
 
+    def test_parsed_observations_are_not_read_again(self):
+        """Testa que observações já decodificadas são reaproveitadas sem reler o arquivo"""
+        from datetime import datetime
+        import numpy as np
+        from obs_store import ObservationStore
+
+        store = ObservationStore(['C1'])
+        store.append_epoch(datetime(2023, 7, 24, 20, 57, 15), ['G01'], np.array([[22000000.0]]))
+        header = Mock(approx_position=(3752842.7775, -4538356.2935, -2442730.7161))
+        parsed = {'header': header, 'observations': store, 'qc': None}
+
+        with patch('gnss_processor.read_observations') as read_observations:
+            rinex_data = self.processor._load_and_parse_rinex('/inexistente/base.23o', None, parsed)
+
+        read_observations.assert_not_called()
+        assert rinex_data['observations'] is store
+        assert rinex_data['header'] is header
+        assert self.processor.observation_stats['epochs'] == 1
+
 
 if __name__ == '__main__':
     # Executa os testes
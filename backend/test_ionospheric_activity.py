@@ -0,0 +1,67 @@
+"""
+Testes unitários para o índice de atividade ionosférica ROT/ROTI
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from cycle_slips import detect_cycle_slips
+from ionospheric_activity import (ROTI_MODERATE, TECU_FACTOR, assess_ionosphere,
+                                  estimate_ionospheric_activity)
+from test_ppp_filter import F1, F2, WAVELENGTH1, WAVELENGTH2, _simulate
+
+
+def _scintillate(store, sat_id, amplitude_tecu):
+    """Soma às fases de um satélite uma oscilação rápida de TEC (período de 4 épocas)"""
+    rows = store.sat_index == store.satellite_index(sat_id)
+    tec = amplitude_tecu * np.sin(np.arange(rows.sum()) * np.pi / 2.0)
+    delay1 = TECU_FACTOR * tec / F1 ** 2
+    store.column('L1')[rows] -= delay1 / WAVELENGTH1
+    store.column('L2')[rows] -= delay1 * F1 ** 2 / F2 ** 2 / WAVELENGTH2
+
+
+class TestIonosphericActivity:
+
+    def test_quiet_ionosphere(self):
+        """Testa ROTI baixo com ionosfera suave e ruído de fase milimétrico"""
+        store, _ = _simulate()
+
+        summary = estimate_ionospheric_activity(store).summary()
+
+        assert summary['windows'] > 0
+        assert summary['roti_p95'] < ROTI_MODERATE
+        assert summary['ionospheric_activity'] == 'Baixa'
+
+    def test_irregularities_raise_roti(self):
+        """Testa ROTI alto só no satélite com flutuações rápidas de TEC"""
+        store, _ = _simulate()
+        detection = detect_cycle_slips(store)
+        _scintillate(store, 'G13', 1.0)
+
+        summary = estimate_ionospheric_activity(store, detection).summary()
+
+        per_satellite = summary['per_satellite']
+        assert per_satellite['G13'] > 1.0
+        assert all(roti < ROTI_MODERATE for sat, roti in per_satellite.items() if sat != 'G13')
+        assert summary['roti_p95'] > 0.5
+        assert summary['ionospheric_activity'] == 'Alta'
+
+    def test_short_session_without_windows(self):
+        """Testa que sessões curtas demais para o ROTI ficam sem classificação"""
+        store, _ = _simulate(epochs=3)
+
+        summary = estimate_ionospheric_activity(store).summary()
+
+        assert summary['windows'] == 0
+        assert summary['roti_p95'] is None
+        assert summary['ionospheric_activity'] == 'Não calculado'
+
+    def test_assess_ionosphere(self):
+        """Testa os limiares de classificação do ROTI"""
+        assert assess_ionosphere(0.1) == 'Baixa'
+        assert assess_ionosphere(0.3) == 'Moderada'
+        assert assess_ionosphere(0.8) == 'Alta'
+        assert assess_ionosphere(None) == 'Não calculado'
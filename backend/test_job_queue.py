@@ -0,0 +1,119 @@
+"""
+Testes unitários para a fila de análises GNSS em segundo plano
+"""
+
+import os
+import subprocess
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from job_queue import JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JobQueue, JobStore
+
+
+def _fake_analysis(file_path, member=None, progress_callback=None):
+    """Análise de teste executada no pool de processos"""
+    progress_callback('leitura', 0.0)
+    progress_callback('leitura', 1.0)
+    progress_callback('posicionamento', 0.5)
+    return {'success': True, 'file': os.path.basename(file_path), 'member': member,
+            'satellites': np.int64(12), 'pdop': np.float32(1.5), 'residuals': np.zeros(2)}
+
+
+def _failing_analysis(file_path, member=None, progress_callback=None):
+    return {'success': False, 'error': 'Arquivo RINEX inválido'}
+
+
+def _wait(queue, job_id, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.status(job_id)
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("Job não terminou no tempo esperado")
+
+
+@pytest.fixture
+def queue(tmp_path):
+    job_queue = JobQueue(str(tmp_path), max_workers=1)
+    yield job_queue
+    job_queue.shutdown()
+
+
+class TestJobQueue:
+
+    def test_job_runs_in_pool_and_stores_result(self, queue, tmp_path):
+        """Testa execução no pool com progresso por fase e resultado serializado"""
+        upload = tmp_path / "rover.23o"
+        upload.write_text("RINEX")
+
+        job_id = queue.submit(_fake_analysis, str(upload), 'membro.23o',
+                              filename='rover.23o', cleanup=[str(upload)])
+        job = _wait(queue, job_id)
+
+        assert job['status'] == JOB_COMPLETED
+        assert job['filename'] == 'rover.23o'
+        assert [(s['stage'], s['progress']) for s in job['stages']] == [('leitura', 1.0), ('posicionamento', 0.5)]
+
+        result = queue.result(job_id)['result']
+        assert result == {'success': True, 'file': 'rover.23o', 'member': 'membro.23o',
+                          'satellites': 12, 'pdop': 1.5, 'residuals': [0.0, 0.0]}
+        assert not upload.exists()
+
+    def test_failed_analysis_marks_job_failed(self, queue, tmp_path):
+        """Testa que análises sem sucesso terminam com status de falha e mensagem de erro"""
+        job_id = queue.submit(_failing_analysis, str(tmp_path / "ruim.23o"))
+        job = _wait(queue, job_id)
+
+        assert job['status'] == JOB_FAILED
+        assert job['error'] == 'Arquivo RINEX inválido'
+        assert queue.result(job_id)['result']['success'] is False
+
+    def test_unknown_job(self, queue):
+        """Testa consulta de job inexistente"""
+        assert queue.status('nao-existe') is None
+
+
+class TestJobStore:
+
+    def test_interrupted_jobs_are_recovered(self, tmp_path):
+        """Testa que jobs pendentes de uma instância anterior são marcados como falhos"""
+        store = JobStore(str(tmp_path))
+        job_id = store.create('rover.23o')
+        assert store.get(job_id)['status'] == JOB_QUEUED
+
+        assert store.recover_interrupted() == 1
+        assert store.get(job_id)['status'] == JOB_FAILED
+
+    def test_jobs_of_live_workers_are_not_recovered(self, tmp_path):
+        """Testa que só os jobs de processos encerrados são recuperados, não os de outros workers vivos"""
+        store = JobStore(str(tmp_path))
+        worker = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+        finished = subprocess.Popen([sys.executable, '-c', 'pass'])
+        finished.wait()
+        try:
+            live_job, dead_job = store.create('base.23o'), store.create('rover.23o')
+            store._execute('UPDATE gnss_jobs SET owner_pid = ? WHERE id = ?', (worker.pid, live_job))
+            store._execute('UPDATE gnss_jobs SET owner_pid = ? WHERE id = ?', (finished.pid, dead_job))
+
+            assert store.recover_interrupted() == 1
+            assert store.get(live_job)['status'] == JOB_QUEUED
+            assert store.get(dead_job)['status'] == JOB_FAILED
+        finally:
+            worker.kill()
+            worker.wait()
+
+    def test_fail_does_not_override_completed(self, tmp_path):
+        """Testa que um job concluído não é sobrescrito por uma falha tardia"""
+        store = JobStore(str(tmp_path))
+        job_id = store.create()
+        store.complete(job_id, {'success': True})
+        store.fail(job_id, 'processo encerrado')
+
+        job = store.get(job_id, include_result=True)
+        assert job['status'] == JOB_COMPLETED
+        assert job['result'] == {'success': True}
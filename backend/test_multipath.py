@@ -0,0 +1,99 @@
+"""
+Testes unitários para o estimador de multicaminho de código MP1/MP2 por arco
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from cycle_slips import detect_cycle_slips
+from multipath import assess_multipath, estimate_multipath
+from test_cycle_slips import _inject
+from test_ppp_filter import RECEIVER, _simulate
+
+
+class TestMultipathEstimate:
+
+    def test_code_noise_and_reflection(self):
+        """Testa RMS igual ao ruído simulado do código e aumento no satélite com reflexão"""
+        store, _ = _simulate()
+        g13 = store.sat_index == store.satellite_index('G13')
+        store.column('C1')[g13] += 0.8 * np.sin(np.arange(g13.sum()) / 3.0)
+
+        result = estimate_multipath(store)
+        summary = result.summary()
+
+        assert result.rms[1] == pytest.approx(0.3, abs=0.03)
+        per_satellite = summary['per_satellite']
+        assert per_satellite['G13']['mp1'] > 0.55
+        assert per_satellite['G13']['mp2'] == pytest.approx(0.3, abs=0.08)
+        assert all(abs(v['mp1'] - 0.3) < 0.08 for sat, v in per_satellite.items() if sat != 'G13')
+        assert summary['peak_level'] == per_satellite['G13']['mp1']
+        assert 'per_elevation' not in summary
+
+    def test_arc_mean_removed_across_slips(self):
+        """Testa que a perda de ciclo separa os arcos e não contamina o MP1/MP2"""
+        clean, _ = _simulate()
+        slipped, _ = _simulate()
+        _inject(slipped, 'G13', 60, 9, 7)
+
+        reference = estimate_multipath(clean)
+        result = estimate_multipath(slipped, detect_cycle_slips(slipped))
+
+        k = slipped.satellite_index('G13')
+        np.testing.assert_allclose(result.satellite_rms[k], reference.satellite_rms[k], atol=0.02)
+        g13 = slipped.sat_index == k
+        assert abs(np.nanmean(result.mp1[g13 & (slipped.epoch_index >= 60)])) < 1e-9
+
+    def test_short_arcs_excluded(self):
+        """Testa que arcos com menos observações que o mínimo ficam sem MP"""
+        store, _ = _simulate(epochs=8)
+
+        result = estimate_multipath(store)
+
+        assert np.isnan(result.mp1).all()
+        assert result.summary()['average_level'] is None
+        assert result.summary()['assessment'] == 'Não calculado'
+
+    def test_elevation_bins(self):
+        """Testa RMS por faixa de elevação com a contagem de todos os registros acima do horizonte"""
+        store, _ = _simulate()
+        g13 = store.sat_index == store.satellite_index('G13')
+        store.column('C1')[g13] += 0.8 * np.sin(np.arange(g13.sum()) / 3.0)
+        elevation = np.radians(np.where(g13, 15.0, 65.0))
+
+        summary = estimate_multipath(store, elevation=elevation).summary()
+
+        bins = {row['elevation']: row for row in summary['per_elevation']}
+        assert set(bins) == {'10-20°', '60-70°'}
+        assert bins['10-20°']['observations'] == g13.sum()
+        assert bins['10-20°']['observations'] + bins['60-70°']['observations'] == store.n_records
+        assert bins['10-20°']['mp1'] > bins['60-70°']['mp1']
+
+    def test_assessment(self):
+        """Testa as faixas de classificação do RMS do MP1"""
+        assert assess_multipath(0.2) == 'Baixo'
+        assert assess_multipath(0.4) == 'Moderado'
+        assert assess_multipath(0.9) == 'Alto'
+        assert assess_multipath(float('nan')) == 'Não calculado'
+
+
+class TestProcessorMultipath:
+
+    def test_processor_reports_elevation_bins(self):
+        """Testa MP1/MP2 do processador com elevações calculadas das órbitas"""
+        from gnss_processor import GNSSProcessor
+        store, orbits = _simulate(epochs=60)
+        processor = GNSSProcessor()
+        processor.ephemeris = orbits
+        processor.receiver_position = RECEIVER
+
+        multipath = processor._compute_multipath({'observations': store})
+        summary = multipath.summary()
+
+        assert summary['mp1_rms'] == pytest.approx(0.3, abs=0.05)
+        assert sum(row['observations'] for row in summary['per_elevation']) == np.isfinite(multipath.mp1).sum()
+        assert all(row['elevation'] != '0-10°' for row in summary['per_elevation'])
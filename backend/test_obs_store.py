@@ -0,0 +1,95 @@
+"""
+Testes unitários para o armazenamento colunar de observações
+"""
+
+import os
+import sys
+from datetime import datetime as dt, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from obs_store import ObservationStore, from_gps_seconds, to_gps_seconds
+
+
+class TestObservationStore:
+
+    def setup_method(self):
+        """Setup para cada teste"""
+        self.store = ObservationStore(['C1', 'L1', 'S1'], capacity=4)
+        self.t0 = dt(2023, 7, 24, 20, 57, 15)
+
+    def _fill(self, n_epochs: int):
+        for i in range(n_epochs):
+            sats = ['G01', 'G02', 'R03'] if i % 2 == 0 else ['G02', 'E05']
+            values = np.arange(len(sats) * 3, dtype=float).reshape(len(sats), 3) + 100 * i
+            self.store.append_epoch(self.t0 + timedelta(seconds=i), sats, values)
+
+    def test_append_and_grow(self):
+        """Testa gravação em bloco com crescimento dos buffers"""
+        self._fill(600)
+
+        assert self.store.n_epochs == 600
+        assert self.store.n_records == 300 * 3 + 300 * 2
+        assert self.store.satellites == ['G01', 'G02', 'R03', 'E05']
+        assert self.store.epoch_satellites(1) == ['G02', 'E05']
+        assert self.store.epoch_time(599) == self.t0 + timedelta(seconds=599)
+
+    def test_epoch_slice_columns(self):
+        """Testa fatiamento de uma época sem cópia"""
+        self._fill(3)
+
+        records = self.store.epoch_slice(2)
+        np.testing.assert_array_equal(self.store.column('L1')[records], [201.0, 204.0, 207.0])
+
+    def test_epoch_range_view(self):
+        """Testa visão de um intervalo de épocas com registros renumerados e sem cópia dos observáveis"""
+        self._fill(5)
+
+        view = self.store.epoch_range(2, 4)
+
+        assert view.n_epochs == 2 and view.n_records == 5
+        assert view.epoch_time(0) == self.store.epoch_time(2)
+        assert view.epoch_satellites(1) == self.store.epoch_satellites(3)
+        np.testing.assert_array_equal(view.epoch_index, [0, 0, 0, 1, 1])
+        np.testing.assert_array_equal(view.column('L1'), self.store.column('L1')[self.store.epoch_slice(2).start:
+                                                                                self.store.epoch_slice(3).stop])
+        assert np.shares_memory(view.column('L1'), self.store.column('L1'))
+
+    def test_dense_matrix_has_nan_for_missing(self):
+        """Testa matriz densa época × satélite"""
+        self._fill(2)
+
+        c1 = self.store.matrix('C1')
+        assert c1.shape == (2, 4)
+        assert c1[0, 0] == 0.0
+        assert np.isnan(c1[1, 0])
+        assert c1[1, 3] == 103.0
+
+    def test_lli_and_ssi_flags(self):
+        """Testa gravação das flags LLI e de intensidade do sinal"""
+        lli = np.array([[0, 1, 0], [0, 0, 0]], dtype=np.int8)
+        ssi = np.array([[7, 7, 0], [5, 5, 0]], dtype=np.int8)
+        self.store.append_epoch(self.t0, ['G01', 'G02'], np.ones((2, 3)), 0, lli, ssi)
+        self.store.append_epoch(self.t0 + timedelta(seconds=1), ['G02'], np.ones((1, 3)))
+
+        np.testing.assert_array_equal(self.store.lli('L1'), [1, 0, 0])
+        np.testing.assert_array_equal(self.store.ssi('C1'), [7, 5, 0])
+        assert self.store.lli_matrix('L1')[0, 0] == 1
+
+    def test_statistics(self):
+        """Testa estatísticas calculadas a partir dos arrays"""
+        self._fill(3601)
+        self.store.trim()
+
+        stats = self.store.statistics()
+        assert stats['epochs'] == 3601
+        assert stats['duration_hours'] == 1.0
+        assert stats['interval'] == 1.0
+        assert stats['observations_per_satellite']['G02'] == 3601
+
+    def test_gps_seconds_roundtrip(self):
+        """Testa conversão para tempo GPS"""
+        assert to_gps_seconds(dt(1980, 1, 13)) == 604800.0
+        assert from_gps_seconds(to_gps_seconds(self.t0)) == self.t0
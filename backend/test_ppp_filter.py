@@ -0,0 +1,233 @@
+"""
+Testes unitários para o filtro de Kalman de PPP com ambiguidades reais
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from ephemeris import SPEED_OF_LIGHT, OrbitSource, SatelliteStates, rotate_earth
+from obs_store import ObservationStore, to_gps_seconds
+from geometry import enu_rotation, geodetic_angles
+from observables import FREQUENCIES
+from atmosphere import Troposphere
+from ppp_filter import PPPEpoch, PPPFilter, ppp_epochs
+
+START = datetime(2023, 7, 1, 12, 0, 0)
+RECEIVER = np.array([3752842.7775, -4538356.2935, -2442730.7161])
+RADIUS = 26560e3
+MEAN_MOTION = 2 * np.pi / 43082.0
+F1, F2 = FREQUENCIES['G']
+WAVELENGTH1, WAVELENGTH2 = SPEED_OF_LIGHT / F1, SPEED_OF_LIGHT / F2
+ZWD = 0.15
+
+
+class CircularOrbits(OrbitSource):
+    """Constelação de teste: 24 satélites em 6 planos circulares, relógio linear"""
+
+    def satellite_states(self, sat_ids, times, travel_time=None):
+        sat_ids, times = np.broadcast_arrays(np.asarray(sat_ids, dtype='<U3'), np.asarray(times, dtype=float))
+        prn = np.char.lstrip(sat_ids.astype('<U3'), 'G').astype(int)
+        node = (prn % 6) * np.pi / 3
+        angle = MEAN_MOTION * (times - to_gps_seconds(START)) + (prn // 6) * np.pi / 2 + (prn % 6) * 0.4
+        x_orb, y_orb = RADIUS * np.cos(angle), RADIUS * np.sin(angle)
+        inclination = np.radians(55.0)
+        position = np.stack([
+            x_orb * np.cos(node) - y_orb * np.cos(inclination) * np.sin(node),
+            x_orb * np.sin(node) + y_orb * np.cos(inclination) * np.cos(node),
+            y_orb * np.sin(inclination)
+        ], axis=-1)
+        if travel_time is not None:
+            position = rotate_earth(position, np.asarray(travel_time, dtype=float))
+        zeros = np.zeros(times.shape)
+        return SatelliteStates(position=position, clock_bias=1e-5 * prn + zeros, group_delay=zeros,
+                               valid=np.ones(times.shape, dtype=bool), ephemeris=zeros.astype(int))
+
+
+def _simulate(epochs=120, interval=30.0, slip=None, seed=1):
+    """Observações C1/P2/L1/L2 simuladas com ionosfera, troposfera e ruído"""
+    rng = np.random.default_rng(seed)
+    orbits = CircularOrbits()
+    troposphere = Troposphere.at(RECEIVER, to_gps_seconds(START))
+    up = RECEIVER / np.linalg.norm(RECEIVER)
+    sat_ids = np.array([f"G{prn:02d}" for prn in range(1, 25)])
+    ambiguities = {s: (rng.integers(-1e6, 1e6), rng.integers(-1e6, 1e6)) for s in sat_ids}
+
+    store = ObservationStore(['C1', 'P2', 'L1', 'L2'])
+    for k in range(epochs):
+        time = START + timedelta(seconds=k * interval)
+        t = to_gps_seconds(time)
+        states = orbits.satellite_states(sat_ids, np.full(len(sat_ids), t - 0.075), travel_time=np.full(24, 0.075))
+        los = states.position - RECEIVER
+        elevation = np.arcsin((los / np.linalg.norm(los, axis=1)[:, None]) @ up)
+        visible = elevation > np.radians(12.0)
+
+        rows, lli = [], []
+        for sat_id in sat_ids[visible]:
+            tau = 0.075
+            for _ in range(4):
+                state = orbits.satellite_states([sat_id], [t - tau], travel_time=[tau])
+                rho = np.linalg.norm(state.position[0] - RECEIVER)
+                tau = rho / SPEED_OF_LIGHT
+            el = elevation[sat_ids == sat_id][0]
+            geometric = rho + 1000.0 - state.clock_bias[0] * SPEED_OF_LIGHT + troposphere.delay(el, zwd=ZWD)
+            iono = 3.0 / np.sin(el)
+            n1, n2 = ambiguities[sat_id]
+            if slip is not None and sat_id == slip[0] and k >= slip[1]:
+                n1 += 7
+            rows.append([
+                geometric + iono + rng.normal(0, 0.3),
+                geometric + iono * F1 ** 2 / F2 ** 2 + rng.normal(0, 0.3),
+                (geometric - iono + rng.normal(0, 0.002)) / WAVELENGTH1 + n1,
+                (geometric - iono * F1 ** 2 / F2 ** 2 + rng.normal(0, 0.002)) / WAVELENGTH2 + n2
+            ])
+            lli.append([0, 0, 1 if slip is not None and sat_id == slip[0] and k == slip[1] else 0, 0])
+        store.append_epoch(time, sat_ids[visible], np.array(rows), lli=np.array(lli))
+    return store.trim(), orbits
+
+
+class TestEpochStream:
+
+    def test_ionosphere_free_combination(self):
+        """Testa que a combinação livre da ionosfera remove o atraso ionosférico simulado"""
+        store, orbits = _simulate(epochs=3)
+
+        epochs = list(ppp_epochs(store, orbits, block_epochs=2))
+
+        assert len(epochs) == 3
+        epoch = epochs[0]
+        ranges = np.linalg.norm(epoch.sat_positions - RECEIVER, axis=1)
+        # Código menos distância: relógio do receptor + troposfera (ionosfera eliminada)
+        offset = epoch.code - ranges - 1000.0
+        assert np.all(offset > 0.0) and np.all(offset < 15.0)
+        assert epoch.slips.sum() == 0
+
+    def test_melbourne_wubbena_widelane(self):
+        """Testa a média de Melbourne-Wübbena por satélite próxima do inteiro wide-lane"""
+        store, orbits = _simulate(epochs=20)
+
+        widelanes = {}
+        for epoch in ppp_epochs(store, orbits):
+            for sat_id, value in zip(epoch.satellites, epoch.widelane):
+                widelanes.setdefault(sat_id, []).append(value)
+
+        means = np.array([np.mean(values) for values in widelanes.values()])
+        assert np.abs(means - np.round(means)).max() < 0.2
+        assert epoch.frequencies.shape == (len(epoch.satellites), 2)
+
+    def test_blocks_match_whole_session(self):
+        """Testa que combinações e perdas de ciclo por bloco coincidem com a sessão num bloco só"""
+        store, orbits = _simulate(slip=('G13', 60))
+
+        whole = list(ppp_epochs(store, orbits, block_epochs=store.n_epochs))
+        blocks = list(ppp_epochs(store, orbits, block_epochs=25))
+
+        assert [e.time for e in blocks] == [e.time for e in whole]
+        assert sum(e.slips.sum() for e in blocks) > 0
+        for a, b in zip(blocks, whole):
+            assert a.satellites == b.satellites
+            np.testing.assert_array_equal(a.slips, b.slips)
+            np.testing.assert_allclose(a.code, b.code)
+            np.testing.assert_allclose(a.widelane, b.widelane)
+
+
+class TestPPPFilter:
+
+    def test_static_convergence(self):
+        """Testa convergência do filtro para a posição verdadeira e estimativa do ZWD"""
+        store, orbits = _simulate()
+        solutions = list(PPPFilter().run(ppp_epochs(store, orbits)))
+
+        final = solutions[-1]
+        assert len(solutions) == store.n_epochs
+        assert np.linalg.norm(final.position - RECEIVER) < 0.10
+        assert abs(final.zwd - ZWD) < 0.05
+        assert final.converged
+        assert solutions[0].sigma_horizontal > final.sigma_horizontal
+        assert np.abs(final.residuals).max() < 0.02
+
+    def test_cycle_slip_resets_ambiguity(self):
+        """Testa que a perda de ciclo sinalizada no LLI reinicia apenas a ambiguidade do satélite"""
+        store, orbits = _simulate(slip=('G13', 60))
+        assert 'G13' in store.epoch_satellites(60)
+
+        solutions = list(PPPFilter().run(ppp_epochs(store, orbits)))
+
+        assert np.linalg.norm(solutions[-1].position - RECEIVER) < 0.10
+        assert solutions[60].rejected == 0
+
+    def test_ambiguity_resolution(self):
+        """Testa fixação wide-lane/narrow-lane validada pela razão depois da convergência"""
+        store, orbits = _simulate()
+        rotation = enu_rotation(*geodetic_angles(RECEIVER)[:2])
+
+        solutions = list(PPPFilter().run(ppp_epochs(store, orbits)))
+        fixed = [s for s in solutions if s.fixed]
+
+        assert not any(s.fixed for s in solutions[:30])
+        assert len(fixed) > 40
+        for solution in fixed:
+            assert solution.ratio >= 3.0
+            assert solution.fixed_ambiguities >= 4
+            assert np.hypot(*(rotation @ (solution.fixed_position - RECEIVER))[:2]) < 0.03
+        assert not any(s.fixed for s in PPPFilter(ambiguity_resolution=False).run(ppp_epochs(store, orbits)))
+
+    def test_satellites_reuse_slots(self):
+        """Testa entrada e saída de satélites sem crescer o vetor de estados"""
+        ppp = PPPFilter(capacity=8)
+        lat, lon, _ = geodetic_angles(RECEIVER)
+        azimuth = np.radians([0.0, 70.0, 140.0, 210.0, 280.0, 330.0])
+        elevation = np.radians([80.0, 40.0, 30.0, 50.0, 25.0, 35.0])
+        enu = np.stack([np.cos(elevation) * np.sin(azimuth), np.cos(elevation) * np.cos(azimuth),
+                        np.sin(elevation)], axis=1)
+        satellites = RECEIVER + 2e7 * enu @ enu_rotation(lat, lon)
+        ranges = np.linalg.norm(satellites - RECEIVER, axis=1)
+        names = ['G01', 'G02', 'G03', 'G04', 'G05', 'G06']
+
+        for k in range(40):
+            chosen = [0, 1, 2, 3, 4] if k % 2 == 0 else [0, 1, 2, 3, 5]
+            epoch = PPPEpoch(time=float(k), satellites=[names[i] for i in chosen], code=ranges[chosen],
+                             phase=ranges[chosen] + 3.0, sat_positions=satellites[chosen],
+                             slips=np.zeros(len(chosen), dtype=bool))
+            ppp.update(epoch)
+
+        assert len(ppp.x) == 5 + 8
+        assert set(ppp.ambiguities) == {'G01', 'G02', 'G03', 'G04', 'G06'}
+        assert ppp.active.sum() == 5 + 5
+
+
+class TestProcessorIntegration:
+
+    def test_processor_uses_filter(self):
+        """Testa que o processador usa o EKF quando há fase em duas frequências e órbitas"""
+        from gnss_processor import GNSSProcessor
+        store, orbits = _simulate(epochs=60)
+        processor = GNSSProcessor()
+        processor.ephemeris = orbits
+
+        results = processor._process_ppp_solution({'observations': store, 'approx_position': None}, {}, {})
+        filtered = processor._apply_kalman_filter(results)
+
+        assert len(filtered) == 60
+        assert filtered.filtered and all(r['filtered'] for r in filtered.recent)
+        assert filtered.last['convergence'] > filtered.first['convergence']
+        assert np.linalg.norm(filtered.last['position'] - RECEIVER) < 0.5
+        assert filtered.fix_rate == 100.0 * sum(r['fixed'] for r in filtered.recent) / 60
+
+    def test_session_summary_is_bounded(self):
+        """Testa que o resumo da sessão guarda só as últimas épocas e as contagens"""
+        from gnss_processor import STABLE_EPOCHS, SessionSolutions
+        results = [{'epoch': k, 'converged': k >= 30, 'fixed': k % 4 == 0, 'success': True}
+                   for k in range(3 * STABLE_EPOCHS)]
+
+        session = SessionSolutions.from_results(results + [{'success': False}])
+
+        assert len(session) == 3 * STABLE_EPOCHS
+        assert len(session.recent) == STABLE_EPOCHS
+        assert session.first['epoch'] == 0 and session.last['epoch'] == 3 * STABLE_EPOCHS - 1
+        assert session.converged_at == 30
+        assert session.fix_rate == 25.0
+        assert SessionSolutions().fix_rate == 0.0 and not SessionSolutions().filtered
@@ -0,0 +1,169 @@
+"""
+Testes unitários para os produtos precisos (SP3/CLK), a interpolação e o cache por dia GPS
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+import precise_products
+from precise_products import PreciseProducts, ProductStore, read_clock, read_sp3
+from obs_store import to_gps_seconds
+
+GPS_EPOCH = datetime(1980, 1, 6)
+WEEK, DOW = 2251, 5
+DAY_START = GPS_EPOCH + timedelta(weeks=WEEK, days=DOW)
+RADIUS = 26560e3
+MEAN_MOTION = 2 * np.pi / 43082.0
+
+
+def _orbit(prn, t):
+    """Órbita circular inclinada de teste (posição em metros para segundos desde o início do dia)"""
+    angle = MEAN_MOTION * np.asarray(t, dtype=float) + prn
+    node = 0.5 * prn
+    x_orb, y_orb = RADIUS * np.cos(angle), RADIUS * np.sin(angle)
+    inclination = np.radians(55.0)
+    return np.stack([
+        x_orb * np.cos(node) - y_orb * np.cos(inclination) * np.sin(node),
+        x_orb * np.sin(node) + y_orb * np.cos(inclination) * np.cos(node),
+        y_orb * np.sin(inclination)
+    ], axis=-1)
+
+
+def _clock(prn, t):
+    return 1e-4 * prn + 1e-11 * np.asarray(t, dtype=float)
+
+
+def _write_sp3(path, prns, start=DAY_START, epochs=96, interval=900, missing=()):
+    lines = [f"#dP{start:%Y %m %d %H %M} 0.00000000 {epochs:6d} ORBIT IGS20 FIT  IGS",
+             f"## {WEEK:4d} {DOW * 86400:15.8f} {interval:14.8f} 60006 0.0000000000000",
+             "%c G  cc GPS ccc cccc cccc cccc cccc ccccc ccccc ccccc ccccc"]
+    for k in range(epochs):
+        time = start + timedelta(seconds=k * interval)
+        t = (time - DAY_START).total_seconds()
+        lines.append(f"*  {time:%Y %m %d %H %M} {time.second:11.8f}")
+        for prn in prns:
+            if (prn, k) in missing:
+                lines.append(f"PG{prn:02d}{0:14.6f}{0:14.6f}{0:14.6f}{999999.999999:14.6f}")
+                continue
+            x, y, z = _orbit(prn, t) / 1e3
+            lines.append(f"PG{prn:02d}{x:14.6f}{y:14.6f}{z:14.6f}{_clock(prn, t) * 1e6:14.6f}")
+    lines.append("EOF")
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def _write_clk(path, prns, interval=30, epochs=2880):
+    lines = ["     3.00           C                   M                   RINEX VERSION / TYPE",
+             "                                                            END OF HEADER"]
+    for k in range(epochs):
+        time = DAY_START + timedelta(seconds=k * interval)
+        t = k * interval
+        for prn in prns:
+            lines.append(f"AS G{prn:02d}  {time:%Y %m %d %H %M} {time.second:9.6f}  1   {_clock(prn, t):19.12e}")
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+class TestProductReaders:
+
+    def test_read_sp3(self, tmp_path):
+        """Testa leitura de posições (m), relógios (s) e valores ausentes do SP3"""
+        path = _write_sp3(tmp_path / "igs22515.sp3", [1, 2], epochs=4, missing={(2, 1)})
+
+        times, satellites, positions, clocks = read_sp3(str(path))
+
+        assert satellites == ['G01', 'G02']
+        assert times[0] == to_gps_seconds(DAY_START)
+        assert np.allclose(np.diff(times), 900.0)
+        np.testing.assert_allclose(positions[0, 0], _orbit(1, 0.0), atol=1e-3)
+        assert clocks[0, 1] == pytest.approx(2e-4)
+        assert np.isnan(positions[1, 1]).all() and np.isnan(clocks[1, 1])
+
+    def test_read_clock(self, tmp_path):
+        """Testa leitura dos registros AS de um RINEX CLK"""
+        path = _write_clk(tmp_path / "igs22515.clk_30s", [3, 1], epochs=3)
+
+        times, satellites, clocks = read_clock(str(path))
+
+        assert satellites == ['G01', 'G03']
+        assert np.allclose(np.diff(times), 30.0)
+        assert clocks[2, 1] == pytest.approx(_clock(3, 60.0))
+
+
+class TestInterpolation:
+
+    def test_lagrange_orbit_and_linear_clock(self, tmp_path):
+        """Testa interpolação entre épocas de 15 min com erro milimétrico"""
+        prns = [1, 2, 3]
+        orbit = read_sp3(str(_write_sp3(tmp_path / "igs22515.sp3", prns)))
+        clock = read_clock(str(_write_clk(tmp_path / "igs22515.clk_30s", prns)))
+        products = PreciseProducts(*orbit, *clock)
+
+        offsets = np.array([3600.0 + 437.3, 40000.0, 70000.5])
+        times = to_gps_seconds(DAY_START) + offsets
+        states = products.satellite_states(np.array(['G01', 'G02', 'G03']), times[:, None])
+
+        assert states.position.shape == (3, 3, 3)
+        assert states.valid.all()
+        for k, prn in enumerate(prns):
+            error = np.linalg.norm(states.position[:, k] - _orbit(prn, offsets), axis=1)
+            assert error.max() < 0.005
+            # Órbita circular: r·v = 0, sem correção relativística
+            np.testing.assert_allclose(states.clock_bias[:, k], _clock(prn, offsets), atol=1e-12)
+
+    def test_missing_and_out_of_range(self, tmp_path):
+        """Testa que satélite ausente, lacuna no SP3 e instante fora do arquivo ficam inválidos"""
+        orbit = read_sp3(str(_write_sp3(tmp_path / "igs22515.sp3", [1, 2], missing={(2, 10)})))
+        products = PreciseProducts(*orbit)
+        start = to_gps_seconds(DAY_START)
+
+        states = products.satellite_states(np.array(['G01', 'G02', 'G07', 'G01']),
+                                           np.array([start + 9000.0, start + 9000.0, start + 9000.0,
+                                                     start + 90000.0]))
+
+        assert states.valid.tolist() == [True, False, False, False]
+        assert np.isnan(states.position[1]).all()
+
+
+class TestProductStore:
+
+    def test_cache_skips_parsing(self, tmp_path, monkeypatch):
+        """Testa que o segundo carregamento do mesmo dia usa o cache binário"""
+        _write_sp3(tmp_path / "igs22515.sp3", [1, 2])
+        _write_clk(tmp_path / "igs22515.clk_30s", [1, 2], epochs=120)
+        times = to_gps_seconds(DAY_START) + np.array([43200.0, 43230.0])
+
+        first = ProductStore(str(tmp_path)).load(times, margin=0)
+        assert (tmp_path / "cache" / f"{WEEK}{DOW}.npz").exists()
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("arquivo de produto interpretado novamente")
+        monkeypatch.setattr(precise_products, 'read_sp3', _fail)
+        monkeypatch.setattr(precise_products, 'read_clock', _fail)
+        second = ProductStore(str(tmp_path)).load(times, margin=0)
+
+        np.testing.assert_array_equal(second.positions, first.positions)
+        assert second.sources == ['igs22515.sp3', 'igs22515.clk_30s']
+
+    def test_final_products_preferred_and_days_joined(self, tmp_path):
+        """Testa escolha do produto final sobre o rápido e união de dias consecutivos"""
+        _write_sp3(tmp_path / "igr22515.sp3", [1])
+        _write_sp3(tmp_path / "igs22515.sp3", [1, 2])
+        next_day = DAY_START + timedelta(days=1)
+        _write_sp3(tmp_path / "IGS0OPSFIN_20230630000_01D_15M_ORB.SP3", [1, 2], start=next_day)
+        assert (next_day - GPS_EPOCH).days == WEEK * 7 + DOW + 1
+
+        products = ProductStore(str(tmp_path)).load(to_gps_seconds(DAY_START) + np.array([80000.0, 90000.0]))
+
+        assert products.satellites == ['G01', 'G02']
+        assert len(products.orbit_times) == 192
+        assert 'igs22515.sp3' in products.sources
+
+    def test_no_products(self, tmp_path):
+        """Testa diretório sem produtos"""
+        assert ProductStore(str(tmp_path / "vazio")).load(np.array([1.4e9])) is None
@@ -0,0 +1,53 @@
+"""
+Testes unitários para as fases de processamento com tempos medidos
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from processing_stages import StageTimer
+
+
+class TestStageTimer:
+
+    def test_records_timings_and_progress(self):
+        """Testa registro do tempo de cada fase e do progresso reportado"""
+        progress = []
+        stages = StageTimer(lambda stage, fraction: progress.append((stage, fraction)))
+
+        with stages.stage('leitura'):
+            stages.update(0.5)
+        with stages.stage('posicionamento'):
+            pass
+
+        assert list(stages.timings) == ['leitura', 'posicionamento']
+        assert all(t >= 0 for t in stages.timings.values())
+        assert progress == [('leitura', 0.0), ('leitura', 0.5), ('leitura', 1.0),
+                            ('posicionamento', 0.0), ('posicionamento', 1.0)]
+        assert stages.elapsed >= sum(stages.timings.values())
+
+    def test_failed_stage_keeps_timing(self):
+        """Testa que uma fase com erro registra o tempo e não reporta conclusão"""
+        progress = []
+        stages = StageTimer(lambda stage, fraction: progress.append((stage, fraction)))
+
+        with pytest.raises(ValueError):
+            with stages.stage('efemérides'):
+                raise ValueError("falha")
+
+        assert 'efemérides' in stages.timings
+        assert progress == [('efemérides', 0.0)]
+
+    def test_callback_errors_do_not_abort(self):
+        """Testa que falhas no callback de progresso não interrompem o processamento"""
+        def broken(stage, fraction):
+            raise RuntimeError("callback quebrado")
+
+        stages = StageTimer(broken)
+        with stages.stage('leitura'):
+            stages.update(2.0)
+
+        assert 'leitura' in stages.timings
@@ -0,0 +1,125 @@
+"""
+Testes unitários para os referenciais ITRF/SIRGAS2000 e a grade de velocidades
+"""
+
+import os
+import sys
+from datetime import datetime as dt
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from obs_store import to_gps_seconds
+from reference_frames import (SIRGAS2000_EPOCH, VelocityGrid, decimal_year, frame_name, load_velocity_grid,
+                              to_sirgas2000, transform_frame)
+from transforms import GRS80, ecef_to_enu, geodetic_to_ecef
+
+# Velocidade típica da placa Sul-Americana (m/ano)
+PLATE_VELOCITY = (-0.0045, 0.0120, 0.0)
+
+
+def _write_grid(path, velocity=PLATE_VELOCITY, hole=None):
+    """Grade de 1° sobre o Brasil com velocidade constante e, opcionalmente, um nó vazio"""
+    with open(path, 'w') as f:
+        f.write("# lon lat ve vn vu\n")
+        for lat in range(-35, 6):
+            for lon in range(-75, -33):
+                if (lon, lat) != hole:
+                    f.write(f"{lon} {lat} {velocity[0]} {velocity[1]} {velocity[2]}\n")
+    return str(path)
+
+
+class TestHelmert:
+
+    def test_chain_matches_direct_parameters(self):
+        """Testa ITRF2014 → ITRF2000 via ITRF2020 contra os parâmetros diretos publicados pelo IERS"""
+        positions = geodetic_to_ecef(np.radians([-15.0, 10.0, 60.0]), np.radians([-47.0, 120.0, 10.0]), 500.0)
+        epoch = 2010.0
+
+        result = transform_frame(positions, 'ITRF2014', 'ITRF2000', epoch)
+
+        expected = positions + np.array([0.7, 1.2, -26.1]) * 1e-3 + 2.12e-9 * positions
+        np.testing.assert_allclose(result, expected, atol=1e-4)
+
+    def test_rates_and_inverse(self):
+        """Testa a variação dos parâmetros com a época e a volta ao referencial de origem"""
+        positions = geodetic_to_ecef(np.radians(-23.0), np.radians(-46.0), 800.0)[None].repeat(3, axis=0)
+        epochs = np.array([2000.0, 2015.0, 2030.0])
+
+        shifted = transform_frame(positions, 'IGS20', 'SIRGAS2000', epochs)
+        back = transform_frame(shifted, 'ITRF2000', 'ITRF2020', epochs)
+
+        # Tz varia -1,7 mm/ano e a escala 0,11 ppb/ano (Z ≈ -2,48e6 m)
+        dz = shifted[:, 2] - positions[:, 2]
+        assert dz[0] - dz[1] == pytest.approx(0.0255 + 15 * 0.11e-9 * 2.48e6, abs=2e-4)
+        np.testing.assert_allclose(back, positions, atol=1e-6)
+        np.testing.assert_array_equal(transform_frame(positions, 'WGS84', 'IGb14', 2020.0), positions)
+        with pytest.raises(ValueError):
+            frame_name('ITRF1997')
+
+    def test_decimal_year(self):
+        """Testa o ano decimal de instantes GPS"""
+        seconds = [to_gps_seconds(dt(2020, 1, 1)), to_gps_seconds(dt(2021, 7, 2, 12)),
+                   to_gps_seconds(dt(2000, 5, 26, 6))]
+
+        np.testing.assert_allclose(decimal_year(seconds), [2020.0, 2021.5, 2000.4], atol=1e-3)
+
+
+class TestVelocityGrid:
+
+    def test_memory_mapped_cache(self, tmp_path):
+        """Testa a criação do cache binário e a reabertura mapeada em memória"""
+        path = _write_grid(tmp_path / 'vemos.txt')
+
+        first = VelocityGrid.load(path)
+        second = VelocityGrid.load(path)
+
+        assert (tmp_path / 'cache' / 'vemos.npy').exists()
+        assert isinstance(second.values, np.memmap)
+        assert first.values.shape == (41, 42, 3)
+        assert load_velocity_grid(path) is load_velocity_grid(path)
+
+    def test_bilinear_interpolation(self, tmp_path):
+        """Testa interpolação bilinear, nós vazios e pontos fora da grade"""
+        grid = VelocityGrid.from_text(_write_grid(tmp_path / 'grid.txt', hole=(-50, -20)))
+        grid.values[:, :, 0] = np.arange(42)[None, :] * 0.001
+
+        velocity = grid.interpolate(np.array([-10.0, -10.5, -20.2, 20.0]), np.array([-60.0, -59.25, -50.1, -50.0]))
+
+        assert velocity[0, 0] == pytest.approx(0.015)
+        assert velocity[1, 0] == pytest.approx(0.01575)
+        np.testing.assert_allclose(velocity[2, 1:], PLATE_VELOCITY[1:], atol=1e-9)
+        assert np.all(np.isnan(velocity[3]))
+
+
+class TestSirgas2000:
+
+    def test_epoch_propagation(self, tmp_path):
+        """Testa a propagação de um conjunto de vértices até 2000,4 numa única chamada"""
+        grid = VelocityGrid.load(_write_grid(tmp_path / 'vemos.txt'))
+        rng = np.random.default_rng(1)
+        vertices = geodetic_to_ecef(np.radians(-15.8 + rng.uniform(-0.01, 0.01, 500)),
+                                    np.radians(-47.9 + rng.uniform(-0.01, 0.01, 500)), 1100.0, GRS80)
+
+        result = to_sirgas2000(vertices, 2024.5, 'ITRF2000', grid=grid)
+
+        assert result.positions.shape == (500, 3)
+        assert np.all(result.propagated)
+        np.testing.assert_allclose(result.epoch, SIRGAS2000_EPOCH)
+        enu = ecef_to_enu(result.positions, vertices[0])
+        expected = np.array(PLATE_VELOCITY) * (SIRGAS2000_EPOCH - 2024.5)
+        np.testing.assert_allclose(enu[0], expected, atol=1e-4)
+        assert result.summary() == {'frame': 'SIRGAS2000', 'epoch': 2000.4, 'observation_epoch': 2024.5,
+                                    'velocity_model': True}
+
+    def test_without_velocities(self):
+        """Testa que pontos sem velocidade ficam no ITRF2000 da época de observação"""
+        position = geodetic_to_ecef(np.radians(-15.8), np.radians(-47.9), 1100.0)
+
+        result = to_sirgas2000(position, 2024.5, 'ITRF2000', velocities=np.full(3, np.nan))
+
+        assert not result.propagated
+        np.testing.assert_allclose(result.positions, position)
+        assert result.summary()['frame'] == 'ITRF2000'
+        assert result.summary()['epoch'] == 2024.5
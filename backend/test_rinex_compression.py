@@ -0,0 +1,199 @@
+"""
+Testes unitários para a descompressão em fluxo de arquivos RINEX
+"""
+
+import base64
+import bz2
+import gzip
+import io
+import os
+import sys
+import zipfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from rinex_compression import (HatanakaDecoder, UnixCompressReader, is_navigation_member,
+                               is_rinex_member, list_rinex_members, open_rinex)
+from rinex_reader import decode_observation, read_observations
+
+RINEX_V2 = (
+    "     2.10           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE\n"
+    "N31L04806           ComNav              55.0                REC # / TYPE / VERS\n"
+    "     3    C1    L1    S1                                    # / TYPES OF OBSERV\n"
+    "                                                            END OF HEADER\n"
+    " 23  7 24 21  9 40.0000000  0  2G24R14                               0.000123456\n"
+    "  22610445.289   118818665.57808        49.000\n"
+    "  19642330.359   104704717.57008        51.000\n"
+    " 23  7 24 21  9 41.0000000  0  3G24R14G05                            0.000123466\n"
+    "  22610645.289   118819716.57808        49.000\n"
+    "  19642130.359   104703667.57018        50.000\n"
+    "  21067494.414   110710439.41807        44.000\n"
+    " 23  7 24 21  9 42.0000000  0  2G24G05                               0.000123476\n"
+    "  22610845.000   118820767.57908        48.000\n"
+    "  21067294.414   110709388.41807\n"
+)
+
+# Saída do RNX2CRX para RINEX_V2
+CRINEX_V1 = (
+    "1.0                 COMPACT RINEX FORMAT                    CRINEX VERS   / TYPE\n"
+    "RNX2CRX ver.4.1.0                       17-Oct-26 19:34     CRINEX PROG / DATE\n"
+    "     2.10           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE\n"
+    "N31L04806           ComNav              55.0                REC # / TYPE / VERS\n"
+    "     3    C1    L1    S1                                    # / TYPES OF OBSERV\n"
+    "                                                            END OF HEADER\n"
+    "&23  7 24 21  9 40.0000000  0  2G24R14\n"
+    "3&123456\n"
+    "3&22610445289 3&118818665578 3&49000   08\n"
+    "3&19642330359 3&104704717570 3&51000   08\n"
+    "                 1             3      G05\n"
+    "10\n"
+    "200000 1051000 0\n"
+    "-200000 -1050000 -1000   1\n"
+    "3&21067494414 3&110710439418 3&44000   07\n"
+    "                 2             2   G05&&&\n"
+    "0\n"
+    "-289 1 -1000\n"
+    "-200000 -1051000\n"
+)
+
+CRINEX_V3 = (
+    "3.0                 COMPACT RINEX FORMAT                    CRINEX VERS   / TYPE\n"
+    "RNX2CRX ver.4.0.8                       08-Apr-21 06:56     CRINEX PROG / DATE\n"
+    "     3.01           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE\n"
+    "G    7 L1C L2P C1P C2P C1C S1P S2P                          SYS / # / OBS TYPES\n"
+    "R    3 L1C C1C S1C                                          SYS / # / OBS TYPES\n"
+    "                                                            END OF HEADER\n"
+    "> 2010 03 05 00 00 30.0000000  0 2       G13R19\n"
+    "\n"
+    "3&130321269801 3&101549030349 3&24799319672 3&24799319752 3&24799318768 3&62000 3&80000 0808&9&9&7&&&&\n"
+    "3&129262004577 3&24597748629 3&47000 08&7&&\n"
+)
+
+RINEX_V3 = (
+    "     3.01           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE\n"
+    "G    7 L1C L2P C1P C2P C1C S1P S2P                          SYS / # / OBS TYPES\n"
+    "R    3 L1C C1C S1C                                          SYS / # / OBS TYPES\n"
+    "                                                            END OF HEADER\n"
+    "> 2010 03 05 00 00 30.0000000  0 2\n"
+    "G13 130321269.80108 101549030.34908  24799319.672 9  24799319.752 9  24799318.768 7"
+    "        62.000          80.000\n"
+    "R19 129262004.57708  24597748.629 7        47.000\n"
+)
+
+# Texto de 120 linhas comprimido pelo compress (LZW com códigos de 9 e 10 bits)
+LZW_TEXT = "".join(f"{i:4d}{i * i % 9973:6d}\n" for i in range(120))
+LZW_BLOB = base64.b64decode(
+    "H52QIALCCEgQhgKCMQgGjHEwoAyFIGg0BDEDYo6JNBTGsDGxhkIZNSbaUDiDI8EbCmlcJIhDoQ2JBHMoxMFw4UCb"
+    "BhcmXCijJogYDxfSgPmz4kIbK39mXJjD5E+PDkE23EgQpNMYKB3iSBqjZcAZMojGkPnVhk8ZNyPCyAmiJ8GhZ4NG"
+    "xEFUhlEQNWQkDUuwxg2nIAnakOpwZEAbfxvKyArihl7FXhvTVUwWBF2fM9LmWNtwxk4QTTEHjQEjbGejpLd2Xhoj"
+    "Rg2nM6ACJUzRMNCmnbPGKJl0htcYQ4nOIOu6Z0MaNzdyDkhj50aax0f/JUoDNd2kQ5mWPA4VLW0ahntuPJ5VBlrs"
+    "Xu3CoE42LAyfNW6CXI53pwwb7xvmdXhjvX6jMuAAQ1I1LKXXeAHVAFVmtL321W5O+fVVWAR6NUNJRNVA1gw0QHfY"
+    "TSXRZ9ZXjvk02Fd0EWWDUcMh1dBLzA3olA1Q0WBeSIcZVt1rL2Y1lGqHeQWeaYeRRcNfPvXH3GZs3bBTfM015FiC"
+    "XRF1g1E1gJXUDUsVmFhAN0D1Gm1/JXjDl41lpeFjYHqF32RgkjVYlAEJeBhybNF02Gs+4RAUYkRaZpQNOABp2VL9"
+    "8VgnVI7RhoNhV+JWZ1ZhulinV2cO1dBWcRoX0GZ1ksZWDjv56SFoQdH1UkM5GPWoSqwuVeh2n0K1GW1NfdqTUzlk"
+    "lQNySeXgVVP+fUqWsPn9tNZHNxxE2mfm4eBsaW95Nu1dK5pE2lKHzjCtbDDkNa1t93mrrG5HagvDb0jVRBpxm0n7"
+    "E2kOAdXsvPZxKG9rQYHkpLO78Sdpa0sxaG5rC4IkA8CG6XswViQi2JqFOdTg7ljMdSUt"
+)
+
+
+def _lines(stream) -> list:
+    return [line.rstrip() for line in iter(stream.readline, '')]
+
+
+def _expected(text: str) -> list:
+    return [line.rstrip() for line in text.splitlines()]
+
+
+class TestHatanakaDecoder:
+
+    def test_crinex1_restores_rinex2(self):
+        """Testa reconstrução de CRINEX 1.0 com relógio, satélite novo e campo ausente"""
+        decoded = _lines(HatanakaDecoder(io.StringIO(CRINEX_V1)))
+
+        assert decoded == _expected(RINEX_V2)
+
+    def test_crinex3_restores_rinex3(self):
+        """Testa reconstrução de CRINEX 3.0 com tabelas por constelação e flags"""
+        decoded = _lines(HatanakaDecoder(io.StringIO(CRINEX_V3)))
+
+        assert decoded == _expected(RINEX_V3)
+
+    def test_rejects_plain_rinex(self):
+        """Testa que arquivos sem rótulo CRINEX são rejeitados"""
+        with pytest.raises(ValueError):
+            HatanakaDecoder(io.StringIO(RINEX_V2))
+
+
+class TestOpenRinex:
+
+    def test_unix_compress(self):
+        """Testa descompressão LZW com mudança de largura de código"""
+        reader = UnixCompressReader(io.BytesIO(LZW_BLOB))
+
+        assert io.BufferedReader(reader).read().decode() == LZW_TEXT
+
+    @pytest.mark.parametrize('suffix, compress', [
+        ('.23d.gz', gzip.compress),
+        ('.23d.bz2', bz2.compress),
+        ('.23d', lambda data: data),
+    ])
+    def test_compressed_crinex_feeds_reader(self, tmp_path, suffix, compress):
+        """Testa leitura de CRINEX comprimido direto para o armazenamento colunar"""
+        path = tmp_path / f"rover{suffix}"
+        path.write_bytes(compress(CRINEX_V1.encode()))
+
+        header, store = read_observations(str(path))
+
+        assert header.obs_types == ['C1', 'L1', 'S1']
+        assert store.n_epochs == 3
+        assert store.epoch_satellites(2) == ['G24', 'G05']
+        assert store.matrix('C1')[2, 0] == 22610845.0
+
+    def test_zip_member_without_extraction(self, tmp_path):
+        """Testa escolha do maior membro RINEX de um ZIP lido em fluxo"""
+        path = tmp_path / "rinex.zip"
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('__MACOSX/._rover.23o', 'lixo')
+            archive.writestr('leia-me.txt', 'texto')
+            archive.writestr('dados/base.rnx.gz', gzip.compress(RINEX_V3.encode()))
+            archive.writestr('dados/rover.crx', CRINEX_V3)
+
+        members = [info.filename for info in list_rinex_members(str(path))]
+        assert members == ['dados/rover.crx', 'dados/base.rnx.gz']
+
+        with open_rinex(str(path)) as stream:
+            assert _lines(stream) == _expected(RINEX_V3)
+        with open_rinex(str(path), 'dados/base.rnx.gz') as stream:
+            assert _lines(stream) == _expected(RINEX_V3)
+
+    def test_plain_rinex_passes_through(self, tmp_path):
+        """Testa que RINEX sem compressão é lido sem alterações"""
+        path = tmp_path / "rover.23o"
+        path.write_text(RINEX_V2)
+
+        with open_rinex(str(path)) as stream:
+            epoch_lines = [l for l in stream if l.startswith(' 23')]
+
+        assert len(epoch_lines) == 3
+
+    def test_is_rinex_member(self):
+        """Testa reconhecimento de nomes de membros RINEX"""
+        assert is_rinex_member('BRAZ0010.23O')
+        assert is_rinex_member('braz0010.23d.Z')
+        assert is_rinex_member('BRAZ00BRA_R_20230010000_01D_30S_MO.crx.gz')
+        assert not is_rinex_member('BRAZ0010.23n')
+        assert not is_rinex_member('__MACOSX/._BRAZ0010.23o')
+        assert not is_rinex_member('BRDC00IGS_R_20230010000_01D_MN.rnx.gz')
+        # Uploads avulsos usam o mesmo padrão: qualquer ano, comprimidos ou não
+        assert is_rinex_member('SITE0010.99o.bz2') and is_rinex_member('site0010.05D')
+        assert not is_rinex_member('observacoes.gz') and not is_rinex_member('site.yyd')
+
+    def test_is_navigation_member(self):
+        """Testa identificação de arquivos de navegação por extensão"""
+        assert is_navigation_member('brdc0010.23n.Z')
+        assert is_navigation_member('BRAZ0010.23g')
+        assert is_navigation_member('Base/efemerides.nav')
+        assert is_navigation_member('BRDC00IGS_R_20230010000_01D_MN.rnx.gz')
+        assert not is_navigation_member('BRAZ00BRA_R_20230010000_01D_30S_MO.rnx')
+        assert not is_navigation_member('BRAZ0010.23o')
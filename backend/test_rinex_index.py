@@ -0,0 +1,150 @@
+"""
+Testes unitários para o índice de épocas RINEX por deslocamento em bytes
+"""
+
+import gzip
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from obs_store import to_gps_seconds
+from rinex_index import build_index, epoch_index, index_path, load_index, read_epochs, scan_epochs
+from rinex_reader import RinexObsReader
+
+HEADER_V3 = (
+    "     3.04           OBSERVATION DATA    M                   RINEX VERSION / TYPE\n"
+    "G    2 C1C L1C                                              SYS / # / OBS TYPES\n"
+    "R    2 C1C L1C                                              SYS / # / OBS TYPES\n"
+    "    30.000                                                  INTERVAL\n"
+    "                                                            END OF HEADER\n"
+)
+
+HEADER_V2 = (
+    "     2.11           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE\n"
+    "     2    C1    L1                                          # / TYPES OF OBSERV\n"
+    "                                                            END OF HEADER\n"
+)
+
+START = datetime(2024, 3, 1)
+
+
+def _write_v3(path, n_epochs: int, event_after: int = None) -> str:
+    with open(path, 'w') as f:
+        f.write(HEADER_V3)
+        for k in range(n_epochs):
+            t = START + timedelta(seconds=30 * k)
+            sats = ['G01', 'G02', 'R03'][:1 + k % 3]
+            f.write(f"> {t.year:4d} {t.month:02d} {t.day:02d} {t.hour:02d} {t.minute:02d}"
+                    f"{t.second:11.7f}  0{len(sats):3d}\n")
+            for i, sat in enumerate(sats):
+                f.write(f"{sat}{22000000.0 + k + i:14.3f}  {1.0e8 + k:14.3f}\n")
+            if k == event_after:
+                f.write(">" + " " * 30 + "4  1\n")
+                f.write(f"{'> EVENTO':60s}COMMENT\n")
+    return str(path)
+
+
+def _write_v2(path, n_epochs: int) -> str:
+    sats = [f"G{i:02d}" for i in range(1, 15)]
+    with open(path, 'w') as f:
+        f.write(HEADER_V2)
+        for k in range(n_epochs):
+            t = START + timedelta(seconds=15 * k)
+            sat_text = "".join(sats)
+            f.write(f" 24 {t.month:2d} {t.day:2d} {t.hour:2d} {t.minute:2d}{t.second:11.7f}  0{len(sats):3d}"
+                    f"{sat_text[:36]}\n")
+            f.write(" " * 32 + sat_text[36:] + "\n")
+            for i, _ in enumerate(sats):
+                f.write(f"{22000000.0 + i:14.3f}  {1.0e8:14.3f}\n")
+    return str(path)
+
+
+class TestEpochIndex:
+
+    def test_scan_rinex3(self, tmp_path):
+        """Testa deslocamentos, instantes, satélites e eventos de um RINEX 3"""
+        path = _write_v3(tmp_path / 'site.rnx', 10, event_after=4)
+        epochs = list(RinexObsReader(path))
+
+        entries = scan_epochs(path)
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        assert len(entries) == 11
+        assert all(data[offset:offset + 1] == b'>' for offset in entries['offset'])
+        assert entries['flag'][5] == 4 and np.isnan(entries['time'][5])
+        observation = np.delete(entries, 5)
+        np.testing.assert_allclose(observation['time'], [to_gps_seconds(e.time) for e in epochs])
+        assert observation['satellites'].tolist() == [len(e.satellites) for e in epochs]
+
+    def test_scan_rinex2(self, tmp_path):
+        """Testa RINEX 2 com ano de dois dígitos e lista de satélites em duas linhas"""
+        path = _write_v2(tmp_path / 'site.24o', 6)
+        epochs = list(RinexObsReader(path))
+
+        entries = scan_epochs(path)
+
+        assert len(entries) == 6
+        assert entries['satellites'].tolist() == [14] * 6
+        np.testing.assert_allclose(entries['time'], [to_gps_seconds(e.time) for e in epochs])
+
+    def test_sidecar_round_trip(self, tmp_path):
+        """Testa gravação binária ao lado do arquivo, mapeamento em memória e invalidação"""
+        path = _write_v3(tmp_path / 'site.rnx', 20)
+
+        built = build_index(path)
+        loaded = load_index(path)
+
+        assert os.path.getsize(index_path(path)) == 32 + 20 * 19
+        assert isinstance(loaded.entries, np.memmap)
+        np.testing.assert_array_equal(loaded.offsets, built.offsets)
+        with open(path, 'a') as f:
+            f.write("\n")
+        assert load_index(path) is None
+        assert len(epoch_index(path)) == 20
+
+    def test_compressed_files_are_not_indexed(self, tmp_path):
+        """Testa que arquivos comprimidos ficam sem índice"""
+        source = _write_v3(tmp_path / 'site.rnx', 3)
+        path = str(tmp_path / 'site.rnx.gz')
+        with open(source, 'rb') as f, gzip.open(path, 'wb') as out:
+            out.write(f.read())
+
+        assert epoch_index(path) is None
+        assert not os.path.exists(index_path(path))
+
+    def test_random_access(self, tmp_path):
+        """Testa leitura a partir de uma época, janela de tempo, decimação e partições"""
+        path = _write_v3(tmp_path / 'site.rnx', 40, event_after=9)
+        epochs = list(RinexObsReader(path))
+        index = epoch_index(path)
+
+        first, last = index.window(to_gps_seconds(START + timedelta(minutes=5)),
+                                   to_gps_seconds(START + timedelta(minutes=10)))
+        window = list(read_epochs(path, index, first, last))
+
+        assert [e.time for e in window] == [e.time for e in epochs[10:20]]
+        assert window[3].records == epochs[13].records
+        assert len(index.decimate(120)) == 10
+        partitions = index.partitions(4)
+        assert partitions[0][0] == 0 and partitions[-1][1] == len(index)
+        assert sum(len(list(read_epochs(path, index, a, b))) for a, b in partitions) == 40
+
+    def test_cycle_slip_records_are_not_observation_epochs(self, tmp_path):
+        """Testa que registros de perdas de ciclo (flag 6) ficam fora das épocas de observação"""
+        path = _write_v3(tmp_path / 'site.rnx', 6)
+        with open(path) as f:
+            text = f.read()
+        slip = "> 2024 03 01 00 01 00.0000000  6  1\nG01" + f"{1.0:14.3f}  {-7.0:14.3f}\n"
+        with open(path, 'w') as f:
+            f.write(text.replace("> 2024 03 01 00 01 30", slip + "> 2024 03 01 00 01 30"))
+
+        index = epoch_index(path)
+
+        assert len(index) == 7 and index.flags[3] == 6
+        assert index.n_observation_epochs == 6
+        assert len(list(read_epochs(path, index, 0, len(index)))) == 6
+        assert [e.time for e in read_epochs(path, index, 4, 6)] == [e.time for e in list(RinexObsReader(path))[3:5]]
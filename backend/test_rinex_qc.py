@@ -0,0 +1,128 @@
+"""
+Testes unitários para o controle de qualidade RINEX em passada única
+"""
+
+import io
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from rinex_qc import StreamingQC
+from rinex_reader import RinexObsReader
+
+SYS_CODES = {'G': ['C1C', 'L1C', 'S1C', 'C2W', 'L2W'], 'R': ['C1C', 'L1C', 'S1C'], 'E': ['C1C', 'L1C', 'C5Q', 'L5Q']}
+
+
+def _header_v3(interval=True) -> str:
+    text = "     3.04           OBSERVATION DATA    M                   RINEX VERSION / TYPE\n"
+    for system, codes in SYS_CODES.items():
+        text += f"{system}{len(codes):5d}" + "".join(f" {c}" for c in codes).ljust(54) + "SYS / # / OBS TYPES\n"
+    if interval:
+        text += "    30.000                                                  INTERVAL\n"
+    return text + " " * 60 + "END OF HEADER\n"
+
+
+def _epoch_v3(instant: datetime, sats: list, blank: str = '') -> str:
+    """Época RINEX 3; em `blank` o último observável fica vazio"""
+    text = f"> {instant.year:4d} {instant.month:02d} {instant.day:02d} {instant.hour:02d} {instant.minute:02d}" \
+           f"{instant.second:11.7f}  0{len(sats):3d}\n"
+    for sat in sats:
+        values = [f"{22000000.0 + i:14.3f}  " for i in range(len(SYS_CODES[sat[0]]))]
+        if sat == blank:
+            values[-1] = " " * 16
+        text += (sat + "".join(values)).rstrip() + "\n"
+    return text
+
+
+def _session(n_epochs: int, sats: list, gap_after: int = None, interval=True) -> str:
+    start = datetime(2024, 3, 1)
+    text, second = _header_v3(interval), 0
+    for k in range(n_epochs):
+        text += _epoch_v3(start + timedelta(seconds=second), sats, blank='E07' if k % 2 else '')
+        second += 30 * (11 if k == gap_after else 1)
+    return text
+
+
+def _run(text: str):
+    qc = StreamingQC(RinexObsReader(io.StringIO(text)).header)
+    reader = RinexObsReader(io.StringIO(text))
+    for epoch in reader:
+        qc.add(epoch)
+    return qc.finish()
+
+
+class TestStreamingQC:
+
+    def test_epochs_intervals_and_gaps(self):
+        """Testa épocas, duração, histograma de intervalos e lacunas do arquivo inteiro"""
+        report = _run(_session(100, ['G01', 'R05', 'E07'], gap_after=39))
+
+        assert report.epochs == 100
+        assert report.span_seconds == 30 * (99 + 10)
+        assert report.interval_histogram == {30.0: 98, 330.0: 1}
+        assert report.gap_count == 1
+        assert report.gaps[0].duration == 330.0
+        assert report.gaps[0].missing_epochs == 10
+        assert report.expected_epochs == 110
+        assert report.completeness == pytest.approx(100 * 100 / 110)
+        assert report.intervals_over(60) == 1
+
+    def test_satellites_and_observables(self):
+        """Testa satélites por constelação e contagem por satélite × observável"""
+        report = _run(_session(10, ['G01', 'G02', 'R05', 'E07']))
+
+        assert report.satellites_per_system == {'G': 2, 'R': 1, 'E': 1}
+        assert report.observations_per_system == {'G': 20, 'R': 10, 'E': 10}
+        assert report.epochs_per_satellite['R05'] == 10
+        assert report.observations['G02'] == {code: 10 for code in SYS_CODES['G']}
+        assert report.observations['E07']['L5Q'] == 5
+        assert report.observations['E07']['C1C'] == 10
+        assert report.observables['R'] == SYS_CODES['R']
+        assert report.summary()['gaps']['count'] == 0
+
+    def test_nominal_interval_without_header(self):
+        """Testa intervalo nominal estimado e lacuna dentro das primeiras épocas"""
+        report = _run(_session(30, ['G01'], gap_after=3, interval=False))
+
+        assert report.nominal_interval == 30.0
+        assert report.gap_count == 1
+        assert report.gaps[0].start == datetime(2024, 3, 1, 0, 1, 30)
+
+    def test_rinex2_single_observable_table(self):
+        """Testa RINEX 2 com a tabela única de observáveis e campos vazios"""
+        header = ("     2.11           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE\n"
+                  "     3    C1    L1    P2                                    # / TYPES OF OBSERV\n"
+                  "                                                            END OF HEADER\n")
+        body = ""
+        for second in (0, 15, 30):
+            body += f" 24  3  1  0  0{second:11.7f}  0  2G05R10\n"
+            body += f"{22000000.0:14.3f}  {1.0:14.3f}  {22000001.0:14.3f}\n"
+            body += f"{21000000.0:14.3f}  {1.0:14.3f}\n"
+
+        report = _run(header + body)
+
+        assert report.epochs == 3
+        assert report.nominal_interval == 15.0
+        assert report.satellites_per_system == {'G': 1, 'R': 1}
+        assert report.observations['G05'] == {'C1': 3, 'L1': 3, 'P2': 3}
+        assert report.observations['R10'] == {'C1': 3, 'L1': 3, 'P2': 0}
+        assert report.observables == {'G': ['C1', 'L1', 'P2'], 'R': ['C1', 'L1']}
+
+    def test_throughput(self):
+        """Testa vazão de leitura + QC acima de 1 milhão de épocas por minuto"""
+        sats = [f"G{i:02d}" for i in range(1, 13)] + [f"R{i:02d}" for i in range(1, 9)] + \
+               [f"E{i:02d}" for i in range(1, 9)]
+        text = _session(5000, sats)
+
+        elapsed = []
+        for _ in range(3):
+            start = time.perf_counter()
+            report = _run(text)
+            elapsed.append(time.perf_counter() - start)
+
+        assert report.epochs == 5000
+        assert report.epochs / min(elapsed) > 1e6 / 60
@@ -0,0 +1,194 @@
+"""
+Testes unitários para o leitor RINEX em fluxo
+"""
+
+import io
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from rinex_reader import (RinexObsReader, decode_epoch, decode_observation,
+                          normalize_satellite_id, read_observations)
+
+HEADER_V2 = (
+    "     2.10           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE\n"
+    "N31L04806           ComNav              55.0                REC # / TYPE / VERS\n"
+    "  3752842.7775 -4538356.2935 -2442730.7161                  APPROX POSITION XYZ\n"
+    "     8    C1    L1    S1    D1    L2    S2    D2    P2      # / TYPES OF OBSERV\n"
+    "     1.000                                                  INTERVAL\n"
+    "                                                            END OF HEADER\n"
+)
+
+
+def _obs_record(c1: float) -> str:
+    """Registro de 8 observáveis distribuído em duas linhas de 80 colunas"""
+    line1 = f"{c1:14.3f}  {c1 * 5.25:14.3f}06{45.0:14.3f}  {-3020.133:14.3f}  {c1 * 4.09:14.3f}04"
+    line2 = f"{24.0:14.3f}  {-2353.332:14.3f}  {c1 + 5.6:14.3f}  "
+    return line1 + "\n" + line2 + "\n"
+
+
+def _epoch(second: int, sats: list) -> str:
+    sat_text = "".join(sats)
+    text = f" 23  7 24 20 57{second:11.7f}  0{len(sats):3d}{sat_text[:36]}\n"
+    for start in range(36, len(sat_text), 36):
+        text += " " * 32 + sat_text[start:start + 36] + "\n"
+    for i, _ in enumerate(sats):
+        text += _obs_record(22000000.0 + i * 1000)
+    return text
+
+
+class TestRinexObsReader:
+
+    def test_header(self):
+        """Testa leitura do cabeçalho"""
+        reader = RinexObsReader(io.StringIO(HEADER_V2))
+
+        assert reader.header.version == 2.10
+        assert reader.header.obs_types == ['C1', 'L1', 'S1', 'D1', 'L2', 'S2', 'D2', 'P2']
+        assert reader.header.lines_per_record == 2
+        assert reader.header.approx_position[0] == 3752842.7775
+        assert reader.header.receiver['type'] == 'ComNav'
+        assert reader.header.interval == 1.0
+
+    def test_multiline_records_stay_aligned(self):
+        """Testa que registros de duas linhas não desalinham o satélite seguinte"""
+        sats = ['G24', 'G11', 'G28', 'G25', 'G29', 'G12', 'G20', 'G05', 'G18', 'R14', 'R13', 'R12', 'R24', 'R23']
+        text = HEADER_V2 + _epoch(15, sats) + _epoch(16, sats[:5])
+
+        epochs = list(RinexObsReader(io.StringIO(text)))
+
+        assert len(epochs) == 2
+        assert epochs[0].satellites == sats
+        assert decode_observation(epochs[0].records['R23'], 0) == 22013000.0
+        assert decode_observation(epochs[0].records['R23'], 7) == 22013005.6
+        assert epochs[1].time.second == 16
+        assert len(epochs[1].satellites) == 5
+
+    def test_event_records_are_skipped(self):
+        """Testa que épocas com flag de evento pulam as linhas especiais"""
+        event = " 23  7 24 20 57 15.5000000  4  2\n" \
+                "EVENT COMMENT                                               COMMENT\n" \
+                "EVENT COMMENT                                               COMMENT\n"
+        text = HEADER_V2 + _epoch(15, ['G01']) + event + _epoch(16, ['G02'])
+
+        epochs = list(RinexObsReader(io.StringIO(text)))
+
+        assert [e.satellites for e in epochs] == [['G01'], ['G02']]
+
+    def test_cycle_slip_records_are_skipped(self):
+        """Testa que o registro de perdas de ciclo (flag 6) não vira uma época repetida"""
+        sats = ['G01', 'G02']
+        slip = _epoch(15, sats).replace("  0  2G01G02", "  6  2G01G02", 1)
+        text = HEADER_V2 + _epoch(15, sats) + slip + _epoch(16, sats)
+
+        header, store = read_observations(io.StringIO(text))
+
+        assert store.n_epochs == 2
+        assert [store.epoch_time(k).second for k in range(2)] == [15, 16]
+        assert (store.flags == 0).all()
+
+    def test_normalize_satellite_id(self):
+        """Testa normalização de identificadores de satélite"""
+        assert normalize_satellite_id("G 5") == "G05"
+        assert normalize_satellite_id(" 12") == "G12"
+        assert normalize_satellite_id("R07") == "R07"
+        assert normalize_satellite_id("   ") is None
+
+    def test_decode_all_observables_with_flags(self):
+        """Testa decodificação de todos os observáveis declarados, com LLI e intensidade"""
+        text = HEADER_V2 + _epoch(15, ['G24', 'R14'])
+        epoch = next(iter(RinexObsReader(io.StringIO(text))))
+
+        sat_ids, values, lli, ssi = decode_epoch(epoch, RinexObsReader(io.StringIO(HEADER_V2)).header)
+
+        assert sat_ids == ['G24', 'R14']
+        assert values.shape == (2, 8)
+        assert values[1, 0] == 22001000.0
+        assert values[0, 5] == 24.0
+        assert values[0, 7] == 22000005.6
+        assert lli[0, 1] == 0 and ssi[0, 1] == 6
+        assert ssi[0, 4] == 4
+        assert ssi[0, 0] == 0
+
+    def test_read_observations_fills_store(self):
+        """Testa carregamento completo para o armazenamento colunar em uma passada"""
+        sats = ['G01', 'G02', 'R03']
+        text = HEADER_V2 + _epoch(15, sats) + _epoch(16, sats)
+
+        header, store = read_observations(io.StringIO(text))
+
+        assert store.obs_codes == header.obs_types
+        assert store.n_epochs == 2
+        assert store.n_records == 6
+        np.testing.assert_allclose(store.matrix('P2')[1], [22000005.6, 22001005.6, 22002005.6])
+        assert (store.ssi('L1') == 6).all()
+
+
+HEADER_V3 = (
+    "     3.04           OBSERVATION DATA    M                   RINEX VERSION / TYPE\n"
+    "  3752842.7775 -4538356.2935 -2442730.7161                  APPROX POSITION XYZ\n"
+    "G    4 C1C L1C S1C C2W                                      SYS / # / OBS TYPES\n"
+    "R    3 C1C L1C S1C                                          SYS / # / OBS TYPES\n"
+    "C   15 C2I L2I S2I C7I L7I S7I C6I L6I S6I C1P L1P S1P C5P  SYS / # / OBS TYPES\n"
+    "       L5P S5P                                              SYS / # / OBS TYPES\n"
+    "  2 R01  1 R02 -4                                           GLONASS SLOT / FRQ #\n"
+    "                                                            END OF HEADER\n"
+)
+
+
+def _field(value: float, lli: str = ' ', ssi: str = ' ') -> str:
+    return f"{value:14.3f}{lli}{ssi}"
+
+
+class TestRinexObsReaderV3:
+
+    def _text(self) -> str:
+        epoch = "> 2023 07 24 20 57 15.0000000  0  4\n"
+        epoch += "G05" + _field(21000000.0, ' ', '7') + _field(110000000.0, '1', '7') + _field(45.0) + _field(21000003.0) + "\n"
+        epoch += "R01" + _field(22000000.0) + _field(117000000.0) + "\n"
+        epoch += "C19" + _field(23000000.0) + " " * 16 * 13 + _field(33.0) + "\n"
+        epoch += "J02" + _field(24000000.0) + "\n"
+        event = "> 2023 07 24 20 57 15.5000000  4  1\nEVENT                                                       COMMENT\n"
+        second = "> 2023 07 24 20 57 16.0000000  0  1\nG05" + _field(21000100.0) + "\n"
+        return HEADER_V3 + epoch + event + second
+
+    def test_header_per_system_tables(self):
+        """Testa tabelas de observáveis por constelação"""
+        header = RinexObsReader(io.StringIO(HEADER_V3)).header
+
+        assert header.version == 3.04
+        assert header.sys_obs_types['G'] == ['C1C', 'L1C', 'S1C', 'C2W']
+        assert len(header.sys_obs_types['C']) == 15
+        assert header.sys_obs_types['C'][-1] == 'S5P'
+        assert header.glonass_slots == {'R01': 1, 'R02': -4}
+        assert header.observables[:5] == ['C1C', 'L1C', 'S1C', 'C2W', 'C2I']
+
+    def test_epochs_feed_same_store(self):
+        """Testa que épocas RINEX 3 alimentam o mesmo armazenamento colunar"""
+        header, store = read_observations(io.StringIO(self._text()))
+
+        assert store.n_epochs == 2
+        assert store.epoch_satellites(0) == ['G05', 'R01', 'C19', 'J02']
+        assert store.epoch_time(1).second == 16
+
+        c1c = store.matrix('C1C')
+        assert c1c[0, 0] == 21000000.0 and c1c[0, 1] == 22000000.0
+        assert np.isnan(c1c[0, 2])
+        assert store.matrix('C2I')[0, 2] == 23000000.0
+        assert store.matrix('S5P')[0, 2] == 33.0
+        assert store.lli_matrix('L1C')[0, 0] == 1
+        assert store.ssi('C1C')[0] == 7
+        # QZSS sem tabela declarada fica sem valores
+        assert np.isnan(store.matrix('C1C')[0, 3])
+
+    def test_cycle_slip_records_are_skipped(self):
+        """Testa que o registro de perdas de ciclo (flag 6) é descartado sem desalinhar a época seguinte"""
+        slip = "> 2023 07 24 20 57 15.0000000  6  1\nG05" + _field(1.0) + _field(-7.0) + "\n"
+        text = self._text().replace("> 2023 07 24 20 57 15.5", slip + "> 2023 07 24 20 57 15.5")
+
+        epochs = list(RinexObsReader(io.StringIO(text)))
+
+        assert [(e.time.second, e.flag) for e in epochs] == [(15, 0), (16, 0)]
+        assert decode_observation(epochs[1].records['G05'], 0) == 21000100.0
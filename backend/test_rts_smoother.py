@@ -0,0 +1,125 @@
+"""
+Testes unitários para o suavizador RTS e o armazenamento compacto dos instantâneos do filtro
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from ppp_filter import PPPFilter, ppp_epochs
+from rts_smoother import RTSSmoother, SnapshotBuffer
+from test_ppp_filter import RECEIVER, _simulate
+
+
+class TestSnapshotBuffer:
+
+    def test_spill_to_memory_map(self, tmp_path):
+        """Testa passagem para arquivo mapeado acima do limite de memória e leitura dos registros"""
+        buffer = SnapshotBuffer(np.float64, memory_limit=64 * 1024, directory=str(tmp_path))
+        offsets = [buffer.append(np.arange(k, k + 100, dtype=float)) for k in range(200)]
+
+        assert buffer.spilled
+        assert len(list(tmp_path.iterdir())) == 1
+        np.testing.assert_array_equal(buffer.read(offsets[150], 100), np.arange(150, 250))
+        np.testing.assert_array_equal(buffer.read(offsets[0], 3), [0.0, 1.0, 2.0])
+
+        buffer.close()
+        assert not list(tmp_path.iterdir())
+
+
+class TestRTSSmoother:
+
+    def test_random_walk_matches_two_sided_estimate(self):
+        """Testa a passada RTS num passeio aleatório escalar contra a solução em lote exata"""
+        rng = np.random.default_rng(3)
+        q, r, n = 0.5, 2.0, 30
+        truth = np.cumsum(rng.normal(0, np.sqrt(q), n))
+        z = truth + rng.normal(0, np.sqrt(r), n)
+
+        smoother = RTSSmoother()
+        x, P = 0.0, 100.0
+        for k in range(n):
+            if k:
+                P += q
+            gain = P / (P + r)
+            x, P = x + gain * (z[k] - x), (1 - gain) * P
+            # Estado escalar registrado no lugar da coordenada x da posição
+            smoother.record(float(k), np.array([0, 1, 2]), np.array([x, 0.0, 0.0]),
+                            np.diag([P, 1.0, 1.0]), position_noise=q if k else 0.0)
+        smoothed = smoother.smooth()
+
+        # Mínimos quadrados em lote: prior, medidas e incrementos do passeio aleatório
+        A = np.vstack([np.eye(n)[:1] / 10.0, np.eye(n) / np.sqrt(r),
+                       (np.eye(n, k=1) - np.eye(n))[:-1] / np.sqrt(q)])
+        b = np.concatenate([[0.0], z / np.sqrt(r), np.zeros(n - 1)])
+        batch = np.linalg.lstsq(A, b, rcond=None)[0]
+
+        np.testing.assert_allclose(smoothed.positions[:, 0], batch, atol=1e-8)
+        covariance = np.linalg.inv(A.T @ A)
+        np.testing.assert_allclose(smoothed.covariances[:, 0, 0], np.diag(covariance), rtol=1e-6)
+
+    def test_static_session(self, tmp_path):
+        """Testa sessão PPP estática: solução suavizada constante, igual à final, mesmo com despejo em disco"""
+        store, orbits = _simulate(epochs=80)
+        in_memory = RTSSmoother()
+        spilled = RTSSmoother(memory_limit=32 * 1024, directory=str(tmp_path))
+
+        for smoother in (in_memory, spilled):
+            solutions = list(PPPFilter(smoother=smoother).run(ppp_epochs(store, orbits)))
+        smoothed = in_memory.smooth()
+        from_disk = spilled.smooth()
+
+        assert spilled._values.spilled
+        assert len(smoothed.times) == len(solutions)
+        np.testing.assert_allclose(smoothed.positions, from_disk.positions)
+        np.testing.assert_allclose(smoothed.positions - solutions[-1].position, 0.0, atol=1e-6)
+        assert np.linalg.norm(smoothed.static_position - RECEIVER) < 0.10
+        assert np.isfinite(smoothed.zwd).all()
+        spilled.close()
+
+    def test_kinematic_smoothing_improves_early_epochs(self):
+        """Testa que a suavização melhora as primeiras épocas de uma solução com posição variável"""
+        store, orbits = _simulate(epochs=80)
+        smoother = RTSSmoother()
+        solutions = list(PPPFilter(static=False, kinematic_noise=0.01, smoother=smoother)
+                         .run(ppp_epochs(store, orbits)))
+        smoothed = smoother.smooth()
+
+        filtered_error = np.linalg.norm(solutions[0].position - RECEIVER)
+        smoothed_error = np.linalg.norm(smoothed.positions[0] - RECEIVER)
+        assert smoothed_error < 0.2 * filtered_error
+        assert np.trace(smoothed.covariances[0]) < np.trace(smoothed.covariances[-1]) * 10
+
+
+class TestProcessorSmoothing:
+
+    def test_final_position_from_smoothed_solution(self):
+        """Testa que a posição final vem da solução suavizada com precisão da covariância"""
+        from gnss_processor import GNSSProcessor
+        store, orbits = _simulate(epochs=80)
+        processor = GNSSProcessor()
+        processor.ephemeris = orbits
+
+        results = processor._process_ppp_solution({'observations': store, 'approx_position': None}, {}, {})
+        processor.dop_series = processor._compute_dop({'observations': store})
+        final = processor._calculate_final_position(processor._apply_kalman_filter(results))
+
+        assert processor.smoothed_solution is not None
+        np.testing.assert_allclose(final['position'], processor.smoothed_solution.static_position)
+        assert final['precision_h'] < 0.10
+        assert final['quality'] in ('EXCELENTE', 'BOA')
+        assert final['pdop'] < 10
+
+        unsmoothed = GNSSProcessor(smoothing=False)
+        unsmoothed.ephemeris = orbits
+        filtered = unsmoothed._process_ppp_solution({'observations': store, 'approx_position': None}, {}, {})
+        assert unsmoothed.smoothed_solution is None
+        final = unsmoothed._calculate_final_position(unsmoothed._apply_kalman_filter(filtered))
+        sigma = filtered.last['sigma']
+        assert final['precision_h'] == np.hypot(sigma[0], sigma[1])
+        assert final['precision_v'] == sigma[2]
+        assert final['quality'] == GNSSProcessor._quality_class(final['precision_h'])
+        repeated = unsmoothed._calculate_final_position(filtered)
+        assert (repeated['precision_h'], repeated['precision_v']) == (final['precision_h'], final['precision_v'])
@@ -0,0 +1,99 @@
+"""
+Testes unitários para o solver SPP em lote
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from spp_solver import solve_spp_batch
+
+RECEIVER = np.array([3752842.7775, -4538356.2935, -2442730.7161])
+
+
+def _scenario(n_epochs=50, n_sats=10, noise=0.0, seed=7):
+    """Satélites acima do horizonte do receptor e pseudodistâncias com relógio do receptor"""
+    rng = np.random.default_rng(seed)
+    up = RECEIVER / np.linalg.norm(RECEIVER)
+    directions = rng.normal(size=(n_epochs, n_sats, 3))
+    directions /= np.linalg.norm(directions, axis=2, keepdims=True)
+    directions += up * (np.abs(directions @ up)[..., None] + 0.3)
+    directions /= np.linalg.norm(directions, axis=2, keepdims=True)
+    sat_positions = RECEIVER + directions * 2.2e7
+    clock = rng.normal(0, 1e4, n_epochs)
+    pseudoranges = np.linalg.norm(sat_positions - RECEIVER, axis=2) + clock[:, None]
+    pseudoranges += rng.normal(0, noise, pseudoranges.shape)
+    return sat_positions, pseudoranges, clock
+
+
+class TestSppBatch:
+
+    def test_exact_observations_recover_position(self):
+        """Testa recuperação da posição e do relógio com observações sem erro"""
+        sat_positions, pseudoranges, clock = _scenario()
+
+        solution = solve_spp_batch(sat_positions, pseudoranges)
+
+        assert solution.converged.all()
+        np.testing.assert_allclose(solution.position, np.tile(RECEIVER, (50, 1)), atol=1e-4)
+        np.testing.assert_allclose(solution.clock_bias, clock, atol=1e-4)
+        assert np.nanmax(np.abs(solution.residuals)) < 1e-4
+        assert (solution.iterations <= 10).all()
+
+    def test_satellite_mask_and_insufficient_epochs(self):
+        """Testa máscara por época: menos de 4 satélites deixa a época sem solução"""
+        sat_positions, pseudoranges, _ = _scenario(n_epochs=3, n_sats=6)
+        mask = np.ones((3, 6), dtype=bool)
+        mask[1, 3:] = False
+        pseudoranges[2, 0] = np.nan
+
+        solution = solve_spp_batch(sat_positions, pseudoranges, mask)
+
+        assert solution.valid.tolist() == [True, False, True]
+        assert solution.n_satellites.tolist() == [6, 3, 5]
+        assert np.isnan(solution.residuals[2, 0])
+        assert np.isnan(solution.pdop[1])
+        np.testing.assert_allclose(solution.position[2], RECEIVER, atol=1e-4)
+
+    def test_dop_matches_geometry(self):
+        """Testa DOP em lote contra o cálculo direto de uma época"""
+        sat_positions, pseudoranges, _ = _scenario(n_epochs=1, n_sats=8)
+
+        solution = solve_spp_batch(sat_positions, pseudoranges, initial_position=RECEIVER + 50.0)
+
+        los = sat_positions[0] - RECEIVER
+        H = np.hstack([-los / np.linalg.norm(los, axis=1, keepdims=True), np.ones((8, 1))])
+        Q = np.linalg.inv(H.T @ H)
+        assert np.isclose(solution.pdop[0], np.sqrt(np.trace(Q[:3, :3])))
+        assert np.isclose(solution.gdop[0], np.sqrt(np.trace(Q)))
+        assert np.isclose(solution.hdop[0] ** 2 + solution.vdop[0] ** 2, solution.pdop[0] ** 2)
+
+    def test_weights_downweight_outlier(self):
+        """Testa que peso baixo reduz a influência de uma observação com erro grosseiro"""
+        sat_positions, pseudoranges, _ = _scenario(n_epochs=1, n_sats=8)
+        pseudoranges[0, 0] += 500.0
+        weights = np.ones((1, 8))
+
+        unweighted = solve_spp_batch(sat_positions, pseudoranges)
+        weights[0, 0] = 1e-6
+        weighted = solve_spp_batch(sat_positions, pseudoranges, weights=weights)
+
+        error = lambda s: np.linalg.norm(s.position[0] - RECEIVER)
+        assert error(weighted) < 0.01 < error(unweighted)
+
+    def test_precision_from_adjustment_covariance(self):
+        """Testa σENU da covariância a posteriori: acompanha o ruído e fica NaN sem redundância"""
+        sat_positions, pseudoranges, _ = _scenario(n_epochs=200, n_sats=10, noise=2.0)
+
+        solution = solve_spp_batch(sat_positions, pseudoranges)
+        errors = solution.position - RECEIVER
+        up = RECEIVER / np.linalg.norm(RECEIVER)
+        vertical = errors @ up
+
+        assert np.isfinite(solution.sigma_enu).all()
+        ratio = np.sqrt(np.mean(vertical ** 2)) / np.sqrt(np.mean(solution.sigma_enu[:, 2] ** 2))
+        assert 0.7 < ratio < 1.4
+        minimal = solve_spp_batch(sat_positions[:1, :4], pseudoranges[:1, :4])
+        assert minimal.valid[0] and np.isnan(minimal.sigma_enu[0]).all()
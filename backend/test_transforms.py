@@ -0,0 +1,144 @@
+"""
+Testes unitários para as transformações de coordenadas vetorizadas
+"""
+
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from transforms import (GRS80, WGS84, central_meridian, ecef_to_enu, ecef_to_geodetic, enu_to_ecef,
+                        geodetic_to_ecef, geodetic_to_utm, utm_to_geodetic, utm_zone)
+
+# Erro angular (rad) equivalente a 0,1 mm na superfície
+SUB_MM = 1e-4 / WGS84.a
+
+
+class TestGeodetic:
+
+    def test_reference_points(self):
+        """Testa equador, polo e um ponto com altura contra valores analíticos"""
+        lat, lon, h = ecef_to_geodetic(np.array([[WGS84.a + 100.0, 0.0, 0.0],
+                                                 [0.0, 0.0, WGS84.b - 50.0],
+                                                 [0.0, WGS84.a, 0.0]]))
+
+        np.testing.assert_allclose(lat, [0.0, np.pi / 2, 0.0], atol=1e-15)
+        np.testing.assert_allclose(lon, [0.0, 0.0, np.pi / 2], atol=1e-15)
+        np.testing.assert_allclose(h, [100.0, -50.0, 0.0], atol=1e-6)
+
+    def test_round_trip(self):
+        """Testa ECEF ↔ geodésicas com concordância submilimétrica de -100 m a 20.000 km"""
+        rng = np.random.default_rng(1)
+        lat = rng.uniform(-np.pi / 2, np.pi / 2, 10000)
+        lon = rng.uniform(-np.pi, np.pi, 10000)
+        h = np.concatenate([rng.uniform(-100.0, 9000.0, 5000), rng.uniform(1e5, 2e7, 5000)])
+
+        lat_back, lon_back, h_back = ecef_to_geodetic(geodetic_to_ecef(lat, lon, h))
+
+        assert np.abs(lat_back - lat).max() < SUB_MM
+        assert np.abs(np.angle(np.exp(1j * (lon_back - lon))) * np.cos(lat)).max() < SUB_MM
+        assert np.abs(h_back - h).max() < 1e-4
+
+    def test_shapes_and_missing_positions(self):
+        """Testa formas (..., 3) arbitrárias e NaN para posições zeradas"""
+        positions = np.zeros((4, 5, 3))
+        positions[1:] = [WGS84.a, 0.0, 0.0]
+
+        lat, lon, h = ecef_to_geodetic(positions)
+
+        assert lat.shape == lon.shape == h.shape == (4, 5)
+        assert np.all(np.isnan(lat[0])) and np.all(np.isnan(h[0]))
+        assert np.all(np.isfinite(h[1:]))
+
+    def test_ellipsoids(self):
+        """Testa a diferença submilimétrica entre WGS84 e GRS80 na altura"""
+        position = geodetic_to_ecef(np.radians(-15.8), np.radians(-47.9), 1100.0)
+
+        h_wgs = ecef_to_geodetic(position, WGS84)[2]
+        h_grs = ecef_to_geodetic(position, GRS80)[2]
+
+        assert 0.0 < abs(h_wgs - h_grs) < 1e-3
+
+
+class TestEnu:
+
+    def test_local_offsets(self):
+        """Testa deslocamentos leste, norte e vertical e a volta para ECEF"""
+        origin = geodetic_to_ecef(np.radians(-22.9), np.radians(-43.2), 10.0)
+        up = geodetic_to_ecef(np.radians(-22.9), np.radians(-43.2), 110.0)
+        rng = np.random.default_rng(2)
+        enu = rng.normal(0.0, 1000.0, (50, 3))
+
+        np.testing.assert_allclose(ecef_to_enu(up, origin), [0.0, 0.0, 100.0], atol=1e-8)
+        np.testing.assert_allclose(ecef_to_enu(enu_to_ecef(enu, origin), origin), enu, atol=1e-8)
+        assert ecef_to_enu(origin + np.array([0.0, 0.0, 1.0]), origin)[1] > 0.0
+
+
+class TestUtm:
+
+    def test_reference_values(self):
+        """Testa valores de referência: origem da zona 31 e arco de meridiano a 45°"""
+        easting, northing, zone, south = geodetic_to_utm(np.radians([0.0, 45.0]), np.radians([0.0, 3.0]))
+
+        np.testing.assert_allclose(easting, [166021.4431, 500000.0], atol=1e-4)
+        np.testing.assert_allclose(northing, [0.0, 0.9996 * 4984944.3779], atol=1e-3)
+        np.testing.assert_array_equal(zone, [31, 31])
+        assert not south.any()
+
+    def test_zones_and_hemispheres(self):
+        """Testa zona, meridiano central e falso norte do hemisfério sul"""
+        easting, northing, zone, south = geodetic_to_utm(np.radians(-23.55), np.radians(-46.63))
+
+        assert zone == 23 and south
+        assert np.degrees(central_meridian(zone)) == pytest.approx(-45.0)
+        assert 0.0 < easting < 500000.0
+        assert 7.0e6 < northing < 1.0e7
+        np.testing.assert_array_equal(utm_zone(np.radians([-180.0, -0.1, 0.0, 179.9, 180.0])), [1, 30, 31, 60, 1])
+
+    def test_round_trip_full_zone(self):
+        """Testa UTM ↔ geodésicas com concordância submilimétrica até 6° do meridiano central"""
+        rng = np.random.default_rng(3)
+        lat = rng.uniform(np.radians(-80.0), np.radians(84.0), 20000)
+        zone = rng.integers(1, 61, 20000)
+        lon = central_meridian(zone) + rng.uniform(-np.radians(6.0), np.radians(6.0), 20000)
+
+        easting, northing, zone_out, south = geodetic_to_utm(lat, lon, zone)
+        lat_back, lon_back = utm_to_geodetic(easting, northing, zone_out, south)
+
+        assert np.abs(lat_back - lat).max() < SUB_MM
+        assert np.abs(np.angle(np.exp(1j * (lon_back - lon))) * np.cos(lat)).max() < SUB_MM
+
+    def test_forced_zone(self):
+        """Testa projeção de vértices vizinhos ao limite de zona num único sistema"""
+        lon = np.radians([-48.05, -47.95])
+
+        _, _, natural, _ = geodetic_to_utm(np.radians(-15.8), lon)
+        easting, _, forced, _ = geodetic_to_utm(np.radians(-15.8), lon, zone=23)
+
+        np.testing.assert_array_equal(natural, [22, 23])
+        np.testing.assert_array_equal(forced, [23, 23])
+        assert easting[1] - easting[0] == pytest.approx(10700.0, rel=0.01)
+
+
+class TestPerformance:
+
+    def test_million_points(self):
+        """Testa conversão de um milhão de pontos por segundo em cada direção"""
+        rng = np.random.default_rng(4)
+        lat = rng.uniform(-1.4, 1.4, 1000000)
+        lon = rng.uniform(-np.pi, np.pi, 1000000)
+        positions = geodetic_to_ecef(lat, lon, np.zeros_like(lat))
+        geodetic_to_utm(lat[:1000], lon[:1000])
+
+        start = time.perf_counter()
+        ecef_to_geodetic(positions)
+        geodetic = time.perf_counter() - start
+        start = time.perf_counter()
+        geodetic_to_utm(lat, lon)
+        utm = time.perf_counter() - start
+
+        assert geodetic < 1.0
+        assert utm < 1.0
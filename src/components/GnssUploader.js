@@ -1,21 +1,42 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import axios from '../config/axios';
 import { db, storage } from '../config/supabase';
 import { useAuth } from '../hooks/useAuth';
 import { API_ENDPOINTS } from '../config/api';
+import {
+  GNSS_JOB_MAX_WAIT_MS,
+  GNSS_JOB_POLL_BACKOFF,
+  GNSS_JOB_POLL_INITIAL_MS,
+  GNSS_JOB_POLL_MAX_INTERVAL_MS,
+  isRinexNavigationFile,
+  isRinexObservationFile
+} from '../config/constants';
+
+// Espera interrompível: rejeita assim que o sinal é abortado (componente desmontado)
+const wait = (ms, signal) => new Promise((resolve, reject) => {
+  const timer = setTimeout(resolve, ms);
+  signal.addEventListener('abort', () => {
+    clearTimeout(timer);
+    reject(new axios.CanceledError());
+  }, { once: true });
+});
 
 const GnssUploader = () => {
   const { isAuthenticated } = useAuth();
   const [file, setFile] = useState(null);
+  const [navFile, setNavFile] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
   const [result, setResult] = useState(null);
   const [error, setError] = useState(null);
   const [dragOver, setDragOver] = useState(false);
   const [analysisProgress, setAnalysisProgress] = useState('');
   const [showProgressModal, setShowProgressModal] = useState(false);
+  const pollAbortRef = useRef(null);
+
+  // Encerra o acompanhamento da análise ao desmontar o componente
+  useEffect(() => () => pollAbortRef.current?.abort(), []);
 
   const handleFileSelect = (selectedFile) => {
-    const allowedTypes = ['.21o', '.rnx', '.zip', '.obs', '.nav'];
     const fileExtension = selectedFile.name.toLowerCase().slice(selectedFile.name.lastIndexOf('.'));
     const maxSizeBytes = 500 * 1024 * 1024; // 500MB limite
     
@@ -28,8 +49,8 @@ const GnssUploader = () => {
       limiteMB: (maxSizeBytes / 1024 / 1024)
     });
     
-    if (!allowedTypes.includes(fileExtension)) {
-      setError('Tipo de arquivo não suportado. Use arquivos RINEX (.21O, .RNX, .OBS, .NAV) ou .ZIP');
+    if (fileExtension !== '.zip' && !isRinexObservationFile(selectedFile.name)) {
+      setError('Tipo de arquivo não suportado. Use arquivos RINEX de observação (.yyO, .yyD, .RNX, .CRX, .OBS, também .gz/.Z/.bz2) ou .ZIP');
       setFile(null);
       return;
     }
@@ -64,6 +85,18 @@ const GnssUploader = () => {
     setDragOver(false);
   };
 
+  const handleNavFileChange = (e) => {
+    const selectedFile = e.target.files[0] || null;
+    if (selectedFile && !isRinexNavigationFile(selectedFile.name)) {
+      setError('Arquivo de navegação não suportado. Use .NAV, .yyN, .yyG, .yyL, .yyP ou _MN.RNX (também .gz/.Z/.bz2)');
+      setNavFile(null);
+      e.target.value = '';
+      return;
+    }
+    setNavFile(selectedFile);
+    setError(null);
+  };
+
   const handleFileChange = (e) => {
     const selectedFile = e.target.files[0];
     if (selectedFile) {
@@ -83,40 +116,70 @@ const GnssUploader = () => {
     setShowProgressModal(true);
     setAnalysisProgress('🔄 Iniciando upload do arquivo GNSS...');
 
+    pollAbortRef.current?.abort();
+    const controller = new AbortController();
+    pollAbortRef.current = controller;
+
     try {
       console.log('Iniciando análise do arquivo:', file.name, (file.size / 1024 / 1024).toFixed(2) + 'MB');
       
       // Enviar para análise via API real
       const formData = new FormData();
       formData.append('file', file);
+      if (navFile) {
+        // Efemérides transmitidas usadas no cálculo das órbitas dos satélites
+        formData.append('navigation_file', navFile);
+      }
 
-      // Simular progresso visual enquanto processa
-      const progressMessages = [
-        '📤 Upload concluído, iniciando análise...',
-        '📋 Analisando cabeçalho RINEX...',
-        '🛰️ Identificando satélites observados...',
-        '📊 Processando épocas de observação...',
-        '⏰ Calculando duração da sessão...',
-        '🧪 Executando análise de qualidade...',
-        '✅ Finalizando processamento...'
-      ];
-      
-      let currentProgress = 0;
-      const progressInterval = setInterval(() => {
-        if (currentProgress < progressMessages.length) {
-          setAnalysisProgress(progressMessages[currentProgress]);
-          currentProgress++;
-        }
-      }, 2000);
-
-      const response = await axios.post(API_ENDPOINTS.uploadGnss, formData, {
+      // Upload retorna o ID do job; a análise roda em segundo plano no servidor
+      const uploadResponse = await axios.post(API_ENDPOINTS.uploadGnss, formData, {
         headers: {
           'Content-Type': 'multipart/form-data',
         },
-        timeout: 300000, // 5 minutos timeout para arquivos grandes
+        timeout: 300000, // 5 minutos timeout para upload de arquivos grandes
+        signal: controller.signal,
       });
 
-      clearInterval(progressInterval);
+      const jobId = uploadResponse.data.job_id;
+      setAnalysisProgress('📤 Upload concluído, análise na fila...');
+
+      // Acompanhar o progresso real de cada fase do processamento
+      const stageMessages = {
+        header: '📋 Analisando cabeçalho RINEX...',
+        epochs: '📊 Processando épocas de observação...',
+        statistics: '🧪 Executando análise de qualidade...',
+        preprocessing: '📋 Carregando observações para o processamento geodésico...',
+        ephemeris: '🛰️ Carregando efemérides dos satélites...',
+        atmosphere: '🌍 Calculando correções atmosféricas...',
+        ppp: '⚡ Processamento PPP...',
+        kalman: '🔄 Aplicando filtro de Kalman...',
+        final_position: '📊 Calculando coordenadas finais...',
+        transformations: '🗺️ Transformando coordenadas...'
+      };
+
+      let job = uploadResponse.data;
+      let pollInterval = GNSS_JOB_POLL_INITIAL_MS;
+      const startedAt = Date.now();
+      while (job.status === 'queued' || job.status === 'running') {
+        if (Date.now() - startedAt > GNSS_JOB_MAX_WAIT_MS) {
+          throw new Error(`A análise excedeu o tempo máximo de espera (${GNSS_JOB_MAX_WAIT_MS / 60000} minutos). ` +
+            'Tente novamente mais tarde ou com um arquivo menor.');
+        }
+        await wait(pollInterval, controller.signal);
+        pollInterval = Math.min(pollInterval * GNSS_JOB_POLL_BACKOFF, GNSS_JOB_POLL_MAX_INTERVAL_MS);
+        job = (await axios.get(API_ENDPOINTS.gnssJob(jobId), { signal: controller.signal })).data;
+        const currentStage = job.stages && job.stages[job.stages.length - 1];
+        if (currentStage) {
+          const message = stageMessages[currentStage.stage] || `⚙️ ${currentStage.stage}...`;
+          setAnalysisProgress(`${message} (${Math.round(currentStage.progress * 100)}%)`);
+        }
+      }
+
+      const response = await axios.get(API_ENDPOINTS.gnssJobResult(jobId), { signal: controller.signal });
+      if (job.status === 'failed' && !response.data.file_info) {
+        throw new Error(response.data.error || job.error || 'Falha na análise do arquivo GNSS');
+      }
+
       setAnalysisProgress('🎯 Análise concluída com sucesso!');
       
       setTimeout(() => {
@@ -133,6 +196,9 @@ const GnssUploader = () => {
       }
       
     } catch (err) {
+      if (controller.signal.aborted) {
+        return;
+      }
       setShowProgressModal(false);
       console.error('Erro na análise:', err);
       let errorMessage = 'Erro ao processar arquivo GNSS';
@@ -153,12 +219,15 @@ const GnssUploader = () => {
       
       setError(errorMessage);
     } finally {
-      setIsLoading(false);
+      if (!controller.signal.aborted) {
+        setIsLoading(false);
+      }
     }
   };
 
   const resetUpload = () => {
     setFile(null);
+    setNavFile(null);
     setResult(null);
     setError(null);
   };
@@ -285,10 +354,10 @@ const GnssUploader = () => {
             </h3>
             <div style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fit, minmax(120px, 1fr))', gap: '0.5rem', marginBottom: '1rem' }}>
               <span style={{ background: '#f5f5f5', color: '#666', padding: '0.5rem', borderRadius: '4px', fontSize: '0.9rem', border: '1px solid #ddd' }}>
-                .21O
+                .yyO/.yyD
               </span>
               <span style={{ background: '#f5f5f5', color: '#666', padding: '0.5rem', borderRadius: '4px', fontSize: '0.9rem', border: '1px solid #ddd' }}>
-                .RNX
+                .RNX/.CRX
               </span>
               <span style={{ background: '#f5f5f5', color: '#666', padding: '0.5rem', borderRadius: '4px', fontSize: '0.9rem', border: '1px solid #ddd' }}>
                 .OBS
@@ -301,14 +370,13 @@ const GnssUploader = () => {
               </span>
             </div>
             <p style={{ fontSize: '0.9rem', color: '#666', margin: 0 }}>
-              Tamanho máximo: 500MB • Formatos RINEX suportados
+              Tamanho máximo: 500MB • Formatos RINEX suportados (também .gz/.Z/.bz2)
             </p>
           </div>
           <input
             id="file-input"
             type="file"
             style={{ display: 'none' }}
-            accept=".21o,.rnx,.zip,.obs,.nav"
             onChange={handleFileChange}
           />
         </div>
@@ -328,6 +396,13 @@ const GnssUploader = () => {
             <p style={{ margin: 0, color: '#666' }}>
               Tamanho: {(file.size / 1024 / 1024).toFixed(2)} MB
             </p>
+            <label style={{ display: 'block', marginTop: '1rem', fontSize: '0.9rem', color: '#666' }}>
+              Arquivo de navegação (opcional, .NAV/.yyN/.yyG/.yyL/.yyP/_MN.RNX):{' '}
+              <input
+                type="file"
+                onChange={handleNavFileChange}
+              />
+            </label>
           </div>
           
           <div style={{ display: 'flex', gap: '1rem', justifyContent: 'center' }}>
@@ -3,6 +3,8 @@ const API_BASE_URL = process.env.REACT_APP_API_URL || '';
 
 export const API_ENDPOINTS = {
   uploadGnss: `${API_BASE_URL}/api/upload-gnss`,
+  gnssJob: (jobId) => `${API_BASE_URL}/api/gnss-jobs/${jobId}`,
+  gnssJobResult: (jobId) => `${API_BASE_URL}/api/gnss-jobs/${jobId}/result`,
   calculateBudget: `${API_BASE_URL}/api/calculate-budget`,
   generatePdf: `${API_BASE_URL}/api/generate-proposal-pdf`
 };
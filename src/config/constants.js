@@ -58,4 +58,22 @@ export const REGIONAL_MULTIPLIERS = {
   'SP': 1.0,
   'SE': 1.15,
   'TO': 1.2
-};
\ No newline at end of file
+};
+// Extensões RINEX aceitas no upload (mesmos padrões do backend em rinex_compression.py)
+// Observação: .yyo/.yyd, .rnx, .crx ou .obs; navegação: .yyn/.yyg/.yyp/.yyl, .nav ou nome longo _MN.rnx.
+// Ambos podem vir comprimidos (.gz, .Z, .bz2)
+const COMPRESSION_SUFFIX = '(\\.gz|\\.z|\\.bz2)?$';
+export const RINEX_OBSERVATION_PATTERN = new RegExp(`(\\.\\d{2}[od]|\\.rnx|\\.crx|\\.obs)${COMPRESSION_SUFFIX}`, 'i');
+export const RINEX_NAVIGATION_PATTERN = new RegExp(`(\\.\\d{2}[ngpl]|\\.nav|_[a-z]n\\.rnx)${COMPRESSION_SUFFIX}`, 'i');
+
+export const isRinexObservationFile = (name) =>
+  RINEX_OBSERVATION_PATTERN.test(name) && !RINEX_NAVIGATION_PATTERN.test(name);
+
+export const isRinexNavigationFile = (name) => RINEX_NAVIGATION_PATTERN.test(name);
+
+// Acompanhamento das análises GNSS em segundo plano: o intervalo entre consultas cresce
+// do inicial até o teto (backoff) e a espera total é limitada
+export const GNSS_JOB_POLL_INITIAL_MS = 1000;
+export const GNSS_JOB_POLL_MAX_INTERVAL_MS = 10000;
+export const GNSS_JOB_POLL_BACKOFF = 1.5;
+export const GNSS_JOB_MAX_WAIT_MS = 60 * 60 * 1000;